@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wijna import config
+from wijna.db import ensure_db, invalidate_settings_cache
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A fresh WIJNA database in tmp_path; the committed office_ops.db is never touched."""
+    path = str(tmp_path / "office_ops.db")
+    monkeypatch.setattr(config, "DB_PATH", path)
+    invalidate_settings_cache(reopen=True)
+    ensure_db()
+    yield path
+    invalidate_settings_cache(reopen=True)
@@ -0,0 +1,27 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from wijna import db
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def test_ensure_db_runs_once_per_rerun(db_path, monkeypatch):
+    calls = []
+    real = db.ensure_db
+
+    def counting_ensure_db():
+        calls.append(1)
+        return real()
+
+    monkeypatch.setattr(db, "ensure_db", counting_ensure_db)
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    assert not at.exception
+    first = len(calls)
+    at.run()
+    at.run()
+    assert not at.exception
+    assert first == 1
+    assert len(calls) == 3
@@ -0,0 +1,31 @@
+from wijna.db import ensure_db, get_db
+from wijna.utils import now_wib
+
+
+def _trigger_sql(conn):
+    return {r[0]: r[1] for r in conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger' AND name LIKE 'trg_mou_expiry_%'")}
+
+
+def test_queue_dates_are_wib(db_path):
+    conn = get_db()
+    conn.execute("INSERT INTO mou (id, nama, tgl_selesai) VALUES ('m1', 'MoU', '2099-01-01')")
+    conn.commit()
+    row = conn.execute("SELECT next_reminder FROM mou_expiry_queue WHERE mou_id='m1'").fetchone()
+    conn.close()
+    assert row[0] == now_wib().date().isoformat()
+
+
+def test_localtime_triggers_are_migrated(db_path):
+    conn = get_db()
+    for name, sql in _trigger_sql(conn).items():
+        conn.execute(f"DROP TRIGGER {name}")
+        conn.execute(sql.replace("'+7 hours'", "'localtime'"))
+    conn.commit()
+    assert all("localtime" in sql for name, sql in _trigger_sql(conn).items() if name != "trg_mou_expiry_del")
+    conn.close()
+    ensure_db()
+    conn = get_db()
+    sqls = _trigger_sql(conn)
+    conn.close()
+    assert sorted(sqls) == ["trg_mou_expiry_del", "trg_mou_expiry_ins", "trg_mou_expiry_upd"]
+    assert not any("localtime" in sql for sql in sqls.values())
@@ -0,0 +1,93 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from wijna import pitr
+from wijna.backup import _snapshot_db, restore_db_from_file
+from wijna.db import get_db
+
+
+@pytest.fixture
+def drive(db_path, monkeypatch):
+    """In-memory Drive folder plus a controllable WIB clock."""
+    store = {}
+    clock = [datetime(2026, 10, 19, 8, 0, 0)]
+
+    def upload(service, folder_id, name, path, **kwargs):
+        fid = "id%d" % len(store)
+        with open(path, "rb") as f:
+            store[fid] = (name, f.read())
+        return fid
+
+    def download_to_file(service, fid, path, **kwargs):
+        with open(path, "wb") as f:
+            f.write(store[fid][1])
+
+    monkeypatch.setattr(pitr, "_drive_upload_file", upload)
+    monkeypatch.setattr(pitr, "_drive_list", lambda service, folder_id, **kwargs: [{"id": k, "name": v[0]} for k, v in store.items()])
+    monkeypatch.setattr(pitr, "_drive_download", lambda service, fid: store[fid][1])
+    monkeypatch.setattr(pitr, "_drive_download_to_file", download_to_file)
+    monkeypatch.setattr(pitr, "now_wib", lambda: clock[0])
+    yield store, clock
+    pitr._close_shipper_conn()
+
+
+def _write(note):
+    conn = get_db()
+    conn.execute("INSERT INTO record_notes (note, created_by) VALUES (?, 'pitr-test')", (note,))
+    conn.commit()
+    conn.close()
+
+
+def _notes(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [r[0] for r in conn.execute("SELECT note FROM record_notes WHERE created_by='pitr-test' ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def _listed(store):
+    return pitr._parse_pitr_files([{"id": k, "name": v[0]} for k, v in store.items()])
+
+
+def _ship(clock):
+    clock[0] += timedelta(minutes=1)
+    ok, msg = pitr.ship_wal(None, "folder")
+    assert ok, msg
+    return clock[0]
+
+
+def test_restore_then_ship_keeps_chains_apart(drive, db_path, tmp_path):
+    store, clock = drive
+    _write("a")
+    _ship(clock)
+    older = str(tmp_path / "older.sqlite")
+    _snapshot_db(older)
+    _write("b")
+    _write("c")
+    t_before_restore = _ship(clock)
+    seq_before = max(s["seq"] for s in _listed(store)[1])
+
+    ok, msg = restore_db_from_file(older)
+    assert ok, msg
+    _write("d")
+    t_after_restore = _ship(clock)
+
+    bases, segs = _listed(store)
+    assert len(bases) == 2
+    new_base = max(bases, key=lambda b: b["ts"])
+    assert new_base["seq"] > seq_before
+    assert all(s["seq"] > seq_before for s in segs if s["chain"] == new_base["chain"])
+
+    out = str(tmp_path / "before.sqlite")
+    ok, msg = pitr.pitr_restore(None, "folder", t_before_restore, out)
+    assert ok, msg
+    assert _notes(out) == ["a", "b", "c"]
+
+    out = str(tmp_path / "after.sqlite")
+    ok, msg = pitr.pitr_restore(None, "folder", t_after_restore, out)
+    assert ok, msg
+    assert new_base["name"] in msg
+    assert _notes(out) == ["a", "d"]
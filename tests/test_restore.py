@@ -0,0 +1,49 @@
+import os
+import sqlite3
+
+from wijna.backup import _snapshot_db, restore_db_from_file
+from wijna.db import get_db
+
+
+def _notes(conn):
+    return [r[0] for r in conn.execute("SELECT note FROM record_notes ORDER BY id")]
+
+
+def _write(note):
+    conn = get_db()
+    conn.execute("INSERT INTO record_notes (note, created_by) VALUES (?, 'restore-test')", (note,))
+    conn.commit()
+    conn.close()
+
+
+def test_restore_with_other_page_size_keeps_live_file(db_path, tmp_path):
+    _write("a")
+    src = str(tmp_path / "restore.sqlite")
+    _snapshot_db(src)
+    conn = sqlite3.connect(src)
+    conn.execute("PRAGMA journal_mode=DELETE").fetchone()
+    conn.execute("PRAGMA page_size=8192")
+    conn.execute("VACUUM")
+    conn.close()
+    _write("b")
+
+    reader = sqlite3.connect(db_path)
+    ino = os.stat(db_path).st_ino
+    ok, msg = restore_db_from_file(src)
+    assert ok, msg
+    # Same file, so connections opened before the restore see the restored data
+    assert os.stat(db_path).st_ino == ino
+    assert _notes(reader) == ["a"]
+    reader.close()
+    assert not os.path.exists(src)
+
+
+def test_restore_rejects_invalid_file(db_path, tmp_path):
+    _write("a")
+    src = tmp_path / "bad.sqlite"
+    src.write_bytes(b"not a database")
+    ok, msg = restore_db_from_file(str(src))
+    assert not ok
+    conn = get_db()
+    assert _notes(conn) == ["a"]
+    conn.close()
@@ -0,0 +1,4 @@
+"""WIJNA Manajemen System core package (DB, Drive, notifikasi, backup, job CLI).
+
+wijna.ui dan wijna.modules berisi halaman Streamlit; modul lain bisa dipakai tanpa UI.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from wijna.cli import main
+
+sys.exit(main())
@@ -0,0 +1,170 @@
+"""Mark-and-sweep garbage collector for orphaned Drive attachments.
+
+Mark: semua id Drive yang masih dirujuk dikumpulkan dengan satu query UNION atas setiap
+kolom *_url / *_drive_id / drive_file_id di DB. Sweep hanya menyentuh file yang jelas
+lampiran modul (ref_module modul lampiran, atau nama berprefiks 8-hex dari
+upload_files_and_store), tidak dirujuk, dan modifiedTime-nya lebih tua dari masa tenggang
+(tanpa modifiedTime = dianggap baru). File lain (unggahan lama/manual Dunyim, backup, PITR)
+tidak pernah disentuh.
+
+Dry-run mencatat kandidatnya di drive_gc_candidates; --apply hanya mengarantina (trash)
+kandidat dari laporan dry-run sebelumnya yang masih yatim, lalu daftar kandidat dikosongkan
+sehingga setiap apply butuh dry-run baru. Setelah masa tenggang file karantina yang tetap
+yatim dihapus permanen; yang dirujuk lagi dikembalikan.
+"""
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set
+
+from wijna import config
+from wijna.backup import BACKUP_FILE_SUFFIXES
+from wijna.db import BLOB_ATTACHMENT_COLUMNS, _setting_get, log_file_delete
+from wijna.drive import (
+    _drive_id_from_url, _drive_list, drive_delete_many, drive_trash_many, invalidate_drive_manifest,
+)
+
+GC_DEFAULT_GRACE_DAYS = 7  # setting 'drive_gc_grace_days'
+_PROTECTED_REFS = {"backup_manifest", "pitr", "dunyim"}
+_SKIP_TABLES = {"drive_files", "drive_gc_quarantine", "drive_gc_candidates", "drive_errors", "drive_sync_state"}
+# ref_module values written by module uploads (upload_files_and_store) and the BLOB migration
+_ATTACHMENT_MODULES = {"inventory", "surat_masuk", "surat_keluar", "mou", "cash_advance", "pmr", "delegasi", "sop", "notulen"} | {
+    spec[0] for spec in BLOB_ATTACHMENT_COLUMNS}
+_UPLOAD_NAME_RE = re.compile(r"^[0-9a-f]{8}_")
+
+def _conn() -> sqlite3.Connection:
+    conn = sqlite3.connect(config.DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def gc_grace_days() -> int:
+    try:
+        return max(0, int(_setting_get('drive_gc_grace_days', str(GC_DEFAULT_GRACE_DAYS)) or GC_DEFAULT_GRACE_DAYS))
+    except Exception:
+        return GC_DEFAULT_GRACE_DAYS
+
+def _reference_columns(conn) -> List[tuple]:
+    cols = []
+    for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'").fetchall():
+        if table in _SKIP_TABLES:
+            continue
+        for r in conn.execute(f'PRAGMA table_info("{table}")'):
+            name = r[1]
+            if name.endswith("_url") or name.endswith("_drive_id") or name == "drive_file_id":
+                cols.append((table, name))
+    return cols
+
+def referenced_drive_ids(conn) -> Set[str]:
+    """Mark phase: every Drive id referenced anywhere in the DB (one UNION query)."""
+    cols = _reference_columns(conn)
+    if not cols:
+        return set()
+    sql = " UNION ".join(f'SELECT "{c}" FROM "{t}" WHERE "{c}" IS NOT NULL AND "{c}" != \'\'' for t, c in cols)
+    refs = set()
+    for (v,) in conn.execute(sql):
+        v = str(v).strip()
+        refs.add((_drive_id_from_url(v) or v) if v.startswith("http") else v)
+    return refs
+
+def _protected(f: Dict) -> bool:
+    name = f.get("name") or ""
+    return (f.get("ref_module") in _PROTECTED_REFS or name.startswith("pitr_")
+            or name.lower().endswith(BACKUP_FILE_SUFFIXES))
+
+def _collectable(f: Dict, cutoff: str) -> bool:
+    """Only module attachments old enough to be past the grace period; unknown files are kept."""
+    if _protected(f):
+        return False
+    if f.get("ref_module") not in _ATTACHMENT_MODULES and not _UPLOAD_NAME_RE.match(f.get("name") or ""):
+        return False
+    mtime = f.get("modifiedTime")
+    return bool(mtime) and mtime < cutoff
+
+def run_attachment_gc(service, folder_id: str, dry_run: bool = True) -> Dict:
+    """One GC pass. Returns counts plus the bytes reclaimed (or reclaimable when dry_run)."""
+    grace = gc_grace_days()
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=grace)).strftime('%Y-%m-%dT%H:%M:%S')
+    files = _drive_list(service, folder_id, max_age=0)  # fresh manifest before sweeping
+    conn = _conn()
+    try:
+        refs = referenced_drive_ids(conn)
+        quarantine = [dict(r) for r in conn.execute(
+            "SELECT file_id, name, size_bytes, quarantined_at < datetime('now', ?) AS due FROM drive_gc_quarantine WHERE folder_id=?",
+            (f"-{grace} days", folder_id))]
+        reviewed = {r[0] for r in conn.execute("SELECT file_id FROM drive_gc_candidates WHERE folder_id=?", (folder_id,))}
+    finally:
+        conn.close()
+    in_quarantine = {q["file_id"] for q in quarantine}
+    orphans = [f for f in files if f["id"] not in refs and f["id"] not in in_quarantine and _collectable(f, cutoff)]
+    unreviewed = 0
+    if not dry_run:
+        # Only trash what a previous dry-run reported
+        unreviewed = sum(1 for f in orphans if f["id"] not in reviewed)
+        orphans = [f for f in orphans if f["id"] in reviewed]
+    restore = [q for q in quarantine if q["file_id"] in refs]
+    expired = [q for q in quarantine if q["due"] and q["file_id"] not in refs]
+    report = {
+        "dry_run": dry_run, "grace_days": grace,
+        "orphans": len(orphans), "orphan_bytes": sum(int(f.get("size") or 0) for f in orphans),
+        "quarantined": 0, "restored": 0, "deleted": 0, "failed": 0,
+        "reclaimed_bytes": sum(int(q["size_bytes"] or 0) for q in expired) if dry_run else 0,
+        "items": [{"id": f["id"], "name": f["name"], "size": int(f.get("size") or 0), "modifiedTime": f.get("modifiedTime")} for f in orphans],
+        "pending_delete": len(expired), "unreviewed": unreviewed,
+    }
+    if dry_run:
+        conn = _conn()
+        try:
+            conn.execute("DELETE FROM drive_gc_candidates WHERE folder_id=?", (folder_id,))
+            conn.executemany("INSERT OR REPLACE INTO drive_gc_candidates (file_id, folder_id) VALUES (?,?)",
+                             [(f["id"], folder_id) for f in orphans])
+            conn.commit()
+        finally:
+            conn.close()
+        return report
+    deleted: List[str] = []
+    conn = _conn()
+    try:
+        if restore:
+            errs = drive_trash_many(service, [q["file_id"] for q in restore], trashed=False)
+            ok = [(k,) for k, e in errs.items() if e is None]
+            conn.executemany("DELETE FROM drive_gc_quarantine WHERE file_id=?", ok)
+            report["restored"] = len(ok)
+            report["failed"] += len(errs) - len(ok)
+        if expired:
+            errs = drive_delete_many(service, [q["file_id"] for q in expired])
+            for q in expired:
+                if errs.get(q["file_id"]) is None:
+                    conn.execute("DELETE FROM drive_gc_quarantine WHERE file_id=?", (q["file_id"],))
+                    deleted.append(q["name"])
+                    report["deleted"] += 1
+                    report["reclaimed_bytes"] += int(q["size_bytes"] or 0)
+                else:
+                    report["failed"] += 1
+        if orphans:
+            errs = drive_trash_many(service, [f["id"] for f in orphans])
+            for f in orphans:
+                if errs.get(f["id"]) is None:
+                    conn.execute("INSERT OR REPLACE INTO drive_gc_quarantine (file_id, folder_id, name, size_bytes) VALUES (?,?,?,?)",
+                                 (f["id"], folder_id, f["name"], int(f.get("size") or 0)))
+                    report["quarantined"] += 1
+                else:
+                    report["failed"] += 1
+        conn.execute("DELETE FROM drive_gc_candidates WHERE folder_id=?", (folder_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    for name in deleted:
+        try:
+            log_file_delete("drive_gc", name, "system", "Lampiran yatim (GC)")
+        except Exception:
+            pass
+    if restore:
+        invalidate_drive_manifest(folder_id)
+    return report
+
+def quarantine_list() -> List[Dict]:
+    conn = _conn()
+    try:
+        return [dict(r) for r in conn.execute("SELECT file_id, name, size_bytes, quarantined_at FROM drive_gc_quarantine ORDER BY quarantined_at")]
+    finally:
+        conn.close()
@@ -0,0 +1,14 @@
+"""Password hashing and session user lookup (tanpa UI)."""
+import hashlib
+
+from wijna.config import session_state
+
+SALT = "office_ops_salt_v1"
+
+# --- Password hashing utility ---
+def hash_password(password: str) -> str:
+    salted = (password + SALT).encode('utf-8')
+    return hashlib.sha256(salted).hexdigest()
+
+def get_current_user():
+    return session_state().get("user")
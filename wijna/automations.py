@@ -0,0 +1,257 @@
+"""Periodic jobs: monthly cash advance rekap and email reminders (PMR, Delegasi, MoU expiry)."""
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+from wijna.db import get_db, audit_log, _setting_get
+from wijna.notify import (
+    _email_enabled, _send_email, _notif_already_sent, _mark_notif_sent,
+    _get_director_emails, _get_user_email_by_name, _get_board_emails,
+    _resolve_user_email_by_id_or_name,
+)
+from wijna.utils import now_wib, now_wib_iso
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def generate_cashadvance_monthly_rekap() -> bool:
+    """Aggregate data from cash_advance into rekap_monthly_cashadvance for the current month.
+    - bulan format: YYYY-MM
+    - total_pengajuan: count rows bulan tsb
+    - total_nominal: sum totals
+    - total_cair: count approved (finance_approved=1 AND director_approved=1)
+    - total_nominal_cair: sum totals for approved
+    Returns True when the rekap row was written.
+    """
+    try:
+        conn = get_db()
+        cur = conn.cursor()
+        bulan = date.today().strftime("%Y-%m")
+        # Filter baris sesuai bulan pada kolom tanggal (assuming stored as ISO date)
+        cur.execute("SELECT COUNT(*), COALESCE(SUM(totals),0) FROM cash_advance WHERE substr(tanggal,1,7)=?", (bulan,))
+        row_all = cur.fetchone()
+        total_pengajuan = row_all[0] if row_all else 0
+        total_nominal = row_all[1] if row_all else 0.0
+        cur.execute("""
+            SELECT COUNT(*), COALESCE(SUM(totals),0) FROM cash_advance
+            WHERE substr(tanggal,1,7)=? AND finance_approved=1 AND director_approved=1
+        """, (bulan,))
+        row_cair = cur.fetchone()
+        total_cair = row_cair[0] if row_cair else 0
+        total_nominal_cair = row_cair[1] if row_cair else 0.0
+        now = now_wib_iso()
+        # Upsert (SQLite 3.24+ supports ON CONFLICT DO UPDATE)
+        cur.execute("""
+            INSERT INTO rekap_monthly_cashadvance (bulan,total_pengajuan,total_nominal,total_cair,total_nominal_cair,updated_at)
+            VALUES (?,?,?,?,?,?)
+            ON CONFLICT(bulan) DO UPDATE SET
+              total_pengajuan=excluded.total_pengajuan,
+              total_nominal=excluded.total_nominal,
+              total_cair=excluded.total_cair,
+              total_nominal_cair=excluded.total_nominal_cair,
+              updated_at=excluded.updated_at
+        """, (bulan, total_pengajuan, total_nominal, total_cair, total_nominal_cair, now))
+        conn.commit()
+        try:
+            audit_log("cash_advance", "rekap_generate", target=bulan, details=f"pengajuan={total_pengajuan}; cair={total_cair}")
+        except Exception:
+            pass
+        return True
+    except Exception:
+        return False
+
+def run_automations_for_dashboard() -> None:
+    """Lightweight email automations for Dashboard entry.
+    - PMR lateness (> day 5): email to staff without PMR this month (cc Directors)
+    - Delegasi reminders: ≤3 days to deadline (PIC), overdue (PIC + Directors)
+    """
+    try:
+        if not _email_enabled():
+            return
+        today = date.today()
+        this_month = today.strftime('%Y-%m')
+        directors = _get_director_emails()
+        conn = get_db(); cur = conn.cursor()
+
+        # 1) PMR lateness
+        if int(today.day) > 5 and (_setting_get('pmr_notify_enabled', 'true') == 'true'):
+            try:
+                # Active users to check (exclude superuser)
+                cur.execute("SELECT id, full_name, email, role FROM users WHERE status='active' AND role <> 'superuser'")
+                users_all = cur.fetchall() or []
+                # Submitted PMR names this month
+                pmr_df = pd.read_sql_query("SELECT DISTINCT nama FROM pmr WHERE substr(bulan,1,7)=?", conn._conn if hasattr(conn,'_conn') else conn, params=(this_month,))
+                submitted = set([] if pmr_df is None or pmr_df.empty else [str(x).strip().lower() for x in pmr_df['nama'].tolist()])
+                for u in users_all:
+                    uname = (u['full_name'] if isinstance(u, dict) else u[1])
+                    uid = (u['id'] if isinstance(u, dict) else u[0])
+                    umail = (u['email'] if isinstance(u, dict) else u[2])
+                    if not uname:
+                        continue
+                    if uname.strip().lower() in submitted:
+                        continue
+                    tag = f"pmr-{this_month}"
+                    if _notif_already_sent('pmr_missing', str(uid), 'late', tag):
+                        continue
+                    recips = []
+                    if umail: recips.append(umail)
+                    for d in directors:
+                        if d and d not in recips: recips.append(d)
+                    if not recips:
+                        continue
+                    subj = f"[WIJNA] PMR {this_month} belum diunggah"
+                    body = (
+                        f"Halo {uname},\n\n"
+                        f"Sistem mendeteksi hingga tanggal {today.day:02d} bahwa PMR untuk bulan {this_month} belum diunggah.\n"
+                        f"Mohon segera upload PMR melalui modul PMR di aplikasi WIJNA.\n\n"
+                        f"Terima kasih.\n"
+                    )
+                    if _send_email(recips, subj, body):
+                        _mark_notif_sent('pmr_missing', str(uid), 'late', tag, recips)
+            except Exception:
+                pass
+
+        # 2) Delegasi reminders
+        if _setting_get('delegasi_notify_enabled', 'true') == 'true':
+            try:
+                df = pd.read_sql_query("SELECT id, judul, pic, tgl_selesai, status FROM delegasi", conn._conn if hasattr(conn,'_conn') else conn)
+            except Exception:
+                df = pd.DataFrame(columns=['id','judul','pic','tgl_selesai','status'])
+            if not df.empty:
+                for _, r in df.iterrows():
+                    status = str(r.get('status','') or '').strip().lower()
+                    if status in ('selesai','done'):
+                        continue
+                    try:
+                        due = pd.to_datetime(r['tgl_selesai']).date()
+                    except Exception:
+                        continue
+                    days_left = (due - today).days
+                    pic_name = str(r.get('pic','') or '').strip()
+                    pic_email = _get_user_email_by_name(pic_name) if pic_name else None
+                    if days_left < 0:
+                        # Overdue
+                        tag = f"delegasi-{r['id']}-overdue"
+                        if not _notif_already_sent('delegasi', str(r['id']), 'overdue', tag):
+                            recips = []
+                            if pic_email: recips.append(pic_email)
+                            for d in directors:
+                                if d and d not in recips: recips.append(d)
+                            if recips:
+                                subj = f"[WIJNA] Delegasi lewat tenggat: {r['judul']}"
+                                body = (
+                                    f"Tugas '{r['judul']}' (PIC: {pic_name}) telah lewat tenggat (due {due.isoformat()}).\n"
+                                    f"Mohon segera ditindaklanjuti dan update status di modul Delegasi.\n"
+                                )
+                                if _send_email(recips, subj, body):
+                                    _mark_notif_sent('delegasi', str(r['id']), 'overdue', tag, recips)
+                    elif 0 <= days_left <= 3:
+                        # Reminder window
+                        tag = f"delegasi-{r['id']}-rem-{days_left}"
+                        if not _notif_already_sent('delegasi', str(r['id']), 'reminder', tag):
+                            recips = [pic_email] if pic_email else []
+                            if recips:
+                                subj = f"[WIJNA] Reminder {days_left} hari — {r['judul']}"
+                                body = (
+                                    f"Halo {pic_name},\n\n"
+                                    f"Tugas '{r['judul']}' akan jatuh tempo pada {due.isoformat()} (sisa {days_left} hari).\n"
+                                    f"Mohon pastikan progres dan update status di modul Delegasi.\n"
+                                )
+                                if _send_email(recips, subj, body):
+                                    _mark_notif_sent('delegasi', str(r['id']), 'reminder', tag, recips)
+
+        # 3) MoU expiry reminders (queue-driven, only due rows are read)
+        try:
+            run_mou_expiry_reminders()
+        except Exception:
+            pass
+    except Exception:
+        # Never break dashboard rendering due to notifier
+        pass
+
+# --- MoU expiry reminders ---
+# Reminder stages in days before tgl_selesai. The queue row holds the date of the
+# next stage; rows inserted by the mou triggers are due "today" with stage NULL and
+# get their real schedule the first time the job pops them.
+MOU_REMINDER_OFFSETS = (90, 30, 7, 0)
+
+def _mou_reminder_plan(tgl_selesai: date, today: date) -> Tuple[Optional[int], Optional[date], Optional[int]]:
+    """Return (due_stage, next_date, next_stage) for an MoU ending on tgl_selesai.
+    - due_stage: smallest offset whose window already contains today (send now), or None
+    - next_date/next_stage: the following reminder; None when nothing remains
+    """
+    days_left = (tgl_selesai - today).days
+    if days_left < 0:
+        return None, None, None
+    offsets = sorted(MOU_REMINDER_OFFSETS, reverse=True)
+    in_window = [o for o in offsets if o >= days_left]
+    upcoming = [o for o in offsets if o < days_left]
+    due_stage = min(in_window) if in_window else None
+    if upcoming:
+        nxt = max(upcoming)
+        return due_stage, tgl_selesai - timedelta(days=nxt), nxt
+    return due_stage, None, None
+
+def run_mou_expiry_reminders(today: Optional[date] = None) -> Tuple[int, int]:
+    """Pop due rows from mou_expiry_queue, email creator + Board + Directors, reschedule.
+    Returns (sent, due). Queue rows are left untouched while email is disabled.
+    """
+    today = today or now_wib().date()
+    conn = get_db(); cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT q.mou_id, m.nomor, m.nama, m.pihak, m.tgl_selesai, m.created_by
+        FROM mou_expiry_queue q LEFT JOIN mou m ON m.id = q.mou_id
+        WHERE q.next_reminder <= ?
+        ORDER BY q.next_reminder
+        """,
+        (today.isoformat(),),
+    )
+    due_rows = cur.fetchall() or []
+    if not due_rows:
+        return 0, 0
+    if not (_email_enabled() and _setting_get('mou_expiry_notify_enabled', 'true') == 'true'):
+        return 0, len(due_rows)
+    board_and_directors = sorted(set(_get_board_emails()) | set(_get_director_emails()))
+    sent = 0
+    for r in due_rows:
+        mou_id = r['mou_id']
+        try:
+            tgl = date.fromisoformat(str(r['tgl_selesai'])[:10])
+        except Exception:
+            tgl = None
+        if tgl is None:
+            cur.execute("DELETE FROM mou_expiry_queue WHERE mou_id=?", (mou_id,))
+            conn.commit()
+            continue
+        due_stage, next_date, next_stage = _mou_reminder_plan(tgl, today)
+        if due_stage is not None:
+            tag = f"mou-{mou_id}-expiry-{due_stage}-{tgl.isoformat()}"
+            if not _notif_already_sent('mou', str(mou_id), 'expiry', tag):
+                recips = []
+                creator = _resolve_user_email_by_id_or_name(r['created_by'])
+                if creator and '@' in creator:
+                    recips.append(creator.lower())
+                for e in board_and_directors:
+                    if e not in recips:
+                        recips.append(e)
+                if recips:
+                    days_left = (tgl - today).days
+                    when = "hari ini" if days_left == 0 else f"dalam {days_left} hari"
+                    subj = f"[WIJNA] MoU berakhir {when}: {r['nomor']} — {r['nama']}"
+                    body = (
+                        f"MoU '{r['nama']}' (Nomor: {r['nomor']}, Pihak: {r['pihak']}) berakhir pada {tgl.isoformat()} ({when}).\n"
+                        f"Mohon tindak lanjuti perpanjangan atau penutupan MoU melalui aplikasi WIJNA.\n\n"
+                        f"Notifikasi otomatis WIJNA.\n"
+                    )
+                    if not _send_email(recips, subj, body):
+                        # keep the row due; retry on the next run
+                        continue
+                    _mark_notif_sent('mou', str(mou_id), 'expiry', tag, recips)
+                    sent += 1
+        if next_date is None:
+            cur.execute("DELETE FROM mou_expiry_queue WHERE mou_id=?", (mou_id,))
+        else:
+            cur.execute("UPDATE mou_expiry_queue SET next_reminder=?, stage=? WHERE mou_id=?",
+                        (next_date.isoformat(), next_stage, mou_id))
+        conn.commit()
+    return sent, len(due_rows)
@@ -0,0 +1,740 @@
+"""Database backup to Google Drive: manual, scheduled slots, GFS retention, and auto-restore-on-wake."""
+import os
+import gzip
+import hashlib
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from wijna import config
+from wijna.db import get_db, _setting_get, _setting_set, invalidate_settings_cache, prepare_db_file_replace
+from wijna.drive import _drive_list, _drive_upload_file, _drive_download_to_file, drive_delete_many, _folder_usage_quick
+from wijna.utils import now_wib, now_wib_iso
+
+try:
+    import zstandard as _zstd  # opsional: pip install zstandard
+except Exception:
+    _zstd = None
+
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_CODECS = ('gzip', 'zstd', 'none')
+_CODEC_SUFFIX = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+_CODEC_MIME = {'gzip': 'application/gzip', 'zstd': 'application/zstd', 'none': 'application/x-sqlite3'}
+BACKUP_FILE_SUFFIXES = ('.sqlite', '.db', '.sqlite.gz', '.db.gz', '.sqlite.zst', '.db.zst')
+BACKUP_SKIPPED_MSG = "Tidak ada perubahan sejak backup terakhir"
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_SQLITE_HEADER = b'SQLite format 3\x00'
+
+def _backup_codec() -> str:
+    codec = (_setting_get('backup_compression', 'gzip') or 'gzip').strip().lower()
+    if codec not in BACKUP_CODECS:
+        codec = 'gzip'
+    if codec == 'zstd' and _zstd is None:
+        codec = 'gzip'
+    return codec
+
+def _backup_remote_name(base_name: str, codec: str, when: Optional[datetime] = None) -> str:
+    """'auto_backup.sqlite' -> 'auto_backup_20260131_140500.sqlite.gz' (timestamp WIB)."""
+    stem, ext = os.path.splitext(base_name)
+    ts = (when or now_wib()).strftime('%Y%m%d_%H%M%S')
+    return f"{stem}_{ts}{ext or '.sqlite'}{_CODEC_SUFFIX.get(codec, '')}"
+
+def _snapshot_db(dest_path: str, pages: int = BACKUP_PAGES_PER_STEP) -> None:
+    """Consistent online copy of the live DB via the SQLite backup API.
+    Disalin bertahap per `pages` halaman sehingga penulis lain tidak terkunci lama;
+    bila sumber berubah di tengah jalan SQLite mengulang salinan dengan sendirinya.
+    """
+    src = sqlite3.connect(config.DB_PATH, timeout=30)
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.backup(dst, pages=pages, sleep=0.005)
+    finally:
+        dst.close()
+        src.close()
+
+# Perubahan yang ditimbulkan oleh backup itu sendiri (termasuk mirror Drive) atau oleh
+# login/logout tidak dihitung; tanpa ini sidik jari selalu berbeda karena backup_log baru saja ditulis.
+_FINGERPRINT_SKIP_TABLES = {'backup_log', 'backup_manifest', 'sqlite_sequence', 'drive_files', 'drive_sync_state', 'blob_migration_state', 'drive_errors', 'drive_gc_quarantine', 'drive_gc_candidates', 'startup_profile'}
+_FINGERPRINT_SKIP_COLUMNS = {'users': {'last_login'}}
+_BOOKKEEPING_SETTINGS = ('scheduled_backup_last_slot', 'scheduled_backup_last_date', 'auto_restore_last_file', 'auto_restore_last_time', 'backup_manifest_reconcile')
+
+def _fingerprint_filter(table: str) -> Tuple[str, tuple]:
+    if table == 'app_settings':
+        marks = ",".join("?" for _ in _BOOKKEEPING_SETTINGS)
+        return f" WHERE key NOT IN ({marks})", _BOOKKEEPING_SETTINGS
+    if table == 'audit_logs':
+        clauses = ["details LIKE '[auth] %'", "details LIKE '[backup_log] %'", "details LIKE '[backup_manifest] %'"]
+        params = tuple(f"[app_settings] update target={k}%" for k in _BOOKKEEPING_SETTINGS)
+        clauses += ["details LIKE ?"] * len(params)
+        return " WHERE NOT (" + " OR ".join(clauses) + ")", params
+    return "", ()
+
+def _snapshot_fingerprint(snapshot_path: str) -> str:
+    """SHA-256 over schema + row content of a snapshot, excluding backup bookkeeping."""
+    h = hashlib.sha256()
+    conn = sqlite3.connect(snapshot_path)
+    try:
+        tables = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='table' ORDER BY name").fetchall()
+        for name, ddl in tables:
+            if name in _FINGERPRINT_SKIP_TABLES:
+                continue
+            h.update(f"T:{name}:{ddl}\n".encode('utf-8'))
+            skip = _FINGERPRINT_SKIP_COLUMNS.get(name, set())
+            cols = [r[1] for r in conn.execute(f'PRAGMA table_info("{name}")') if r[1] not in skip]
+            if not cols:
+                continue
+            where, params = _fingerprint_filter(name)
+            col_sql = ",".join(f'"{c}"' for c in cols)
+            try:
+                rows = conn.execute(f'SELECT {col_sql} FROM "{name}"{where} ORDER BY rowid', params)
+            except sqlite3.OperationalError:  # WITHOUT ROWID
+                rows = conn.execute(f'SELECT {col_sql} FROM "{name}"{where} ORDER BY 1', params)
+            for row in rows:
+                for v in row:
+                    if isinstance(v, bytes):
+                        h.update(b"B%d:" % len(v)); h.update(v)
+                    else:
+                        h.update(repr(v).encode('utf-8'))
+                    h.update(b"\x1f")
+                h.update(b"\x1e")
+    finally:
+        conn.close()
+    return h.hexdigest()
+
+def _last_backup_fingerprint():
+    """Fingerprint of the newest generation still in the manifest (any series)."""
+    try:
+        conn = get_db(); cur = conn.cursor()
+        cur.execute("SELECT fingerprint FROM backup_manifest WHERE fingerprint IS NOT NULL ORDER BY created_at DESC, id DESC LIMIT 1")
+        r = cur.fetchone()
+        return r[0] if r else None
+    except Exception:
+        return None
+
+def _log_backup(log_id: Optional[int], file_name: str, fid: Optional[str], status: str, message: str, fingerprint: Optional[str] = None) -> None:
+    """Insert a backup_log row, or finalize the RUNNING row of a background run."""
+    conn = get_db(); cur = conn.cursor()
+    if log_id:
+        cur.execute("UPDATE backup_log SET file_name=?, drive_file_id=?, status=?, message=?, fingerprint=?, backup_time=CURRENT_TIMESTAMP WHERE id=?",
+                    (file_name, fid, status, message, fingerprint, log_id))
+    else:
+        cur.execute("INSERT INTO backup_log (file_name, drive_file_id, status, message, fingerprint) VALUES (?,?,?,?,?)",
+                    (file_name, fid, status, message, fingerprint))
+    conn.commit()
+
+def _compress_file(src_path: str, dest_path: str, codec: str) -> None:
+    with open(src_path, 'rb') as fin:
+        if codec == 'zstd':
+            with open(dest_path, 'wb') as fout:
+                _zstd.ZstdCompressor(level=10).copy_stream(fin, fout)
+        else:
+            with gzip.open(dest_path, 'wb', compresslevel=6) as fout:
+                shutil.copyfileobj(fin, fout, 1024 * 1024)
+
+def _decompress_backup_file(src_path: str, dest_path: str) -> None:
+    """Write raw SQLite from a (possibly gzip/zstd-compressed) backup file, streaming."""
+    with open(src_path, 'rb') as fin:
+        magic = fin.read(4)
+        fin.seek(0)
+        with open(dest_path, 'wb') as fout:
+            if magic.startswith(_GZIP_MAGIC):
+                with gzip.GzipFile(fileobj=fin) as gz:
+                    shutil.copyfileobj(gz, fout, 1024 * 1024)
+            elif magic.startswith(_ZSTD_MAGIC):
+                if _zstd is None:
+                    raise RuntimeError("Backup terkompresi zstd; pasang paket 'zstandard' untuk restore.")
+                _zstd.ZstdDecompressor().copy_stream(fin, fout)
+            else:
+                shutil.copyfileobj(fin, fout, 1024 * 1024)
+
+def download_backup_to_file(service, fid: str, dest_path: str) -> None:
+    """Stream a Drive backup to disk and decompress it into `dest_path` (memori konstan)."""
+    raw = dest_path + ".download"
+    try:
+        _drive_download_to_file(service, fid, raw)
+        _decompress_backup_file(raw, dest_path)
+    finally:
+        try:
+            os.remove(raw)
+        except OSError:
+            pass
+
+def _upload_snapshot(service, folder_id: str, base_name: str, label: str, log_id: Optional[int] = None) -> Tuple[bool, str, str]:
+    """Snapshot -> fingerprint -> compress -> resumable upload from disk; logs to backup_log.
+    Upload dilewati (status SKIPPED) bila sidik jari sama dengan generasi terakhir di manifest.
+    Setiap upload adalah generasi baru bernama timestamp; generasi lama dipangkas (GFS).
+    Returns (ok, message, remote_name). Memori yang dipakai konstan (tidak memuat DB ke RAM).
+    """
+    codec = _backup_codec()
+    created = now_wib().replace(microsecond=0)
+    remote_name = _backup_remote_name(base_name, codec, created)
+    series = os.path.splitext(base_name)[0]
+    with tempfile.TemporaryDirectory(prefix="wijna-backup-") as tmp:
+        snap = os.path.join(tmp, "snapshot.sqlite")
+        _snapshot_db(snap)
+        fingerprint = _snapshot_fingerprint(snap)
+        if fingerprint == _last_backup_fingerprint():
+            _log_backup(log_id, remote_name, None, 'SKIPPED', f"{label} unchanged", fingerprint)
+            return True, BACKUP_SKIPPED_MSG, remote_name
+        db_size = os.path.getsize(snap)
+        if codec == 'none':
+            payload = snap
+        else:
+            payload = snap + _CODEC_SUFFIX[codec]
+            _compress_file(snap, payload, codec)
+        size = os.path.getsize(payload)
+        cap = int(_setting_get('project_capacity_bytes', 2*1024*1024*1024) or 2*1024*1024*1024)
+        try:
+            used = int(_folder_usage_quick(service, folder_id).get('total_bytes', 0))
+        except Exception:
+            used = 0
+        if _setting_get('backup_manifest_reconcile', 'false') == 'true':
+            reconcile_backup_manifest(service, folder_id)
+        if used + size > cap:
+            # Make room by dropping the oldest generations before refusing
+            _, freed = prune_backups(service, need_bytes=used + size - cap)
+            used -= freed
+        if used >= cap:
+            return False, "Kapasitas penuh.", remote_name
+        if used + size > cap:
+            return False, "Ukuran backup melebihi kapasitas.", remote_name
+        fid = _drive_upload_file(service, folder_id, remote_name, payload, mimetype=_CODEC_MIME[codec], ref_module='backup_manifest', replace=False)
+    detail = f"{label} {codec} {db_size}->{size} bytes"
+    if fid:
+        conn = get_db(); cur = conn.cursor()
+        cur.execute("INSERT INTO backup_manifest (file_name, drive_file_id, series, size_bytes, fingerprint, created_at) VALUES (?,?,?,?,?,?)",
+                    (remote_name, fid, series, size, fingerprint, created.isoformat()))
+        conn.commit()
+        _log_backup(log_id, remote_name, fid, 'SUCCESS', detail, fingerprint)
+        try:
+            prune_backups(service)
+        except Exception:
+            pass
+        return True, f"Backup sukses (ID: {fid})", remote_name
+    _log_backup(log_id, remote_name, None, 'FAILED', f"{label} upload gagal")
+    return False, "Upload gagal", remote_name
+
+# --- GFS retention (grandfather-father-son) driven by backup_manifest ---
+GFS_DEFAULTS = {'hourly': 24, 'daily': 7, 'weekly': 4, 'monthly': 12}
+_GFS_BUCKETS = {
+    'hourly': lambda d: d.strftime('%Y%m%d%H'),
+    'daily': lambda d: d.strftime('%Y%m%d'),
+    'weekly': lambda d: '%04d-W%02d' % d.isocalendar()[:2],
+    'monthly': lambda d: d.strftime('%Y%m'),
+}
+
+def gfs_policy() -> Dict[str, int]:
+    policy = {}
+    for kind, dflt in GFS_DEFAULTS.items():
+        try:
+            policy[kind] = max(0, int(_setting_get(f'gfs_keep_{kind}', str(dflt)) or dflt))
+        except Exception:
+            policy[kind] = dflt
+    return policy
+
+def list_backup_generations() -> List[Dict]:
+    """Manifest rows, newest first (for restore selection and pruning)."""
+    conn = get_db(); cur = conn.cursor()
+    cur.execute("SELECT id, file_name, drive_file_id, series, size_bytes, fingerprint, created_at FROM backup_manifest ORDER BY created_at DESC, id DESC")
+    return [dict(r) for r in cur.fetchall()]
+
+_GENERATION_NAME_RE = re.compile(r"^(?P<series>.+)_(?P<ts>\d{8}_\d{6})\.(?:sqlite|db)(?:\.gz|\.zst)?$")
+
+def reconcile_backup_manifest(service, folder_id: str) -> int:
+    """Sync the manifest with the Drive folder after a restore: the restored manifest stops at
+    its own snapshot, so generations uploaded later are added back (else GFS never prunes
+    them) and rows for files already pruned from Drive are dropped. Files without a
+    generation timestamp in their name are left alone. Returns the number of rows added.
+    """
+    files = _drive_list(service, folder_id, max_age=0)
+    present = {f.get('id') for f in files}
+    conn = get_db(); cur = conn.cursor()
+    cur.execute("SELECT id, drive_file_id FROM backup_manifest")
+    known = set()
+    for r in cur.fetchall():
+        if r['drive_file_id'] in present:
+            known.add(r['drive_file_id'])
+        else:
+            cur.execute("DELETE FROM backup_manifest WHERE id=?", (r['id'],))
+    added = 0
+    for f in files:
+        name = f.get('name') or ''
+        m = _GENERATION_NAME_RE.match(name)
+        if not m or name.startswith('pitr_') or f.get('id') in known:
+            continue
+        try:
+            created = datetime.strptime(m.group('ts'), '%Y%m%d_%H%M%S').isoformat()
+        except ValueError:
+            continue
+        cur.execute("INSERT INTO backup_manifest (file_name, drive_file_id, series, size_bytes, fingerprint, created_at) VALUES (?,?,?,?,?,?)",
+                    (name, f['id'], m.group('series'), int(f.get('size') or 0), None, created))
+        added += 1
+    conn.commit()
+    _setting_set('backup_manifest_reconcile', 'false')
+    return added
+
+def _gfs_keep_ids(rows: List[Dict], policy: Dict[str, int]) -> set:
+    """Newest generation of each of the last N hours/days/weeks/months is kept."""
+    keep = set()
+    for kind, n in policy.items():
+        if n <= 0:
+            continue
+        seen = []
+        for r in rows:  # newest first
+            try:
+                key = _GFS_BUCKETS[kind](datetime.fromisoformat(r['created_at']))
+            except Exception:
+                continue
+            if key in seen:
+                continue
+            if len(seen) >= n:
+                break
+            seen.append(key)
+            keep.add(r['id'])
+    if rows:
+        keep.add(rows[0]['id'])  # never drop the newest generation
+    return keep
+
+def prune_backups(service, need_bytes: int = 0) -> Tuple[int, int]:
+    """Delete generations outside the GFS policy; with need_bytes also drop the oldest
+    kept generations until that many bytes are freed (newest is always kept).
+    Returns (deleted_count, freed_bytes).
+    """
+    rows = list_backup_generations()
+    keep = _gfs_keep_ids(rows, gfs_policy())
+    doomed = [r for r in rows if r['id'] not in keep]
+    freed = sum(int(r['size_bytes'] or 0) for r in doomed)
+    if need_bytes > freed:
+        for r in reversed([r for r in rows if r['id'] in keep][1:]):  # oldest first
+            if freed >= need_bytes:
+                break
+            doomed.append(r)
+            freed += int(r['size_bytes'] or 0)
+    deleted, freed = 0, 0
+    errors = drive_delete_many(service, [r['drive_file_id'] for r in doomed if r['drive_file_id']]) if doomed else {}
+    conn = get_db(); cur = conn.cursor()
+    for r in doomed:
+        if errors.get(r['drive_file_id']) is not None:
+            continue
+        cur.execute("DELETE FROM backup_manifest WHERE id=?", (r['id'],))
+        deleted += 1
+        freed += int(r['size_bytes'] or 0)
+    if deleted:
+        cur.execute("INSERT INTO backup_log (file_name, drive_file_id, status, message) VALUES (?,?,?,?)",
+                    ('-', None, 'PRUNED', f"{deleted} generasi dihapus ({freed} bytes)"))
+    conn.commit()
+    return deleted, freed
+
+def _backup_db_now(service, folder_id: str, label: str = 'auto', log_id: Optional[int] = None) -> Tuple[bool, str]:
+    if not os.path.exists(config.DB_PATH):
+        return False, f"DB '{config.DB_PATH}' tidak ditemukan"
+    base_name = _setting_get('auto_backup_filename', 'auto_backup.sqlite') or 'auto_backup.sqlite'
+    try:
+        ok, msg, _ = _upload_snapshot(service, folder_id, base_name, label, log_id=log_id)
+        return ok, msg
+    except Exception as e:
+        try:
+            _log_backup(log_id, base_name, None, 'FAILED', str(e))
+        except Exception:
+            pass
+        return False, f"Error: {e}"
+
+# --- Restore verification (sandbox; file DB live tidak pernah disentuh) ---
+VERIFY_MAX_AGE_HOURS = 24
+
+def _table_row_counts(conn) -> Dict[str, int]:
+    counts = {}
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name").fetchall():
+        counts[name] = conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+    return counts
+
+def verify_latest_backup(service, folder_id: str, log_id: Optional[int] = None) -> Tuple[bool, str]:
+    """Download the newest generation into a temp dir and prove it restores.
+    Cek: header SQLite, PRAGMA integrity_check + quick_check, sidik jari sama dengan
+    manifest, dan semua tabel live ada di backup. Selisih jumlah baris per tabel hanya
+    dilaporkan (DB live terus berubah setelah backup). Hasil dicatat di backup_log
+    sebagai VERIFIED / VERIFY_FAILED.
+    """
+    gens = list_backup_generations()
+    if gens:
+        name, fid, expected = gens[0]['file_name'], gens[0]['drive_file_id'], gens[0]['fingerprint']
+    else:
+        latest = _pick_latest_drive_backup_file(service, folder_id)
+        if not latest:
+            return False, 'No backup found'
+        name, fid, expected = latest.get('name'), latest.get('id'), None
+    problems: List[str] = []
+    notes: List[str] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="wijna-verify-") as tmp:
+            path = os.path.join(tmp, "restore.sqlite")
+            download_backup_to_file(service, fid, path)
+            with open(path, 'rb') as f:
+                if f.read(16) != _SQLITE_HEADER:
+                    raise ValueError('Invalid sqlite header')
+            conn = sqlite3.connect(path)
+            try:
+                for pragma in ('integrity_check', 'quick_check'):
+                    res = [r[0] for r in conn.execute(f"PRAGMA {pragma}").fetchall()]
+                    if res != ['ok']:
+                        problems.append(f"{pragma}: {'; '.join(str(x) for x in res[:3])}")
+                restored = _table_row_counts(conn)
+            finally:
+                conn.close()
+            if expected and not problems and _snapshot_fingerprint(path) != expected:
+                problems.append("sidik jari tidak sama dengan manifest")
+        live_conn = get_db()
+        try:
+            live = _table_row_counts(live_conn)
+        finally:
+            live_conn.close()
+        missing = sorted(t for t in live if t not in restored and t not in _FINGERPRINT_SKIP_TABLES)
+        if missing:
+            problems.append("tabel hilang: " + ", ".join(missing))
+        diffs = [f"{t}({live[t] - restored[t]:+d})" for t in sorted(live)
+                 if t in restored and t not in _FINGERPRINT_SKIP_TABLES and live[t] != restored[t]]
+        notes.append(f"{len(restored)} tabel, {sum(restored.values())} baris")
+        if diffs:
+            notes.append("selisih vs live: " + ", ".join(diffs[:10]) + (" ..." if len(diffs) > 10 else ""))
+    except Exception as e:
+        problems.append(str(e))
+    if problems:
+        msg = "Verifikasi gagal: " + "; ".join(problems)
+        _log_backup(log_id, name, fid, 'VERIFY_FAILED', msg, expected)
+        return False, msg
+    msg = "Verifikasi OK: " + "; ".join(notes)
+    _log_backup(log_id, name, fid, 'VERIFIED', msg, expected)
+    return True, msg
+
+def last_backup_verification() -> Optional[Dict]:
+    """Newest VERIFIED/VERIFY_FAILED row plus its age in hours (None if never verified)."""
+    try:
+        conn = get_db(); cur = conn.cursor()
+        cur.execute("SELECT file_name, status, message, backup_time, (julianday('now') - julianday(backup_time)) * 24.0 AS age_hours "
+                    "FROM backup_log WHERE status IN ('VERIFIED','VERIFY_FAILED') ORDER BY backup_time DESC, id DESC LIMIT 1")
+        r = cur.fetchone()
+        return dict(r) if r else None
+    except Exception:
+        return None
+
+def backup_verification_due() -> bool:
+    """True when there is no successful verification in the last VERIFY_MAX_AGE_HOURS."""
+    try:
+        conn = get_db(); cur = conn.cursor()
+        cur.execute("SELECT 1 FROM backup_log WHERE status='VERIFIED' AND backup_time >= datetime('now', ?) LIMIT 1",
+                    (f"-{VERIFY_MAX_AGE_HOURS} hours",))
+        return cur.fetchone() is None
+    except Exception:
+        return False
+
+# --- Single-flight background backup (login/logout) ---
+# Satu worker; permintaan yang datang saat sebuah run masih antre digabung ke run itu,
+# sehingga logout beruntun tidak meng-upload file yang sama berkali-kali.
+_BG_LOCK = threading.Lock()
+_BG_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_BG_STATE: Dict = {"seq": 0, "queued": {}, "running": None, "results": {}}
+_BG_RESULTS_KEEP = 20
+
+def _run_background_job(kind: str, ticket: int, reason: str) -> None:
+    with _BG_LOCK:
+        if _BG_STATE["queued"].get(kind) == ticket:
+            _BG_STATE["queued"].pop(kind, None)
+        _BG_STATE["running"] = ticket
+    label = reason if kind == 'backup' else f"{kind} {reason}"
+    log_id = None
+    try:
+        conn = get_db(); cur = conn.cursor()
+        cur.execute("INSERT INTO backup_log (file_name, drive_file_id, status, message) VALUES (?,?,?,?)", ('-', None, 'RUNNING', f"{label}: berjalan"))
+        log_id = cur.lastrowid
+        conn.commit()
+        from wijna.drive import _build_drive
+        folder_id = _setting_get('gdrive_folder_id', config.GDRIVE_DEFAULT_FOLDER_ID) or config.GDRIVE_DEFAULT_FOLDER_ID
+        if kind == 'verify':
+            ok, msg = verify_latest_backup(_build_drive(), folder_id, log_id=log_id)
+        else:
+            ok, msg = _backup_db_now(_build_drive(), folder_id, label=reason, log_id=log_id)
+    except Exception as e:
+        ok, msg = False, f"Error: {e}"
+    if log_id:
+        # Capacity/other early exits do not touch the RUNNING row; close it here.
+        try:
+            conn = get_db(); cur = conn.cursor()
+            cur.execute("UPDATE backup_log SET status='FAILED', message=? WHERE id=? AND status='RUNNING'", (f"{label}: {msg}", log_id))
+            conn.commit()
+        except Exception:
+            pass
+    with _BG_LOCK:
+        _BG_STATE["running"] = None
+        results = _BG_STATE["results"]
+        results[ticket] = (ok, msg)
+        for old in sorted(results)[:-_BG_RESULTS_KEEP]:
+            results.pop(old, None)
+
+def _submit_background(kind: str, reason: str) -> int:
+    global _BG_EXECUTOR
+    with _BG_LOCK:
+        queued = _BG_STATE["queued"].get(kind)
+        if queued is not None:
+            return queued
+        if _BG_EXECUTOR is None:
+            _BG_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wijna-backup")
+        _BG_STATE["seq"] += 1
+        ticket = _BG_STATE["seq"]
+        _BG_STATE["queued"][kind] = ticket
+    _BG_EXECUTOR.submit(_run_background_job, kind, ticket, reason)
+    return ticket
+
+def submit_background_backup(reason: str) -> int:
+    """Queue a Drive backup on the background worker and return a ticket immediately.
+    Bila sudah ada run yang menunggu, tiket run tersebut yang dikembalikan (coalesce).
+    """
+    return _submit_background('backup', reason)
+
+def submit_background_verify(reason: str = 'manual') -> int:
+    """Queue verify_latest_backup on the same worker (runs after any pending backup)."""
+    return _submit_background('verify', reason)
+
+def background_backup_result(ticket: int) -> Optional[Tuple[bool, str]]:
+    """(ok, message) once the run for `ticket` has finished, else None."""
+    with _BG_LOCK:
+        return _BG_STATE["results"].get(ticket)
+
+# --- Scheduled backup slots & auto-restore-on-wake ---
+DEFAULT_SCHEDULE_SLOTS = [
+    {"start": 6,  "end": 12, "name": "slot_morning"},
+    {"start": 12, "end": 18, "name": "slot_afternoon"},
+    {"start": 18, "end": 23, "name": "slot_evening"},
+    {"start": 23, "end": 6,  "name": "slot_night"},  # wrap
+]
+
+def _validate_slot_struct(slots) -> bool:
+    if not isinstance(slots, list) or not slots:
+        return False
+    names = set()
+    for s in slots:
+        if not isinstance(s, dict):
+            return False
+        if 'start' not in s or 'end' not in s or 'name' not in s:
+            return False
+        try:
+            st_h = int(s['start']); en_h = int(s['end'])
+        except Exception:
+            return False
+        if not (0 <= st_h <= 23 and 0 <= en_h <= 23):
+            return False
+        if st_h == en_h:
+            return False
+        nm = str(s['name']).strip()
+        if not nm or nm in names:
+            return False
+        names.add(nm)
+    return True
+
+def get_schedule_slots():
+    raw = _setting_get('scheduled_backup_slots_json')
+    if raw:
+        try:
+            import json as _json
+            slots = _json.loads(raw)
+            if _validate_slot_struct(slots):
+                # normalize
+                return [{"start": int(s['start']), "end": int(s['end']), "name": str(s['name']).strip()} for s in slots]
+        except Exception:
+            pass
+    return DEFAULT_SCHEDULE_SLOTS
+
+def determine_slot(now_local: datetime) -> str:
+    h = now_local.hour
+    for s in get_schedule_slots():
+        st_h = int(s['start']); en_h = int(s['end'])
+        if st_h < en_h:
+            if st_h <= h < en_h:
+                return s['name']
+        else:  # wrap
+            if h >= st_h or h < en_h:
+                return s['name']
+    return 'slot_unknown'
+
+def check_scheduled_backup(service, folder_id: str) -> Tuple[bool, str]:
+    enabled = _setting_get('scheduled_backup_enabled', 'false') == 'true'
+    if not enabled:
+        return False, 'Scheduled backup disabled'
+    base_name = _setting_get('scheduled_backup_filename', 'scheduled_backup.sqlite') or 'scheduled_backup.sqlite'
+    now_local = now_wib()
+    slot = determine_slot(now_local)
+    if slot == 'slot_unknown':
+        return False, 'Outside defined slots'
+    # Tag harian berdasarkan WIB
+    today_tag = now_local.date().isoformat()
+    last_slot_done = _setting_get('scheduled_backup_last_slot')
+    last_slot_date = _setting_get('scheduled_backup_last_date')
+    if last_slot_done == slot and last_slot_date == today_tag:
+        return False, 'Slot already backed up'
+    if not os.path.exists(config.DB_PATH):
+        return False, 'DB missing'
+    try:
+        ok, msg, remote_name = _upload_snapshot(service, folder_id, base_name, f'scheduled {slot}')
+    except Exception as e:
+        return False, f'Cannot snapshot DB: {e}'
+    if ok:
+        _setting_set('scheduled_backup_last_slot', slot)
+        _setting_set('scheduled_backup_last_date', today_tag)
+        if msg == BACKUP_SKIPPED_MSG:
+            return True, f'Scheduled backup ({slot}): {BACKUP_SKIPPED_MSG}'
+        return True, f'Scheduled backup OK ({slot}) -> {remote_name}'
+    return False, 'Upload failed'
+
+# --- Atomic restore (Replace DB, Restore dari Drive, auto-restore) ---
+def restore_temp_path() -> str:
+    """Temp file beside DB_PATH (same filesystem, so the os.replace fallback is atomic)."""
+    db_dir = os.path.dirname(os.path.abspath(config.DB_PATH))
+    fd, path = tempfile.mkstemp(prefix=os.path.basename(config.DB_PATH) + ".restore-", suffix=".tmp", dir=db_dir)
+    os.close(fd)
+    return path
+
+def discard_restore_temp(path: str) -> None:
+    for p in (path, path + "-wal", path + "-shm", path + "-journal"):
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+def _validate_sqlite_file(path: str) -> Optional[str]:
+    """None when `path` is a readable SQLite DB passing quick_check, else the reason."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(16) != _SQLITE_HEADER:
+                return "File bukan SQLite valid."
+        conn = sqlite3.connect(path)
+        try:
+            res = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        return None if res == 'ok' else f"quick_check gagal: {res}"
+    except Exception as e:
+        return f"File tidak bisa dibuka: {e}"
+
+def _backup_into_live(src_path: str) -> None:
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(config.DB_PATH, timeout=30)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+def _match_live_page_size(src_path: str) -> None:
+    """Rewrite `src_path` in place with the live DB's page size (VACUUM needs rollback mode)."""
+    live = sqlite3.connect(config.DB_PATH, timeout=30)
+    try:
+        page_size = live.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        live.close()
+    conn = sqlite3.connect(src_path)
+    try:
+        conn.execute("PRAGMA journal_mode=DELETE").fetchone()
+        conn.execute(f"PRAGMA page_size={int(page_size)}")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+def restore_db_from_file(src_path: str, local_copy: Optional[str] = None) -> Tuple[bool, str]:
+    """Validate `src_path` and swap it in as the live DB.
+    Salinan lokal DB lama (opsional) dibuat dengan backup API. Penggantian memakai backup
+    API ke DB live dalam satu transaksi (pembaca lain tetap konsisten); bila page size
+    berbeda, salinan ditulis ulang dengan page size DB live lalu dicoba sekali lagi.
+    File live tidak pernah ditukar di bawah koneksi yang masih terbuka. `src_path` dipakai habis.
+    """
+    err = _validate_sqlite_file(src_path)
+    if err:
+        return False, err
+    notes = []
+    if local_copy and os.path.exists(config.DB_PATH):
+        try:
+            _snapshot_db(local_copy)
+            notes.append(f"salinan lama: {local_copy}")
+        except Exception as e:
+            return False, f"Backup lokal gagal, restore dibatalkan: {e}"
+    prepare_db_file_replace()
+    try:
+        try:
+            _backup_into_live(src_path)
+        except sqlite3.Error:
+            # Backup into a WAL-mode DB fails when the page sizes differ
+            _match_live_page_size(src_path)
+            _backup_into_live(src_path)
+            notes.append("page size disesuaikan")
+    except sqlite3.Error as e:
+        invalidate_settings_cache(reopen=True)
+        return False, f"Restore gagal, DB live tidak diubah: {e}"
+    finally:
+        discard_restore_temp(src_path)
+    invalidate_settings_cache(reopen=True)
+    # The restored manifest stops at its own snapshot; later generations on Drive are
+    # merged back in before the next prune (reconcile_backup_manifest).
+    _setting_set('backup_manifest_reconcile', 'true')
+    return True, "DB berhasil direstore" + (f" ({'; '.join(notes)})" if notes else "")
+
+def _is_probably_fresh_seed_db() -> bool:
+    try:
+        conn = get_db()
+    except Exception:
+        return False
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM users"); user_cnt = cur.fetchone()[0]
+        if user_cnt > 3:  # WIJNA seeds up to 3 users in ensure_db
+            return False
+        cur.execute("SELECT COUNT(*) FROM backup_log"); bkup_cnt = cur.fetchone()[0]
+        if bkup_cnt > 0:
+            return False
+        return True
+    except Exception:
+        return False
+    finally:
+        conn.close()
+
+def _pick_latest_drive_backup_file(service, folder_id: str):
+    try:
+        files = _drive_list(service, folder_id)
+    except Exception:
+        return None
+    if not files:
+        return None
+    candidates = [f for f in files if f.get('name','').endswith(BACKUP_FILE_SUFFIXES) and not f.get('name','').startswith('pitr_')]
+    if not candidates:
+        return None
+    try:
+        candidates.sort(key=lambda x: x.get('modifiedTime',''), reverse=True)
+    except Exception:
+        pass
+    return candidates[0]
+
+def attempt_auto_restore_if_seed(service, folder_id: str) -> Tuple[bool, str]:
+    if _setting_get('auto_restore_enabled','true') != 'true':
+        return False, 'Auto-restore disabled'
+    if not _is_probably_fresh_seed_db():
+        return False, 'DB not fresh'
+    latest = _pick_latest_drive_backup_file(service, folder_id)
+    if not latest:
+        return False, 'No backup found'
+    fid = latest.get('id'); fname = latest.get('name')
+    tmp = restore_temp_path()
+    try:
+        download_backup_to_file(service, fid, tmp)
+        ok, msg = restore_db_from_file(tmp)
+        if not ok:
+            return False, f'Restore failed: {msg}'
+        _setting_set('auto_restore_last_file', fname)
+        _setting_set('auto_restore_last_time', now_wib_iso())
+        return True, f'Restored from {fname}'
+    except Exception as e:
+        return False, f'Restore failed: {e}'
+    finally:
+        discard_restore_temp(tmp)
@@ -0,0 +1,197 @@
+"""Resumable background migration of legacy BLOB attachments to Google Drive.
+
+Setiap pasangan (tabel, kolom blob) dipindai berurutan menurut id dengan checkpoint di
+tabel blob_migration_state. Per batch: blob diunggah paralel (drive_upload_many), lalu
+kolom *_drive_id/*_url diisi, blob di-NULL-kan, dan checkpoint maju dalam satu transaksi.
+Crash di tengah batch hanya mengulang batch itu (file Drive ganda dibersihkan GC).
+Setelah semua selesai DB di-VACUUM.
+"""
+import io
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from wijna import config
+from wijna.db import BLOB_ATTACHMENT_COLUMNS, _fire_table_write, _setting_get, on_db_file_replace
+from wijna.drive import drive_upload_many, DRIVE_UPLOAD_WORKERS
+from wijna.utils import from_blob
+
+MIGRATION_BATCH_SIZE = DRIVE_UPLOAD_WORKERS
+MIGRATION_DEFAULT_RATE = 30  # file per menit; setting 'blob_migration_rate'
+
+_LOCK = threading.Lock()
+_STATE: Dict = {"thread": None, "stop": False, "last": None}
+
+def _conn() -> sqlite3.Connection:
+    conn = sqlite3.connect(config.DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _spec_key(table: str, blob_col: str) -> str:
+    return f"{table}.{blob_col}"
+
+def _existing_specs(conn) -> List[Tuple[str, str, str, str, str]]:
+    """Specs whose table and columns exist in this DB (older DBs may lack Drive columns)."""
+    out = []
+    for spec in BLOB_ATTACHMENT_COLUMNS:
+        table = spec[0]
+        try:
+            cols = {r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')}
+        except sqlite3.Error:
+            continue
+        if set(spec[1:]).issubset(cols):
+            out.append(spec)
+    return out
+
+def migration_progress() -> List[Dict]:
+    """Per spec: pending rows/bytes still in BLOBs plus the persisted checkpoint counters."""
+    conn = _conn()
+    try:
+        state = {r["spec"]: dict(r) for r in conn.execute("SELECT * FROM blob_migration_state")}
+        rows = []
+        for table, blob_col, _name_col, drive_col, _url_col in _existing_specs(conn):
+            pending, pending_bytes = conn.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(LENGTH("{blob_col}")), 0) FROM "{table}" '
+                f'WHERE "{blob_col}" IS NOT NULL AND COALESCE("{drive_col}", \'\') = \'\'').fetchone()
+            st = state.get(_spec_key(table, blob_col), {})
+            rows.append({"spec": _spec_key(table, blob_col), "pending": pending, "pending_bytes": pending_bytes,
+                         "migrated": st.get("migrated", 0), "failed": st.get("failed", 0),
+                         "bytes_freed": st.get("bytes_freed", 0), "done": bool(st.get("done")),
+                         "updated_at": st.get("updated_at")})
+        return rows
+    finally:
+        conn.close()
+
+def _rate_per_minute() -> int:
+    try:
+        return max(1, int(_setting_get('blob_migration_rate', str(MIGRATION_DEFAULT_RATE)) or MIGRATION_DEFAULT_RATE))
+    except Exception:
+        return MIGRATION_DEFAULT_RATE
+
+def _migrate_spec(conn, folder_id: str, spec: Tuple[str, str, str, str, str]) -> Tuple[int, int]:
+    table, blob_col, name_col, drive_col, url_col = spec
+    key = _spec_key(table, blob_col)
+    conn.execute("INSERT OR IGNORE INTO blob_migration_state (spec, last_id, migrated, failed, bytes_freed, done) VALUES (?, '', 0, 0, 0, 0)", (key,))
+    conn.commit()
+    st = conn.execute("SELECT last_id, done FROM blob_migration_state WHERE spec=?", (key,)).fetchone()
+    if st["done"]:
+        return 0, 0
+    last_id = st["last_id"] or ""
+    migrated = failed = 0
+    min_interval = 60.0 / _rate_per_minute()
+    while not _STATE["stop"]:
+        batch = conn.execute(
+            f'SELECT id, "{blob_col}" AS blob, "{name_col}" AS name FROM "{table}" '
+            f'WHERE id > ? AND "{blob_col}" IS NOT NULL AND COALESCE("{drive_col}", \'\') = \'\' ORDER BY id LIMIT ?',
+            (last_id, MIGRATION_BATCH_SIZE)).fetchall()
+        if not batch:
+            conn.execute("UPDATE blob_migration_state SET done=1, updated_at=CURRENT_TIMESTAMP WHERE spec=?", (key,))
+            conn.commit()
+            break
+        started = time.monotonic()
+        items = []
+        for r in batch:
+            name = r["name"] or f"{table}_{r['id']}"
+            items.append((f"{uuid.uuid4().hex[:8]}_{name}", io.BytesIO(from_blob(r["blob"])), "application/octet-stream", table))
+        fids = drive_upload_many(folder_id, items)
+        ok = bad = freed = 0
+        for r, fid in zip(batch, fids):
+            if fid:
+                url = f"https://drive.google.com/file/d/{fid}/view?usp=drive_link"
+                cur = conn.execute(f'UPDATE "{table}" SET "{drive_col}"=?, "{url_col}"=?, "{blob_col}"=NULL WHERE id=? AND "{blob_col}" IS NOT NULL',
+                                   (fid, url, r["id"]))
+                if cur.rowcount:
+                    ok += 1
+                    freed += len(r["blob"])
+            else:
+                bad += 1
+        last_id = batch[-1]["id"]
+        conn.execute("UPDATE blob_migration_state SET last_id=?, migrated=migrated+?, failed=failed+?, bytes_freed=bytes_freed+?, "
+                     "updated_at=CURRENT_TIMESTAMP WHERE spec=?", (last_id, ok, bad, freed, key))
+        conn.commit()
+        if ok:
+            # Raw connection: bump table_version so topic caches drop the old attachment columns
+            _fire_table_write([table])
+        migrated += ok
+        failed += bad
+        # Rate limit: spread uploads so a batch of N files takes at least N/rate minutes
+        wait = min_interval * len(batch) - (time.monotonic() - started)
+        if wait > 0:
+            time.sleep(wait)
+    return migrated, failed
+
+def run_blob_migration(folder_id: str) -> Tuple[bool, str]:
+    """Migrate every spec from its checkpoint; VACUUM once all specs are done."""
+    conn = _conn()
+    try:
+        states = [r["done"] for r in conn.execute("SELECT done FROM blob_migration_state")]
+        if states and all(states):
+            # Previous pass finished: start a new pass for rows added since (e.g. Drive outage)
+            conn.execute("DELETE FROM blob_migration_state")
+            conn.commit()
+        migrated = failed = 0
+        for spec in _existing_specs(conn):
+            if _STATE["stop"]:
+                break
+            m, f = _migrate_spec(conn, folder_id, spec)
+            migrated += m
+            failed += f
+        if _STATE["stop"]:
+            return False, f"Dihentikan: {migrated} file dipindahkan, {failed} gagal"
+        all_done = all(r["done"] for r in conn.execute("SELECT done FROM blob_migration_state"))
+    finally:
+        conn.close()
+    note = ""
+    if all_done and migrated:
+        vac = sqlite3.connect(config.DB_PATH, timeout=60, isolation_level=None)
+        try:
+            vac.execute("VACUUM")
+            note = "; VACUUM selesai"
+        except sqlite3.Error as e:
+            note = f"; VACUUM gagal: {e}"
+        finally:
+            vac.close()
+    return failed == 0, f"{migrated} file dipindahkan, {failed} gagal{note}"
+
+def reset_blob_migration() -> None:
+    """Start over from the first id (retries rows that failed in an earlier pass)."""
+    conn = _conn()
+    try:
+        conn.execute("DELETE FROM blob_migration_state")
+        conn.commit()
+    finally:
+        conn.close()
+
+def _worker(folder_id: str) -> None:
+    try:
+        ok, msg = run_blob_migration(folder_id)
+    except Exception as e:
+        ok, msg = False, f"Error: {e}"
+    with _LOCK:
+        _STATE["last"] = (ok, msg)
+        _STATE["thread"] = None
+
+def start_blob_migration(folder_id: str) -> bool:
+    """Run the migration on a background thread; False if one is already running."""
+    with _LOCK:
+        if _STATE["thread"] is not None:
+            return False
+        _STATE["stop"] = False
+        _STATE["last"] = None
+        t = threading.Thread(target=_worker, args=(folder_id,), name="wijna-blob-migration", daemon=True)
+        _STATE["thread"] = t
+    t.start()
+    return True
+
+def stop_blob_migration() -> None:
+    """Stop after the current batch; the checkpoint keeps the position."""
+    _STATE["stop"] = True
+
+def blob_migration_status() -> Tuple[bool, Optional[Tuple[bool, str]]]:
+    """(running, last_result)."""
+    with _LOCK:
+        return _STATE["thread"] is not None, _STATE["last"]
+
+on_db_file_replace(stop_blob_migration)
@@ -0,0 +1,260 @@
+"""Headless entry point for maintenance jobs (cron/systemd).
+
+Usage:
+    python -m wijna [--config wijna.toml] [--db office_ops.db] <job>
+    python -m wijna pitr-restore --target "2026-01-31 14:05" --out restored.sqlite
+
+Jobs:
+    init-db           ensure schema/migrations (ensure_db)
+    backup            upload DB sekarang ke Drive (auto_backup.sqlite)
+    scheduled-backup  backup sesuai slot jadwal (sekali per slot per hari)
+    rekap             rekap bulanan cash advance
+    reminders         email otomatis PMR terlambat, reminder Delegasi & MoU
+    mou-reminders     hanya pengingat MoU kedaluwarsa (antrian mou_expiry_queue)
+    auto-restore      restore DB dari Drive bila DB lokal masih seed
+    outbox            kirim ulang notifikasi tertunda di notification_outbox
+    wal-ship          kirim segmen WAL baru ke Drive (PITR), checkpoint bila WAL besar
+    pitr-restore      bangun DB per waktu --target ke file --out (DB live tidak diubah)
+    verify-backup     uji restore backup terbaru di folder sementara (integrity/quick_check)
+    migrate-blobs     pindahkan lampiran BLOB lama ke Drive (lanjut dari checkpoint), lalu VACUUM
+    gc-attachments    laporan lampiran Drive yatim (dry-run); --apply: karantina kandidat dry-run terakhir lalu hapus
+
+Exit codes:
+    0 OK, 1 job gagal, 2 argumen salah, 3 konfigurasi/dependency tidak tersedia,
+    4 dilewati (tidak ada yang perlu dikerjakan). Untuk systemd gunakan
+    ``SuccessExitStatus=4`` bila skip dianggap sukses.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from wijna import config
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NOT_CONFIGURED = 3
+EXIT_SKIPPED = 4
+
+_STATUS_LABEL = {
+    EXIT_OK: "OK",
+    EXIT_FAILED: "FAILED",
+    EXIT_USAGE: "USAGE",
+    EXIT_NOT_CONFIGURED: "NOT_CONFIGURED",
+    EXIT_SKIPPED: "SKIPPED",
+}
+
+
+class JobNotConfigured(Exception):
+    """Raised when a job lacks Drive packages, credentials or folder id."""
+
+
+def _drive_context():
+    from wijna.db import _setting_get
+    from wijna.drive import _drive_available, _build_drive
+    if not _drive_available():
+        raise JobNotConfigured("Paket Google API belum terpasang.")
+    folder_id = _setting_get('gdrive_folder_id', config.GDRIVE_DEFAULT_FOLDER_ID) or config.GDRIVE_DEFAULT_FOLDER_ID
+    if not folder_id:
+        raise JobNotConfigured("Folder ID Google Drive belum diatur.")
+    try:
+        service = _build_drive()
+    except RuntimeError as e:
+        raise JobNotConfigured(str(e))
+    return service, folder_id
+
+
+def job_init_db() -> Tuple[int, str]:
+    return EXIT_OK, f"Schema siap ({config.DB_PATH})"
+
+
+def job_backup() -> Tuple[int, str]:
+    from wijna.backup import _backup_db_now, BACKUP_SKIPPED_MSG
+    service, folder_id = _drive_context()
+    ok, msg = _backup_db_now(service, folder_id)
+    if ok and msg == BACKUP_SKIPPED_MSG:
+        return EXIT_SKIPPED, msg
+    return (EXIT_OK if ok else EXIT_FAILED), msg
+
+
+def job_scheduled_backup() -> Tuple[int, str]:
+    from wijna.backup import check_scheduled_backup, BACKUP_SKIPPED_MSG
+    service, folder_id = _drive_context()
+    ok, msg = check_scheduled_backup(service, folder_id)
+    if ok:
+        return (EXIT_SKIPPED if msg.endswith(BACKUP_SKIPPED_MSG) else EXIT_OK), msg
+    if msg in ('Scheduled backup disabled', 'Outside defined slots', 'Slot already backed up'):
+        return EXIT_SKIPPED, msg
+    return EXIT_FAILED, msg
+
+
+def job_rekap() -> Tuple[int, str]:
+    from wijna.automations import generate_cashadvance_monthly_rekap
+    if generate_cashadvance_monthly_rekap():
+        return EXIT_OK, "Rekap cash advance bulan ini diperbarui"
+    return EXIT_FAILED, "Rekap cash advance gagal"
+
+
+def job_reminders() -> Tuple[int, str]:
+    from wijna.automations import run_automations_for_dashboard
+    from wijna.notify import _email_enabled
+    if not _email_enabled():
+        return EXIT_SKIPPED, "Notifikasi email nonaktif atau kredensial email belum diatur"
+    run_automations_for_dashboard()
+    return EXIT_OK, "Reminder PMR, Delegasi & MoU diproses"
+
+
+def job_mou_reminders() -> Tuple[int, str]:
+    from wijna.automations import run_mou_expiry_reminders
+    from wijna.notify import _email_enabled
+    if not _email_enabled():
+        return EXIT_SKIPPED, "Notifikasi email nonaktif atau kredensial email belum diatur"
+    sent, due = run_mou_expiry_reminders()
+    return EXIT_OK, f"MoU jatuh tempo: {due}, email terkirim: {sent}"
+
+
+def job_auto_restore() -> Tuple[int, str]:
+    from wijna.backup import attempt_auto_restore_if_seed
+    service, folder_id = _drive_context()
+    ok, msg = attempt_auto_restore_if_seed(service, folder_id)
+    if ok:
+        return EXIT_OK, msg
+    if msg in ('Auto-restore disabled', 'DB not fresh', 'No backup found'):
+        return EXIT_SKIPPED, msg
+    return EXIT_FAILED, msg
+
+
+def job_outbox() -> Tuple[int, str]:
+    from wijna.notify import _email_enabled
+    from wijna.uow import dispatch_outbox
+    if not _email_enabled():
+        dispatch_outbox()  # marks pending rows skipped
+        return EXIT_SKIPPED, "Email nonaktif; notifikasi tertunda dilewati"
+    processed, failed = dispatch_outbox()
+    if not processed and not failed:
+        return EXIT_SKIPPED, "Tidak ada notifikasi tertunda"
+    return (EXIT_FAILED if failed else EXIT_OK), f"Outbox terkirim: {processed}, gagal: {failed}"
+
+
+def job_wal_ship() -> Tuple[int, str]:
+    from wijna.pitr import ship_wal
+    service, folder_id = _drive_context()
+    ok, msg = ship_wal(service, folder_id, force_checkpoint=_ARGS.get("checkpoint", False))
+    if not ok:
+        return EXIT_SKIPPED, msg
+    return EXIT_OK, msg
+
+
+def job_pitr_restore() -> Tuple[int, str]:
+    from wijna.pitr import pitr_restore
+    target, out = _ARGS.get("target"), _ARGS.get("out")
+    if not target or not out:
+        return EXIT_USAGE, "pitr-restore butuh --target 'YYYY-MM-DD HH:MM' dan --out PATH"
+    try:
+        when = datetime.fromisoformat(target)
+    except ValueError:
+        return EXIT_USAGE, f"Format --target tidak dikenali: {target}"
+    service, folder_id = _drive_context()
+    ok, msg = pitr_restore(service, folder_id, when, out)
+    return (EXIT_OK if ok else EXIT_FAILED), msg
+
+
+def job_verify_backup() -> Tuple[int, str]:
+    from wijna.backup import verify_latest_backup
+    service, folder_id = _drive_context()
+    ok, msg = verify_latest_backup(service, folder_id)
+    if not ok and msg == 'No backup found':
+        return EXIT_SKIPPED, msg
+    return (EXIT_OK if ok else EXIT_FAILED), msg
+
+
+def job_migrate_blobs() -> Tuple[int, str]:
+    from wijna.blob_migration import run_blob_migration, migration_progress
+    _, folder_id = _drive_context()
+    if not any(r["pending"] for r in migration_progress()):
+        return EXIT_SKIPPED, "Tidak ada lampiran BLOB tersisa"
+    ok, msg = run_blob_migration(folder_id)
+    return (EXIT_OK if ok else EXIT_FAILED), msg
+
+
+def job_gc_attachments() -> Tuple[int, str]:
+    from wijna.attachment_gc import run_attachment_gc
+    from wijna.drive import _bytes_fmt
+    service, folder_id = _drive_context()
+    apply = bool(_ARGS.get("apply"))
+    rep = run_attachment_gc(service, folder_id, dry_run=not apply)
+    if not rep["orphans"] and not rep["pending_delete"]:
+        if rep["unreviewed"]:
+            return EXIT_SKIPPED, f"{rep['unreviewed']} file yatim belum dilaporkan; jalankan dry-run dulu"
+        return EXIT_SKIPPED, "Tidak ada lampiran yatim"
+    if not apply:
+        return EXIT_OK, (f"[dry-run] {rep['orphans']} file yatim ({_bytes_fmt(rep['orphan_bytes'])}), "
+                         f"{rep['pending_delete']} siap dihapus ({_bytes_fmt(rep['reclaimed_bytes'])})")
+    msg = (f"{rep['quarantined']} dikarantina, {rep['deleted']} dihapus ({_bytes_fmt(rep['reclaimed_bytes'])} kembali), "
+           f"{rep['restored']} dipulihkan, {rep['failed']} gagal")
+    return (EXIT_FAILED if rep["failed"] else EXIT_OK), msg
+
+
+JOBS: Dict[str, Callable[[], Tuple[int, str]]] = {
+    "init-db": job_init_db,
+    "backup": job_backup,
+    "scheduled-backup": job_scheduled_backup,
+    "rekap": job_rekap,
+    "reminders": job_reminders,
+    "mou-reminders": job_mou_reminders,
+    "auto-restore": job_auto_restore,
+    "outbox": job_outbox,
+    "wal-ship": job_wal_ship,
+    "pitr-restore": job_pitr_restore,
+    "verify-backup": job_verify_backup,
+    "migrate-blobs": job_migrate_blobs,
+    "gc-attachments": job_gc_attachments,
+}
+
+# Job-specific options (--target/--out/--checkpoint/--apply) parsed by main()
+_ARGS: Dict[str, Optional[object]] = {}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m wijna", description="WIJNA maintenance jobs (tanpa UI Streamlit).")
+    parser.add_argument("--config", help="Path file TOML (default: WIJNA_CONFIG, wijna.toml, .streamlit/secrets.toml)")
+    parser.add_argument("--db", help="Path database SQLite (override WIJNA_DB_PATH / config)")
+    parser.add_argument("--target", help="pitr-restore: waktu target WIB, mis. '2026-01-31 14:05'")
+    parser.add_argument("--out", help="pitr-restore: path file DB hasil")
+    parser.add_argument("--checkpoint", action="store_true", help="wal-ship: paksa checkpoint setelah kirim")
+    parser.add_argument("--apply", action="store_true", help="gc-attachments: jalankan karantina/hapus (default dry-run)")
+    parser.add_argument("job", choices=sorted(JOBS), help="Job yang dijalankan")
+    return parser
+
+
+def run_job(name: str) -> int:
+    """Run one job with ensure_db() first; prints status and timings, returns the exit code."""
+    from wijna.db import ensure_db
+    t0 = time.perf_counter()
+    ensure_db()
+    t_db = time.perf_counter() - t0
+    try:
+        code, msg = JOBS[name]()
+    except JobNotConfigured as e:
+        code, msg = EXIT_NOT_CONFIGURED, str(e)
+    except Exception as e:
+        code, msg = EXIT_FAILED, f"Error: {e}"
+    total = time.perf_counter() - t0
+    out = sys.stdout if code in (EXIT_OK, EXIT_SKIPPED) else sys.stderr
+    print(f"[wijna] {name}: {_STATUS_LABEL.get(code, code)} in {total:.2f}s (ensure_db {t_db:.2f}s) — {msg}", file=out)
+    return code
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        config.load_config(args.config)
+    except Exception as e:
+        print(f"[wijna] config error: {e}", file=sys.stderr)
+        return EXIT_NOT_CONFIGURED
+    if args.db:
+        config.DB_PATH = args.db
+    _ARGS.update(target=args.target, out=args.out, checkpoint=args.checkpoint, apply=args.apply)
+    return run_job(args.job)
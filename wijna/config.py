@@ -0,0 +1,103 @@
+"""Runtime configuration shared by the Streamlit app and the headless CLI.
+
+Nilai dibaca dari (urutan prioritas):
+1. Environment variable (``WIJNA_DB_PATH``, ``DUNYIM_GDRIVE_FOLDER_ID``, ``GOOGLE_APPLICATION_CREDENTIALS``)
+2. File TOML (``--config`` / ``WIJNA_CONFIG`` / ``wijna.toml`` / ``.streamlit/secrets.toml``)
+3. ``st.secrets`` bila berjalan di dalam Streamlit
+
+Modul ini sengaja tidak meng-import streamlit agar job CLI tetap ringan.
+"""
+import os
+import sys
+import json
+from typing import Optional, Dict, Any
+
+try:
+    import tomllib as _toml  # Python 3.11+
+except Exception:
+    try:
+        import tomli as _toml  # type: ignore
+    except Exception:
+        _toml = None
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILENAME = "office_ops.db"
+DB_PATH = os.environ.get("WIJNA_DB_PATH") or os.path.join(APP_DIR, DB_FILENAME)
+GDRIVE_DEFAULT_FOLDER_ID = os.environ.get("DUNYIM_GDRIVE_FOLDER_ID", "1CxYo2ZGu8jweKjmEws41nT3cexJju5_1")
+
+_file_config: Dict[str, Any] = {}
+_file_config_path: Optional[str] = None
+_LOCAL_STATE: Dict[str, Any] = {}
+
+
+def _default_config_candidates():
+    env_path = os.environ.get("WIJNA_CONFIG")
+    if env_path:
+        return [env_path]
+    return [
+        os.path.join(APP_DIR, "wijna.toml"),
+        os.path.join(APP_DIR, ".streamlit", "secrets.toml"),
+    ]
+
+
+def load_config(path: Optional[str] = None) -> Optional[str]:
+    """Load a TOML config file; returns the path used (or None when nothing found).
+    Struktur file sama dengan secrets Streamlit ([service_account], [email_credentials]),
+    ditambah tabel opsional [wijna] berisi db_path dan gdrive_folder_id.
+    """
+    global _file_config, _file_config_path, DB_PATH, GDRIVE_DEFAULT_FOLDER_ID
+    candidates = [path] if path else _default_config_candidates()
+    for cand in candidates:
+        if not cand or not os.path.exists(cand):
+            continue
+        if _toml is None:
+            raise RuntimeError("Parser TOML tidak tersedia (butuh Python 3.11+ atau paket 'tomli').")
+        with open(cand, "rb") as f:
+            _file_config = _toml.load(f)
+        _file_config_path = cand
+        section = _file_config.get("wijna", {}) or {}
+        if section.get("db_path") and not os.environ.get("WIJNA_DB_PATH"):
+            p = str(section["db_path"])
+            DB_PATH = p if os.path.isabs(p) else os.path.join(os.path.dirname(os.path.abspath(cand)), p)
+        if section.get("gdrive_folder_id") and not os.environ.get("DUNYIM_GDRIVE_FOLDER_ID"):
+            GDRIVE_DEFAULT_FOLDER_ID = str(section["gdrive_folder_id"])
+        return cand
+    if path:
+        raise FileNotFoundError(f"Config '{path}' tidak ditemukan")
+    return None
+
+
+def _streamlit():
+    """Return the streamlit module only when the host process already imported it."""
+    return sys.modules.get("streamlit")
+
+
+def get_secret(name: str, default=None):
+    """Lookup a secret table (e.g. 'service_account', 'email_credentials')."""
+    if name == "service_account":
+        key_file = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+        if key_file and os.path.exists(key_file):
+            with open(key_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+    if name in _file_config:
+        return _file_config[name]
+    st = _streamlit()
+    if st is not None:
+        try:
+            return st.secrets[name]
+        except Exception:
+            pass
+    return default
+
+
+def session_state():
+    """Streamlit session_state when running inside a script run, else a process-local dict."""
+    st = _streamlit()
+    if st is not None:
+        try:
+            from streamlit.runtime.scriptrunner import get_script_run_ctx
+        except Exception:
+            return st.session_state
+        if get_script_run_ctx(suppress_warning=True) is not None:
+            return st.session_state
+    return _LOCAL_STATE
@@ -0,0 +1,1069 @@
+"""SQLite access: connection factory with audit hook, schema bootstrap, settings and audit log."""
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Callable, Dict, List, Iterable
+
+from wijna import config
+from wijna.config import session_state
+from wijna.auth import hash_password
+from wijna.utils import now_wib_iso, gen_id
+
+# --- Table write listeners (in-memory cache invalidation) ---
+_TABLE_WRITE_LISTENERS: Dict[str, List[Callable[[], None]]] = {}
+_DML_TABLE_RE = re.compile(
+    r"^\s*(?:insert(?:\s+or\s+\w+)?\s+into|replace\s+into|update(?:\s+or\s+\w+)?|delete\s+from)\s+[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+def on_table_write(table: str, callback: Callable[[], None]) -> None:
+    """Register a callback fired after a write to `table` is committed through get_db()."""
+    _TABLE_WRITE_LISTENERS.setdefault(table.lower(), []).append(callback)
+
+def _dml_table(sql: str) -> Optional[str]:
+    m = _DML_TABLE_RE.match(sql or "")
+    return m.group(1).lower() if m else None
+
+_TABLE_VERSIONS: Dict[str, int] = {}
+
+def table_version(table: str) -> int:
+    """Process-wide count of committed writes to `table` (all sessions and threads)."""
+    return _TABLE_VERSIONS.get(table.lower(), 0)
+
+def _fire_table_write(tables: Iterable[str]) -> None:
+    for t in tables:
+        _TABLE_VERSIONS[t] = _TABLE_VERSIONS.get(t, 0) + 1
+        for cb in _TABLE_WRITE_LISTENERS.get(t, ()):
+            try:
+                cb()
+            except Exception:
+                pass
+
+# Recursion guard for audit_log. Thread-local: background threads (backup, WAL shipper,
+# BLOB migration) must not switch auditing off for user sessions running concurrently.
+_AUDIT_GUARD = threading.local()
+
+def _audit_disabled() -> bool:
+    return getattr(_AUDIT_GUARD, "disabled", False)
+
+class _AuditCursor:
+    def __init__(self, outer_conn, inner_cursor):
+        self._outer_conn = outer_conn
+        self._c = inner_cursor
+    def __getattr__(self, name):
+        return getattr(self._c, name)
+    def execute(self, sql, params=()):
+        result = self._c.execute(sql, params)
+        self._outer_conn._note_write(sql)
+        try:
+            self._maybe_log(sql, params)
+        except Exception:
+            pass
+        return result
+    def executemany(self, sql, seq_of_params):
+        result = self._c.executemany(sql, seq_of_params)
+        self._outer_conn._note_write(sql)
+        try:
+            for p in seq_of_params:
+                self._maybe_log(sql, p)
+        except Exception:
+            pass
+        return result
+    def _maybe_log(self, sql, params):
+        # Guard or non-DML: skip
+        if _audit_disabled():
+            return
+        sql_l = (sql or "").strip().lower()
+        op = None
+        table = None
+        target_id = None
+        if sql_l.startswith("insert into"):
+            op = "create"
+            try:
+                # parse table and col list
+                after_into = sql_l.split("insert into",1)[1].strip()
+                table = after_into.split("(",1)[0].strip().split()[0]
+            except Exception:
+                pass
+
+            try:
+                # Same connection/transaction as the INSERT: a second connection would
+                # block on the write lock held by this uncommitted statement.
+                self._outer_conn._conn.execute(_AUDIT_INSERT_SQL, _audit_row(table, op, target=str(target_id) if target_id is not None else None, details=(sql[:180] + ("..." if len(sql) > 180 else ""))))
+            except Exception:
+                pass
+
+class _AuditConnection:
+    def __init__(self, inner_conn: sqlite3.Connection):
+        self._conn = inner_conn
+        self.row_factory = inner_conn.row_factory
+        self._written_tables = set()
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    def cursor(self, *args, **kwargs):
+        return _AuditCursor(self, self._conn.cursor(*args, **kwargs))
+    def execute(self, sql, params=()):
+        result = self._conn.execute(sql, params)
+        self._note_write(sql)
+        return result
+    def _note_write(self, sql):
+        table = _dml_table(sql)
+        if table:
+            self._written_tables.add(table)
+    def commit(self):
+        self._conn.commit()
+        if self._written_tables:
+            tables, self._written_tables = self._written_tables, set()
+            _fire_table_write(tables)
+
+def get_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(config.DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+    conn.row_factory = sqlite3.Row
+    # If audit is disabled (e.g., during migrations or within audit_log), return raw connection
+    if _audit_disabled():
+        return conn
+    return _AuditConnection(conn)
+# Module columns that store Drive share links (file id via wijna.drive._drive_id_from_url)
+DRIVE_URL_COLUMNS: Dict[str, tuple] = {
+    "sop": ("file_url",),
+    "notulen": ("file_url",),
+    "surat_masuk": ("file_url",),
+    "surat_keluar": ("draft_url", "final_url", "lampiran_url"),
+    "mou": ("file_url", "final_url"),
+    "pmr": ("file1_url", "file2_url"),
+    "delegasi": ("file_url",),
+    "inventory": ("drive_file_url",),
+}
+
+# Legacy BLOB attachments: (table, blob, name, drive id, url) for wijna.blob_migration
+BLOB_ATTACHMENT_COLUMNS = [
+    ("sop", "file_blob", "file_name", "file_drive_id", "file_url"),
+    ("notulen", "file_blob", "file_name", "file_drive_id", "file_url"),
+    ("surat_masuk", "file_blob", "file_name", "file_drive_id", "file_url"),
+    ("surat_keluar", "draft_blob", "draft_name", "draft_drive_id", "draft_url"),
+    ("surat_keluar", "final_blob", "final_name", "final_drive_id", "final_url"),
+    ("surat_keluar", "lampiran_blob", "lampiran_name", "lampiran_drive_id", "lampiran_url"),
+    ("mou", "file_blob", "file_name", "file_drive_id", "file_url"),
+    ("mou", "final_blob", "final_name", "final_drive_id", "final_url"),
+    ("pmr", "file1_blob", "file1_name", "file1_drive_id", "file1_url"),
+    ("pmr", "file2_blob", "file2_name", "file2_drive_id", "file2_url"),
+    ("delegasi", "file_blob", "file_name", "file_drive_id", "file_url"),
+    ("inventory", "file_blob", "file_name", "drive_file_id", "drive_file_url"),
+]
+
+def ensure_db():
+    """Ensure minimum required tables/columns exist so modules load safely.
+    This lightweight bootstrap focuses on Users, Calendar, SOP, Notulen, and File Log.
+    """
+    try:
+        conn = get_db()
+        cur = conn.cursor()
+        # WAL: readers tidak memblokir penulis, dan frame WAL bisa dikirim untuk PITR (wijna.pitr)
+        try:
+            cur.execute("PRAGMA journal_mode=WAL")
+        except Exception:
+            pass
+        # Users
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(8)))),
+                email TEXT UNIQUE NOT NULL,
+                full_name TEXT,
+                role TEXT,
+                password_hash TEXT,
+                status TEXT,
+                created_at TEXT,
+                last_login TEXT
+            )
+            """
+        )
+        # Seed default superuser if table empty
+        cur.execute("SELECT COUNT(*) FROM users")
+        count_users = cur.fetchone()[0]
+        if count_users == 0:
+            try:
+                pw = hash_password("zzz")
+                now = now_wib_iso()
+                cur.execute("INSERT INTO users (email, full_name, role, password_hash, status, created_at) VALUES (?,?,?,?,?,?)",
+                            ("admin", "Prime", "superuser", pw, "active", now))
+                cur.execute("INSERT INTO users (email, full_name, role, password_hash, status, created_at) VALUES (?,?,?,?,?,?)",
+                            ("admin2", "Finance", "Finance", pw, "active", now))
+                cur.execute("INSERT INTO users (email, full_name, role, password_hash, status, created_at) VALUES (?,?,?,?,?,?)",
+                            ("admin3", "director", "director", pw, "active", now))
+                conn.commit()
+            except Exception:
+                pass
+        # Calendar tables
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS calendar (
+                id TEXT PRIMARY KEY,
+                jenis TEXT,
+                judul TEXT,
+                nama_divisi TEXT,
+                tgl_mulai TEXT,
+                tgl_selesai TEXT,
+                deskripsi TEXT,
+                file_blob BLOB,
+                file_name TEXT,
+                is_holiday INTEGER DEFAULT 0,
+                sumber TEXT,
+                ditetapkan_oleh TEXT,
+                tanggal_penetapan TEXT
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS public_holidays (
+                tahun INTEGER,
+                tanggal TEXT,
+                nama TEXT,
+                keterangan TEXT,
+                ditetapkan_oleh TEXT,
+                tanggal_penetapan TEXT
+            )
+            """
+        )
+        # SOP and Notulen (minimal compatible schemas)
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sop (
+                id TEXT PRIMARY KEY,
+                judul TEXT,
+                file_blob BLOB,
+                file_name TEXT,
+                tanggal_upload TEXT,
+                director_approved INTEGER DEFAULT 0
+            )
+            """
+        )
+        # Ensure SOP has board_note column for Board reviewer notes
+        try:
+            cur.execute("PRAGMA table_info(sop)")
+            sop_cols_existing = {row[1] for row in cur.fetchall()}
+            if "board_note" not in sop_cols_existing:
+                cur.execute("ALTER TABLE sop ADD COLUMN board_note TEXT")
+        except Exception:
+            pass
+        # Migration: add Drive columns to SOP
+        try:
+            cur.execute("PRAGMA table_info(sop)")
+            sop_cols_existing = {row[1] for row in cur.fetchall()}
+            if "file_drive_id" not in sop_cols_existing:
+                cur.execute("ALTER TABLE sop ADD COLUMN file_drive_id TEXT")
+            if "file_url" not in sop_cols_existing:
+                cur.execute("ALTER TABLE sop ADD COLUMN file_url TEXT")
+        except Exception:
+            pass
+        # Ensure SOP has director_note column for Director approval notes
+        try:
+            cur.execute("PRAGMA table_info(sop)")
+            sop_cols_existing = {row[1] for row in cur.fetchall()}
+            if "director_note" not in sop_cols_existing:
+                cur.execute("ALTER TABLE sop ADD COLUMN director_note TEXT")
+        except Exception:
+            pass
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS notulen (
+                id TEXT PRIMARY KEY,
+                judul TEXT,
+                file_blob BLOB,
+                file_name TEXT,
+                tanggal_upload TEXT,
+                uploaded_by TEXT,
+                deadline TEXT,
+                director_note TEXT,
+                director_approved INTEGER DEFAULT 0
+            )
+            """
+        )
+        # Ensure Notulen has board_note column for Board reviewer notes
+        try:
+            cur.execute("PRAGMA table_info(notulen)")
+            nt_cols_existing = {row[1] for row in cur.fetchall()}
+            if "board_note" not in nt_cols_existing:
+                cur.execute("ALTER TABLE notulen ADD COLUMN board_note TEXT")
+        except Exception:
+            pass
+        # Migration: add Drive columns to Notulen
+        try:
+            cur.execute("PRAGMA table_info(notulen)")
+            nt_cols_existing = {row[1] for row in cur.fetchall()}
+            if "file_drive_id" not in nt_cols_existing:
+                cur.execute("ALTER TABLE notulen ADD COLUMN file_drive_id TEXT")
+            if "file_url" not in nt_cols_existing:
+                cur.execute("ALTER TABLE notulen ADD COLUMN file_url TEXT")
+        except Exception:
+            pass
+        # File Log for audit
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_log (
+                id TEXT PRIMARY KEY,
+                modul TEXT,
+                file_name TEXT,
+                versi INTEGER,
+                deleted_by TEXT,
+                tanggal_hapus TEXT,
+                alasan TEXT
+            )
+            """
+        )
+        # Additional domain tables (moved from top-level into bootstrap)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS surat_masuk (
+            id TEXT PRIMARY KEY,
+            indeks TEXT,
+            nomor TEXT,
+            pengirim TEXT,
+            tanggal TEXT,
+            perihal TEXT,
+            file_blob BLOB,
+            file_name TEXT,
+            status TEXT,
+            follow_up TEXT,
+            rekap INTEGER DEFAULT 0,
+            director_approved INTEGER DEFAULT 0
+        )
+        """)
+        # Migration: add Drive columns to surat_masuk
+        try:
+            cur.execute("PRAGMA table_info(surat_masuk)")
+            sm_cols = {row[1] for row in cur.fetchall()}
+            if "file_drive_id" not in sm_cols:
+                cur.execute("ALTER TABLE surat_masuk ADD COLUMN file_drive_id TEXT")
+            if "file_url" not in sm_cols:
+                cur.execute("ALTER TABLE surat_masuk ADD COLUMN file_url TEXT")
+        except Exception:
+            pass
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS surat_keluar (
+            id TEXT PRIMARY KEY,
+            indeks TEXT,
+            nomor TEXT,
+            tanggal TEXT,
+            ditujukan TEXT,
+            perihal TEXT,
+            lampiran_blob BLOB,
+            lampiran_name TEXT,
+            pengirim TEXT,
+            draft_blob BLOB,
+            draft_name TEXT,
+            status TEXT,
+            follow_up TEXT,
+            director_note TEXT,
+            director_approved INTEGER DEFAULT 0,
+            final_blob BLOB,
+            final_name TEXT
+        )
+        """)
+        # Migration: ensure new optional column draft_url exists (for link-based drafts)
+        try:
+            cur.execute("PRAGMA table_info(surat_keluar)")
+            sk_cols = {row[1] for row in cur.fetchall()}
+            if "draft_url" not in sk_cols:
+                cur.execute("ALTER TABLE surat_keluar ADD COLUMN draft_url TEXT")
+        except Exception:
+            pass
+        # Migration: add Drive columns to surat_keluar (draft/final/lampiran)
+        try:
+            cur.execute("PRAGMA table_info(surat_keluar)")
+            sk_cols = {row[1] for row in cur.fetchall()}
+            if "draft_drive_id" not in sk_cols:
+                cur.execute("ALTER TABLE surat_keluar ADD COLUMN draft_drive_id TEXT")
+            if "final_url" not in sk_cols:
+                cur.execute("ALTER TABLE surat_keluar ADD COLUMN final_url TEXT")
+            if "final_drive_id" not in sk_cols:
+                cur.execute("ALTER TABLE surat_keluar ADD COLUMN final_drive_id TEXT")
+            if "lampiran_url" not in sk_cols:
+                cur.execute("ALTER TABLE surat_keluar ADD COLUMN lampiran_url TEXT")
+            if "lampiran_drive_id" not in sk_cols:
+                cur.execute("ALTER TABLE surat_keluar ADD COLUMN lampiran_drive_id TEXT")
+        except Exception:
+            pass
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS mou (
+            id TEXT PRIMARY KEY,
+            nomor TEXT,
+            nama TEXT,
+            pihak TEXT,
+            jenis TEXT,
+            tgl_mulai TEXT,
+            tgl_selesai TEXT,
+            divisi TEXT,
+            file_blob BLOB,
+            file_name TEXT,
+            board_note TEXT,
+            board_approved INTEGER DEFAULT 0,
+            director_note TEXT,
+            director_approved INTEGER DEFAULT 0,
+            final_blob BLOB,
+            final_name TEXT
+        )
+        """)
+        # Migration: add Drive columns to MoU (initial/final)
+        try:
+            cur.execute("PRAGMA table_info(mou)")
+            mou_cols = {row[1] for row in cur.fetchall()}
+            if "file_drive_id" not in mou_cols:
+                cur.execute("ALTER TABLE mou ADD COLUMN file_drive_id TEXT")
+            if "file_url" not in mou_cols:
+                cur.execute("ALTER TABLE mou ADD COLUMN file_url TEXT")
+            if "final_drive_id" not in mou_cols:
+                cur.execute("ALTER TABLE mou ADD COLUMN final_drive_id TEXT")
+            if "final_url" not in mou_cols:
+                cur.execute("ALTER TABLE mou ADD COLUMN final_url TEXT")
+        except Exception:
+            pass
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS cash_advance (
+            id TEXT PRIMARY KEY,
+            divisi TEXT,
+            items_json TEXT,
+            totals REAL,
+            tanggal TEXT,
+            finance_note TEXT,
+            finance_approved INTEGER DEFAULT 0,
+            director_note TEXT,
+            director_approved INTEGER DEFAULT 0
+        )
+        """)
+        # Migration: track requester for cash advance
+        try:
+            cur.execute("ALTER TABLE cash_advance ADD COLUMN requested_by TEXT")
+        except Exception:
+            pass
+        # Migration: mark director reviewed (so rejected items don't reappear)
+        try:
+            cur.execute("PRAGMA table_info(cash_advance)")
+            ca_cols = {row[1] for row in cur.fetchall()}
+            if "director_reviewed" not in ca_cols:
+                cur.execute("ALTER TABLE cash_advance ADD COLUMN director_reviewed INTEGER DEFAULT 0")
+        except Exception:
+            pass
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS pmr (
+            id TEXT PRIMARY KEY,
+            nama TEXT,
+            file1_blob BLOB,
+            file1_name TEXT,
+            file2_blob BLOB,
+            file2_name TEXT,
+            bulan TEXT,
+            finance_note TEXT,
+            finance_approved INTEGER DEFAULT 0,
+            director_note TEXT,
+            director_approved INTEGER DEFAULT 0,
+            tanggal_submit TEXT
+        )
+        """)
+        # Migration: add Drive columns to PMR (file1/file2)
+        try:
+            cur.execute("PRAGMA table_info(pmr)")
+            pmr_cols = {row[1] for row in cur.fetchall()}
+            if "file1_drive_id" not in pmr_cols:
+                cur.execute("ALTER TABLE pmr ADD COLUMN file1_drive_id TEXT")
+            if "file1_url" not in pmr_cols:
+                cur.execute("ALTER TABLE pmr ADD COLUMN file1_url TEXT")
+            if "file2_drive_id" not in pmr_cols:
+                cur.execute("ALTER TABLE pmr ADD COLUMN file2_drive_id TEXT")
+            if "file2_url" not in pmr_cols:
+                cur.execute("ALTER TABLE pmr ADD COLUMN file2_url TEXT")
+        except Exception:
+            pass
+        # Cuti table (fix malformed DDL and ensure required columns exist)
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cuti (
+                id TEXT PRIMARY KEY,
+                nama TEXT,
+                tgl_mulai TEXT,
+                tgl_selesai TEXT,
+                durasi INTEGER,
+                kuota_tahunan INTEGER,
+                cuti_terpakai INTEGER,
+                sisa_kuota INTEGER,
+                status TEXT,
+                finance_note TEXT,
+                finance_approved INTEGER DEFAULT 0,
+                director_note TEXT,
+                director_approved INTEGER DEFAULT 0
+            )
+            """
+        )
+        # Migration: track creator for MoU (moved outside of Cuti DDL)
+        try:
+            cur.execute("ALTER TABLE mou ADD COLUMN created_by TEXT")
+        except Exception:
+            pass
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS flex (
+            id TEXT PRIMARY KEY,
+            nama TEXT,
+            tanggal TEXT,
+            jam_mulai TEXT,
+            jam_selesai TEXT,
+            alasan TEXT,
+            catatan_finance TEXT,
+            approval_finance INTEGER DEFAULT 0,
+            catatan_director TEXT,
+            approval_director INTEGER DEFAULT 0
+        )
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS delegasi (
+            id TEXT PRIMARY KEY,
+            judul TEXT,
+            deskripsi TEXT,
+            pic TEXT,
+            tgl_mulai TEXT,
+            tgl_selesai TEXT,
+            file_blob BLOB,
+            file_name TEXT,
+            status TEXT,
+            tanggal_update TEXT
+        )
+        """)
+        # Ensure workflow columns for Delegasi exist
+        try:
+            cur.execute("PRAGMA table_info(delegasi)")
+            _del_cols = {row[1] for row in cur.fetchall()}
+            if "created_by" not in _del_cols:
+                cur.execute("ALTER TABLE delegasi ADD COLUMN created_by TEXT")
+            if "review_status" not in _del_cols:
+                cur.execute("ALTER TABLE delegasi ADD COLUMN review_status TEXT")
+            if "review_note" not in _del_cols:
+                cur.execute("ALTER TABLE delegasi ADD COLUMN review_note TEXT")
+            if "review_time" not in _del_cols:
+                cur.execute("ALTER TABLE delegasi ADD COLUMN review_time TEXT")
+            if "reviewed_by" not in _del_cols:
+                cur.execute("ALTER TABLE delegasi ADD COLUMN reviewed_by TEXT")
+        except Exception:
+            pass
+        # Migration: add Drive columns to Delegasi
+        try:
+            cur.execute("PRAGMA table_info(delegasi)")
+            del_cols = {row[1] for row in cur.fetchall()}
+            if "file_drive_id" not in del_cols:
+                cur.execute("ALTER TABLE delegasi ADD COLUMN file_drive_id TEXT")
+            if "file_url" not in del_cols:
+                cur.execute("ALTER TABLE delegasi ADD COLUMN file_url TEXT")
+        except Exception:
+            pass
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS mobil (
+            id TEXT PRIMARY KEY,
+            nama_pengguna TEXT,
+            divisi TEXT,
+            tgl_mulai TEXT,
+            tgl_selesai TEXT,
+            tujuan TEXT,
+            kendaraan TEXT,
+            driver TEXT,
+            status TEXT,
+            finance_note TEXT
+        )
+        """)
+        # Inventory table (missing previously)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS inventory (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            location TEXT,
+            status TEXT,
+            pic TEXT,
+            updated_at TEXT,
+            finance_note TEXT,
+            finance_approved INTEGER DEFAULT 0,
+            director_note TEXT,
+            director_approved INTEGER DEFAULT 0,
+            file_blob BLOB,
+            file_name TEXT
+        )
+        """)
+        # Migration: add Drive columns to Inventory
+        try:
+            cur.execute("PRAGMA table_info(inventory)")
+            inv_cols = {row[1] for row in cur.fetchall()}
+            if "drive_file_id" not in inv_cols:
+                cur.execute("ALTER TABLE inventory ADD COLUMN drive_file_id TEXT")
+            if "drive_file_url" not in inv_cols:
+                cur.execute("ALTER TABLE inventory ADD COLUMN drive_file_url TEXT")
+        except Exception:
+            pass
+        # Optional requester column for inventory (when loan requests reuse pic field already, so this is optional)
+        try:
+            cur.execute("ALTER TABLE inventory ADD COLUMN requested_by TEXT")
+        except Exception:
+            pass
+        # Rekap bulanan cash advance (aggregated summary), one row per bulan (YYYY-MM)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS rekap_monthly_cashadvance (
+            bulan TEXT PRIMARY KEY,
+            total_pengajuan INTEGER DEFAULT 0,
+            total_nominal REAL DEFAULT 0,
+            total_cair INTEGER DEFAULT 0,
+            total_nominal_cair REAL DEFAULT 0,
+            updated_at TEXT
+        )
+        """)
+        cur.execute("PRAGMA table_info(file_log)")
+        fl_cols = {row[1] for row in cur.fetchall()}
+        if "uploaded_by" not in fl_cols:
+            cur.execute("ALTER TABLE file_log ADD COLUMN uploaded_by TEXT")
+        if "tanggal_upload" not in fl_cols:
+            cur.execute("ALTER TABLE file_log ADD COLUMN tanggal_upload TEXT")
+        if "action" not in fl_cols:
+            cur.execute("ALTER TABLE file_log ADD COLUMN action TEXT")
+        # --- Dunyim Security tables (idempotent) ---
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS app_settings (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS backup_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_name TEXT,
+                drive_file_id TEXT,
+                status TEXT,
+                message TEXT,
+                backup_time TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        # Migration: content fingerprint for skip-if-unchanged backups
+        try:
+            cur.execute("PRAGMA table_info(backup_log)")
+            bl_cols_existing = {row[1] for row in cur.fetchall()}
+            if "fingerprint" not in bl_cols_existing:
+                cur.execute("ALTER TABLE backup_log ADD COLUMN fingerprint TEXT")
+        except Exception:
+            pass
+        # Local manifest of backup generations on Drive (GFS retention, restore list)
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS backup_manifest (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_name TEXT,
+                drive_file_id TEXT,
+                series TEXT,
+                size_bytes INTEGER,
+                fingerprint TEXT,
+                created_at TEXT
+            )
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_backup_manifest_created ON backup_manifest(created_at)")
+        # Local mirror of the Drive folder (wijna.drive); usage/search/listing are local queries
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS drive_files (
+                id TEXT PRIMARY KEY,
+                folder_id TEXT,
+                name TEXT,
+                size_bytes INTEGER,
+                mime_type TEXT,
+                modified_time TEXT,
+                ref_module TEXT,
+                ref_id TEXT,
+                synced_at TEXT
+            )
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_drive_files_folder_name ON drive_files(folder_id, name)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_drive_files_ref ON drive_files(ref_module, ref_id)")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blob_migration_state (
+                spec TEXT PRIMARY KEY,
+                last_id TEXT,
+                migrated INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                bytes_freed INTEGER DEFAULT 0,
+                done INTEGER DEFAULT 0,
+                updated_at TEXT
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS drive_sync_state (
+                folder_id TEXT PRIMARY KEY,
+                page_token TEXT,
+                full_sync_at TEXT,
+                synced_at TEXT
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS drive_errors (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                op TEXT,
+                target TEXT,
+                status INTEGER,
+                reason TEXT,
+                attempts INTEGER,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS drive_gc_quarantine (
+                file_id TEXT PRIMARY KEY,
+                folder_id TEXT,
+                name TEXT,
+                size_bytes INTEGER,
+                quarantined_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS drive_gc_candidates (
+                file_id TEXT PRIMARY KEY,
+                folder_id TEXT,
+                reported_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS startup_profile (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                total_ms REAL,
+                report_json TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS record_notes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                note TEXT,
+                created_by TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS audit_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_email TEXT,
+                action TEXT,
+                details TEXT,
+                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS email_notifications (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                entity_type TEXT,
+                entity_id TEXT,
+                kind TEXT,
+                tag TEXT,
+                recipients TEXT,
+                sent_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        # Notification outbox: rows written in the same transaction as the entity change
+        # (unit_of_work) and dispatched after commit; pending rows are retried by the CLI.
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fn TEXT,
+                payload TEXT,
+                created_at TEXT,
+                sent_at TEXT,
+                skipped_at TEXT,
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT
+            )
+            """
+        )
+        # Migration: rows dropped (email off / too old) are marked skipped instead of kept pending
+        try:
+            cur.execute("PRAGMA table_info(notification_outbox)")
+            if "skipped_at" not in {row[1] for row in cur.fetchall()}:
+                cur.execute("ALTER TABLE notification_outbox ADD COLUMN skipped_at TEXT")
+        except Exception:
+            pass
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_outbox_pending ON notification_outbox(sent_at, id)")
+        # MoU expiry reminder queue: one row per MoU with the next reminder date.
+        # Triggers keep it in sync on insert/update/delete; the job computes the stage.
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS mou_expiry_queue (
+                mou_id TEXT PRIMARY KEY,
+                next_reminder TEXT,
+                stage INTEGER
+            )
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_mou_expiry_next ON mou_expiry_queue(next_reminder)")
+        # Queue dates are WIB ('+7 hours'), not the server's 'localtime'
+        try:
+            cur.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name='trg_mou_expiry_ins'")
+            row = cur.fetchone()
+            legacy = row is not None and "localtime" in (row[0] or "")
+            if legacy:
+                # Migration: triggers from before the WIB fix are recreated below
+                cur.execute("DROP TRIGGER IF EXISTS trg_mou_expiry_ins")
+                cur.execute("DROP TRIGGER IF EXISTS trg_mou_expiry_upd")
+            if row is None or legacy:
+                cur.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS trg_mou_expiry_ins AFTER INSERT ON mou
+                    WHEN NEW.tgl_selesai IS NOT NULL
+                    BEGIN
+                        INSERT OR REPLACE INTO mou_expiry_queue (mou_id, next_reminder, stage)
+                        VALUES (NEW.id, date('now','+7 hours'), NULL);
+                    END
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS trg_mou_expiry_upd AFTER UPDATE OF tgl_selesai ON mou
+                    WHEN NEW.tgl_selesai IS NOT OLD.tgl_selesai
+                    BEGIN
+                        INSERT OR REPLACE INTO mou_expiry_queue (mou_id, next_reminder, stage)
+                        VALUES (NEW.id, date('now','+7 hours'), NULL);
+                    END
+                    """
+                )
+            if row is None:
+                cur.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS trg_mou_expiry_del AFTER DELETE ON mou
+                    BEGIN
+                        DELETE FROM mou_expiry_queue WHERE mou_id = OLD.id;
+                    END
+                    """
+                )
+                # One-time backfill for MoUs created before the queue existed
+                cur.execute(
+                    """
+                    INSERT OR IGNORE INTO mou_expiry_queue (mou_id, next_reminder, stage)
+                    SELECT id, date('now','+7 hours'), NULL FROM mou
+                    WHERE tgl_selesai IS NOT NULL AND date(tgl_selesai) >= date('now','+7 hours')
+                    """
+                )
+        except Exception:
+            pass
+        # Seed default settings
+        try:
+            cur.execute("INSERT OR IGNORE INTO app_settings (key, value) VALUES ('auto_restore_enabled','true')")
+            cur.execute("INSERT OR IGNORE INTO app_settings (key, value) VALUES ('scheduled_backup_enabled','false')")
+            cur.execute("INSERT OR IGNORE INTO app_settings (key, value) VALUES ('enable_email_notifications','false')")
+            cur.execute("INSERT OR IGNORE INTO app_settings (key, value) VALUES ('pmr_notify_enabled','true')")
+            cur.execute("INSERT OR IGNORE INTO app_settings (key, value) VALUES ('delegasi_notify_enabled','true')")
+            cur.execute("INSERT OR IGNORE INTO app_settings (key, value) VALUES ('delegasi_deadline_autoshift','false')")
+            cur.execute("INSERT OR IGNORE INTO app_settings (key, value) VALUES ('mou_expiry_notify_enabled','true')")
+            if config.GDRIVE_DEFAULT_FOLDER_ID:
+                cur.execute("INSERT OR IGNORE INTO app_settings (key, value) VALUES ('gdrive_folder_id', ?)", (config.GDRIVE_DEFAULT_FOLDER_ID,))
+        except Exception:
+            pass
+        conn.commit()
+    except Exception:
+        pass
+def log_file_delete(modul, file_name, deleted_by, alasan=None):
+    conn = get_db()
+    cur = conn.cursor()
+    log_id = gen_id("log")
+    now = now_wib_iso()
+    cur.execute("INSERT INTO file_log (id, modul, file_name, versi, deleted_by, tanggal_hapus, alasan) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (log_id, modul, file_name, 1, deleted_by, now, alasan or ""))
+    conn.commit()
+
+_AUDIT_INSERT_SQL = "INSERT INTO audit_logs (user_email, action, details, timestamp) VALUES (?,?,?,?)"
+
+def _audit_row(modul: str, action: str, target=None, details=None, actor=None) -> tuple:
+    """Build the audit_logs row values (user_email, action, details, timestamp)."""
+    now = now_wib_iso()
+    # Resolve actor from session if not provided
+    if not actor:
+        u = session_state().get("user")
+        actor = (u.get("email") or u.get("full_name")) if u else "-"
+    # Compose details payload
+    prefix = f"[{modul}] " if modul else ""
+    target_txt = f" target={target}" if target is not None else ""
+    details_txt = details or ""
+    payload = f"{prefix}{action or '-'}{target_txt} {details_txt}".strip()
+    return (actor, action or "-", payload, now)
+
+def audit_log(modul: str, action: str, target=None, details=None, actor=None):
+    """Write a simplified activity record into audit_logs.
+    - modul: logical module name (e.g., 'auth', 'cuti', 'delegasi')
+    - action: verb (e.g., 'login', 'logout', 'create', 'update', 'delete', 'approve', 'review')
+    - target: optional entity id/name
+    - details: optional additional information
+    - actor: user email/name; if None, inferred from session
+    Inside a write flow prefer unit_of_work().audit(...) so the record commits with the change.
+    """
+    try:
+        # prevent recursive logging
+        _AUDIT_GUARD.disabled = True
+        conn = sqlite3.connect(config.DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+        cur = conn.cursor()
+        cur.execute(_AUDIT_INSERT_SQL, _audit_row(modul, action, target=target, details=details, actor=actor))
+        conn.commit()
+    except Exception:
+        pass
+    finally:
+        _AUDIT_GUARD.disabled = False
+
+# --- Settings store: process-wide cache of app_settings ---
+# Reads are served from a dict. Every SETTINGS_RECHECK_SECONDS the cache asks its own
+# connection for PRAGMA data_version (changes when another connection/process commits)
+# and reloads the whole table in one query when it moved.
+SETTINGS_RECHECK_SECONDS = 2.0
+_SETTINGS_LOCK = threading.RLock()
+_SETTINGS_STATE = {"values": None, "path": None, "conn": None, "data_version": None, "next_check": 0.0}
+_SETTINGS_LISTENERS: List[Callable[[set], None]] = []
+
+def on_setting_change(callback: Callable[[set], None]) -> None:
+    """Register callback(changed_keys) fired after a reload or _setting_set changes values."""
+    _SETTINGS_LISTENERS.append(callback)
+
+def _settings_conn() -> sqlite3.Connection:
+    stt = _SETTINGS_STATE
+    if stt["conn"] is None or stt["path"] != config.DB_PATH:
+        if stt["conn"] is not None:
+            try:
+                stt["conn"].close()
+            except Exception:
+                pass
+        stt["conn"] = sqlite3.connect(config.DB_PATH, check_same_thread=False)
+        stt["path"] = config.DB_PATH
+        stt["values"] = None
+    return stt["conn"]
+
+def _notify_setting_change(old: Optional[Dict[str, str]], new: Dict[str, str]) -> None:
+    if old is None or not _SETTINGS_LISTENERS:
+        return
+    changed = {k for k in set(old) | set(new) if old.get(k) != new.get(k)}
+    if not changed:
+        return
+    for cb in list(_SETTINGS_LISTENERS):
+        try:
+            cb(changed)
+        except Exception:
+            pass
+
+def _settings_reload(conn: sqlite3.Connection) -> None:
+    stt = _SETTINGS_STATE
+    old = stt["values"]
+    try:
+        rows = conn.execute("SELECT key, value FROM app_settings").fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # table not created yet (before ensure_db)
+    new = {k: v for k, v in rows}
+    stt["values"] = new
+    stt["data_version"] = conn.execute("PRAGMA data_version").fetchone()[0]
+    _notify_setting_change(old, new)
+
+def _settings_snapshot() -> Dict[str, str]:
+    stt = _SETTINGS_STATE
+    values = stt["values"]
+    if values is not None and stt["path"] == config.DB_PATH and time.monotonic() < stt["next_check"]:
+        return values
+    with _SETTINGS_LOCK:
+        conn = _settings_conn()
+        if stt["values"] is None:
+            _settings_reload(conn)
+        else:
+            dv = conn.execute("PRAGMA data_version").fetchone()[0]
+            if dv != stt["data_version"]:
+                _settings_reload(conn)
+        stt["next_check"] = time.monotonic() + SETTINGS_RECHECK_SECONDS
+        return stt["values"]
+
+def invalidate_settings_cache(reopen: bool = False) -> None:
+    """Force a reload on next read; reopen=True also drops the watcher connection (after a DB file swap)."""
+    with _SETTINGS_LOCK:
+        stt = _SETTINGS_STATE
+        stt["next_check"] = 0.0
+        stt["data_version"] = None
+        if reopen and stt["conn"] is not None:
+            try:
+                stt["conn"].close()
+            except Exception:
+                pass
+            stt["conn"] = None
+            stt["values"] = None
+
+on_table_write("app_settings", invalidate_settings_cache)
+
+_DB_REPLACE_LISTENERS: List[Callable[[], None]] = []
+
+def on_db_file_replace(callback: Callable[[], None]) -> None:
+    """Register a callback that must drop its long-lived connection before a DB file swap."""
+    _DB_REPLACE_LISTENERS.append(callback)
+
+def prepare_db_file_replace() -> None:
+    """Call before overwriting the DB file: close long-lived connections, flush the WAL
+    into the main file and restart the PITR chain (the next shipping round uploads a fresh base)."""
+    invalidate_settings_cache(reopen=True)
+    for cb in list(_DB_REPLACE_LISTENERS):
+        try:
+            cb()
+        except Exception:
+            pass
+    try:
+        conn = sqlite3.connect(config.DB_PATH, timeout=30)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        finally:
+            conn.close()
+    except Exception:
+        pass
+    try:
+        os.remove(config.DB_PATH + ".pitr.json")
+    except OSError:
+        pass
+
+def _setting_get(key: str, default: Optional[str] = None) -> Optional[str]:
+    try:
+        values = _settings_snapshot()
+        return values[key] if key in values else default
+    except Exception:
+        return default
+
+def _setting_set(key: str, value: str) -> None:
+    try:
+        with _SETTINGS_LOCK:
+            # Write on the watcher connection: own commits do not bump its data_version,
+            # so the write-through value stays valid without a reload.
+            conn = _settings_conn()
+            if _SETTINGS_STATE["values"] is None:
+                _settings_reload(conn)
+            conn.execute("INSERT INTO app_settings (key,value) VALUES (?,?) ON CONFLICT(key) DO UPDATE SET value=excluded.value", (key, str(value)))
+            conn.commit()
+            old = _SETTINGS_STATE["values"]
+            new = dict(old)
+            new[key] = str(value)
+            _SETTINGS_STATE["values"] = new
+            _notify_setting_change(old, new)
+    except Exception:
+        return
+    try:
+        audit_log("app_settings", "update", target=key)
+    except Exception:
+        pass
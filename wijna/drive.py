@@ -0,0 +1,623 @@
+"""Google Drive helpers (service account)."""
+import importlib.util
+import io
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional, Dict, List
+
+from wijna import config
+from wijna.config import get_secret
+from wijna.startup import LazyModule
+
+# Google API client is imported on first Drive use (keeps it off the cold-start path);
+# availability is checked without importing it.
+try:
+    _GDRIVE_AVAILABLE = all(importlib.util.find_spec(m) is not None for m in ("google.oauth2", "googleapiclient"))
+except Exception:
+    _GDRIVE_AVAILABLE = False
+service_account = LazyModule("google.oauth2.service_account")
+_discovery = LazyModule("googleapiclient.discovery")
+_http = LazyModule("googleapiclient.http")
+
+def _drive_available() -> bool:
+    return bool(_GDRIVE_AVAILABLE)
+
+# Credentials are parsed once per process; the discovery client is cached per thread
+# because googleapiclient/httplib2 objects must not be shared across threads.
+_CREDS_CACHE: Dict = {"key": None, "creds": None}
+_CREDS_LOCK = threading.Lock()
+_SERVICE_LOCAL = threading.local()
+
+def _build_drive():
+    if not _GDRIVE_AVAILABLE:
+        raise RuntimeError("Google API packages not installed.")
+    creds_info = get_secret("service_account")
+    if not creds_info:
+        raise RuntimeError("Secrets service_account tidak tersedia.")
+    key = json.dumps(dict(creds_info), sort_keys=True, default=str)
+    with _CREDS_LOCK:
+        if _CREDS_CACHE["key"] != key:
+            scopes = ["https://www.googleapis.com/auth/drive"]
+            _CREDS_CACHE["creds"] = service_account.Credentials.from_service_account_info(dict(creds_info), scopes=scopes)
+            _CREDS_CACHE["key"] = key
+        creds = _CREDS_CACHE["creds"]
+    cached = getattr(_SERVICE_LOCAL, "entry", None)
+    if cached and cached[0] is creds:
+        return cached[1]
+    svc = _discovery.build("drive", "v3", credentials=creds, cache_discovery=False)
+    _SERVICE_LOCAL.entry = (creds, svc)
+    return svc
+
+_FILE_FIELDS = "id,name,mimeType,modifiedTime,size"
+
+def _drive_list_full(service, folder_id: str) -> List[Dict]:
+    res = []
+    token = None
+    q = f"'{folder_id}' in parents and trashed=false"
+    while True:
+        resp = _execute(service.files().list(q=q, spaces="drive", fields=f"nextPageToken, files({_FILE_FIELDS})", pageToken=token, supportsAllDrives=True, includeItemsFromAllDrives=True, pageSize=200), "list", folder_id)
+        res.extend(resp.get("files", []))
+        token = resp.get("nextPageToken")
+        if not token:
+            break
+    return res
+
+# --- Local mirror of Drive folders (tabel drive_files) ---
+# Listing, pemakaian & pencarian adalah query lokal berindeks. Helper upload/hapus di
+# modul ini memperbarui mirror langsung; rekonsiliasi lewat changes.list (token di
+# drive_sync_state) paling cepat tiap DRIVE_MANIFEST_TTL detik, dan listing penuh bila
+# belum ada token atau listing penuh terakhir lebih tua dari DRIVE_FULL_SYNC_HOURS.
+DRIVE_MANIFEST_TTL = 60.0
+DRIVE_FULL_SYNC_HOURS = 24
+_MIRROR_LOCK = threading.Lock()  # guards the dicts below only, never held across Drive calls
+_MIRROR_CHECKED: Dict[str, float] = {}
+_MIRROR_EPOCH: Dict[str, int] = {}  # bumped by invalidate_drive_manifest
+_MIRROR_SYNC_LOCKS: Dict[str, threading.Lock] = {}
+
+def _mirror_conn() -> sqlite3.Connection:
+    conn = sqlite3.connect(config.DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+# --- Resilience: every Drive request goes through _execute ---
+# Token bucket per proses (semua sesi & thread berbagi kuota Drive) + backoff eksponensial
+# dengan full jitter untuk 429/5xx/403 rateLimitExceeded dan error jaringan. Kegagalan
+# akhir dicatat di tabel drive_errors agar penyebab fallback BLOB terlihat.
+DRIVE_REQUESTS_PER_SECOND = 8.0
+DRIVE_RATE_BURST = 16
+DRIVE_MAX_ATTEMPTS = 6
+DRIVE_BACKOFF_BASE = 0.5
+DRIVE_BACKOFF_CAP = 32.0
+DRIVE_BATCH_SIZE = 100  # batas Drive per batch request
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+_RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+class _RateLimiter:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, n: int = 1) -> None:
+        n = min(float(n), self.burst)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+_LIMITER = _RateLimiter(DRIVE_REQUESTS_PER_SECOND, DRIVE_RATE_BURST)
+
+def drive_error_status(e: BaseException) -> Optional[int]:
+    """HTTP status of a googleapiclient HttpError (None for other errors)."""
+    try:
+        return int(e.resp.status)  # type: ignore[attr-defined]
+    except Exception:
+        return None
+
+def _is_retryable(e: BaseException) -> bool:
+    status = drive_error_status(e)
+    if status is None:
+        return isinstance(e, (ConnectionError, TimeoutError, socket.timeout)) or type(e).__name__ in ("ServerNotFoundError", "SSLError")
+    if status in _RETRY_STATUSES:
+        return True
+    if status == 403:
+        content = getattr(e, "content", b"") or b""
+        text = content.decode("utf-8", "replace") if isinstance(content, bytes) else str(content)
+        return any(r in text for r in _RATE_LIMIT_REASONS)
+    return False
+
+def _error_reason(e: BaseException) -> str:
+    status = drive_error_status(e)
+    if status is not None:
+        try:
+            detail = json.loads(e.content.decode("utf-8"))["error"]["message"]  # type: ignore[attr-defined]
+        except Exception:
+            detail = getattr(e, "reason", "") or str(e)
+        return f"HTTP {status}: {detail}"[:500]
+    return f"{type(e).__name__}: {e}"[:500]
+
+def _backoff_sleep(attempt: int) -> None:
+    time.sleep(random.uniform(0, min(DRIVE_BACKOFF_CAP, DRIVE_BACKOFF_BASE * (2 ** attempt))))
+
+def _record_drive_error(op: str, target: Optional[str], e: BaseException, attempts: int) -> None:
+    if drive_error_status(e) == 404 or getattr(e, "_drive_recorded", False):
+        return  # 404 is expected for already-deleted files; callers decide
+    try:
+        e._drive_recorded = True  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    try:
+        conn = _mirror_conn()
+        try:
+            conn.execute("INSERT INTO drive_errors (op, target, status, reason, attempts) VALUES (?,?,?,?,?)",
+                         (op, target, drive_error_status(e), _error_reason(e), attempts))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception:
+        pass
+
+def _execute(request, op: str = "request", target: Optional[str] = None):
+    """request.execute() behind the rate limiter, retried with jittered exponential backoff."""
+    for attempt in range(DRIVE_MAX_ATTEMPTS):
+        _LIMITER.acquire()
+        try:
+            return request.execute()
+        except Exception as e:
+            if not _is_retryable(e) or attempt == DRIVE_MAX_ATTEMPTS - 1:
+                _record_drive_error(op, target, e, attempt + 1)
+                raise
+            _backoff_sleep(attempt)
+
+def _execute_batch(service, requests: Dict[str, object], op: str) -> Dict[str, tuple]:
+    """Run {key: request} as BatchHttpRequests of DRIVE_BATCH_SIZE; sub-requests that fail
+    with a retryable error are re-batched with backoff. Returns {key: (response, error)}."""
+    results: Dict[str, tuple] = {}
+    pending = dict(requests)
+    for attempt in range(DRIVE_MAX_ATTEMPTS):
+        if not pending:
+            break
+        if attempt:
+            _backoff_sleep(attempt - 1)
+        retry: Dict[str, object] = {}
+        keys = list(pending)
+        for i in range(0, len(keys), DRIVE_BATCH_SIZE):
+            chunk = keys[i:i + DRIVE_BATCH_SIZE]
+
+            def _cb(request_id, response, exception):
+                results[request_id] = (response, exception)
+                if exception is not None and _is_retryable(exception):
+                    retry[request_id] = pending[request_id]
+            batch = service.new_batch_http_request(callback=_cb)
+            for k in chunk:
+                batch.add(pending[k], request_id=k)
+            _LIMITER.acquire(len(chunk))
+            try:
+                batch.execute()
+            except Exception as e:
+                for k in chunk:
+                    results[k] = (None, e)
+                    if _is_retryable(e):
+                        retry[k] = pending[k]
+        pending = retry
+    for k, (_, err) in results.items():
+        if err is not None:
+            _record_drive_error(op, k, err, DRIVE_MAX_ATTEMPTS if k in pending else 1)
+    return results
+
+def drive_get_many(service, fids: List[str], fields: str = _FILE_FIELDS) -> Dict[str, Optional[Dict]]:
+    """Batched files.get; value None when the file is missing or the lookup failed."""
+    reqs = {fid: service.files().get(fileId=fid, fields=fields, supportsAllDrives=True) for fid in dict.fromkeys(fids)}
+    return {k: (resp if err is None else None) for k, (resp, err) in _execute_batch(service, reqs, "get").items()}
+
+def drive_delete_many(service, fids: List[str]) -> Dict[str, Optional[BaseException]]:
+    """Batched files.delete; value None when deleted (404 counts as already deleted)."""
+    reqs = {fid: service.files().delete(fileId=fid, supportsAllDrives=True) for fid in dict.fromkeys(fids)}
+    out = {k: (None if err is None or drive_error_status(err) == 404 else err)
+           for k, (_, err) in _execute_batch(service, reqs, "delete").items()}
+    gone = [(k,) for k, err in out.items() if err is None]
+    if gone:
+        try:
+            conn = _mirror_conn()
+            try:
+                conn.executemany("DELETE FROM drive_files WHERE id=?", gone)
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception:
+            pass
+    return out
+
+def drive_trash_many(service, fids: List[str], trashed: bool = True) -> Dict[str, Optional[BaseException]]:
+    """Batched move to (or out of) the Drive trash; value None on success."""
+    reqs = {fid: service.files().update(fileId=fid, body={"trashed": trashed}, fields="id", supportsAllDrives=True) for fid in dict.fromkeys(fids)}
+    out = {k: err for k, (_, err) in _execute_batch(service, reqs, "trash" if trashed else "untrash").items()}
+    if trashed:
+        gone = [(k,) for k, err in out.items() if err is None]
+        if gone:
+            try:
+                conn = _mirror_conn()
+                try:
+                    conn.executemany("DELETE FROM drive_files WHERE id=?", gone)
+                    conn.commit()
+                finally:
+                    conn.close()
+            except Exception:
+                pass
+    return out
+
+def drive_last_errors(limit: int = 20) -> List[Dict]:
+    """Most recent final Drive failures (after retries), newest first."""
+    conn = _mirror_conn()
+    try:
+        return [dict(r) for r in conn.execute("SELECT op, target, status, reason, attempts, created_at FROM drive_errors ORDER BY id DESC LIMIT ?", (limit,))]
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+
+def _drive_time_now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+def _mirror_upsert(conn, folder_id: str, f: Dict, ref_module: Optional[str] = None, ref_id: Optional[str] = None) -> None:
+    size = f.get('size')
+    conn.execute(
+        "INSERT INTO drive_files (id, folder_id, name, size_bytes, mime_type, modified_time, ref_module, ref_id, synced_at) "
+        "VALUES (?,?,?,?,?,?,?,?,CURRENT_TIMESTAMP) ON CONFLICT(id) DO UPDATE SET folder_id=excluded.folder_id, name=excluded.name, "
+        "size_bytes=excluded.size_bytes, mime_type=excluded.mime_type, modified_time=excluded.modified_time, "
+        "ref_module=COALESCE(excluded.ref_module, drive_files.ref_module), ref_id=COALESCE(excluded.ref_id, drive_files.ref_id), synced_at=excluded.synced_at",
+        (f['id'], folder_id, f.get('name'), int(size) if size is not None else None, f.get('mimeType'), f.get('modifiedTime'), ref_module, ref_id))
+
+def _mirror_record_upload(folder_id: str, fid: str, name: str, size: Optional[int], mimetype: str, ref_module: Optional[str] = None) -> None:
+    try:
+        conn = _mirror_conn()
+        try:
+            _mirror_upsert(conn, folder_id, {"id": fid, "name": name, "size": size, "mimeType": mimetype, "modifiedTime": _drive_time_now()}, ref_module)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception:
+        pass
+
+def _link_drive_refs(conn) -> None:
+    """Fill ref_module/ref_id from the module columns that store Drive links."""
+    from wijna.db import DRIVE_URL_COLUMNS
+    for table, cols in DRIVE_URL_COLUMNS.items():
+        for col in cols:
+            try:
+                rows = conn.execute(f'SELECT id, "{col}" FROM "{table}" WHERE "{col}" IS NOT NULL AND "{col}" != \'\'').fetchall()
+            except sqlite3.OperationalError:
+                continue
+            for row_id, url in rows:
+                fid = _drive_id_from_url(url)
+                if fid:
+                    conn.execute("UPDATE drive_files SET ref_module=?, ref_id=? WHERE id=?", (table, str(row_id), fid))
+    try:
+        conn.execute("UPDATE drive_files SET ref_module='backup_manifest', ref_id=(SELECT CAST(m.id AS TEXT) FROM backup_manifest m WHERE m.drive_file_id=drive_files.id) "
+                     "WHERE id IN (SELECT drive_file_id FROM backup_manifest)")
+    except sqlite3.OperationalError:
+        pass
+
+def _fetch_drive_changes(service, folder_id: str, token: str):
+    """All pending changes since `token` (network only); returns (changes, new token)."""
+    changes = []
+    while True:
+        resp = _execute(service.changes().list(pageToken=token, spaces="drive", supportsAllDrives=True, includeItemsFromAllDrives=True, pageSize=1000,
+                                      fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({_FILE_FIELDS},parents,trashed))"), "changes", folder_id)
+        changes.extend(resp.get("changes", []))
+        if resp.get("newStartPageToken"):
+            return changes, resp["newStartPageToken"]
+        token = resp.get("nextPageToken")
+
+def _apply_drive_changes(conn, folder_id: str, changes) -> None:
+    for ch in changes:
+        f = ch.get("file") or {}
+        if ch.get("removed") or f.get("trashed") or folder_id not in (f.get("parents") or []):
+            conn.execute("DELETE FROM drive_files WHERE id=? AND folder_id=?", (ch.get("fileId"), folder_id))
+        else:
+            _mirror_upsert(conn, folder_id, f)
+
+def _mirror_fresh(folder_id: str, max_age: float) -> bool:
+    last = _MIRROR_CHECKED.get(folder_id)
+    return last is not None and time.monotonic() - last <= max_age
+
+def _sync_drive_mirror(service, folder_id: str, max_age: float = DRIVE_MANIFEST_TTL) -> None:
+    """Reconcile one folder. Drive is queried without holding any DB write transaction, and
+    only this folder's sync lock is taken; while another thread syncs the folder, readers of
+    a merely expired mirror serve the cached rows instead of waiting (invalidated folders
+    and max_age=0 wait)."""
+    if _mirror_fresh(folder_id, max_age):
+        return
+    with _MIRROR_LOCK:
+        lock = _MIRROR_SYNC_LOCKS.setdefault(folder_id, threading.Lock())
+        seen = folder_id in _MIRROR_CHECKED  # merely expired, not invalidated
+    if not lock.acquire(blocking=max_age <= 0 or not seen):
+        return
+    try:
+        if _mirror_fresh(folder_id, max_age):
+            return
+        started = time.monotonic()
+        epoch = _MIRROR_EPOCH.get(folder_id, 0)
+        conn = _mirror_conn()
+        try:
+            row = conn.execute("SELECT page_token, full_sync_at < datetime('now', ?) AS full_due FROM drive_sync_state WHERE folder_id=?",
+                               (f"-{DRIVE_FULL_SYNC_HOURS} hours", folder_id)).fetchone()
+            token = row["page_token"] if row else None
+            full = not token or bool(row["full_due"])
+            changes = files = None
+            if not full:
+                try:
+                    changes, token = _fetch_drive_changes(service, folder_id, token)
+                except Exception:
+                    full = True
+            if full:
+                # Token taken before listing so nothing changed in between is missed
+                try:
+                    token = _execute(service.changes().getStartPageToken(supportsAllDrives=True), "changes", folder_id).get("startPageToken")
+                except Exception:
+                    token = None
+                files = _drive_list_full(service, folder_id)
+            # Network done: apply everything in one short transaction
+            if files is not None:
+                listed = {f["id"] for f in files}
+                stale = [r[0] for r in conn.execute("SELECT id FROM drive_files WHERE folder_id=?", (folder_id,)) if r[0] not in listed]
+                conn.executemany("DELETE FROM drive_files WHERE id=?", [(i,) for i in stale])
+                for f in files:
+                    _mirror_upsert(conn, folder_id, f)
+                _link_drive_refs(conn)
+            else:
+                _apply_drive_changes(conn, folder_id, changes)
+            conn.execute("INSERT INTO drive_sync_state (folder_id, page_token, full_sync_at, synced_at) VALUES (?,?,CURRENT_TIMESTAMP,CURRENT_TIMESTAMP) "
+                         "ON CONFLICT(folder_id) DO UPDATE SET page_token=excluded.page_token, synced_at=excluded.synced_at"
+                         + (", full_sync_at=excluded.full_sync_at" if full else ""), (folder_id, token))
+            conn.commit()
+        finally:
+            conn.close()
+        with _MIRROR_LOCK:
+            # An invalidation during the sync may not be reflected yet: leave the folder stale
+            if _MIRROR_EPOCH.get(folder_id, 0) == epoch:
+                _MIRROR_CHECKED[folder_id] = started
+    finally:
+        lock.release()
+
+def _drive_list(service, folder_id: str, max_age: float = DRIVE_MANIFEST_TTL, name_query: Optional[str] = None) -> List[Dict]:
+    """Files in `folder_id` from the local mirror (reconciled when older than max_age).
+    name_query memfilter nama (LIKE, tanpa beda huruf besar/kecil)."""
+    _sync_drive_mirror(service, folder_id, max_age)
+    sql = "SELECT id, name, mime_type, modified_time, size_bytes, ref_module, ref_id FROM drive_files WHERE folder_id=?"
+    params: list = [folder_id]
+    if name_query:
+        sql += " AND name LIKE ? ESCAPE '\\'"
+        params.append("%" + name_query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+    conn = _mirror_conn()
+    try:
+        rows = conn.execute(sql + " ORDER BY name", params).fetchall()
+    finally:
+        conn.close()
+    return [{"id": r["id"], "name": r["name"], "mimeType": r["mime_type"], "modifiedTime": r["modified_time"],
+             "size": str(r["size_bytes"]) if r["size_bytes"] is not None else None,
+             "ref_module": r["ref_module"], "ref_id": r["ref_id"]} for r in rows]
+
+def drive_find_by_name(service, folder_id: str, name: str) -> Optional[Dict]:
+    """Exact-name lookup on the mirror (indexed on folder_id, name)."""
+    _sync_drive_mirror(service, folder_id)
+    conn = _mirror_conn()
+    try:
+        r = conn.execute("SELECT id, name, size_bytes FROM drive_files WHERE folder_id=? AND name=? ORDER BY modified_time DESC LIMIT 1", (folder_id, name)).fetchone()
+    finally:
+        conn.close()
+    return dict(r) if r else None
+
+def invalidate_drive_manifest(folder_id: Optional[str] = None, full: bool = False) -> None:
+    """Reconcile on the next read; full=True forces a complete relisting."""
+    with _MIRROR_LOCK:
+        for k in ([folder_id] if folder_id else list(set(_MIRROR_CHECKED) | set(_MIRROR_SYNC_LOCKS))):
+            _MIRROR_CHECKED.pop(k, None)
+            _MIRROR_EPOCH[k] = _MIRROR_EPOCH.get(k, 0) + 1
+        if full:
+            try:
+                conn = _mirror_conn()
+                try:
+                    if folder_id:
+                        conn.execute("UPDATE drive_sync_state SET page_token=NULL WHERE folder_id=?", (folder_id,))
+                    else:
+                        conn.execute("UPDATE drive_sync_state SET page_token=NULL")
+                    conn.commit()
+                finally:
+                    conn.close()
+            except Exception:
+                pass
+
+DRIVE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # harus kelipatan 256 KB
+DRIVE_UPLOAD_RETRIES = 5
+
+def _resumable_upload(service, folder_id: str, name: str, media, size: Optional[int], mimetype: str,
+                      num_retries: int, ref_module: Optional[str], replace: bool) -> Optional[str]:
+    """Send `media` chunk by chunk. next_chunk(num_retries) retries each chunk on 5xx/429
+    with exponential backoff and resumes from the last acknowledged offset.
+    replace=False skips the name lookup (caller guarantees a unique name)."""
+    existing = []
+    if replace:
+        q = f"name='{name}' and '{folder_id}' in parents and trashed=false"
+        resp = _execute(service.files().list(q=q, spaces='drive', fields='files(id)', supportsAllDrives=True, includeItemsFromAllDrives=True), "list", name)
+        existing = resp.get('files', [])
+    if existing:
+        req = service.files().update(fileId=existing[0]['id'], media_body=media, fields='id', supportsAllDrives=True)
+    else:
+        meta = {"name": name, "parents": [folder_id]}
+        req = service.files().create(body=meta, media_body=media, fields='id', supportsAllDrives=True)
+    done = None
+    while done is None:
+        _LIMITER.acquire()
+        _, done = req.next_chunk(num_retries=num_retries)
+    fid = done.get('id')
+    if fid:
+        _mirror_record_upload(folder_id, fid, name, size, mimetype, ref_module)
+    return fid
+
+def _drive_upload_stream(service, folder_id: str, name: str, fh, mimetype: str = "application/octet-stream",
+                         chunksize: int = DRIVE_UPLOAD_CHUNK_SIZE, num_retries: int = DRIVE_UPLOAD_RETRIES,
+                         ref_module: Optional[str] = None, replace: bool = True) -> Optional[str]:
+    """Upload from a seekable file object (e.g. Streamlit UploadedFile) without copying it;
+    memori tambahan per upload sebesar satu chunk."""
+    try:
+        fh.seek(0, io.SEEK_END)
+        size = fh.tell()
+        fh.seek(0)
+        media = _http.MediaIoBaseUpload(fh, mimetype=mimetype, chunksize=chunksize, resumable=True)
+        return _resumable_upload(service, folder_id, name, media, size, mimetype, num_retries, ref_module, replace)
+    except Exception as e:
+        _record_drive_error("upload", name, e, num_retries + 1)
+        return None
+
+# Bounded pool shared by all sessions for multi-attachment submissions. Each worker
+# thread reuses its own cached client from _build_drive() (clients are not thread-safe).
+DRIVE_UPLOAD_WORKERS = 4
+_UPLOAD_POOL_LOCK = threading.Lock()
+_UPLOAD_POOL: Optional[ThreadPoolExecutor] = None
+
+def _upload_pool() -> ThreadPoolExecutor:
+    global _UPLOAD_POOL
+    with _UPLOAD_POOL_LOCK:
+        if _UPLOAD_POOL is None:
+            _UPLOAD_POOL = ThreadPoolExecutor(max_workers=DRIVE_UPLOAD_WORKERS, thread_name_prefix="wijna-upload")
+        return _UPLOAD_POOL
+
+def _upload_one(folder_id: str, name: str, fh, mimetype: str, ref_module: Optional[str]) -> Optional[str]:
+    return _drive_upload_stream(_build_drive(), folder_id, name, fh, mimetype=mimetype, ref_module=ref_module, replace=False)
+
+def drive_upload_many(folder_id: str, items: List[tuple]) -> List[Optional[str]]:
+    """Upload (unique_name, file_obj, mimetype, ref_module) items concurrently.
+    Returns file ids in input order; a failed item yields None without affecting the others."""
+    if len(items) == 1:
+        try:
+            return [_upload_one(folder_id, *items[0])]
+        except Exception:
+            return [None]
+    futures = [_upload_pool().submit(_upload_one, folder_id, *it) for it in items]
+    out: List[Optional[str]] = []
+    for fut in futures:
+        try:
+            out.append(fut.result())
+        except Exception:
+            out.append(None)
+    return out
+
+def _drive_upload_or_replace(service, folder_id: str, name: str, data: bytes, mimetype: str = "application/octet-stream",
+                             ref_module: Optional[str] = None) -> Optional[str]:
+    return _drive_upload_stream(service, folder_id, name, io.BytesIO(data), mimetype=mimetype, ref_module=ref_module)
+
+def _drive_upload_file(service, folder_id: str, name: str, path: str, mimetype: str = "application/octet-stream",
+                       chunksize: int = DRIVE_UPLOAD_CHUNK_SIZE, num_retries: int = DRIVE_UPLOAD_RETRIES,
+                       ref_module: Optional[str] = None, replace: bool = True) -> Optional[str]:
+    """Upload a file from disk in resumable chunks (replace when the name exists).
+    Memori tetap sebesar satu chunk; chunk yang gagal diulang dari offset terakhir.
+    """
+    media = _http.MediaFileUpload(path, mimetype=mimetype, chunksize=chunksize, resumable=True)
+    try:
+        return _resumable_upload(service, folder_id, name, media, os.path.getsize(path), mimetype, num_retries, ref_module, replace)
+    except Exception as e:
+        _record_drive_error("upload", name, e, num_retries + 1)
+        return None
+    finally:
+        try:
+            media.stream().close()
+        except Exception:
+            pass
+
+def _drive_download(service, fid: str, num_retries: int = 3) -> bytes:
+    req = service.files().get_media(fileId=fid)
+    buf = io.BytesIO()
+    dl = _http.MediaIoBaseDownload(buf, req)
+    done = False
+    try:
+        while not done:
+            _LIMITER.acquire()
+            _, done = dl.next_chunk(num_retries=num_retries)
+    except Exception as e:
+        _record_drive_error("download", fid, e, num_retries + 1)
+        raise
+    buf.seek(0)
+    return buf.read()
+
+DRIVE_DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+def _drive_download_to_file(service, fid: str, path: str, chunksize: int = DRIVE_DOWNLOAD_CHUNK_SIZE, num_retries: int = 3) -> int:
+    """Stream a Drive file to `path` chunk by chunk; returns the byte count."""
+    req = service.files().get_media(fileId=fid)
+    with open(path, 'wb') as fh:
+        dl = _http.MediaIoBaseDownload(fh, req, chunksize=chunksize)
+        done = False
+        try:
+            while not done:
+                _LIMITER.acquire()
+                _, done = dl.next_chunk(num_retries=num_retries)
+        except Exception as e:
+            _record_drive_error("download", fid, e, num_retries + 1)
+            raise
+        return fh.tell()
+
+def _drive_delete(service, fid: str) -> None:
+    _execute(service.files().delete(fileId=fid, supportsAllDrives=True), "delete", fid)
+    try:
+        conn = _mirror_conn()
+        try:
+            conn.execute("DELETE FROM drive_files WHERE id=?", (fid,))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception:
+        pass
+
+def _bytes_fmt(n: int) -> str:
+    try:
+        n = int(n)
+    except Exception:
+        return "-"
+    units = ["B","KB","MB","GB","TB"]
+    size = float(n)
+    for u in units:
+        if size < 1024 or u == units[-1]:
+            return (f"{int(size)} {u}" if u == "B" else f"{size:.2f} {u}")
+        size /= 1024
+
+def _drive_id_from_url(url: Optional[str]) -> Optional[str]:
+    """Extract Google Drive file ID from a typical share/view URL."""
+    if not url:
+        return None
+    try:
+        # common format: https://drive.google.com/file/d/<ID>/view?...
+        if "/file/d/" in url:
+            part = url.split("/file/d/")[-1]
+            return part.split("/")[0]
+        # ?id=<ID>
+        if "id=" in url:
+            return url.split("id=")[-1].split("&")[0]
+    except Exception:
+        return None
+    return None
+
+def _folder_usage_quick(service, folder_id: str) -> Dict:
+    _sync_drive_mirror(service, folder_id)
+    conn = _mirror_conn()
+    try:
+        total, count, unknown = conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0), COUNT(*), COUNT(*) - COUNT(size_bytes) FROM drive_files WHERE folder_id=?", (folder_id,)).fetchone()
+    finally:
+        conn.close()
+    return {"total_bytes": int(total), "file_count": int(count), "unknown_size_count": int(unknown)}
@@ -0,0 +1,123 @@
+"""Size-bounded on-disk LRU cache for Drive file downloads.
+
+Kunci cache = (drive file id, modifiedTime): file yang diganti di Drive otomatis mendapat
+entri baru. Waktu akses dicatat lewat mtime file cache; bila total melebihi anggaran
+(setting 'drive_cache_max_bytes') entri yang paling lama tidak dipakai dihapus.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from typing import BinaryIO, Dict, Optional
+
+from wijna import config
+from wijna.db import _setting_get
+from wijna.drive import _drive_download_to_file, _execute, _mirror_conn
+
+DRIVE_CACHE_DEFAULT_BYTES = 512 * 1024 * 1024
+
+_KEY_LOCKS: Dict[str, threading.Lock] = {}
+_KEY_LOCKS_GUARD = threading.Lock()
+_EVICT_LOCK = threading.Lock()
+
+def drive_cache_dir() -> str:
+    d = _setting_get('drive_cache_dir', '') or os.path.join(os.path.dirname(os.path.abspath(config.DB_PATH)), ".drive_cache")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+def drive_cache_budget() -> int:
+    try:
+        return max(0, int(_setting_get('drive_cache_max_bytes', str(DRIVE_CACHE_DEFAULT_BYTES)) or DRIVE_CACHE_DEFAULT_BYTES))
+    except Exception:
+        return DRIVE_CACHE_DEFAULT_BYTES
+
+def _key_lock(key: str) -> threading.Lock:
+    with _KEY_LOCKS_GUARD:
+        return _KEY_LOCKS.setdefault(key, threading.Lock())
+
+def _modified_time(service, fid: str) -> str:
+    """modifiedTime from the local Drive mirror, falling back to files.get."""
+    try:
+        conn = _mirror_conn()
+        try:
+            r = conn.execute("SELECT modified_time FROM drive_files WHERE id=?", (fid,)).fetchone()
+        finally:
+            conn.close()
+        if r and r[0]:
+            return r[0]
+    except Exception:
+        pass
+    meta = _execute(service.files().get(fileId=fid, fields="modifiedTime", supportsAllDrives=True), "get", fid)
+    return meta.get("modifiedTime") or ""
+
+def _entries(d: str):
+    out = []
+    for name in os.listdir(d):
+        if not name.endswith(".bin"):
+            continue
+        try:
+            stt = os.stat(os.path.join(d, name))
+        except OSError:
+            continue
+        out.append((stt.st_mtime, stt.st_size, name))
+    return out
+
+def _evict(d: str, keep: str) -> None:
+    budget = drive_cache_budget()
+    with _EVICT_LOCK:
+        entries = _entries(d)
+        total = sum(e[1] for e in entries)
+        for _, size, name in sorted(entries):  # least recently used first
+            if total <= budget:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(os.path.join(d, name))
+                total -= size
+            except OSError:
+                pass
+
+def open_cached_download(service, fid: str, modified_time: Optional[str] = None) -> BinaryIO:
+    """Open the Drive file `fid` from the cache (downloaded once per (id, modifiedTime)).
+    Handle dibuka sebelum penggusuran sehingga tetap valid walau entrinya tergusur."""
+    mtime = modified_time or _modified_time(service, fid)
+    key = hashlib.sha1(f"{fid}:{mtime}".encode("utf-8")).hexdigest()
+    d = drive_cache_dir()
+    name = key + ".bin"
+    path = os.path.join(d, name)
+    with _key_lock(key):
+        if os.path.exists(path):
+            os.utime(path, None)  # mark as recently used
+        else:
+            fd, tmp = tempfile.mkstemp(prefix=key, suffix=".part", dir=d)
+            os.close(fd)
+            try:
+                _drive_download_to_file(service, fid, tmp)
+                os.replace(tmp, path)
+            except Exception:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+        fh = open(path, "rb")
+    _evict(d, keep=name)
+    return fh
+
+def drive_cache_usage() -> Dict:
+    entries = _entries(drive_cache_dir())
+    return {"bytes": sum(e[1] for e in entries), "files": len(entries), "budget": drive_cache_budget()}
+
+def clear_drive_cache() -> int:
+    """Remove every cached file; returns the number removed."""
+    d = drive_cache_dir()
+    n = 0
+    with _EVICT_LOCK:
+        for _, _, name in _entries(d):
+            try:
+                os.remove(os.path.join(d, name))
+                n += 1
+            except OSError:
+                pass
+    return n
@@ -0,0 +1 @@
+"""Halaman Streamlit per modul bisnis; app.py hanya melakukan routing ke fungsi di sini."""
@@ -0,0 +1,77 @@
+"""Audit Trail: log aktivitas dan penghapusan file (Director/Superuser)."""
+from datetime import date, timedelta
+from typing import List
+
+import streamlit as st
+
+from wijna.db import get_db
+from wijna.ui import require_login
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def audit_trail_module():
+    user = require_login()
+    # Hanya Director dan Superuser yang bisa akses Audit Trail
+    if user.get("role") not in ["director", "superuser"]:
+        st.warning("⚠️ Anda tidak memiliki akses ke Audit Trail. Hanya Director dan Superuser.")
+        return
+    st.header("🕵️ Audit Trail / Log Aktivitas")
+    conn = get_db()
+    cur = conn.cursor()
+    # Simple filters for Activity view (audit_logs)
+    st.markdown("#### Activity")
+    c1, c2 = st.columns(2)
+    with c1:
+        date_min = st.date_input("Dari tanggal", value=date.today() - timedelta(days=7))
+    with c2:
+        date_max = st.date_input("Sampai tanggal", value=date.today())
+    q = st.text_input("Cari (Nama/Action/Detail)", "")
+
+    # Load from audit_logs with basic range filter
+    try:
+        params: List = []
+        # Join to users to show Full Name before email in Nama User column
+        query = (
+            "SELECT "
+            "CASE WHEN u.full_name IS NOT NULL AND TRIM(u.full_name) <> '' "
+            "THEN u.full_name || ' (' || a.user_email || ')' "
+            "ELSE a.user_email END AS nama_user, "
+            "a.timestamp AS tanggal, a.action, a.details "
+            "FROM audit_logs a "
+            "LEFT JOIN users u ON lower(u.email) = lower(a.user_email) "
+            "WHERE 1=1"
+        )
+        if date_min:
+            query += " AND date(a.timestamp) >= date(?)"
+            params.append(date_min.isoformat())
+        if date_max:
+            query += " AND date(a.timestamp) <= date(?)"
+            params.append(date_max.isoformat())
+        query += " ORDER BY a.timestamp DESC"
+        df = pd.read_sql_query(query, conn, params=params)
+    except Exception:
+        df = pd.DataFrame(columns=["nama_user","tanggal","action","details"])
+
+    # Quick search filter
+    if q and not df.empty:
+        ql = q.lower()
+        def _has(x):
+            try:
+                return ql in str(x).lower()
+            except Exception:
+                return False
+        mask = df.apply(lambda r: _has(r.get("nama_user")) or _has(r.get("action")) or _has(r.get("details")), axis=1)
+        df = df[mask]
+
+    # Present concise columns with nicer headers
+    if not df.empty:
+        df_present = df.rename(columns={
+            "nama_user": "Nama User",
+            "tanggal": "Date",
+            "action": "Action",
+            "details": "Detail",
+        })[["Nama User","Date","Action","Detail"]]
+        st.dataframe(df_present, use_container_width=True)
+    else:
+        st.info("Belum ada aktivitas.")
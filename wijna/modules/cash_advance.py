@@ -0,0 +1,294 @@
+"""Cash Advance: pengajuan, review Finance, approval Director, rekap."""
+import json
+from datetime import date
+
+import streamlit as st
+
+from wijna.utils import gen_id
+from wijna.db import audit_log, get_db
+from wijna.uow import unit_of_work
+from wijna.notify import notify_review_request, _resolve_user_email_by_id_or_name
+from wijna.ui import (
+    card_saved, invalidate_topic, lazy_tabs, pending_counter, require_login, upload_file_and_store,
+)
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def cash_advance_module():
+    user = require_login()
+    st.header("💸 Cash Advance")
+    conn = get_db()
+    cur = conn.cursor()
+    tab1, tab2, tab3, tab4 = lazy_tabs([
+        "📝 Input",
+        "💰 Review Finance",
+        "✅ Approval Director",
+        "📋 Daftar & Rekap"
+    ], key="cash_advance")
+
+    # Format total as Rp with thousand separator (dipakai di beberapa tab)
+    def format_rp(val):
+        return f"Rp. {val:,.0f}".replace(",", ".")
+
+    # Item editor + submit as one fragment: Tambah/Hapus item only rerun this form
+    @st.fragment
+    def request_form():
+        conn = get_db()
+        cur = conn.cursor()
+        st.markdown("### Pengajuan Cash Advance ")
+        # --- Dynamic items with default 3 rows and 'Tambah Item' button ---
+        # Use stable row IDs so deleting doesn't shift existing inputs unexpectedly
+        if 'ca_items_count' not in st.session_state:
+            st.session_state['ca_items_count'] = 3
+        if 'ca_rows' not in st.session_state:
+            st.session_state['ca_rows'] = list(range(1, st.session_state['ca_items_count'] + 1))
+
+        items = []
+        nama_program = st.text_input("Nama Program")
+        import re
+        def format_ribuan(val):
+            if val is None or val == "":
+                return ""
+            val_str = str(val)
+            val_str = re.sub(r'[^\d]', '', val_str)
+            if not val_str:
+                return ""
+            return f"{int(val_str):,}".replace(",", ".")
+
+        # Action button to add more item rows
+        if st.button("Tambah Item"):
+            next_id = (max(st.session_state['ca_rows']) + 1) if st.session_state['ca_rows'] else 1
+            st.session_state['ca_rows'].append(next_id)
+            st.session_state['ca_items_count'] = len(st.session_state['ca_rows'])
+            st.rerun(scope="fragment")
+
+        total = 0.0
+        # Build rows in display order 1..N but map to stable keys using row_id
+        for display_idx, row_id in enumerate(list(st.session_state['ca_rows']), start=1):
+            col_item, col_nom, col_akt, col_act = st.columns([3,2,3,1])
+            with col_item:
+                item = st.text_input(f"Item {display_idx}", key=f"ca_item_{row_id}")
+            with col_nom:
+                key_nom = f"ca_nom_{row_id}"
+                val = st.session_state.get(key_nom, "")
+                val_disp = format_ribuan(val)
+                nominal_str = st.text_input(f"Nominal {display_idx}", value=val_disp, key=key_nom)
+                clean_nom = re.sub(r'[^\d]', '', nominal_str)
+                nominal_val = float(clean_nom) if clean_nom else 0.0
+                total += nominal_val
+            with col_akt:
+                aktivitas = st.text_input(f"Aktivitas {display_idx}", key=f"ca_aktivitas_{row_id}")
+            with col_act:
+                if st.button("Hapus", key=f"ca_del_{row_id}"):
+                    # Clear keys for this row and remove from list
+                    for key in (f"ca_item_{row_id}", f"ca_aktivitas_{row_id}", f"ca_nom_{row_id}"):
+                        if key in st.session_state:
+                            del st.session_state[key]
+                    st.session_state['ca_rows'] = [rid for rid in st.session_state['ca_rows'] if rid != row_id]
+                    st.session_state['ca_items_count'] = len(st.session_state['ca_rows'])
+                    st.rerun(scope="fragment")
+            if (item or aktivitas or nominal_val > 0):
+                items.append({"item": item or "", "aktivitas": aktivitas or "", "nominal": nominal_val})
+        tanggal = st.date_input("Tanggal", value=date.today())
+        st.info(f"Total: {format_rp(total)}")
+        if st.button("Ajukan Cash Advance"):
+            if not nama_program or not items:
+                st.error("Nama Program dan minimal 1 item wajib diisi.")
+            else:
+                cid = gen_id("ca")
+                requester_id = (user.get('id') if isinstance(user, dict) else None)
+                try:
+                    cur.execute("INSERT INTO cash_advance (id,divisi,items_json,totals,tanggal,finance_note,finance_approved,director_note,director_approved,requested_by) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                                (cid, nama_program, json.dumps(items), total, tanggal.isoformat(), "", 0, "", 0, requester_id))
+                except Exception:
+                    # fallback if column doesn't exist yet
+                    cur.execute("INSERT INTO cash_advance (id,divisi,items_json,totals,tanggal,finance_note,finance_approved,director_note,director_approved) VALUES (?,?,?,?,?,?,?,?,?)",
+                                (cid, nama_program, json.dumps(items), total, tanggal.isoformat(), "", 0, "", 0))
+                conn.commit()
+                try:
+                    audit_log("cash_advance", "create", target=cid, details=f"divisi={nama_program}; total={total}")
+                except Exception:
+                    pass
+                try:
+                    notify_review_request("cash_advance", title=f"{nama_program} — {format_rp(total)}", entity_id=cid, recipients_roles=("finance","director"))
+                except Exception:
+                    pass
+                st.success("Cash advance diajukan.")
+                invalidate_topic("cash_advance")
+                # Reset inputs to default 3 rows
+                # Clear any existing per-row keys
+                for rid in list(st.session_state.get('ca_rows', [])):
+                    for key in (f"ca_item_{rid}", f"ca_aktivitas_{rid}", f"ca_nom_{rid}"):
+                        if key in st.session_state:
+                            del st.session_state[key]
+                st.session_state['ca_rows'] = [1,2,3]
+                st.session_state['ca_items_count'] = 3
+
+    # --- Tab 1: Input Staf ---
+    if tab1:
+        request_form()
+
+    @st.fragment
+    def finance_card(row):
+        with st.expander(f"{row['divisi']} | {row['tanggal']} | Total: {format_rp(row['totals'])}"):
+            items = json.loads(row['items_json']) if row['items_json'] else []
+            # Format nominal columns as Rp
+            if items:
+                df_items = pd.DataFrame(items)
+                if 'nominal' in df_items.columns:
+                    df_items['nominal'] = df_items['nominal'].apply(format_rp)
+                st.write(df_items)
+            st.write(f"Catatan: {row['finance_note']}")
+            note = st.text_area("Catatan Finance", value=row['finance_note'], key=f"fin_note_{row['id']}")
+            # Opsi upload ToR jika diminta
+            tor_file = st.file_uploader("Upload File ToR (jika diminta)", key=f"tor_{row['id']}")
+            # Opsi: Ajukan ke Director atau Kembalikan ke User
+            colA, colB = st.columns(2)
+            with colA:
+                approve = st.button("Ajukan ke Director", key=f"ajukan_dir_{row['id']}")
+            with colB:
+                return_user = st.button("Kembalikan ke User", key=f"kembali_user_{row['id']}")
+            if approve:
+                # Upload ToR first (network), then write + audit + notify in one commit
+                fin_note = note
+                if tor_file:
+                    tor_blob, tor_name, _ = upload_file_and_store(tor_file, "cash_advance")
+                    fin_note = note + "\n[ToR diupload: " + tor_name + "]"
+                tor_info = f"; ToR={tor_file.name}" if tor_file else ""
+                applicant_email = _resolve_user_email_by_id_or_name(row.get('requested_by')) if isinstance(row, dict) else None
+                title_txt = f"{row['divisi']} — {format_rp(row['totals'])}"
+                # Notify Director + applicant; skipped if another session already forwarded it
+                with unit_of_work() as uow:
+                    done = uow.execute("UPDATE cash_advance SET finance_note=?, finance_approved=1 WHERE id=? AND finance_approved=0", (fin_note, row['id'])).rowcount
+                    if done:
+                        uow.audit("cash_advance", "finance_review", target=row['id'], details=f"approve=1; note={note}{tor_info}")
+                        uow.notify_decision("cash_advance", title=title_txt, decision="finance_approved", entity_id=row['id'],
+                                            recipients_roles=("director",), recipients_users=[applicant_email] if applicant_email else None,
+                                            tag_suffix="finance")
+                if done:
+                    card_saved("Diajukan ke Director.", "cash_advance")
+                else:
+                    card_saved(f"{row['divisi']} sudah diajukan ke Director.", "cash_advance", icon="ℹ️")
+            if return_user:
+                applicant_email = _resolve_user_email_by_id_or_name(row.get('requested_by')) if isinstance(row, dict) else None
+                title_txt = f"{row['divisi']} — {format_rp(row['totals'])}"
+                # Notify Director + applicant of rejection
+                with unit_of_work() as uow:
+                    done = uow.execute("UPDATE cash_advance SET finance_note=?, finance_approved=0 WHERE id=? AND finance_approved=0", (note + "\n[Perlu revisi oleh user]", row['id'])).rowcount
+                    if done:
+                        uow.audit("cash_advance", "finance_review", target=row['id'], details=f"approve=0; note={note}")
+                        uow.notify_decision("cash_advance", title=title_txt, decision="finance_rejected", entity_id=row['id'],
+                                            recipients_roles=("director",), recipients_users=[applicant_email] if applicant_email else None,
+                                            tag_suffix="finance")
+                if done:
+                    card_saved("Dikembalikan ke user peminta.", "cash_advance", icon="⚠️")
+                else:
+                    card_saved(f"{row['divisi']} sudah diajukan ke Director.", "cash_advance", icon="ℹ️")
+
+    @st.fragment
+    def director_card(row):
+        with st.expander(f"{row['divisi']} | {row['tanggal']} | Total: Rp {row['totals']:,.0f}"):
+            items = json.loads(row['items_json']) if row['items_json'] else []
+            st.write(pd.DataFrame(items))
+            st.write(f"Finance Approved: {'Ya' if row['finance_approved'] else 'Belum'}")
+            st.write(f"Catatan Director: {row['director_note']}")
+            note = st.text_area("Catatan Director", value=row['director_note'], key=f"dir_note_{row['id']}")
+            approve = st.checkbox("Approve Director", value=bool(row['director_approved']), key=f"dir_approved_{row['id']}")
+            if st.button("Simpan Approval Director", key=f"save_dir_{row['id']}"):
+                applicant_email = _resolve_user_email_by_id_or_name(row.get('requested_by')) if isinstance(row, dict) else None
+                decision = "director_approved" if approve else "director_rejected"
+                title_txt = f"{row['divisi']} — {format_rp(row['totals'])}"
+                # Notify applicant + Finance; skipped if another session already decided
+                with unit_of_work() as uow:
+                    done = uow.execute("UPDATE cash_advance SET director_note=?, director_approved=?, director_reviewed=1 WHERE id=? AND finance_approved=1 AND COALESCE(director_reviewed,0)=0",
+                                       (note, int(approve), row['id'])).rowcount
+                    if done:
+                        uow.audit("cash_advance", "director_approval", target=row['id'], details=f"approve={bool(approve)}; note={note}")
+                        uow.notify_decision("cash_advance", title=title_txt, decision=decision, entity_id=row['id'],
+                                            recipients_roles=("finance",), recipients_users=[applicant_email] if applicant_email else None,
+                                            tag_suffix="director")
+                if done:
+                    card_saved("Approval Director disimpan.", "cash_advance")
+                else:
+                    card_saved(f"{row['divisi']} sudah diputuskan Director.", "cash_advance", icon="ℹ️")
+
+    # --- Tab 2: Review Finance ---
+    if tab2:
+        st.markdown("### Review & Approval Finance")
+        if user["role"] in ["finance", "director", "superuser"]:
+            # Show only items that are still awaiting Finance review (not approved to director yet)
+            rows = cur.execute(
+                "SELECT id, divisi, items_json, totals, tanggal, finance_note, finance_approved, COALESCE(requested_by,'') as requested_by "
+                "FROM cash_advance WHERE finance_approved=0 ORDER BY tanggal DESC"
+            ).fetchall()
+            pending_counter("cash_advance", "Menunggu review Finance", "SELECT COUNT(*) FROM cash_advance WHERE finance_approved=0")
+            for row in rows:
+                finance_card(row)
+        else:
+            st.info("Hanya Finance yang dapat review di sini.")
+
+    # --- Tab 3: Approval Director ---
+    if tab3:
+        st.markdown("### Approval Director Cash Advance")
+        if user["role"] in ["director", "superuser"]:
+            # Only show items already approved by Finance and not yet reviewed by Director
+            rows = cur.execute(
+                "SELECT id, divisi, items_json, totals, tanggal, finance_approved, director_note, director_approved, COALESCE(requested_by,'') as requested_by "
+                "FROM cash_advance WHERE finance_approved=1 AND COALESCE(director_reviewed,0)=0 ORDER BY tanggal DESC"
+            ).fetchall()
+            pending_counter("cash_advance", "Menunggu approval Director", "SELECT COUNT(*) FROM cash_advance WHERE finance_approved=1 AND COALESCE(director_reviewed,0)=0")
+            for row in rows:
+                director_card(row)
+        else:
+            st.info("Hanya Director yang dapat approve di sini.")
+
+    # --- Tab 4: Daftar & Rekap ---
+    if tab4:
+        st.markdown("### Daftar & Rekap Cash Advance")
+        df = pd.read_sql_query("SELECT id, divisi, items_json, totals, tanggal, finance_approved, director_approved, COALESCE(director_reviewed,0) as director_reviewed FROM cash_advance ORDER BY tanggal DESC", conn)
+        def _map_status(x):
+            if x['finance_approved'] and x['director_approved']:
+                return 'Cair'
+            if x.get('director_reviewed', 0) == 1 and not x['director_approved']:
+                return 'Ditolak Director'
+            if x['finance_approved'] and not x['director_approved']:
+                return 'Menunggu Director'
+            return 'Menunggu Finance'
+        df['status'] = df.apply(_map_status, axis=1)
+        # --- FILTER UI ---
+        with st.container():
+            col_div, col_status, col_tgl = st.columns([2,2,3])
+            with col_div:
+                divisi_list = ["Semua"] + sorted(df["divisi"].dropna().unique().tolist())
+                filter_divisi = st.selectbox("Filter Divisi", divisi_list)
+            with col_status:
+                status_list = ["Semua", "Cair", "Proses"]
+                filter_status = st.selectbox("Status", status_list)
+            with col_tgl:
+                min_tgl = df["tanggal"].min() if not df.empty else date.today()
+                max_tgl = df["tanggal"].max() if not df.empty else date.today()
+                filter_tgl = st.date_input("Tanggal", value=(min_tgl, max_tgl) if min_tgl and max_tgl else (date.today(), date.today()))
+
+        dff = df.copy()
+        if filter_divisi != "Semua":
+            dff = dff[dff["divisi"] == filter_divisi]
+        if filter_status != "Semua":
+            dff = dff[dff["status"] == filter_status]
+        if filter_tgl and isinstance(filter_tgl, tuple) and len(filter_tgl) == 2:
+            tgl_start, tgl_end = filter_tgl
+            dff = dff[(pd.to_datetime(dff["tanggal"]) >= pd.to_datetime(tgl_start)) & (pd.to_datetime(dff["tanggal"]) <= pd.to_datetime(tgl_end))]
+
+        st.dataframe(dff)
+        # Rekap Bulanan
+        st.markdown("#### Rekap Bulanan Cash Advance (Otomatis)")
+        this_month = date.today().strftime("%Y-%m")
+        df_month = dff[dff['tanggal'].str[:7] == this_month] if not dff.empty else pd.DataFrame()
+        st.write(f"Jumlah pengajuan bulan ini: {len(df_month)}")
+        if not df_month.empty:
+            by_div = df_month.groupby('divisi').agg({'id':'count','totals':'sum'}).rename(columns={'id':'jumlah_pengajuan','totals':'total_nominal'})
+            st.write("Rekap per Divisi:")
+            st.dataframe(by_div)
+            approved = df_month[(df_month['finance_approved']==1) & (df_month['director_approved']==1)]
+            pending = df_month[(df_month['finance_approved']==0) | (df_month['director_approved']==0)]
+            st.write(f"Approved (Cair): {len(approved)} | Pending: {len(pending)}")
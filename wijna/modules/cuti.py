@@ -0,0 +1,194 @@
+"""Cuti: pengajuan cuti, review Finance, approval Director, rekap."""
+from datetime import date
+
+import streamlit as st
+
+from wijna.utils import gen_id
+from wijna.db import audit_log, get_db
+from wijna.uow import unit_of_work
+from wijna.notify import _get_user_email_by_name, notify_review_request
+from wijna.holidays import _count_days_excluding_holidays
+from wijna.ui import card_saved, lazy_tabs, pending_counter, require_login
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def cuti_module():
+    user = require_login()
+    st.header("🌴 Pengajuan & Approval Cuti")
+    conn = get_db()
+    cur = conn.cursor()
+    tab1, tab2, tab3, tab4 = lazy_tabs(["📝 Ajukan Cuti", "💰 Review Finance", "✅ Approval Director", "📋 Rekap Cuti"], key="cuti")
+
+    # Tab 1: Ajukan Cuti
+    if tab1:
+        st.markdown("### 📝 Ajukan Cuti")
+        nama = user["full_name"]
+        tgl_mulai = st.date_input("Tanggal Mulai", value=date.today())
+        tgl_selesai = st.date_input("Tanggal Selesai", value=date.today())
+        alasan = st.text_area("Alasan Cuti")
+        # Durasi tidak menghitung Libur Nasional (non-working days)
+        durasi = _count_days_excluding_holidays(tgl_mulai, tgl_selesai) if tgl_selesai >= tgl_mulai else 0
+        cur.execute("SELECT kuota_tahunan, cuti_terpakai FROM cuti WHERE nama=? ORDER BY tgl_mulai DESC LIMIT 1", (nama,))
+        last = cur.fetchone()
+        kuota_tahunan = last["kuota_tahunan"] if last else 12
+        cuti_terpakai = last["cuti_terpakai"] if last else 0
+        sisa_kuota = kuota_tahunan - cuti_terpakai
+        st.info(f"Sisa kuota cuti: {sisa_kuota} hari dari {kuota_tahunan} hari")
+        st.write(f"Durasi cuti diajukan (tidak termasuk Libur Nasional): {durasi} hari")
+        if durasi > 0 and sisa_kuota < durasi:
+            st.error("Sisa kuota tidak cukup, pengajuan cuti otomatis ditolak.")
+        st.caption("Pengajuan akan ditolak otomatis bila Sisa Kuota < Durasi pengajuan.")
+        if st.button("Ajukan Cuti"):
+            if not alasan or durasi <= 0:
+                st.warning("Lengkapi data dan pastikan tanggal benar.")
+            elif sisa_kuota < durasi:
+                st.error("Sisa kuota tidak cukup, pengajuan cuti ditolak.")
+            else:
+                cid = gen_id("cuti")
+                # Update running totals at time of submission
+                new_cuti_terpakai = cuti_terpakai + durasi
+                new_sisa = max(0, kuota_tahunan - new_cuti_terpakai)
+                cur.execute(
+                    """
+                    INSERT INTO cuti (id, nama, tgl_mulai, tgl_selesai, durasi, kuota_tahunan, cuti_terpakai, sisa_kuota, status, finance_note, finance_approved, director_note, director_approved)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, '', 0, '', 0)
+                    """,
+                    (cid, nama, tgl_mulai.isoformat(), tgl_selesai.isoformat(), durasi, kuota_tahunan, new_cuti_terpakai, new_sisa, "Menunggu Review Finance"),
+                )
+                conn.commit()
+                try:
+                    notify_review_request("cuti", title=f"{nama} — {durasi} hari", entity_id=cid, recipients_roles=("finance","director"))
+                except Exception:
+                    pass
+                st.success("Pengajuan cuti berhasil diajukan.")
+                # Audit trail
+                try:
+                    audit_log("cuti", "create", target=cid, details=f"{nama} ajukan cuti {tgl_mulai} s/d {tgl_selesai} ({durasi} hari)")
+                except Exception:
+                    pass
+
+    @st.fragment
+    def finance_card(row):
+        with st.expander(f"{row['nama']} | {row['tgl_mulai']} s/d {row['tgl_selesai']}"):
+            st.write(f"Durasi: {row['durasi']} hari, Sisa kuota: {row['sisa_kuota']} hari")
+            st.write(f"Alasan: {row['status']}")
+            note = st.text_area("Catatan Finance", value=row["finance_note"] or "", key=f"fin_note_{row['id']}")
+            approve = st.checkbox("Approve", value=bool(row["finance_approved"]), key=f"fin_appr_{row['id']}")
+            if st.button("Simpan Review", key=f"fin_save_{row['id']}"):
+                status = "Menunggu Approval Director" if approve else "Ditolak Finance"
+                pemohon_email = _get_user_email_by_name(row['nama'])
+                decision = "finance_approved" if approve else "finance_rejected"
+                # Update + audit trail + notify Director/applicant in one commit; the row may
+                # have been processed in another session since this card was rendered
+                with unit_of_work() as uow:
+                    done = uow.execute("UPDATE cuti SET finance_note=?, finance_approved=?, status=? WHERE id=? AND finance_approved=0",
+                                       (note, int(approve), status, row["id"])).rowcount
+                    if done:
+                        uow.audit("cuti", "finance_review", target=row["id"], details=f"approve={bool(approve)}; status={status}")
+                        uow.notify_decision("cuti", title=f"{row['nama']} — {row['tgl_mulai']} s/d {row['tgl_selesai']}", decision=decision,
+                                            entity_id=row['id'], recipients_roles=("director",),
+                                            recipients_users=[pemohon_email] if pemohon_email else None, tag_suffix="finance")
+                if done:
+                    card_saved("Review Finance disimpan.", "cuti")
+                else:
+                    card_saved("Pengajuan ini sudah diproses.", "cuti", icon="ℹ️")
+
+    # Tab 2: Review Finance
+    if tab2:
+        st.markdown("### Review & Approval Finance")
+        if user["role"] in ["finance", "director", "superuser"]:
+            rows = conn.execute("SELECT * FROM cuti WHERE finance_approved=0 ORDER BY tgl_mulai DESC").fetchall()
+            pending_counter("cuti", "Menunggu review Finance", "SELECT COUNT(*) FROM cuti WHERE finance_approved=0")
+            for row in rows:
+                finance_card(row)
+        else:
+            st.info("Hanya Finance/Superuser yang dapat review di sini.")
+
+    @st.fragment
+    def director_card(row):
+        with st.expander(f"{row['nama']} | {row['tgl_mulai']} s/d {row['tgl_selesai']}"):
+            st.write(f"Durasi: {row['durasi']} hari, Sisa kuota: {row['sisa_kuota']} hari")
+            st.write(f"Alasan: {row['status']}")
+            note = st.text_area("Catatan Director", value=row["director_note"] or "", key=f"dir_note_{row['id']}")
+            approve = st.checkbox("Approve", value=bool(row["director_approved"]), key=f"dir_appr_{row['id']}")
+            if st.button("Simpan Approval", key=f"dir_save_{row['id']}"):
+                pemohon_email = _get_user_email_by_name(row['nama'])
+                decision = "director_approved" if approve else "director_rejected"
+                with unit_of_work() as uow:
+                    r = uow.execute("SELECT cuti_terpakai, durasi, kuota_tahunan FROM cuti WHERE id= ? AND finance_approved=1 AND director_approved=0",
+                                    (row["id"],)).fetchone()
+                    if r is not None:
+                        if approve:
+                            baru_terpakai = (r["cuti_terpakai"] or 0) + (r["durasi"] or 0)
+                            sisa = (r["kuota_tahunan"] or 12) - baru_terpakai
+                            uow.execute("UPDATE cuti SET director_note=?, director_approved=?, status=?, cuti_terpakai=?, sisa_kuota=? WHERE id= ?",
+                                (note, int(approve), "Disetujui Director", baru_terpakai, sisa, row["id"]))
+                        else:
+                            uow.execute("UPDATE cuti SET director_note=?, director_approved=?, status=? WHERE id= ?",
+                                (note, int(approve), "Ditolak Director", row["id"]))
+                        # Audit trail + notify applicant/Finance, committed with the update
+                        uow.audit("cuti", "director_approval", target=row["id"], details=f"approve={bool(approve)}")
+                        uow.notify_decision("cuti", title=f"{row['nama']} — {row['tgl_mulai']} s/d {row['tgl_selesai']}", decision=decision,
+                                            entity_id=row['id'], recipients_roles=("finance",),
+                                            recipients_users=[pemohon_email] if pemohon_email else None, tag_suffix="director")
+                if r is not None:
+                    card_saved("Approval Director disimpan.", "cuti")
+                else:
+                    card_saved("Pengajuan ini sudah diproses.", "cuti", icon="ℹ️")
+
+    # Tab 3: Approval Director
+    if tab3:
+        st.markdown("### Approval Director")
+        if user["role"] in ["director", "superuser"]:
+            # Tampilkan hanya yang masih menunggu persetujuan Director
+            rows = conn.execute("SELECT * FROM cuti WHERE finance_approved=1 AND director_approved=0 ORDER BY tgl_mulai DESC").fetchall()
+            pending_counter("cuti", "Menunggu approval Director", "SELECT COUNT(*) FROM cuti WHERE finance_approved=1 AND director_approved=0")
+            for row in rows:
+                director_card(row)
+
+    # Tab 4: Rekap (dengan filter)
+    if tab4:
+        st.markdown("### 📋 Rekap Pengajuan Cuti")
+        df = pd.read_sql_query("SELECT * FROM cuti ORDER BY tgl_mulai DESC", conn)
+        # Filter UI
+        c1, c2, c3 = st.columns([2,2,3])
+        with c1:
+            q = st.text_input("Cari Nama/Status", "")
+        with c2:
+            opt_status = ["Semua"]
+            if not df.empty and "status" in df.columns:
+                try:
+                    unique_status = sorted([s for s in df["status"].dropna().unique().tolist() if str(s).strip() != ""])
+                    opt_status += unique_status
+                except Exception:
+                    pass
+            status_sel = st.selectbox("Status", opt_status)
+        with c3:
+            if not df.empty and "tgl_mulai" in df.columns:
+                try:
+                    min_d = pd.to_datetime(df["tgl_mulai"]).min().date()
+                    max_d = pd.to_datetime(df["tgl_mulai"]).max().date()
+                    dr = st.date_input("Rentang Tanggal (Mulai)", value=(min_d, max_d))
+                except Exception:
+                    dr = None
+            else:
+                dr = None
+
+        dff = df.copy()
+        if q:
+            ql = q.lower()
+            dff = dff[
+                dff.get("nama", "").astype(str).str.lower().str.contains(ql, na=False)
+                | dff.get("status", "").astype(str).str.lower().str.contains(ql, na=False)
+            ]
+        if status_sel and status_sel != "Semua" and "status" in dff.columns:
+            dff = dff[dff["status"] == status_sel]
+        if dr and isinstance(dr, (list, tuple)) and len(dr) == 2 and "tgl_mulai" in dff.columns:
+            try:
+                s, e = dr
+                dff = dff[(pd.to_datetime(dff["tgl_mulai"]) >= pd.to_datetime(s)) & (pd.to_datetime(dff["tgl_mulai"]) <= pd.to_datetime(e))]
+            except Exception:
+                pass
+
+        st.dataframe(dff, width='stretch', hide_index=True)
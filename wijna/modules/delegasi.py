@@ -0,0 +1,291 @@
+"""Delegasi: penugasan, monitoring, dan laporan tugas."""
+import io
+from datetime import date, datetime
+
+import streamlit as st
+
+from wijna.utils import gen_id, now_wib_iso
+from wijna.db import audit_log, get_db, _setting_get
+from wijna.drive import _drive_id_from_url
+from wijna.notify import _get_user_email_by_name, notify_review_request, _send_email
+from wijna.holidays import _is_public_holiday, _next_working_day
+from wijna.ui import lazy_tabs, require_login, upload_file_and_store
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def delegasi_module():
+    user = require_login()
+    st.header("🗂️ Delegasi Tugas & Monitoring")
+    conn = get_db()
+    cur = conn.cursor()
+    tab1, tab2, tab3, tab4 = lazy_tabs(["🆕 Buat Tugas", "📝 Update Status/Bukti", "👀 Monitoring Director", "📅 Rekap & Filter"], key="delegasi")
+
+    # Tab 1: Buat Tugas
+    if tab1:
+        st.markdown("### 🆕 Buat Tugas Baru (Pemberi Tugas)")
+        with st.form("del_add"):
+            judul = st.text_input("Judul Tugas")
+            deskripsi = st.text_area("Deskripsi")
+            # PIC dropdown from active users
+            try:
+                cur.execute("SELECT id, full_name, email, role, status FROM users WHERE status='active' ORDER BY COALESCE(NULLIF(full_name,''), email)")
+                _users = cur.fetchall() or []
+            except Exception:
+                _users = []
+            pic_value = None
+            if _users:
+                # Build safe (label, value) options to avoid serializing Row objects
+                _opts = []
+                for u in _users:
+                    try:
+                        fn = u["full_name"] if isinstance(u, dict) else u[1]
+                        em = u["email"] if isinstance(u, dict) else u[2]
+                    except Exception:
+                        fn = u[1] if len(u) > 1 else None
+                        em = u[2] if len(u) > 2 else None
+                    label = f"{fn} ({em})" if fn else (em or "-")
+                    value = fn or em or ""
+                    if value:
+                        _opts.append((label, value))
+                labels = [o[0] for o in _opts]
+                selected_label = st.selectbox("Penanggung Jawab (PIC)", options=labels, key="del_pic_select")
+                # Map back to value
+                pic_value = dict(_opts).get(selected_label)
+            else:
+                st.info("Daftar user aktif kosong, masukkan PIC secara manual.")
+                pic_value = st.text_input("Penanggung Jawab (PIC)")
+            tgl_mulai = st.date_input("Tgl Mulai", value=date.today())
+            tgl_selesai = st.date_input("Tgl Selesai", value=date.today())
+            # Holiday-aware hints
+            try:
+                if _is_public_holiday(tgl_mulai):
+                    st.info("Catatan: Tgl Mulai jatuh pada Libur Nasional.")
+                if _is_public_holiday(tgl_selesai):
+                    st.warning("Peringatan: Tgl Selesai jatuh pada Libur Nasional.")
+            except Exception:
+                pass
+            if st.form_submit_button("Buat Tugas"):
+                if not (judul and deskripsi and pic_value):
+                    st.warning("Semua field wajib diisi.")
+                elif tgl_selesai < tgl_mulai:
+                    st.warning("Tanggal selesai tidak boleh sebelum mulai.")
+                else:
+                    # Optional auto-shift deadline to next working day
+                    try:
+                        auto_shift = (_setting_get('delegasi_deadline_autoshift', 'false') == 'true')
+                    except Exception:
+                        auto_shift = False
+                    adj_selesai = tgl_selesai
+                    try:
+                        if auto_shift and _is_public_holiday(adj_selesai):
+                            adj_selesai = _next_working_day(adj_selesai)
+                            st.info(f"Tgl Selesai otomatis digeser ke hari kerja berikutnya: {adj_selesai.isoformat()}")
+                    except Exception:
+                        pass
+                    did = gen_id("del")
+                    now = now_wib_iso()
+                    created_by = user.get('email') or user.get('full_name')
+                    try:
+                        cur.execute("PRAGMA table_info(delegasi)")
+                        _del_cols = {row[1] for row in cur.fetchall()}
+                    except Exception:
+                        _del_cols = set()
+                    if {"created_by","review_status"}.issubset(_del_cols):
+                        cur.execute("INSERT INTO delegasi (id,judul,deskripsi,pic,tgl_mulai,tgl_selesai,status,tanggal_update,created_by,review_status) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                                    (did, judul, deskripsi, pic_value, tgl_mulai.isoformat(), adj_selesai.isoformat(), "Belum Selesai", now, created_by, "Pending"))
+                    else:
+                        cur.execute("INSERT INTO delegasi (id,judul,deskripsi,pic,tgl_mulai,tgl_selesai,status,tanggal_update) VALUES (?,?,?,?,?,?,?,?)",
+                                    (did, judul, deskripsi, pic_value, tgl_mulai.isoformat(), adj_selesai.isoformat(), "Belum Selesai", now))
+                    conn.commit()
+                    try:
+                        audit_log("delegasi", "create", target=did, details=f"{judul} -> {pic_value} {tgl_mulai}..{adj_selesai}")
+                    except Exception:
+                        pass
+                    try:
+                        notify_review_request("delegasi", title=f"{judul} → {pic_value}", entity_id=did, recipients_roles=("director",))
+                    except Exception:
+                        pass
+                    st.success("Tugas berhasil dibuat.")
+
+    # Tab 2: Update Status & Upload Bukti (PIC)
+    if tab2:
+        st.markdown("### 📝 PIC Update Status & Upload Bukti")
+        # Match tasks where PIC equals current user's full_name or email (fallback)
+        _u_name = user.get("full_name") if isinstance(user, dict) else None
+        _u_mail = user.get("email") if isinstance(user, dict) else None
+        if _u_name and _u_mail:
+            _sql = "SELECT * FROM delegasi WHERE pic IN (?, ?) ORDER BY tgl_selesai ASC"
+            tugas_pic = pd.read_sql_query(_sql, conn, params=(_u_name, _u_mail))
+        elif _u_name or _u_mail:
+            _val = _u_name or _u_mail
+            _sql = "SELECT * FROM delegasi WHERE pic=? ORDER BY tgl_selesai ASC"
+            tugas_pic = pd.read_sql_query(_sql, conn, params=(_val,))
+        else:
+            tugas_pic = pd.read_sql_query("SELECT * FROM delegasi ORDER BY tgl_selesai ASC", conn)
+        filter_status = st.selectbox("Filter Status", ["Semua", "Belum Selesai", "Proses", "Selesai"], key="filter_status_pic")
+        if filter_status != "Semua":
+            tugas_pic = tugas_pic[tugas_pic["status"] == filter_status]
+        for idx, row in tugas_pic.iterrows():
+            with st.expander(f"{row['judul']} | {row['tgl_mulai']} s/d {row['tgl_selesai']} | Status: {row['status']}"):
+                st.write(f"Deskripsi: {row['deskripsi']}")
+                st.write(f"Tenggat: {row['tgl_mulai']} s/d {row['tgl_selesai']}")
+                status = st.selectbox("Status", ["Belum Selesai", "Proses", "Selesai"], index=["Belum Selesai", "Proses", "Selesai"].index(row["status"]), key=f"status_{row['id']}")
+                file_bukti = st.file_uploader("Upload Bukti (wajib jika selesai)", key=f"bukti_{row['id']}")
+                if st.button("Update Status", key=f"update_{row['id']}"):
+                    if status == "Selesai" and not file_bukti:
+                        st.error("Status 'Selesai' wajib upload file dokumentasi!")
+                    else:
+                        blob, fname, furl = upload_file_and_store(file_bukti, "delegasi") if file_bukti else (None, None, None)
+                        now = now_wib_iso()
+                        if status == "Selesai":
+                            # Prefer Drive URL when available
+                            try:
+                                cur.execute("PRAGMA table_info(delegasi)")
+                                dcols = {r[1] for r in cur.fetchall()}
+                            except Exception:
+                                dcols = set()
+                            if 'file_url' in dcols:
+                                cur.execute("UPDATE delegasi SET status=?, file_blob=?, file_name=?, file_drive_id=?, file_url=?, tanggal_update=? WHERE id=?",
+                                            (status, None if furl else blob, fname, _drive_id_from_url(furl) if furl else None, furl, now, row["id"]))
+                            else:
+                                cur.execute("UPDATE delegasi SET status=?, file_blob=?, file_name=?, tanggal_update=? WHERE id=?",
+                                            (status, blob, fname, now, row["id"]))
+                        else:
+                            cur.execute("UPDATE delegasi SET status=?, tanggal_update=? WHERE id=?",
+                                (status, now, row["id"]))
+                        conn.commit()
+                        try:
+                            det = f"status={status}" + (f"; bukti={fname}" if fname else "")
+                            audit_log("delegasi", "update", target=row['id'], details=det)
+                        except Exception:
+                            pass
+                        st.success("Status tugas diperbarui.")
+
+                # Approval/Reject by Pemberi Tugas (creator)
+                # fetch creator lazily
+                try:
+                    _created_by = row['created_by'] if 'created_by' in row.index else None
+                except Exception:
+                    _created_by = None
+                if not _created_by:
+                    r2 = cur.execute("SELECT created_by FROM delegasi WHERE id=?", (row['id'],)).fetchone()
+                    _created_by = r2[0] if r2 and len(r2) > 0 else None
+                if _created_by and (user.get('email') == _created_by or user.get('full_name') == _created_by):
+                    st.markdown("---")
+                    st.write("Approval oleh Pemberi Tugas")
+                    note = st.text_area("Catatan (wajib saat reject)", key=f"rev_note_{row['id']}")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        approve_btn = st.button("Approve", key=f"approve_{row['id']}")
+                    with col2:
+                        reject_btn = st.button("Reject", key=f"reject_{row['id']}")
+                    if approve_btn or reject_btn:
+                        now = now_wib_iso()
+                        reviewer = user.get('email') or user.get('full_name')
+                        new_stat = "Approved" if approve_btn else "Rejected"
+                        if new_stat == "Rejected" and not (note and note.strip()):
+                            st.error("Catatan wajib saat reject.")
+                        else:
+                            try:
+                                cur.execute("PRAGMA table_info(delegasi)")
+                                _del_cols = {row[1] for row in cur.fetchall()}
+                            except Exception:
+                                _del_cols = set()
+                            if {"review_status","review_note","review_time","reviewed_by"}.issubset(_del_cols):
+                                cur.execute("UPDATE delegasi SET review_status=?, review_note=?, review_time=?, reviewed_by=? WHERE id=?",
+                                            (new_stat, note or '', now, reviewer, row['id']))
+                            else:
+                                cur.execute("UPDATE delegasi SET status=?, tanggal_update=? WHERE id=?",
+                                            (row['status'], now, row['id']))
+                            conn.commit()
+                            try:
+                                audit_log('delegasi','review', target=row['id'], details=f"{new_stat}; note={note or ''}", actor=reviewer)
+                            except Exception:
+                                pass
+                            st.success(f"Tugas di-{new_stat.lower()} oleh pemberi tugas.")
+                            if new_stat == "Rejected":
+                                # Notify PIC to rework/upload again
+                                try:
+                                    pic_name = row['pic']
+                                    recips = []
+                                    if pic_name and '@' in str(pic_name):
+                                        recips = [pic_name]
+                                    else:
+                                        em = _get_user_email_by_name(str(pic_name))
+                                        if em:
+                                            recips = [em]
+                                    if recips:
+                                        _send_email(recips, f"[WIJNA] Delegasi ditolak: {row['judul']}", f"Delegasi '{row['judul']}' ditolak.\nCatatan: {note or '-'}\nSilakan perbaiki dan upload bukti kembali.")
+                                except Exception:
+                                    pass
+
+    # Tab 3: Monitoring Director
+    if tab3:
+        st.markdown("### 👀 Monitoring Director")
+        if user["role"] in ["director", "superuser"]:
+            df_all = pd.read_sql_query("SELECT id,judul,deskripsi,pic,tgl_mulai,tgl_selesai,status,file_name,tanggal_update FROM delegasi ORDER BY tgl_selesai ASC", conn)
+            filter_status = st.selectbox("Filter Status", ["Semua", "Belum Selesai", "Proses", "Selesai"], key="filter_status_dir")
+            if filter_status != "Semua":
+                df_all = df_all[df_all["status"] == filter_status]
+            st.dataframe(df_all)
+            for idx, row in df_all.iterrows():
+                with st.expander(f"{row['judul']} | {row['pic']} | Status: {row['status']}"):
+                    st.write(f"Deskripsi: {row['deskripsi']}")
+                    st.write(f"Tenggat: {row['tgl_mulai']} s/d {row['tgl_selesai']}")
+                    st.write(f"Update terakhir: {row['tanggal_update']}")
+                    if row["status"] == "Selesai" and row["file_name"]:
+                        st.download_button("Download Bukti", data=row["file_blob"], file_name=row["file_name"])
+                    st.write(f"Status: {row['status']}")
+
+    # Tab 4: Rekap Bulanan & Statistik
+    if tab4:
+        st.markdown("### 📅 Rekap Bulanan Delegasi & Filter")
+        df = pd.read_sql_query("SELECT id,judul,pic,tgl_mulai,tgl_selesai,status,tanggal_update FROM delegasi ORDER BY tgl_selesai ASC", conn)
+        filter_status = st.selectbox("Filter Status", ["Semua", "Belum Selesai", "Proses", "Selesai"], key="filter_status_rekap")
+        if filter_status != "Semua":
+            df = df[df["status"] == filter_status]
+        this_month = date.today().strftime("%Y-%m")
+        df_month = df[df['tgl_mulai'].str[:7] == this_month] if not df.empty else pd.DataFrame()
+        if not df_month.empty:
+            # Robust Excel export with fallback engines (openpyxl -> xlsxwriter) else CSV only
+            try:
+                bio = io.BytesIO()
+                success = False
+                for eng in ["openpyxl", "xlsxwriter"]:
+                    if success:
+                        break
+                    try:
+                        df_month.to_excel(bio, index=False, engine=eng)
+                        bio.seek(0)
+                        st.download_button("Download Rekap Bulanan (Excel)", bio, file_name=f"rekap_delegasi_{this_month}.xlsx")
+                        success = True
+                    except Exception:
+                        bio = io.BytesIO()
+                        continue
+                if not success:
+                    st.info("Engine Excel (openpyxl/xlsxwriter) tidak tersedia. Export Excel dinonaktifkan.")
+            except Exception:
+                st.warning("Gagal membuat file Excel.")
+            by_pic = df_month['pic'].value_counts().head(5)
+            st.write("Top 5 PIC:")
+            st.dataframe(by_pic)
+            status_count = df_month['status'].value_counts().to_dict()
+            st.write("Status:", status_count)
+        st.write(f"Total tugas bulan ini: {len(df_month)}")
+        # Preview warna tenggat
+        st.subheader("⏰ Status Tenggat (preview warna)")
+        rows = pd.read_sql_query("SELECT id,judul,pic,tgl_mulai,tgl_selesai,status FROM delegasi", conn)
+        def color_for_deadline(end_str):
+            end = datetime.fromisoformat(end_str).date()
+            today = date.today()
+            d = (end - today).days
+            if d < 0:
+                return "Merah"
+            if d <= 3:
+                return "Oranye"
+            if d <= 7:
+                return "Kuning"
+            return "Hijau"
+        rows["color"] = rows["tgl_selesai"].apply(color_for_deadline)
+        st.dataframe(rows)
@@ -0,0 +1,413 @@
+"""Dunyim Security: backup/restore, PITR, Drive, migrasi BLOB (Superuser)."""
+import os
+import shutil
+from datetime import datetime
+
+import streamlit as st
+
+from wijna import config
+from wijna.utils import now_wib
+from wijna.db import get_db, _setting_get, _setting_set
+from wijna.pitr import pitr_restore, shipper_status
+from wijna.drive import (
+    _build_drive, _bytes_fmt, _drive_available, _drive_delete, drive_last_errors, _drive_list,
+    _drive_upload_stream, _folder_usage_quick, invalidate_drive_manifest,
+)
+from wijna.drive_cache import clear_drive_cache, drive_cache_budget, drive_cache_usage, open_cached_download
+from wijna.attachment_gc import gc_grace_days, quarantine_list, run_attachment_gc
+from wijna.blob_migration import (
+    blob_migration_status, migration_progress, reset_blob_migration, start_blob_migration,
+    stop_blob_migration,
+)
+from wijna.backup import (
+    BACKUP_CODECS, _backup_db_now, BACKUP_FILE_SUFFIXES, check_scheduled_backup, discard_restore_temp,
+    download_backup_to_file, gfs_policy, last_backup_verification, list_backup_generations,
+    restore_db_from_file, restore_temp_path, VERIFY_MAX_AGE_HOURS,
+)
+from wijna.ui import lazy_tabs, _request_background_verify, require_login
+from wijna.startup import current_profile, LazyModule, startup_history
+
+pd = LazyModule("pandas")
+
+def _blob_migration_panel():
+    running, last = blob_migration_status()
+    try:
+        prog = migration_progress()
+    except Exception as e:
+        st.error(f"Gagal membaca progres migrasi: {e}")
+        return
+    pending = sum(r['pending'] for r in prog)
+    st.metric("Lampiran BLOB tersisa", pending, help=_bytes_fmt(sum(r['pending_bytes'] for r in prog)))
+    if running:
+        st.info("Migrasi sedang berjalan...")
+    elif last:
+        (st.success if last[0] else st.warning)(f"Migrasi terakhir: {last[1]}")
+    df = pd.DataFrame(prog)
+    if not df.empty:
+        df['pending_bytes'] = df['pending_bytes'].apply(_bytes_fmt)
+        df['bytes_freed'] = df['bytes_freed'].apply(_bytes_fmt)
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+@st.fragment(run_every=3)
+def _blob_migration_live():
+    """Rendered only while a migration runs; when it ends, one full rerun swaps back to the
+    static panel (and re-enables the buttons), so nothing polls while idle."""
+    if not blob_migration_status()[0]:
+        st.rerun(scope="app")
+    _blob_migration_panel()
+
+def _startup_profile_panel():
+    """Cold-start report: import time per dependency, ensure_db, auto-restore, first render."""
+    with st.expander("⏱️ Profil Cold Start"):
+        prof = current_profile()
+        st.caption("Proses ini (ms sejak server bangun / durasi fase). Import setelah render pertama = lazy import saat modul dipakai.")
+        c1, c2 = st.columns(2)
+        with c1:
+            st.dataframe(pd.DataFrame([{"fase": k, "ms": v} for k, v in prof["phases"].items()]), use_container_width=True, hide_index=True)
+        with c2:
+            deps = [{"dependensi": k, "ms": v["ms"], "setelah render pertama": v["after_first_render"]} for k, v in prof["imports"].items()]
+            if deps:
+                st.dataframe(pd.DataFrame(deps), use_container_width=True, hide_index=True)
+            else:
+                st.caption("Belum ada dependensi berat yang diimpor.")
+        hist = startup_history(20)
+        if hist:
+            st.markdown("**Riwayat cold start**")
+            rows = []
+            for h in hist:
+                row = {"waktu": h["created_at"], "render pertama (ms)": h["total_ms"]}
+                row.update({f"{k} (ms)": v for k, v in (h.get("phases") or {}).items() if k != "first_render"})
+                row["import saat start (ms)"] = round(sum((v.get("ms") or 0) for v in (h.get("imports") or {}).values()), 1)
+                rows.append(row)
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+def dunyim_security_module():
+    user = require_login()
+    # Hanya Superuser yang bisa akses Dunyim Security
+    if user.get("role") != "superuser":
+        st.warning("⚠️ Anda tidak memiliki akses ke Dunyim Security. Hanya Superuser.")
+        return
+    st.header("🛡️ Dunyim Security System")
+    _startup_profile_panel()
+    if not _drive_available():
+        st.error("Paket Google API belum terpasang. Tambahkan 'google-api-python-client' dan 'google-auth' di requirements.")
+        return
+    folder_id = _setting_get('gdrive_folder_id', config.GDRIVE_DEFAULT_FOLDER_ID) or config.GDRIVE_DEFAULT_FOLDER_ID
+    # Settings only visible to superuser
+    if (user or {}).get("role") == "superuser":
+        with st.expander("⚙️ Pengaturan", expanded=not bool(folder_id)):
+            fld = st.text_input("Folder ID Google Drive", value=folder_id)
+            cap = st.number_input("Kapasitas (bytes)", min_value=0, value=int(_setting_get('project_capacity_bytes', 2*1024*1024*1024) or 2*1024*1024*1024))
+            colA, colB = st.columns(2)
+            with colA:
+                sched_enabled = st.checkbox("Aktifkan Scheduled Backup", value=(_setting_get('scheduled_backup_enabled','false')=='true'))
+            with colB:
+                sched_name = st.text_input("Nama file jadwal (prefix, diberi timestamp)", value=_setting_get('scheduled_backup_filename','scheduled_backup.sqlite') or 'scheduled_backup.sqlite')
+            pitr_enabled = st.checkbox("Aktifkan PITR (kirim segmen WAL ke Drive tiap menit)", value=(_setting_get('pitr_enabled','false')=='true'))
+            st.caption("Retensi backup (GFS): simpan generasi terbaru per jam/hari/minggu/bulan; sisanya dihapus otomatis.")
+            gfs_cur = gfs_policy()
+            gfs_cols = st.columns(4)
+            gfs_new = {}
+            for col, (kind, label) in zip(gfs_cols, [('hourly','Per jam'),('daily','Harian'),('weekly','Mingguan'),('monthly','Bulanan')]):
+                with col:
+                    gfs_new[kind] = st.number_input(label, min_value=0, max_value=366, value=int(gfs_cur[kind]), step=1, key=f"gfs_{kind}")
+            cur_codec = _setting_get('backup_compression', 'gzip') or 'gzip'
+            codec = st.selectbox("Kompresi backup", list(BACKUP_CODECS), index=list(BACKUP_CODECS).index(cur_codec) if cur_codec in BACKUP_CODECS else 0,
+                                 help="zstd butuh paket 'zstandard'; bila tidak ada otomatis memakai gzip.")
+            cache_mb = st.number_input("Cache unduhan Drive (MB)", min_value=0, value=int(drive_cache_budget() // (1024*1024)), step=64,
+                                       help="Anggaran disk untuk cache LRU file Drive; 0 = tidak menyimpan.")
+            if st.button("Simpan Pengaturan"):
+                if fld:
+                    _setting_set('gdrive_folder_id', fld)
+                _setting_set('project_capacity_bytes', str(cap))
+                _setting_set('scheduled_backup_enabled', 'true' if sched_enabled else 'false')
+                _setting_set('scheduled_backup_filename', sched_name.strip() or 'scheduled_backup.sqlite')
+                _setting_set('backup_compression', codec)
+                _setting_set('drive_cache_max_bytes', str(int(cache_mb) * 1024 * 1024))
+                _setting_set('pitr_enabled', 'true' if pitr_enabled else 'false')
+                for kind, n in gfs_new.items():
+                    _setting_set(f'gfs_keep_{kind}', str(int(n)))
+                st.success("Pengaturan disimpan.")
+                st.rerun()
+    if not folder_id:
+        st.info("Masukkan Folder ID terlebih dahulu.")
+        return
+    try:
+        service = _build_drive()
+    except Exception as e:
+        st.error(str(e)); return
+    tabs = lazy_tabs(["List","Upload","Download","Delete","Sync DB","Audit Log","Record","Drive Usage"], key="dunyim")
+    # List
+    if tabs[0]:
+        if st.button("🔄 Muat ulang daftar", key="drive_manifest_refresh"):
+            invalidate_drive_manifest(folder_id, full=True)
+        q_name = st.text_input("Cari nama file", key="drive_list_search")
+        try:
+            files = _drive_list(service, folder_id, name_query=q_name.strip() or None)
+        except Exception as e:
+            st.error(f"Gagal list: {e}"); files=[]
+        if not files:
+            st.info("Tidak ada file yang cocok." if q_name.strip() else "Folder kosong.")
+        else:
+            df = pd.DataFrame(files)
+            if 'size' in df.columns:
+                df['size'] = df['size'].fillna(0).astype(int).apply(_bytes_fmt)
+            st.dataframe(df[['name','id','mimeType','modifiedTime'] + (['size'] if 'size' in df.columns else []) + ['ref_module','ref_id']], use_container_width=True, hide_index=True)
+        c1, c2 = st.columns(2)
+        with c1:
+            if st.button("🚀 Backup DB Sekarang"):
+                ok, msg = _backup_db_now(service, folder_id)
+                st.success(msg) if ok else st.error(msg)
+        with c2:
+            if st.button("⏱️ Paksa Backup Slot Saat Ini"):
+                ok, msg = check_scheduled_backup(service, folder_id)
+                if ok:
+                    st.success(msg)
+                else:
+                    st.info(msg)
+    # Upload
+    if tabs[1]:
+        f = st.file_uploader("Pilih file untuk upload")
+        if f and st.button("Upload"):
+            usage = _folder_usage_quick(service, folder_id)
+            cap = int(_setting_get('project_capacity_bytes', 2*1024*1024*1024) or 2*1024*1024*1024)
+            if usage['total_bytes'] + f.size > cap:
+                st.error("Melebihi kapasitas.")
+            else:
+                fid = _drive_upload_stream(service, folder_id, f.name, f, mimetype=f.type or 'application/octet-stream', ref_module='dunyim')
+                st.success(f"Uploaded (ID: {fid})") if fid else st.error("Gagal upload")
+    # Download
+    if tabs[2]:
+        files = _drive_list(service, folder_id)
+        if not files:
+            st.info("Folder kosong.")
+        else:
+            mp = {x['name']: (x['id'], x.get('modifiedTime')) for x in files}
+            sel = st.selectbox("File", list(mp.keys()))
+            if st.button("Download"):
+                try:
+                    # Served from the local LRU cache; Drive is hit once per file version
+                    with open_cached_download(service, *mp[sel]) as fh:
+                        st.download_button("Klik untuk download", data=fh, file_name=sel)
+                except Exception as e:
+                    st.error(f"Gagal download: {e}")
+    # Delete
+    if tabs[3]:
+        files = _drive_list(service, folder_id)
+        if not files:
+            st.info("Folder kosong.")
+        else:
+            mp = {x['name']: x['id'] for x in files}
+            sel = st.selectbox("Pilih file", list(mp.keys()))
+            if st.button("Hapus"):
+                try:
+                    _drive_delete(service, mp[sel])
+                    st.success("Terhapus."); st.rerun()
+                except Exception as e:
+                    st.error(f"Gagal hapus: {e}")
+    # Sync DB
+    if tabs[4]:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("### ⬆️ Upload & Replace DB Lokal")
+            up = st.file_uploader("File .sqlite/.db", type=["sqlite","db"])
+            if up and st.button("Replace DB"):
+                ts = now_wib().strftime('%Y%m%d_%H%M%S')
+                tmp = restore_temp_path()
+                try:
+                    # Salin bertahap ke file sementara; divalidasi sebelum DB live diganti
+                    up.seek(0)
+                    with open(tmp, 'wb') as f2:
+                        shutil.copyfileobj(up, f2, 1024 * 1024)
+                    ok, msg = restore_db_from_file(tmp, local_copy=f"local_backup_before_replace_{ts}.sqlite")
+                    if ok:
+                        st.success(f"DB lokal diganti. {msg}")
+                    else:
+                        st.error(msg)
+                except Exception as e:
+                    st.error(f"Gagal mengganti DB: {e}")
+                finally:
+                    discard_restore_temp(tmp)
+        with col2:
+            st.markdown("### ⬇️ Restore dari Drive")
+            # Generasi backup dari manifest lokal; fallback ke listing Drive bila manifest kosong
+            gens = list_backup_generations()
+            if gens:
+                mp = {f"{g['created_at'].replace('T',' ')} — {g['file_name']} ({_bytes_fmt(g['size_bytes'] or 0)})": g['drive_file_id'] for g in gens}
+            else:
+                files = _drive_list(service, folder_id)
+                dbs = [f for f in files if f.get('name','').endswith(BACKUP_FILE_SUFFIXES)]
+                try:
+                    dbs.sort(key=lambda x: x.get('modifiedTime',''), reverse=True)
+                except Exception:
+                    pass
+                mp = {x['name']: x['id'] for x in dbs}
+            if not mp:
+                st.info("Tidak ada file DB di Drive.")
+            else:
+                sel = st.selectbox("Pilih generasi backup", list(mp.keys()))
+                if st.button("Restore DB Lokal"):
+                    ts = now_wib().strftime('%Y%m%d_%H%M%S')
+                    tmp = restore_temp_path()
+                    try:
+                        with st.spinner("Mengunduh & memvalidasi backup..."):
+                            download_backup_to_file(service, mp[sel], tmp)
+                            ok, msg = restore_db_from_file(tmp, local_copy=f"local_backup_before_restore_{ts}.sqlite")
+                        if ok:
+                            st.success(f"{msg}. Reload halaman.")
+                        else:
+                            st.error(msg)
+                    except Exception as e:
+                        st.error(f"Gagal restore: {e}")
+                    finally:
+                        discard_restore_temp(tmp)
+        st.markdown("### 🕰️ Point-in-time Restore (PITR)")
+        last_ship = shipper_status()
+        if last_ship:
+            st.caption(f"Pengiriman WAL terakhir: {last_ship[0]} — {'OK' if last_ship[1] else 'GAGAL'}: {last_ship[2]}")
+        elif _setting_get('pitr_enabled','false') != 'true':
+            st.caption("PITR nonaktif (aktifkan di Pengaturan).")
+        colP1, colP2 = st.columns(2)
+        with colP1:
+            pitr_date = st.date_input("Tanggal target (WIB)", value=now_wib().date(), key="pitr_date")
+        with colP2:
+            pitr_time = st.time_input("Jam target (WIB)", value=now_wib().time().replace(second=0, microsecond=0), key="pitr_time")
+        if st.button("Bangun DB per waktu target"):
+            out_path = os.path.join(os.path.dirname(config.DB_PATH), f"pitr_restore_{now_wib().strftime('%Y%m%d_%H%M%S')}.sqlite")
+            with st.spinner("Mengunduh base & memutar ulang segmen WAL..."):
+                try:
+                    ok, msg = pitr_restore(service, folder_id, datetime.combine(pitr_date, pitr_time), out_path)
+                except Exception as e:
+                    ok, msg = False, f"Gagal PITR: {e}"
+            if ok:
+                st.success(msg)
+                st.info("DB live tidak diubah. Gunakan 'Upload & Replace DB Lokal' dengan file ini untuk memakainya.")
+            else:
+                st.error(msg)
+    # Audit Log
+    if tabs[5]:
+        try:
+            conn = get_db(); df = pd.read_sql_query("SELECT * FROM backup_log ORDER BY id DESC LIMIT 20", conn)
+        except Exception:
+            df = pd.DataFrame()
+        st.subheader("Verifikasi Restore")
+        ver = last_backup_verification()
+        if not ver:
+            st.warning("Backup belum pernah diverifikasi.")
+        else:
+            age = float(ver.get('age_hours') or 0.0)
+            age_txt = f"{age:.1f} jam lalu" if age < 48 else f"{age/24:.1f} hari lalu"
+            line = f"Terakhir diverifikasi {age_txt} — {ver.get('file_name')}: {ver.get('message')}"
+            if ver.get('status') != 'VERIFIED':
+                st.error(line)
+            elif age > VERIFY_MAX_AGE_HOURS:
+                st.warning(line)
+            else:
+                st.success(line)
+        if st.button("Verifikasi backup terbaru", key="verify_backup_now"):
+            _request_background_verify("manual")
+            st.info("Verifikasi berjalan di latar belakang; hasil muncul sebagai notifikasi.")
+        st.subheader("Riwayat Backup")
+        if df.empty:
+            st.info("Belum ada log backup.")
+        else:
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        st.subheader("Kegagalan Drive")
+        errs = drive_last_errors(20)
+        if not errs:
+            st.caption("Tidak ada kegagalan Drive tercatat (setelah retry).")
+        else:
+            st.dataframe(pd.DataFrame(errs), use_container_width=True, hide_index=True)
+    # Record
+    if tabs[6]:
+        st.subheader("Catatan Manual")
+        with st.form("note_form"):
+            t = st.text_input("Catatan baru")
+            s = st.form_submit_button("Simpan")
+            if s and t.strip():
+                try:
+                    conn = get_db(); cur = conn.cursor()
+                    cur.execute("INSERT INTO record_notes (note, created_by) VALUES (?,?)", (t.strip(), user['email']))
+                    conn.commit(); st.success("Tersimpan."); st.rerun()
+                except Exception as e:
+                    st.error(f"Gagal menyimpan: {e}")
+        try:
+            conn = get_db(); notes = pd.read_sql_query("SELECT * FROM record_notes ORDER BY id DESC LIMIT 50", conn)
+        except Exception:
+            notes = pd.DataFrame()
+        if notes.empty:
+            st.info("Belum ada catatan.")
+        else:
+            st.dataframe(notes[['id','note','created_by','created_at']], use_container_width=True, hide_index=True)
+    # Drive Usage
+    if tabs[7]:
+        st.subheader("Penggunaan Drive")
+        try:
+            usage = _folder_usage_quick(service, folder_id)
+        except Exception as e:
+            st.error(f"Gagal menghitung penggunaan: {e}")
+            usage = {"total_bytes":0,"file_count":0,"unknown_size_count":0}
+        cap = int(_setting_get('project_capacity_bytes', 2*1024*1024*1024) or 2*1024*1024*1024)
+        used = int(usage.get('total_bytes',0))
+        st.metric("Used", _bytes_fmt(used))
+        st.metric("Capacity", _bytes_fmt(cap))
+        pct = (used/cap*100.0) if cap>0 else 0.0
+        st.progress(min(pct/100.0, 1.0))
+        cache = drive_cache_usage()
+        st.caption(f"Cache unduhan lokal: {_bytes_fmt(cache['bytes'])} / {_bytes_fmt(cache['budget'])} ({cache['files']} file)")
+        if st.button("Kosongkan cache unduhan", key="drive_cache_clear"):
+            st.success(f"{clear_drive_cache()} file cache dihapus.")
+        st.subheader("Migrasi Lampiran BLOB ke Drive")
+        st.caption("Lampiran lama yang masih tersimpan di DB diunggah ke Drive bertahap (checkpoint per tabel, bisa dilanjutkan setelah restart), lalu DB di-VACUUM.")
+        running, _ = blob_migration_status()
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            if st.button("▶️ Mulai / Lanjutkan", disabled=running, key="blob_mig_start"):
+                start_blob_migration(folder_id)
+                st.rerun()
+        with c2:
+            if st.button("⏹️ Hentikan", disabled=not running, key="blob_mig_stop"):
+                stop_blob_migration()
+        with c3:
+            if st.button("↺ Ulangi dari awal", disabled=running, key="blob_mig_reset"):
+                reset_blob_migration()
+        if running:
+            _blob_migration_live()
+        else:
+            _blob_migration_panel()
+        st.subheader("Pembersihan Lampiran Yatim")
+        grace = gc_grace_days()
+        st.caption(f"Lampiran modul (unggahan form modul) yang tidak dirujuk kolom *_url/*_drive_id mana pun dan lebih tua dari {grace} hari "
+                   f"dipindah ke trash (karantina); setelah {grace} hari tetap yatim baru dihapus permanen. File lain (backup, PITR, "
+                   "unggahan manual Dunyim) tidak disentuh. GC hanya mengarantina file dari laporan simulasi terakhir.")
+        g1, g2 = st.columns(2)
+        with g1:
+            gc_dry = st.button("🔎 Simulasi (dry-run)", key="drive_gc_dry")
+        with g2:
+            gc_confirm = st.checkbox("Saya yakin", key="drive_gc_confirm")
+            gc_apply = st.button("🧹 Jalankan GC", key="drive_gc_apply", disabled=not gc_confirm)
+        if gc_dry or gc_apply:
+            with st.spinner("Mencocokkan referensi DB dengan isi folder..."):
+                try:
+                    rep = run_attachment_gc(service, folder_id, dry_run=not gc_apply)
+                except Exception as e:
+                    rep = None
+                    st.error(f"GC gagal: {e}")
+            if rep:
+                if rep["dry_run"]:
+                    st.info(f"{rep['orphans']} file yatim ({_bytes_fmt(rep['orphan_bytes'])}) akan dikarantina; "
+                            f"{rep['pending_delete']} file karantina siap dihapus ({_bytes_fmt(rep['reclaimed_bytes'])}).")
+                else:
+                    (st.success if not rep["failed"] else st.warning)(
+                        f"{rep['quarantined']} dikarantina, {rep['deleted']} dihapus ({_bytes_fmt(rep['reclaimed_bytes'])} kembali), "
+                        f"{rep['restored']} dipulihkan, {rep['failed']} gagal.")
+                    if rep["unreviewed"]:
+                        st.info(f"{rep['unreviewed']} file yatim baru belum ada di laporan simulasi; jalankan simulasi dulu.")
+                if rep["items"]:
+                    df_gc = pd.DataFrame(rep["items"])
+                    df_gc["size"] = df_gc["size"].apply(_bytes_fmt)
+                    st.dataframe(df_gc, use_container_width=True, hide_index=True)
+        q = quarantine_list()
+        if q:
+            with st.expander(f"Karantina ({len(q)} file, {_bytes_fmt(sum(int(r['size_bytes'] or 0) for r in q))})"):
+                st.dataframe(pd.DataFrame(q), use_container_width=True, hide_index=True)
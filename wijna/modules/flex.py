@@ -0,0 +1,182 @@
+"""Flex Time: pengajuan jam fleksibel dan approval berjenjang."""
+from datetime import date
+
+import streamlit as st
+
+from wijna.utils import gen_id
+from wijna.db import audit_log, get_db
+from wijna.uow import unit_of_work
+from wijna.notify import _get_user_email_by_name, notify_review_request
+from wijna.ui import card_saved, lazy_tabs, pending_counter, require_login
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def flex_module():
+    user = require_login()
+    st.header("⏰ Flex Time")
+    conn = get_db()
+    cur = conn.cursor()
+    # Cek kolom tabel flex
+    cur.execute("PRAGMA table_info(flex)")
+    flex_cols = [row[1] for row in cur.fetchall()]
+    required_cols = ["alasan","catatan_finance","approval_finance","catatan_director","approval_director"]
+    missing = [c for c in required_cols if c not in flex_cols]
+    if missing:
+        st.error(f"Struktur tabel flex belum sesuai. Kolom berikut belum ada: {', '.join(missing)}.\n\nSilakan backup data, drop tabel flex, lalu jalankan ulang aplikasi agar tabel otomatis dibuat ulang.")
+        return
+    tabs = lazy_tabs([
+        "📝 Input",
+        "💰 Review Finance",
+        "✅ Approval Director",
+        "📋 Daftar Flex"
+    ], key="flex")
+
+    # --- Tab 1: Input Staf ---
+    if tabs[0]:
+        st.subheader(":bust_in_silhouette: Ajukan Flex Time")
+        with st.form("flex_add_form"):
+            nama = st.text_input("Nama")
+            tanggal = st.date_input("Tanggal")
+            jam_mulai = st.time_input("Jam Mulai")
+            jam_selesai = st.time_input("Jam Selesai")
+            alasan = st.text_area("Alasan")
+            submit = st.form_submit_button("Ajukan")
+            if submit:
+                # Validasi jam tidak overlap
+                q = "SELECT * FROM flex WHERE tanggal=? AND ((jam_mulai <= ? AND jam_selesai > ?) OR (jam_mulai < ? AND jam_selesai >= ?) OR (jam_mulai >= ? AND jam_selesai <= ?)) AND approval_director=1"
+                params = (tanggal.isoformat(), jam_mulai.isoformat(), jam_mulai.isoformat(), jam_selesai.isoformat(), jam_selesai.isoformat(), jam_mulai.isoformat(), jam_selesai.isoformat())
+                overlap = pd.read_sql_query(q, conn, params=params)
+                if not nama or not alasan:
+                    st.warning("Nama dan alasan wajib diisi.")
+                elif jam_mulai >= jam_selesai:
+                    st.warning("Jam selesai harus setelah jam mulai.")
+                elif not overlap.empty:
+                    st.error("Jam flex time bentrok/overlap dengan pengajuan lain yang sudah disetujui.")
+                else:
+                    fid = gen_id("flex")
+                    cur.execute("INSERT INTO flex (id, nama, tanggal, jam_mulai, jam_selesai, alasan, catatan_finance, approval_finance, catatan_director, approval_director) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                        (fid, nama, tanggal.isoformat(), jam_mulai.isoformat(), jam_selesai.isoformat(), alasan, '', 0, '', 0))
+                    conn.commit()
+                    try:
+                        audit_log("flex", "create", target=fid, details=f"{nama} {tanggal} {jam_mulai}-{jam_selesai}; alasan={alasan}")
+                    except Exception:
+                        pass
+                    # Notify Finance + Director new request
+                    try:
+                        notify_review_request("flex", title=f"{nama} • {tanggal} {jam_mulai}-{jam_selesai}", entity_id=fid, recipients_roles=("finance","director"))
+                    except Exception:
+                        pass
+                    st.success("Flex time diajukan.")
+
+    @st.fragment
+    def finance_card(row, allowed_finance):
+        with st.expander(f"{row['nama']} | {row['tanggal']} | {row['jam_mulai']} - {row['jam_selesai']}"):
+            st.write(f"Alasan: {row['alasan']}")
+            catatan = st.text_area(
+                "Catatan Finance",
+                value=row['catatan_finance'] or "",
+                key=f"catatan_fin_{row['id']}",
+                disabled=not allowed_finance,
+            )
+            if allowed_finance:
+                approve = st.button("Approve", key=f"approve_fin_{row['id']}")
+                reject = st.button("Tolak", key=f"reject_fin_{row['id']}")
+                if approve or reject:
+                    applicant_email = _get_user_email_by_name(row['nama'])
+                    decision = "finance_approved" if approve else "finance_rejected"
+                    # Notify Director + applicant; skipped if another session already reviewed it
+                    with unit_of_work() as uow:
+                        done = uow.execute("UPDATE flex SET catatan_finance=?, approval_finance=? WHERE id=? AND approval_finance=0",
+                                           (catatan, 1 if approve else -1, row['id'])).rowcount
+                        if done:
+                            uow.audit("flex", "finance_review", target=row['id'], details=f"approve={1 if approve else 0}; note={catatan}")
+                            uow.notify_decision("flex", title=f"{row['nama']} • {row['tanggal']} {row['jam_mulai']}-{row['jam_selesai']}", decision=decision,
+                                                entity_id=row['id'], recipients_roles=("director",),
+                                                recipients_users=[applicant_email] if applicant_email else None, tag_suffix="finance")
+                    if done:
+                        card_saved("Status review finance diperbarui.", "flex")
+                    else:
+                        card_saved("Pengajuan ini sudah diproses.", "flex", icon="ℹ️")
+            else:
+                st.info("Hanya Finance/Superuser yang dapat melakukan review di tab ini.")
+
+    # --- Tab 2: Review Finance ---
+    if tabs[1]:
+        st.subheader(":money_with_wings: Review Finance")
+        allowed_finance = user["role"] in ["finance", "director", "superuser"]
+        rows = conn.execute("SELECT * FROM flex WHERE approval_finance=0 ORDER BY tanggal DESC").fetchall()
+        pending_counter("flex", "Menunggu review Finance", "SELECT COUNT(*) FROM flex WHERE approval_finance=0")
+        if not rows:
+            st.info("Tidak ada pengajuan flex time yang perlu direview.")
+        else:
+            for row in rows:
+                finance_card(row, allowed_finance)
+
+    @st.fragment
+    def director_card(row, allowed_dir):
+        with st.expander(f"{row['nama']} | {row['tanggal']} | {row['jam_mulai']} - {row['jam_selesai']}"):
+            st.write(f"Alasan: {row['alasan']}")
+            st.write(f"Catatan Finance: {row['catatan_finance']}")
+            catatan = st.text_area(
+                "Catatan Director",
+                value=row['catatan_director'] or "",
+                key=f"catatan_dir_{row['id']}",
+                disabled=not allowed_dir,
+            )
+            if allowed_dir:
+                approve = st.button("Approve", key=f"approve_dir_{row['id']}")
+                reject = st.button("Tolak", key=f"reject_dir_{row['id']}")
+                if approve or reject:
+                    applicant_email = _get_user_email_by_name(row['nama'])
+                    decision = "director_approved" if approve else "director_rejected"
+                    # Notify applicant + Finance; skipped if another session already decided
+                    with unit_of_work() as uow:
+                        done = uow.execute("UPDATE flex SET catatan_director=?, approval_director=? WHERE id=? AND approval_finance=1 AND approval_director=0",
+                                           (catatan, 1 if approve else -1, row['id'])).rowcount
+                        if done:
+                            uow.audit("flex", "director_approval", target=row['id'], details=f"approve={1 if approve else 0}; note={catatan}")
+                            uow.notify_decision("flex", title=f"{row['nama']} • {row['tanggal']} {row['jam_mulai']}-{row['jam_selesai']}", decision=decision,
+                                                entity_id=row['id'], recipients_roles=("finance",),
+                                                recipients_users=[applicant_email] if applicant_email else None, tag_suffix="director")
+                    if done:
+                        card_saved("Status approval director diperbarui.", "flex")
+                    else:
+                        card_saved("Pengajuan ini sudah diproses.", "flex", icon="ℹ️")
+            else:
+                st.info("Hanya Director/Superuser yang dapat memberikan approval di tab ini.")
+
+    # --- Tab 3: Approval Director ---
+    if tabs[2]:
+        st.subheader("👨‍💼 Approval Director")
+        allowed_dir = user["role"] in ["director", "superuser"]
+        rows = conn.execute("SELECT * FROM flex WHERE approval_finance=1 AND approval_director=0 ORDER BY tanggal DESC").fetchall()
+        pending_counter("flex", "Menunggu approval Director", "SELECT COUNT(*) FROM flex WHERE approval_finance=1 AND approval_director=0")
+        if not rows:
+            st.info("Tidak ada pengajuan flex time yang menunggu approval director.")
+        else:
+            for row in rows:
+                director_card(row, allowed_dir)
+
+    # --- Tab 4: Daftar Flex ---
+    if tabs[3]:
+        st.subheader(":clipboard: Daftar Flex Time")
+        df = pd.read_sql_query("SELECT * FROM flex ORDER BY tanggal DESC, jam_mulai ASC", conn)
+        if df.empty:
+            st.info("Belum ada data flex time.")
+        else:
+            df['status'] = df.apply(lambda r: '✅ Disetujui' if r['approval_director']==1 else ('❌ Ditolak' if r['approval_finance']==-1 or r['approval_director']==-1 else ('🕒 Proses')), axis=1)
+            df['jam_mulai'] = df['jam_mulai'].str[:5]
+            df['jam_selesai'] = df['jam_selesai'].str[:5]
+            st.dataframe(df[['nama','tanggal','jam_mulai','jam_selesai','alasan','catatan_finance','catatan_director','status']], width='stretch')
+        # Rekap Bulanan
+        st.markdown("#### Rekap Bulanan Flex Time (Otomatis)")
+        this_month = date.today().strftime("%Y-%m")
+        df_month = df[df['tanggal'].str[:7] == this_month] if not df.empty else pd.DataFrame()
+        st.write(f"Total pengajuan flex bulan ini: {len(df_month)}")
+        if not df_month.empty:
+            by_pegawai = df_month.groupby('nama').agg({'id':'count'}).rename(columns={'id':'jumlah_pengajuan'})
+            st.write("Rekap per Pegawai:")
+            st.dataframe(by_pegawai)
+
+# Modul Mobil Kantor
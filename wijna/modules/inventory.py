@@ -0,0 +1,425 @@
+"""Inventory: input barang, review Finance, approval Director, peminjaman."""
+import sqlite3
+from datetime import date, datetime
+
+import streamlit as st
+
+from wijna.utils import format_datetime_wib, gen_id, now_wib_iso
+from wijna.db import audit_log, get_db
+from wijna.uow import unit_of_work
+from wijna.drive import _drive_id_from_url
+from wijna.notify import notify_decision, notify_review_request, _resolve_user_email_by_id_or_name
+from wijna.ui import (
+    card_saved, lazy_tabs, pending_counter, require_login,
+    show_file_download, topic_cached, upload_file_and_store,
+)
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def inventory_module():
+    # Prepare monthly rekap at the top
+    user = require_login()
+    # Normalize role once to avoid casing/whitespace mismatches
+    _role = (user.get("role") or "").strip().lower()
+    conn = get_db()
+    cur = conn.cursor()
+    # Safeguard: if table missing (first migration), create it and continue
+    try:
+        cur.execute("SELECT 1 FROM inventory LIMIT 1")
+    except Exception:
+        # create table on the fly (should already exist via ensure_db, but fallback)
+        cur.execute("""CREATE TABLE IF NOT EXISTS inventory (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                location TEXT,
+                status TEXT,
+                pic TEXT,
+                updated_at TEXT,
+                finance_note TEXT,
+                finance_approved INTEGER DEFAULT 0,
+                director_note TEXT,
+                director_approved INTEGER DEFAULT 0,
+                file_blob BLOB,
+                file_name TEXT
+            )""")
+        conn.commit()
+    # --- UI with Tabs: Selalu tampilkan SEMUA tab; hak akses diatur di dalam masing-masing tab ---
+    st.markdown("# 📦 Inventory")
+
+    tab_labels = [
+        "➕ Tambah Barang",
+        "💰 Review Finance",
+        "✅ Approval Director",
+        "📦 Daftar Inventaris",
+    ]
+
+    # Tab 1: Tambah Barang (aksi untuk Staff, Finance, Director, Superuser)
+    def staff_tab():
+        allowed = _role in ["staff", "finance", "director", "superuser"]
+        if not allowed:
+            st.info("Anda tidak memiliki akses untuk menambah barang. Tab ini ditampilkan untuk transparansi alur kerja.")
+            return
+        with st.form("inv_add"):
+            name = st.text_input("Nama Barang")
+            keterangan_opsi = st.selectbox("Keterangan Tambahan", ["", "dijual", "rusak"], index=0)
+            loc = st.text_input("Tempat Barang")
+            status = st.selectbox("Status", ["Tersedia","Dipinjam","Rusak","Dijual"])
+            # PIC dihapus
+            f = st.file_uploader("Lampiran (opsional)")
+            submitted = st.form_submit_button("Simpan (draft)")
+            if submitted:
+                if not name:
+                    st.warning("Nama barang wajib diisi.")
+                else:
+                    full_nama = name
+                    if keterangan_opsi:
+                        full_nama += f" ({keterangan_opsi})"
+                    iid = gen_id("inv")
+                    now = now_wib_iso()
+                    blob, fname, furl = upload_file_and_store(f, "inventory") if f else (None, None, None)
+                    # PIC dihapus, set kosong
+                    pic = ""
+                    # Store Drive URL when available; keep legacy columns for compatibility
+                    try:
+                        drive_id = _drive_id_from_url(furl) if furl else None
+                        cur.execute("PRAGMA table_info(inventory)")
+                        inv_cols = {row[1] for row in cur.fetchall()}
+                    except Exception:
+                        inv_cols = set()
+                    if {'drive_file_url','drive_file_id'}.issubset(inv_cols):
+                        cur.execute("""INSERT INTO inventory (id,name,location,status,pic,updated_at,finance_note,finance_approved,director_note,director_approved,file_blob,file_name,drive_file_id,drive_file_url)
+                                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                                    (iid, full_nama, loc, status, pic, now, '', 0, '', 0, None if furl else blob, fname, drive_id, furl))
+                    else:
+                        cur.execute("""INSERT INTO inventory (id,name,location,status,pic,updated_at,finance_note,finance_approved,director_note,director_approved,file_blob,file_name)
+                                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+                                    (iid, full_nama, loc, status, pic, now, '', 0, '', 0, blob, fname))
+                    conn.commit()
+                    try:
+                        audit_log("inventory", "create", target=iid, details=f"{full_nama} @ {loc} status={status}")
+                    except Exception:
+                        pass
+                    # Notify Finance + Director immediately on draft creation
+                    try:
+                        notify_review_request("inventory", title=f"{full_nama} — {loc}", entity_id=iid, recipients_roles=("finance","director"))
+                    except Exception:
+                        pass
+                    st.success("Item disimpan sebagai draft. Menunggu review Finance.")
+
+    @st.fragment
+    def finance_card(r, idx, allowed):
+        with st.container():
+            st.markdown(f"""
+<div style='border:1.5px solid #b3d1ff; border-radius:10px; padding:1.2em 1em; margin-bottom:1.5em; background:#f8fbff;'>
+<b>📦 {r['name']}</b> <span style='color:#888;'>(ID: {r['id']})</span><br>
+<b>Lokasi:</b> {r['location']}<br>
+<b>Status:</b> {r['status']}<br>
+<b>Penanggung Jawab:</b> {r['pic']}<br>
+<b>Terakhir Update:</b> {r['updated_at']}<br>
+""", unsafe_allow_html=True)
+            # Download file/link jika ada
+            file_name = r['file_name'] if 'file_name' in r.keys() else None
+            drive_url = r['drive_file_url'] if 'drive_file_url' in r.keys() else None
+            if drive_url:
+                show_file_download(drive_url, file_name or 'Lampiran')
+            else:
+                file_blob = r['file_blob'] if 'file_blob' in r.keys() else None
+                if file_blob and file_name:
+                    show_file_download(file_blob, file_name)
+            st.markdown("**Catatan Finance:**")
+            note = st.text_area(
+                "Tulis catatan atau alasan jika perlu",
+                value=r["finance_note"] or "",
+                key=f"fin_note_{r['id']}_finance_{idx}",
+                disabled=not allowed,
+            )
+            colf1, colf2 = st.columns([1,2])
+            with colf1:
+                if allowed and st.button("🔎 Review", key=f"ap_fin_{r['id']}_finance_{idx}"):
+                    requester_email = None
+                    # PIC may store requester id or name; try resolve
+                    if isinstance(r, sqlite3.Row):
+                        try:
+                            requester_email = _resolve_user_email_by_id_or_name(r['pic'] if 'pic' in r.keys() else None)
+                        except Exception:
+                            requester_email = None
+                    # Update + audit + notify Director/requester in one commit (skipped if
+                    # another session reviewed the item since this card was rendered)
+                    with unit_of_work() as uow:
+                        done = uow.execute("UPDATE inventory SET finance_note=?, finance_approved=1 WHERE id=? AND finance_approved=0", (note, r["id"])).rowcount
+                        if done:
+                            uow.audit("inventory", "finance_review", target=r["id"], details=note)
+                            uow.notify_decision(
+                                "inventory",
+                                title=r['name'],
+                                decision="finance_reviewed",
+                                entity_id=r['id'],
+                                recipients_roles=("director",),
+                                recipients_users=[requester_email] if requester_email else None,
+                                tag_suffix="finance",
+                                decision_note=note,
+                                acted_by_role="finance",
+                                decision_kind="finance_decision",
+                            )
+                    if done:
+                        card_saved("Finance reviewed. Menunggu persetujuan Director.", "inventory")
+                    else:
+                        card_saved(f"{r['name']} sudah di-review Finance.", "inventory", icon="ℹ️")
+            with colf2:
+                st.caption("Klik Review jika sudah sesuai. Catatan akan tersimpan di database.")
+
+    # Tab 2: Review Finance (aksi untuk Finance, Director, Superuser)
+    def finance_tab():
+        allowed = _role in ["finance", "director", "superuser"]
+        if not allowed:
+            st.info("Hanya Finance, Director, atau Superuser yang dapat melakukan review. Anda dapat melihat daftar yang menunggu review.")
+        rows = cur.execute("SELECT * FROM inventory WHERE finance_approved=0").fetchall()
+        pending_counter("inventory", "Menunggu review Finance", "SELECT COUNT(*) FROM inventory WHERE finance_approved=0")
+        for idx, r in enumerate(rows):
+            finance_card(r, idx, allowed)
+        # Section: items waiting for Director approval with resend option
+        st.markdown("---")
+        st.subheader("Menunggu Approval Director" + (" (Kirim Ulang Notifikasi)" if allowed else ""))
+        waiting_director(allowed)
+
+    @st.fragment
+    def waiting_director(allowed):
+        def _load():
+            conn = get_db()
+            try:
+                return [dict(w) for w in conn.execute("SELECT id, name, pic FROM inventory WHERE finance_approved=1 AND director_approved=0 ORDER BY updated_at DESC")]
+            finally:
+                conn.close()
+        waiting = topic_cached("inventory", "inventory_waiting_director", _load)
+        if not waiting:
+            st.caption("Tidak ada item yang menunggu.")
+        else:
+            for jdx, w in enumerate(waiting):
+                col1, col2, col3 = st.columns([3,3,2])
+                with col1:
+                    st.write(f"{w['name']} ({w['id']})")
+                with col2:
+                    st.write(f"PIC: {w['pic']}")
+                with col3:
+                    if allowed and st.button("Kirim Ulang Notifikasi", key=f"resend_dir_{w['id']}"):
+                        try:
+                            try:
+                                requester_email = _resolve_user_email_by_id_or_name(w.get('pic'))
+                            except Exception:
+                                requester_email = None
+                            notify_decision(
+                                "inventory",
+                                title=w['name'],
+                                decision="finance_reviewed",
+                                entity_id=w['id'],
+                                recipients_roles=("director",),
+                                recipients_users=[requester_email] if requester_email else None,
+                                tag_suffix="finance-resend",
+                                acted_by_role="finance",
+                                decision_kind="finance_decision",
+                            )
+                            st.success("Notifikasi dikirim.")
+                        except Exception:
+                            st.warning("Gagal mengirim notifikasi.")
+
+    @st.fragment
+    def director_card(r, idx, allowed):
+        updated_str = format_datetime_wib(r['updated_at'])
+        with st.expander(f"[Menunggu Approval Director] {r['name']} ({r['id']})"):
+            st.markdown(f"""
+            <div style='background:#f8fafc;border-radius:12px;padding:1.2em 1.5em 1em 1.5em;margin-bottom:1em;'>
+                <b>Nama:</b> {r['name']}<br>
+                <b>ID:</b> {r['id']}<br>
+                <b>Lokasi:</b> {r['location']}<br>
+                <b>Status:</b> <span style='color:#2563eb;font-weight:600'>{r['status']}</span><br>
+                <b>PIC:</b> {r['pic']}<br>
+                <b>Update Terakhir:</b> {updated_str}<br>
+            </div>
+            """, unsafe_allow_html=True)
+            # Download file/link jika ada
+            try:
+                drive_url = r['drive_file_url'] if 'drive_file_url' in r.keys() else None
+            except Exception:
+                drive_url = None
+            if drive_url:
+                try:
+                    _fname = r['file_name'] if 'file_name' in r.keys() else None
+                except Exception:
+                    _fname = None
+                show_file_download(drive_url, _fname)
+            elif r['file_blob'] and r['file_name']:
+                show_file_download(r['file_blob'], r['file_name'])
+            st.markdown("<b>Catatan Director</b>", unsafe_allow_html=True)
+            note2 = st.text_area(
+                "",
+                value=r["director_note"] or "",
+                key=f"dir_note_{r['id']}_director_{idx}",
+                placeholder="Tulis catatan atau alasan jika perlu...",
+                height=80,
+                disabled=not allowed,
+            )
+            colA, colB = st.columns([1,1])
+            with colA:
+                if allowed and st.button("✅ Approve", key=f"ap_dir_{r['id']}_director_{idx}"):
+                    requester_email = None
+                    if isinstance(r, sqlite3.Row):
+                        try:
+                            requester_email = _resolve_user_email_by_id_or_name(r['pic'] if 'pic' in r.keys() else None)
+                        except Exception:
+                            requester_email = None
+                    # Update + audit + notify requester/Finance in one commit (skipped if
+                    # another session decided the item since this card was rendered)
+                    with unit_of_work() as uow:
+                        done = uow.execute("UPDATE inventory SET director_note=?, director_approved=1 WHERE id=? AND finance_approved=1 AND director_approved=0",
+                                           (note2, r["id"])).rowcount
+                        if done:
+                            uow.audit("inventory", "director_approval", target=r["id"], details=f"approve=1; note={note2}")
+                            uow.notify_decision(
+                                "inventory",
+                                title=r['name'],
+                                decision="director_approved",
+                                entity_id=r['id'],
+                                recipients_roles=("finance",),
+                                recipients_users=[requester_email] if requester_email else None,
+                                tag_suffix="director",
+                                decision_note=note2,
+                                acted_by_role="director",
+                                decision_kind="director_decision",
+                            )
+                    if done:
+                        card_saved("Item telah di-approve Director.", "inventory")
+                    else:
+                        card_saved(f"{r['name']} sudah diputuskan Director.", "inventory", icon="ℹ️")
+            with colB:
+                if allowed and st.button("❌ Tolak", key=f"reject_dir_{r['id']}_director_{idx}"):
+                    requester_email = None
+                    if isinstance(r, sqlite3.Row):
+                        try:
+                            requester_email = _resolve_user_email_by_id_or_name(r['pic'] if 'pic' in r.keys() else None)
+                        except Exception:
+                            requester_email = None
+                    # Update + audit + notify requester/Finance in one commit (skipped if
+                    # another session decided the item since this card was rendered)
+                    with unit_of_work() as uow:
+                        done = uow.execute("UPDATE inventory SET director_note=?, director_approved=-1 WHERE id=? AND finance_approved=1 AND director_approved=0",
+                                           (note2, r["id"])).rowcount
+                        if done:
+                            uow.audit("inventory", "director_approval", target=r["id"], details=f"approve=0; note={note2}")
+                            uow.notify_decision(
+                                "inventory",
+                                title=r['name'],
+                                decision="director_rejected",
+                                entity_id=r['id'],
+                                recipients_roles=("finance",),
+                                recipients_users=[requester_email] if requester_email else None,
+                                tag_suffix="director",
+                                decision_note=note2,
+                                acted_by_role="director",
+                                decision_kind="director_decision",
+                            )
+                    if done:
+                        card_saved("Item ditolak Director.", "inventory", icon="⚠️")
+                    else:
+                        card_saved(f"{r['name']} sudah diputuskan Director.", "inventory", icon="ℹ️")
+
+    # Tab 3: Approval Director (aksi hanya untuk Director/Superuser; lainnya read-only)
+    def director_tab():
+        allowed = _role in ["director", "superuser"]
+        if not allowed:
+            st.info("Hanya Director atau Superuser yang dapat memberikan persetujuan. Anda dapat melihat daftar yang menunggu persetujuan.")
+        rows = cur.execute("SELECT * FROM inventory WHERE finance_approved=1 AND director_approved=0").fetchall()
+        pending_counter("inventory", "Menunggu approval Director", "SELECT COUNT(*) FROM inventory WHERE finance_approved=1 AND director_approved=0")
+        for idx, r in enumerate(rows):
+            director_card(r, idx, allowed)
+
+    # Tab 4: Daftar Inventaris (tetap tanpa batasan)
+    def data_tab():
+        st.subheader("Daftar Inventaris & Pinjam Barang")
+        left_col, right_col = st.columns([2, 1])
+        # --- Kiri: Daftar Inventaris ---
+        with left_col:
+            filter_col1, filter_col2, filter_col3 = st.columns([2,2,2])
+            with filter_col1:
+                filter_nama = st.text_input("Filter Nama Barang", "")
+            with filter_col2:
+                filter_lokasi = st.text_input("Filter Lokasi", "")
+            with filter_col3:
+                filter_status = st.selectbox("Filter Status", ["Semua", "Tersedia", "Dipinjam", "Rusak", "Dijual"], index=0)
+
+            df = pd.read_sql_query("SELECT id, name, location, status, pic, updated_at, file_name, file_blob FROM inventory ORDER BY updated_at DESC", conn)
+            if not df.empty and 'updated_at' in df.columns:
+                df['updated_at'] = df['updated_at'].apply(format_datetime_wib)
+
+            filtered_df = df.copy()
+            if filter_nama:
+                filtered_df = filtered_df[filtered_df['name'].str.contains(filter_nama, case=False, na=False)]
+            if filter_lokasi:
+                filtered_df = filtered_df[filtered_df['location'].str.contains(filter_lokasi, case=False, na=False)]
+            if filter_status != "Semua":
+                filtered_df = filtered_df[filtered_df['status'] == filter_status]
+
+            if filtered_df.empty:
+                st.info("Tidak ada data inventaris sesuai filter.")
+            else:
+                show_df = filtered_df.drop(columns=["file_blob"], errors="ignore")
+                st.dataframe(show_df, width='stretch')
+
+                lampiran_list = [
+                    f"{row['name']} - {row['file_name']}" for idx, row in filtered_df.iterrows()
+                    if row['file_blob'] is not None and row['file_name']
+                ]
+                # Include the unique record ID to build a stable unique key for the download button
+                lampiran_dict = {
+                    f"{row['name']} - {row['file_name']}": (row['id'], row['file_name'], row['file_blob'])
+                    for idx, row in filtered_df.iterrows()
+                    if row['file_blob'] is not None and row['file_name']
+                }
+                if lampiran_list:
+                    selected = st.selectbox("Pilih lampiran untuk diunduh:", lampiran_list)
+                    if selected:
+                        rec_id, file_name, file_blob = lampiran_dict[selected]
+                        st.download_button(
+                            label=f"⬇️ Download {file_name}",
+                            data=file_blob,
+                            file_name=file_name,
+                            mime="application/octet-stream",
+                            key=f"inv_download_{rec_id}"
+                        )
+                else:
+                    st.info("Tidak ada lampiran yang tersedia untuk diunduh.")
+
+        # --- Kanan: Pinjam Barang ---
+        with right_col:
+            st.markdown("### 📋 Pinjam Barang")
+            # Filter pinjam barang mengikuti filter kiri
+            pinjam_df = filtered_df.copy()
+            for idx, row in pinjam_df.iterrows():
+                if row['status'] != "Dipinjam":
+                    loan_card(row['id'], row['name'])
+
+    @st.fragment
+    def loan_card(iid, name):
+        with st.expander(f"Pinjam: {name} ({iid})"):
+            keperluan = st.text_input(f"Keperluan pinjam untuk {name}", key=f"keperluan_{iid}")
+            tgl_kembali = st.date_input(f"Tanggal Kembali", key=f"tglkembali_{iid}", min_value=date.today())
+            ajukan = st.button(f"Ajukan Pinjam", key=f"ajukan_{iid}")
+            if ajukan:
+                # Simpan pengajuan: status tetap, approval direset, info pengajuan di pic
+                conn = get_db()
+                conn.execute("UPDATE inventory SET pic=?, finance_approved=0, director_approved=0, updated_at=? WHERE id=?", (f"{user['id']}|{keperluan}|{tgl_kembali}|0|0", datetime.utcnow().isoformat(), iid))
+                conn.commit()
+                conn.close()
+                try:
+                    audit_log("inventory", "loan_request", target=iid, details=f"keperluan={keperluan}; kembali={tgl_kembali}")
+                    notify_review_request("inventory", title=f"Pinjam {name} oleh {user['full_name']}", entity_id=iid, recipients_roles=("finance","director"))
+                except Exception:
+                    pass
+                card_saved("Pengajuan pinjam barang berhasil. Menunggu ACC Finance & Director.", "inventory")
+
+    # Render tabs dalam urutan tetap dan jalankan fungsi masing-masing
+    tab_contents = [staff_tab, finance_tab, director_tab, data_tab]
+    selected = lazy_tabs(tab_labels, key="inventory")
+    for i, tab_func in enumerate(tab_contents):
+        if selected[i]:
+            tab_func()
@@ -0,0 +1,289 @@
+"""Kalender Bersama: agenda bersama, libur nasional, dan cuti."""
+from datetime import date, timedelta
+
+import streamlit as st
+
+from wijna.utils import format_datetime_wib, gen_id, now_wib_iso
+from wijna.db import audit_log, get_db
+from wijna.notify import (
+    _email_enabled, _get_all_active_emails, _mark_notif_sent, _notif_already_sent, _send_email,
+)
+from wijna.ui import lazy_tabs, require_login
+from wijna.startup import LazyModule, timed_import
+
+pd = LazyModule("pandas")
+
+def calendar_module():
+
+    user = require_login()
+    st.header("📅 Kalender Bersama (Auto Integrasi)")
+    conn = get_db()
+    cur = conn.cursor()
+
+    tab1, tab2 = lazy_tabs(["➕ Tambah Libur Nasional", "📆 Kalender & Rekap"], key="calendar")
+
+    # Tab 1: Tambah Libur Nasional (khusus Director/Superuser)
+    if tab1:
+        st.subheader("Tambah Libur Nasional (Director)")
+        if user["role"] in ["director", "superuser"]:
+            with st.form("add_libur_nasional"):
+                judul = st.text_input("Judul Libur Nasional")
+                tgl_mulai = st.date_input("Tgl Mulai")
+                tgl_selesai = st.date_input("Tgl Selesai")
+                sumber = st.text_input("Sumber / Dasar Penetapan (opsional)")
+                if st.form_submit_button("Tambah Libur Nasional"):
+                    cid = gen_id("cal")
+                    now = now_wib_iso()
+                    cur.execute("INSERT INTO calendar (id,jenis,judul,nama_divisi,tgl_mulai,tgl_selesai,deskripsi,file_blob,file_name,is_holiday,sumber,ditetapkan_oleh,tanggal_penetapan) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                        (cid, "Libur Nasional", judul, "-", tgl_mulai.isoformat(), tgl_selesai.isoformat(), sumber, None, None, 1, sumber, user["full_name"], now))
+                    cur.execute("INSERT INTO public_holidays (tahun,tanggal,nama,keterangan,ditetapkan_oleh,tanggal_penetapan) VALUES (?,?,?,?,?,?)",
+                        (tgl_mulai.year, tgl_mulai.isoformat(), judul, sumber or "", user["full_name"], now))
+                    conn.commit()
+                    try:
+                        audit_log("calendar", "add_holiday", target=cid, details=f"{judul} {tgl_mulai}..{tgl_selesai}")
+                    except Exception:
+                        pass
+                    # Notify all staff about new public holiday
+                    try:
+                        if _email_enabled():
+                            all_staff = _get_all_active_emails()
+                            if all_staff:
+                                tag = f"holiday:{cid}:{tgl_mulai.isoformat()}-{tgl_selesai.isoformat()}"
+                                if not _notif_already_sent('calendar', cid, 'new_holiday', tag):
+                                    subj = f"[WIJNA] Libur Nasional ditetapkan: {judul}"
+                                    body = (
+                                        f"Libur Nasional baru telah ditambahkan.\n"
+                                        f"Nama: {judul}\n"
+                                        f"Tanggal: {tgl_mulai.isoformat()} s/d {tgl_selesai.isoformat()}\n"
+                                        f"Sumber: {sumber or '-'}\n"
+                                        f"Ditetapkan oleh: {user.get('full_name','-')} pada {format_datetime_wib(now)}\n"
+                                    )
+                                    if _send_email(all_staff, subj, body):
+                                        _mark_notif_sent('calendar', cid, 'new_holiday', tag, all_staff)
+                    except Exception:
+                        pass
+                    st.success("Libur Nasional ditambahkan.")
+        else:
+            st.info("Hanya Director yang bisa menambah Libur Nasional.")
+
+    # Tab 2: Kalender Gabungan & Rekap (dengan tampilan seperti gambar/FullCalendar)
+    if tab2:
+        # Use raw sqlite connection for pandas compatibility
+        raw_conn = conn._conn if hasattr(conn, "_conn") else conn
+
+        # --- AUTO INTEGRASI EVENT ---
+        df_cuti = pd.read_sql_query("SELECT nama as judul, 'Cuti' as jenis, nama as nama_divisi, tgl_mulai, tgl_selesai FROM cuti WHERE director_approved=1", raw_conn)
+        # Flex table uses approval_director (not director_approved). Fallback if column missing.
+        try:
+            df_flex = pd.read_sql_query("SELECT nama as judul, 'Flex Time' as jenis, nama as nama_divisi, tanggal as tgl_mulai, tanggal as tgl_selesai FROM flex WHERE approval_director=1", raw_conn)
+        except Exception:
+            # fallback without filter
+            try:
+                df_flex = pd.read_sql_query("SELECT nama as judul, 'Flex Time' as jenis, nama as nama_divisi, tanggal as tgl_mulai, tanggal as tgl_selesai FROM flex", raw_conn)
+            except Exception:
+                df_flex = pd.DataFrame(columns=["judul","jenis","nama_divisi","tgl_mulai","tgl_selesai"])
+        df_delegasi = pd.read_sql_query("SELECT judul, 'Delegasi' as jenis, pic as nama_divisi, tgl_mulai, tgl_selesai FROM delegasi", raw_conn)
+        df_rapat = pd.read_sql_query("SELECT judul, jenis, nama_divisi, tgl_mulai, tgl_selesai FROM calendar WHERE jenis='Rapat'", raw_conn)
+        df_mobil = pd.read_sql_query("SELECT tujuan as judul, 'Mobil Kantor' as jenis, kendaraan as nama_divisi, tgl_mulai, tgl_selesai, kendaraan FROM mobil WHERE status='Disetujui'", raw_conn)
+        df_libur = pd.read_sql_query("SELECT judul, jenis, nama_divisi, tgl_mulai, tgl_selesai FROM calendar WHERE is_holiday=1", raw_conn)
+
+        # Gabungkan semua event
+        df_all = pd.concat([
+            df_cuti,
+            df_flex,
+            df_delegasi,
+            df_rapat,
+            df_mobil.drop(columns=["kendaraan"], errors="ignore"),
+            df_libur
+        ], ignore_index=True)
+
+        # Cek overlap mobil kantor (tidak boleh overlap untuk kendaraan yang sama)
+        if not df_mobil.empty:
+            df_mobil_sorted = df_mobil.sort_values(["kendaraan", "tgl_mulai"])
+            overlaps = []
+            for kendaraan, group in df_mobil_sorted.groupby("kendaraan"):
+                prev_end = None
+                for idx, row in group.iterrows():
+                    start = pd.to_datetime(row["tgl_mulai"])
+                    end = pd.to_datetime(row["tgl_selesai"])
+                    if prev_end and start <= prev_end:
+                        overlaps.append((kendaraan, row["tgl_mulai"], row["tgl_selesai"]))
+                    prev_end = max(prev_end, end) if prev_end else end
+            if overlaps:
+                st.warning(f"Terdapat overlap jadwal Mobil Kantor untuk kendaraan yang sama: {overlaps}")
+
+        # Prepare helper columns once
+        if not df_all.empty:
+            df_all = df_all.copy()
+            df_all["tgl_mulai_dt"] = pd.to_datetime(df_all["tgl_mulai"], errors="coerce")
+            df_all["tgl_selesai_dt"] = pd.to_datetime(df_all["tgl_selesai"], errors="coerce")
+
+            # Sub-view switcher to avoid hidden-tab mount issues for the calendar component
+            st.markdown("### 📆 Kalender & 📊 Rekap")
+            view_choice = st.radio(
+                "",
+                ["Kalender", "Rekap"],
+                horizontal=True,
+                key="kalender_rekap_switch",
+                label_visibility="collapsed",
+            )
+
+            # --- View: Kalender (FullCalendar) ---
+            if view_choice == "Kalender":
+                # Build events for FullCalendar
+                dff = df_all.sort_values("tgl_mulai") if not df_all.empty else pd.DataFrame()
+                if not dff.empty:
+                    COLOR_MAP = {
+                        "Cuti": "#FF6C6C",
+                        "Flex Time": "#FFA500",
+                        "Delegasi": "#8E44AD",
+                        "Rapat": "#3498DB",
+                        "Mobil Kantor": "#27AE60",
+                        "Libur Nasional": "#F1C40F",
+                    }
+                    events = []
+                    for _, r in dff.iterrows():
+                        try:
+                            start_dt = pd.to_datetime(r.get("tgl_mulai"))
+                            end_dt = pd.to_datetime(r.get("tgl_selesai"))
+                            if pd.isna(start_dt):
+                                continue
+                            # FullCalendar all-day end is exclusive; tambah 1 hari agar inklusif
+                            end_dt = (end_dt if pd.notna(end_dt) else start_dt) + pd.Timedelta(days=1)
+                            color = COLOR_MAP.get(str(r.get("jenis")), "#4f8cff")
+                            title = f"[{r.get('jenis','-')}] {r.get('judul','-')} — {r.get('nama_divisi','-')}"
+                            events.append({
+                                "title": title,
+                                "start": start_dt.strftime("%Y-%m-%d"),
+                                "end": end_dt.strftime("%Y-%m-%d"),
+                                "allDay": True,
+                                "backgroundColor": color,
+                                "borderColor": color,
+                            })
+                        except Exception:
+                            continue
+
+                    # Try to import component. Fall back to table if not available.
+                    cal_available = False
+                    try:
+                        st_calendar = timed_import("streamlit_calendar").calendar
+                        cal_available = True
+                    except Exception:
+                        cal_available = False
+
+                    if cal_available:
+                        calendar_options = {
+                            "editable": False,
+                            "selectable": False,
+                            "headerToolbar": {
+                                "left": "today prev,next",
+                                "center": "title",
+                                "right": "dayGridDay,dayGridWeek,dayGridMonth",
+                            },
+                            "initialView": "dayGridMonth",
+                            "dayMaxEvents": True,
+                            # Fixed heights avoid collapsing when rendered inside hidden tabs/containers
+                            "height": 680,
+                            "contentHeight": 640,
+                            "expandRows": True,
+                            "displayEventTime": False,
+                            # Reduce layout shifts inside dynamic containers
+                            "handleWindowResize": False,
+                            "lazyFetching": True,
+                        }
+                        custom_css = """
+                            .fc .fc-toolbar-title { font-size: 1.3rem; }
+                            .fc .fc-button-primary { background: linear-gradient(90deg, #4f8cff 0%, #38c6ff 100%); border: none; }
+                            .fc .fc-button-primary:not(:disabled).fc-button-active { background: #2a5d9f; }
+                        """
+                        cal_state = st_calendar(
+                            events=events,
+                            options=calendar_options,
+                            custom_css=custom_css,
+                            key="wijna_calendar_main",
+                        )
+
+                        # Optional: simple event click preview
+                        if isinstance(cal_state, dict) and cal_state.get("callback") == "eventClick":
+                            ev = (cal_state.get("eventClick") or {}).get("event") or {}
+                            st.info(f"{ev.get('title','Event')} — {ev.get('start','')} s/d {ev.get('end','')}")
+                    else:
+                        st.info("Komponen 'streamlit-calendar' belum terpasang. Menampilkan tabel sebagai fallback.")
+                        show_cols = ["judul", "jenis", "nama_divisi", "tgl_mulai", "tgl_selesai"]
+                        st.dataframe(dff[show_cols], use_container_width=True)
+
+                else:
+                    st.info("Tidak ada event untuk ditampilkan.")
+
+            # --- View: Rekap ---
+            if view_choice == "Rekap":
+                # Tampilkan filter hanya di mode Rekap
+                st.subheader("🔎 Filter Kalender")
+                # Default rentang: bulan ini
+                today = date.today()
+                month_start = today.replace(day=1)
+                next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+                month_end = next_month - timedelta(days=1)
+                default_start = month_start
+                default_end = month_end
+
+                col_a, col_b = st.columns([2, 2])
+                with col_a:
+                    jenis_options = sorted([x for x in df_all["jenis"].dropna().unique().tolist()])
+                    jenis_selected = st.multiselect("Jenis Event", jenis_options, default=jenis_options, key="kalender_filter_jenis")
+                with col_b:
+                    date_range = st.date_input("Rentang Tanggal (overlap)", value=(default_start, default_end), key="kalender_filter_range")
+
+                col_c, col_d = st.columns([2, 2])
+                with col_c:
+                    filter_div = st.text_input("Filter Divisi (nama_divisi)", "", key="kalender_filter_div")
+                with col_d:
+                    filter_judul = st.text_input("Cari Judul", "", key="kalender_filter_judul")
+
+                # Terapkan filter untuk Rekap
+                dff = df_all[(df_all["jenis"].isin(jenis_selected))] if jenis_selected else df_all.copy()
+                if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+                    start_d, end_d = date_range
+                    if start_d and end_d:
+                        dff = dff[(dff["tgl_mulai_dt"] <= pd.to_datetime(end_d)) & (dff["tgl_selesai_dt"] >= pd.to_datetime(start_d))]
+                if filter_div:
+                    dff = dff[dff["nama_divisi"].astype(str).str.contains(filter_div, case=False, na=False)]
+                if filter_judul:
+                    dff = dff[dff["judul"].astype(str).str.contains(filter_judul, case=False, na=False)]
+                st.subheader("📊 Rekap Bulanan dari Hasil Filter")
+                this_month = date.today().strftime("%Y-%m")
+                df_month = dff[dff['tgl_mulai'].astype(str).str[:7] == this_month] if not dff.empty else pd.DataFrame()
+                c1, c2, c3 = st.columns(3)
+                total_ev = int(len(df_month)) if not df_month.empty else 0
+                uniq_div = int(df_month['nama_divisi'].nunique()) if not df_month.empty else 0
+                uniq_jenis = int(df_month['jenis'].nunique()) if not df_month.empty else 0
+                c1.metric("Event bulan ini", total_ev)
+                c2.metric("Divisi terlibat", uniq_div)
+                c3.metric("Jenis event", uniq_jenis)
+
+                if not df_month.empty:
+                    by_jenis = df_month['jenis'].value_counts().rename_axis('Jenis').reset_index(name='Jumlah')
+                    st.markdown("#### Rekap per Jenis Event")
+                    st.dataframe(by_jenis, use_container_width=True)
+
+                    by_div = df_month.groupby('nama_divisi').size().sort_values(ascending=False).rename_axis('Divisi').reset_index(name='Jumlah')
+                    st.markdown("#### Rekap per Divisi")
+                    st.dataframe(by_div, use_container_width=True)
+                else:
+                    st.info("Tidak ada event pada bulan berjalan untuk rekap.")
+
+            # Legend warna (di luar pilihan view agar selalu tersedia di bawah)
+            with st.expander("Legenda Warna Jenis Event"):
+                COLOR_MAP = {
+                    "Cuti": "#FF6C6C",
+                    "Flex Time": "#FFA500",
+                    "Delegasi": "#8E44AD",
+                    "Rapat": "#3498DB",
+                    "Mobil Kantor": "#27AE60",
+                    "Libur Nasional": "#F1C40F",
+                }
+                lg_cols = st.columns(len(COLOR_MAP))
+                for i, (k, v) in enumerate(COLOR_MAP.items()):
+                    lg_cols[i].markdown(f"<div style='padding:6px 10px;border-radius:6px;background:{v};color:#000;font-weight:700;text-align:center'>{k}</div>", unsafe_allow_html=True)
+        else:
+            st.info("Belum ada event pada kalender.")
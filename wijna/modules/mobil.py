@@ -0,0 +1,104 @@
+"""Mobil Kantor: kalender pemakaian mobil kantor."""
+from datetime import date
+
+import streamlit as st
+
+from wijna.utils import gen_id
+from wijna.db import audit_log, get_db
+from wijna.ui import lazy_tabs, require_login
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def kalender_pemakaian_mobil_kantor():
+    user = require_login()
+    st.header("🚗 Kalender & Booking Mobil Kantor")
+    conn = get_db()
+    cur = conn.cursor()
+    tab1, tab2, tab3 = lazy_tabs(["📝 Input/Edit/Hapus (Finance)", "📋 Daftar Booking & Filter", "📅 Rekap Bulanan & Bentrok"], key="mobil")
+
+    # Tab 1: Input/Edit/Hapus (Finance)
+    if tab1:
+        st.markdown("### 📝 Input/Edit/Hapus Jadwal Mobil (Finance/Director/Superuser)")
+        if user["role"] in ["finance", "director", "superuser"]:
+            with st.form("form_mobil"):  
+                nama_pengguna = st.text_input("Nama")
+                divisi = st.text_input("Divisi")
+                tgl_mulai = st.date_input("Tgl Mulai", value=date.today())
+                tgl_selesai = st.date_input("Tgl Selesai", value=date.today())
+                tujuan = st.text_input("Tujuan")
+                kendaraan = st.text_input("Kendaraan")
+                driver = st.text_input("Driver")
+                status = st.selectbox("Status", ["Menunggu Approve", "Disetujui", "Ditolak"])
+                finance_note = st.text_area("Catatan")
+                submitted = st.form_submit_button("Simpan Jadwal Mobil")
+                if submitted:
+                    mid = gen_id("mobil")
+                    cur.execute("""
+                        INSERT INTO mobil (id, nama_pengguna, divisi, tgl_mulai, tgl_selesai, tujuan, kendaraan, driver, status, finance_note)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        mid, nama_pengguna, divisi, tgl_mulai.isoformat(), tgl_selesai.isoformat(), tujuan, kendaraan, driver, status, finance_note
+                    ))
+                    conn.commit()
+                    try:
+                        audit_log("mobil", "create", target=mid, details=f"{kendaraan} {tgl_mulai}..{tgl_selesai} {tujuan}")
+                    except Exception:
+                        pass
+                    st.success("Jadwal mobil berhasil disimpan.")
+            # Edit/hapus jadwal
+            df_edit = pd.read_sql_query("SELECT * FROM mobil ORDER BY tgl_mulai ASC", conn)
+            st.markdown("#### Edit/Hapus Jadwal Mobil")
+            for idx, row in df_edit.iterrows():
+                with st.expander(f"{row['nama_pengguna']} | {row['tgl_mulai']} s/d {row['tgl_selesai']} | {row['kendaraan']} | Status: {row['status']}"):
+                    st.write(f"Tujuan: {row['tujuan']}, Driver: {row['driver']}, Catatan: {row['finance_note']}")
+                    if st.button("Hapus Jadwal", key=f"hapus_mobil_{row['id']}"):
+                        cur.execute("DELETE FROM mobil WHERE id=?", (row["id"],))
+                        conn.commit()
+                        try:
+                            audit_log("mobil", "delete", target=row['id'], details=f"kendaraan={row['kendaraan']}; tujuan={row['tujuan']}")
+                        except Exception:
+                            pass
+                        st.success("Jadwal dihapus.")
+                        st.rerun()
+
+    # Tab 2: Daftar Booking & Filter (semua user)
+    if tab2:
+        st.markdown("### 📋 Daftar Booking Mobil & Filter")
+        df = pd.read_sql_query("SELECT id,nama_pengguna,divisi,tgl_mulai,tgl_selesai,tujuan,kendaraan,driver,status FROM mobil ORDER BY tgl_mulai ASC", conn)
+        filter_status = st.selectbox("Filter Status", ["Semua", "Menunggu Approve", "Disetujui", "Ditolak"], key="filter_status_mobil")
+        filter_kendaraan = st.text_input("Filter Kendaraan (opsional)", "", key="filter_kendaraan_mobil")
+        if filter_status != "Semua":
+            df = df[df["status"] == filter_status]
+        if filter_kendaraan:
+            df = df[df["kendaraan"].str.contains(filter_kendaraan, case=False, na=False)]
+        st.dataframe(df)
+
+    # Tab 3: Rekap Bulanan & Bentrok
+    if tab3:
+        st.markdown("### 📅 Rekap Bulanan Mobil Kantor & Cek Bentrok")
+        df = pd.read_sql_query("SELECT * FROM mobil ORDER BY tgl_mulai ASC", conn)
+        this_month = date.today().strftime("%Y-%m")
+        df_month = df[df['tgl_mulai'].str[:7] == this_month] if not df.empty else pd.DataFrame()
+        st.write(f"Total booking bulan ini: {len(df_month)}")
+        if not df_month.empty:
+            by_kendaraan = df_month['kendaraan'].value_counts()
+            st.write("Top Kendaraan Dipakai:")
+            st.dataframe(by_kendaraan)
+        # Cek bentrok jadwal mobil kantor (kendaraan sama, tanggal overlap)
+        st.markdown("#### 🚨 Cek Bentrok Jadwal Mobil Kantor")
+        if not df.empty:
+            df_sorted = df.sort_values(["kendaraan", "tgl_mulai"])
+            overlaps = []
+            for kendaraan, group in df_sorted.groupby("kendaraan"):
+                prev_end = None
+                for idx, row in group.iterrows():
+                    start = pd.to_datetime(row["tgl_mulai"])
+                    end = pd.to_datetime(row["tgl_selesai"])
+                    if prev_end and start <= prev_end:
+                        overlaps.append((kendaraan, row["tgl_mulai"], row["tgl_selesai"]))
+                    prev_end = max(prev_end, end) if prev_end else end
+            if overlaps:
+                st.warning(f"Terdapat overlap jadwal Mobil Kantor untuk kendaraan yang sama: {overlaps}")
+            else:
+                st.success("Tidak ada bentrok jadwal mobil kantor bulan ini.")
@@ -0,0 +1,195 @@
+"""MoU: pengajuan, review, dan arsip MoU."""
+from datetime import date, timedelta
+
+import streamlit as st
+
+from wijna.utils import from_blob, gen_id
+from wijna.db import audit_log, get_db
+from wijna.uow import unit_of_work
+from wijna.drive import _drive_id_from_url
+from wijna.notify import notify_review_request, _resolve_user_email_by_id_or_name
+from wijna.ui import lazy_tabs, require_login, show_file_download, upload_file_and_store
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def mou_module():
+    user = require_login()
+    st.header("🤝 MoU")
+    conn = get_db()
+    cur = conn.cursor()
+    tab1, tab2, tab4 = lazy_tabs([
+        "📝 Input Draft MoU",
+        "👥 Review Board",
+        "📋 Daftar & Rekap MoU"
+    ], key="mou")
+
+    # --- Tab 1: Input Draft MoU ---
+    if tab1:
+        st.markdown("### Input Draft MoU ")
+        jenis_options = [
+            "Programmatic MoU",
+            "Funding MoU / Grant Agreement",
+            "Strategic Partnership MoU",
+            "Capacity Building MoU",
+            "Secondment MoU",
+            "Internship/Volunteer MoU",
+            "Advocacy MoU",
+            "Operational MoU",
+            "Research & Development MoU",
+            "MoU Advokasi Kebijakan Publik",
+            "MoU Operasional",
+        ]
+        with st.form("mou_add", clear_on_submit=True):
+            nomor = st.text_input("Nomor MoU")
+            nama = st.text_input("Nama MoU")
+            pihak = st.text_input("Pihak Terlibat")
+            jenis = st.selectbox("Jenis MoU", jenis_options)
+            tgl_mulai = st.date_input("Tgl Mulai", value=date.today())
+            tgl_selesai = st.date_input("Tgl Selesai", value=date.today()+timedelta(days=365))
+            f = st.file_uploader("File Draft MoU (wajib)")
+            submit = st.form_submit_button("Simpan Draft MoU")
+            if submit:
+                if not f:
+                    st.error("File draft MoU wajib diupload.")
+                elif tgl_selesai < tgl_mulai:
+                    st.error("Tanggal selesai tidak boleh sebelum tanggal mulai.")
+                else:
+                    mid = gen_id("mou")
+                    blob, fname, furl = upload_file_and_store(f, "mou")
+                    created_by = (user.get('id') if isinstance(user, dict) else None)
+                    # Prefer Drive URL when available
+                    try:
+                        cur.execute("PRAGMA table_info(mou)")
+                        mou_cols = {row[1] for row in cur.fetchall()}
+                    except Exception:
+                        mou_cols = set()
+                    if 'file_url' in mou_cols:
+                        cur.execute("""INSERT INTO mou (id,nomor,nama,pihak,jenis,tgl_mulai,tgl_selesai,file_blob,file_name,file_drive_id,file_url,board_note,board_approved,final_blob,final_name,created_by)
+                                       VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                            (mid, nomor, nama, pihak, jenis, tgl_mulai.isoformat(), tgl_selesai.isoformat(), None if furl else blob, fname, _drive_id_from_url(furl) if furl else None, furl, "", 0, None, None, created_by))
+                    else:
+                        cur.execute("""INSERT INTO mou (id,nomor,nama,pihak,jenis,tgl_mulai,tgl_selesai,file_blob,file_name,board_note,board_approved,final_blob,final_name,created_by)
+                                       VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                            (mid, nomor, nama, pihak, jenis, tgl_mulai.isoformat(), tgl_selesai.isoformat(), blob, fname, "", 0, None, None, created_by))
+                    conn.commit()
+                    try:
+                        audit_log("mou", "create", target=mid, details=f"{nomor} - {nama} ({jenis})")
+                    except Exception:
+                        pass
+                    # Notify Board and Director for new draft
+                    try:
+                        title = f"{nomor} — {nama}"
+                        notify_review_request("mou", title=title, entity_id=mid, recipients_roles=("board","director"))
+                    except Exception:
+                        pass
+                    st.success("MoU tersimpan (draft).")
+
+    # --- Tab 2: Review Board (opsional) ---
+    if tab2:
+        st.markdown("### Review Board (Opsional)")
+        if user["role"] in ["board","superuser"]:
+            df = pd.read_sql_query("SELECT id, nomor, nama, pihak, jenis, tgl_mulai, tgl_selesai, board_note, board_approved FROM mou ORDER BY tgl_selesai ASC", conn)
+            for idx, row in df.iterrows():
+                with st.expander(f"{row['nomor']} | {row['nama']} | {row['tgl_mulai']} - {row['tgl_selesai']}"):
+                    st.write(f"Pihak: {row['pihak']}")
+                    st.write(f"Jenis: {row['jenis']}")
+                    st.write(f"Catatan Board: {row['board_note']}")
+                    note = st.text_area("Catatan Board", value=row['board_note'], key=f"board_note_{row['id']}")
+                    approve = st.checkbox("Approve Board", value=bool(row['board_approved']), key=f"board_approved_{row['id']}")
+                    if st.button("Simpan Review Board", key=f"save_board_{row['id']}"):
+                        # Resolve Director + creator/applicant recipients before opening the write
+                        creator_email = None
+                        try:
+                            r2 = pd.read_sql_query("SELECT created_by, nomor, nama FROM mou WHERE id=?", conn, params=(row['id'],))
+                            if not r2.empty:
+                                creator_email = _resolve_user_email_by_id_or_name(r2.iloc[0].get('created_by'))
+                                title = f"{r2.iloc[0]['nomor']} — {r2.iloc[0]['nama']}"
+                            else:
+                                title = f"{row['nomor']} — {row['nama']}"
+                        except Exception:
+                            title = f"{row['nomor']} — {row['nama']}"
+                        decision = "board_approved" if approve else "board_rejected"
+                        with unit_of_work() as uow:
+                            uow.execute("UPDATE mou SET board_note=?, board_approved=? WHERE id=?", (note, int(approve), row['id']))
+                            uow.audit("mou", "board_review", target=row['id'], details=f"approve={bool(approve)}; note={note}")
+                            uow.notify_decision("mou", title=title, decision=decision, entity_id=row['id'],
+                                                recipients_roles=("director",), recipients_users=[creator_email] if creator_email else None,
+                                                tag_suffix="board")
+                        st.success("Review Board disimpan.")
+                        st.rerun()
+        else:
+            st.info("Hanya Board yang dapat review di sini.")
+
+    # --- Tab 4: Daftar & Rekap MoU ---
+    if tab4:
+        st.markdown("### Daftar & Rekap MoU")
+        df = pd.read_sql_query("SELECT id, nomor, nama, pihak, jenis, tgl_mulai, tgl_selesai, file_name, board_approved FROM mou ORDER BY tgl_selesai ASC", conn)
+        # Status aktif (berdasarkan rentang tanggal)
+        today = pd.to_datetime(date.today())
+        if not df.empty:
+            df = df.copy()
+            df['status_aktif'] = [
+                'Aktif' if pd.to_datetime(row['tgl_mulai']) <= today <= pd.to_datetime(row['tgl_selesai']) else 'Tidak Aktif'
+                for _, row in df.iterrows()
+            ]
+        else:
+            df['status_aktif'] = []
+
+        # Siapkan dataframe untuk tampilan
+        show_df = df[["id", "nomor", "nama", "pihak", "jenis", "tgl_mulai", "tgl_selesai", "file_name", "board_approved", "status_aktif"]].copy() if not df.empty else pd.DataFrame(columns=["id","nomor","nama","pihak","jenis","tgl_mulai","tgl_selesai","file_name","board_approved","status_aktif"])
+        if not show_df.empty:
+            show_df['Board Approved'] = show_df['board_approved'].map({0: '❌', 1: '✅'})
+            show_df = show_df.rename(columns={
+                "id": "ID",
+                "nomor": "Nomor",
+                "nama": "Nama",
+                "pihak": "Pihak",
+                "jenis": "Jenis",
+                "tgl_mulai": "Tgl Mulai",
+                "tgl_selesai": "Tgl Selesai",
+                "file_name": "File",
+                "status_aktif": "Status Aktif",
+            })
+
+        left, right = st.columns([3,2])
+        with left:
+            st.subheader("📋 Daftar MoU")
+            cols_order = ["ID","Nomor","Nama","Pihak","Jenis","Tgl Mulai","Tgl Selesai","File","Board Approved","Status Aktif"]
+            disp = show_df[cols_order] if not show_df.empty else show_df
+            st.dataframe(disp, width='stretch', hide_index=True)
+
+        with right:
+            st.subheader("⬇️ Download File")
+            if not df.empty:
+                # Hanya tampilkan opsi yang memiliki file
+                opt_map = {f"{r['nomor']} | {r['nama']} — {r['file_name']}": r['id'] for _, r in df.iterrows() if r.get('file_name')}
+                pilihan = st.selectbox("Pilih MoU", [""] + list(opt_map.keys()))
+                if pilihan:
+                    mid = opt_map[pilihan]
+                    row = pd.read_sql_query("SELECT file_blob, file_name, file_url FROM mou WHERE id=?", conn, params=(mid,))
+                    if not row.empty:
+                        fname = row.iloc[0].get("file_name")
+                        furl = row.iloc[0].get("file_url") if "file_url" in row.columns else None
+                        if furl:
+                            show_file_download(furl, fname)
+                        elif row.iloc[0].get("file_blob") is not None and fname:
+                            data_bytes = from_blob(row.iloc[0]["file_blob"])  # decode if base64
+                            st.download_button(label=f"Download {fname}", data=data_bytes, file_name=fname, mime="application/octet-stream")
+                        else:
+                            st.info("File tidak tersedia untuk MoU terpilih.")
+            else:
+                st.info("Belum ada data MoU.")
+
+        # Rekap Bulanan MoU (opsional, ringkas)
+        st.markdown("#### 📅 Rekap Bulanan MoU (Otomatis)")
+        this_month = date.today().strftime("%Y-%m")
+        if not df.empty:
+            df_month = df[(df['tgl_mulai'].astype(str).str[:7] == this_month) | (df['tgl_selesai'].astype(str).str[:7] == this_month)]
+        else:
+            df_month = pd.DataFrame()
+        st.write(f"Total MoU terkait bulan ini: {len(df_month)}")
+        if not df_month.empty:
+            by_jenis = df_month['jenis'].value_counts()
+            st.write("Rekap per Jenis:")
+            st.dataframe(by_jenis)
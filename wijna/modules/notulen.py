@@ -0,0 +1,233 @@
+"""Notulen: upload notulen rapat, review, dan arsip."""
+from datetime import date
+
+import streamlit as st
+
+from wijna.utils import gen_id, now_wib_iso
+from wijna.db import audit_log, get_db
+from wijna.drive import _drive_id_from_url
+from wijna.notify import notify_review_request
+from wijna.ui import lazy_tabs, require_login, show_file_download, upload_file_and_store
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def notulen_module():
+    user = require_login()
+    st.header("🗒️ Notulen Rapat Rutin")
+    conn = get_db()
+    cur = conn.cursor()
+    # Introspeksi awal kolom dan tanggal utama
+    cur.execute("PRAGMA table_info(notulen)")
+    nt_cols = [row[1] for row in cur.fetchall()]
+    nt_date_col = "tanggal_rapat" if "tanggal_rapat" in nt_cols else ("tanggal_upload" if "tanggal_upload" in nt_cols else None)
+
+    tab_upload, tab_list, tab_rekap, tab_board = lazy_tabs(["🆕 Upload Notulen", "📋 Daftar Notulen", "📅 Rekap Bulanan Notulen", "👥 Review Board"], key="notulen") 
+
+    # --- Tab 1: Upload ---
+    if tab_upload:
+        st.subheader("🆕 Upload Notulen")
+        with st.form("not_add", clear_on_submit=True):
+            judul = st.text_input("Judul Rapat")
+            if nt_date_col == "tanggal_rapat":
+                tgl = st.date_input("Tanggal Rapat", value=date.today())
+            else:
+                tgl = None
+                st.caption("Tanggal upload akan dicatat otomatis.")
+            f = st.file_uploader("File Notulen")
+            follow_up = st.text_area("Catatan Follow Up (opsional)") if "follow_up" in nt_cols else None
+            deadline = st.date_input("Deadline / Tindak Lanjut", value=date.today()) if "deadline" in nt_cols else None
+            submit = st.form_submit_button("💾 Upload Notulen")
+            if submit:
+                if not judul or not f:
+                    st.warning("Judul dan file wajib diisi.")
+                else:
+                    nid = gen_id("not")
+                    blob, fname, furl = upload_file_and_store(f, "notulen")
+                    cols = ["id", "judul", "file_blob", "file_name"]
+                    vals = [nid, judul, None if furl else blob, fname]
+                    # Drive columns when available
+                    try:
+                        cur.execute("PRAGMA table_info(notulen)")
+                        nt_cols_existing = {row[1] for row in cur.fetchall()}
+                    except Exception:
+                        nt_cols_existing = set()
+                    if 'file_url' in nt_cols_existing:
+                        cols.extend(["file_drive_id","file_url"]) ; vals.extend([_drive_id_from_url(furl) if furl else None, furl])
+                    if nt_date_col == "tanggal_rapat":
+                        cols.append("tanggal_rapat"); vals.append(tgl.isoformat())
+                    elif nt_date_col == "tanggal_upload":
+                        cols.append("tanggal_upload"); vals.append(now_wib_iso())
+                    if "follow_up" in nt_cols:
+                        cols.append("follow_up"); vals.append(follow_up or "")
+                    if "deadline" in nt_cols and deadline:
+                        cols.append("deadline"); vals.append(deadline.isoformat())
+                    if "uploaded_by" in nt_cols:
+                        cols.append("uploaded_by"); vals.append(user.get("full_name") or user.get("email"))
+                    if "director_note" in nt_cols:
+                        cols.append("director_note"); vals.append("")
+                    if "director_approved" in nt_cols:
+                        cols.append("director_approved"); vals.append(0)
+                    placeholders = ", ".join(["?" for _ in cols])
+                    cur.execute(f"INSERT INTO notulen ({', '.join(cols)}) VALUES ({placeholders})", vals)
+                    conn.commit()
+                    try:
+                        audit_log("notulen", "upload", target=nid, details=f"{judul} {tgl or ''}; file={fname}")
+                    except Exception:
+                        pass
+                    try:
+                        notify_review_request("notulen", title=judul, entity_id=nid, recipients_roles=("director",))
+                    except Exception:
+                        pass
+                    st.success("Notulen berhasil diupload. Menunggu approval Director.")
+
+    # --- Tab 2: Daftar ---
+    if tab_list:
+        st.subheader("📋 Daftar Notulen")
+        # Build SELECT dinamis
+        cur.execute("PRAGMA table_info(notulen)")
+        nt_cols = [row[1] for row in cur.fetchall()]
+        nt_date_col = "tanggal_rapat" if "tanggal_rapat" in nt_cols else ("tanggal_upload" if "tanggal_upload" in nt_cols else None)
+        select_cols = ["id", "judul"]
+        if nt_date_col: select_cols.append(nt_date_col)
+        for extra in ["uploaded_by", "deadline", "director_approved", "file_name"]:
+            if extra in nt_cols:
+                select_cols.append(extra)
+        order_clause = f" ORDER BY {nt_date_col} DESC" if nt_date_col else " ORDER BY id DESC"
+        df = pd.read_sql_query(f"SELECT {', '.join(select_cols)} FROM notulen" + order_clause, conn)
+
+        # Filter UI
+        c1, c2, c3 = st.columns([2,2,3])
+        with c1:
+            q = st.text_input("Cari Judul", "")
+        with c2:
+            status_sel = st.selectbox("Status", ["Semua","Approved","Belum"]) if "director_approved" in df.columns else "Semua"
+        with c3:
+            if nt_date_col and not df.empty:
+                min_d = pd.to_datetime(df[nt_date_col]).min().date()
+                max_d = pd.to_datetime(df[nt_date_col]).max().date()
+                dr = st.date_input("Rentang Tanggal", value=(min_d, max_d))
+            else:
+                dr = None
+
+        dff = df.copy()
+        if q:
+            dff = dff[dff["judul"].astype(str).str.contains(q, case=False, na=False)]
+        if status_sel != "Semua" and "director_approved" in dff.columns:
+            dff = dff[dff["director_approved"] == (1 if status_sel == "Approved" else 0)]
+        if dr and isinstance(dr, (list, tuple)) and len(dr) == 2 and nt_date_col and nt_date_col in dff.columns:
+            s, e = dr
+            dff = dff[(pd.to_datetime(dff[nt_date_col]) >= pd.to_datetime(s)) & (pd.to_datetime(dff[nt_date_col]) <= pd.to_datetime(e))]
+
+        if not dff.empty:
+            show = dff.copy()
+            if "director_approved" in show.columns:
+                show["Status"] = show["director_approved"].map({1: "✅ Approved", 0: "🕒 Proses"})
+            cols_show = ["judul"]
+            if nt_date_col: cols_show.append(nt_date_col)
+            for c in ["uploaded_by", "deadline", "file_name", "Status"]:
+                if c in show.columns:
+                    cols_show.append(c)
+            st.dataframe(show[cols_show], width='stretch')
+
+            # Download file terpilih
+            if "id" in show.columns and "file_name" in show.columns:
+                opsi = {f"{r['judul']} — {r.get(nt_date_col, '')}" + (f" ({r['file_name']})" if r.get('file_name') else ""): r['id'] for _, r in show.iterrows()}
+                if opsi:
+                    pilih = st.selectbox("Pilih notulen untuk diunduh", [""] + list(opsi.keys()))
+                    if pilih:
+                        nid = opsi[pilih]
+                        row = pd.read_sql_query("SELECT file_blob, file_name, file_url FROM notulen WHERE id=?", conn, params=(nid,)).iloc[0]
+                        if ("file_url" in row.index) and row.get("file_url"):
+                            show_file_download(row["file_url"], row["file_name"]) 
+                        elif row["file_blob"] is not None and row["file_name"]:
+                            show_file_download(row["file_blob"], row["file_name"])
+
+            # Approval Director inline
+            if user["role"] in ["director", "superuser"] and "director_approved" in nt_cols:
+                st.markdown("#### ✅ Approval Director (Pending)")
+                pend = pd.read_sql_query(
+                    f"SELECT id, judul" + (f", {nt_date_col}" if nt_date_col else "") + ", file_name, director_note FROM notulen WHERE director_approved=0" + (f" ORDER BY {nt_date_col} DESC" if nt_date_col else ""),
+                    conn
+                )
+                if pend.empty:
+                    st.info("Tidak ada notulen menunggu approval.")
+                else:
+                    for _, r in pend.iterrows():
+                        title = f"{r['judul']}" + (f" | {r[nt_date_col]}" if nt_date_col and r.get(nt_date_col) else "")
+                        with st.expander(title):
+                            st.write(f"File: {r.get('file_name') or '-'}")
+                            rr = pd.read_sql_query("SELECT file_blob, file_name, file_url FROM notulen WHERE id=?", conn, params=(r['id'],))
+                            if not rr.empty:
+                                if ("file_url" in rr.columns) and rr.iloc[0].get("file_url"):
+                                    show_file_download(rr.iloc[0]["file_url"], rr.iloc[0]["file_name"])
+                                elif rr.iloc[0].get("file_blob") is not None and rr.iloc[0].get("file_name"):
+                                    show_file_download(rr.iloc[0]["file_blob"], rr.iloc[0]["file_name"])
+                            note = st.text_area("Catatan Director (opsional)", value=r.get("director_note") or "", key=f"nt_note_{r['id']}")
+                            if st.button("Approve Notulen", key=f"nt_approve_{r['id']}"):
+                                if "director_note" in nt_cols:
+                                    cur.execute("UPDATE notulen SET director_approved=1, director_note=? WHERE id=?", (note, r['id']))
+                                else:
+                                    cur.execute("UPDATE notulen SET director_approved=1 WHERE id=?", (r['id'],))
+                                conn.commit()
+                                try:
+                                    audit_log("notulen", "director_approval", target=r['id'], details=f"note={note}")
+                                except Exception:
+                                    pass
+                                st.success("Notulen approved.")
+                                st.rerun()
+        else:
+            st.info("Belum ada notulen.")
+
+    # --- Tab 3: Rekap ---
+    if tab_rekap:
+        st.subheader("📅 Rekap Bulanan Notulen (Otomatis)")
+    
+    # --- Tab 4: Review Board (Opsional) ---
+    if tab_board:
+        if user["role"] in ["board", "superuser"]:
+            try:
+                df_nb = pd.read_sql_query("SELECT id, judul, " + (nt_date_col if nt_date_col else "'') AS tanggal") + ", board_note FROM notulen ORDER BY " + (nt_date_col if nt_date_col else "id") + " DESC", conn)
+            except Exception:
+                try:
+                    df_nb = pd.read_sql_query("SELECT id, judul, board_note FROM notulen ORDER BY id DESC", conn)
+                except Exception:
+                    df_nb = pd.DataFrame()
+            if df_nb.empty:
+                st.info("Belum ada notulen untuk direview.")
+            else:
+                for _, row in df_nb.iterrows():
+                    st.markdown(f"**{row['judul']}**")
+                    cur_note = row.get('board_note') or ""
+                    note = st.text_area("Catatan Board", value=cur_note, key=f"notulen_board_note_{row['id']}")
+                    if st.button("Simpan Catatan", key=f"notulen_board_save_{row['id']}"):
+                        try:
+                            cur.execute("UPDATE notulen SET board_note=? WHERE id=?", (note, row['id']))
+                            conn.commit()
+                            st.success("Catatan Board disimpan.")
+                            try:
+                                audit_log("notulen", "board_review", target=row['id'], details=f"note={note}")
+                            except Exception:
+                                pass
+                        except Exception as e:
+                            st.error(f"Gagal simpan: {e}")
+        else:
+            st.info("Hanya Board yang dapat review di sini.")
+        cur.execute("PRAGMA table_info(notulen)")
+        nt_cols = [row[1] for row in cur.fetchall()]
+        nt_date_col = "tanggal_rapat" if "tanggal_rapat" in nt_cols else ("tanggal_upload" if "tanggal_upload" in nt_cols else None)
+        select_cols = ["id", "judul"]
+        if nt_date_col: select_cols.append(nt_date_col)
+        df_all = pd.read_sql_query(f"SELECT {', '.join(select_cols)} FROM notulen", conn)
+        this_month = date.today().strftime("%Y-%m")
+        if not df_all.empty and (nt_date_col and nt_date_col in df_all.columns):
+            df_month = df_all[df_all[nt_date_col].astype(str).str[:7] == this_month]
+        else:
+            df_month = pd.DataFrame()
+        st.write(f"Total notulen bulan ini: {len(df_month)}")
+        if not df_month.empty:
+            if nt_date_col:
+                st.dataframe(df_month[["judul", nt_date_col]], width='stretch')
+            else:
+                st.dataframe(df_month[["judul"]], width='stretch')
+            # CSV export removed as requested
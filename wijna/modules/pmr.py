@@ -0,0 +1,177 @@
+"""PMR: upload laporan bulanan, review Finance, approval Director."""
+from datetime import date
+
+import streamlit as st
+
+from wijna.utils import gen_id, now_wib_iso
+from wijna.db import audit_log, get_db
+from wijna.drive import _drive_id_from_url
+from wijna.notify import notify_review_request
+from wijna.ui import card_saved, lazy_tabs, require_login, upload_files_and_store
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def pmr_module():
+    user = require_login()
+    st.header("📑 PMR")
+    conn = get_db()
+    cur = conn.cursor()
+    # Normalize role once to avoid casing/whitespace mismatches
+    _role = (user.get("role") or "").strip().lower()
+    tab_upload, tab_finance, tab_director, tab_rekap = lazy_tabs([
+        "📝 Upload Laporan Bulanan ",
+        "💰 Review & Approval Finance",
+        "✅ Approval Director PMR",
+        "📋 Daftar & Rekap PMR"
+    ], key="pmr")
+
+    if tab_upload:
+        st.markdown("### Upload Laporan Bulanan ")
+        with st.form("pmr_add", clear_on_submit=True):
+            nama = st.text_input("Nama Pegawai")
+            bulan = st.selectbox("Bulan (YYYY-MM)", options=[f"{y}-{m:02d}" for y in range(date.today().year-1, date.today().year+2) for m in range(1,13)])
+            f1 = st.file_uploader("File Laporan 1 (wajib)")
+            f2 = st.file_uploader("File Laporan 2 (opsional)")
+            duplicate = False
+            if nama and bulan:
+                cek = cur.execute("SELECT COUNT(*) FROM pmr WHERE nama=? AND bulan=?", (nama, bulan)).fetchone()[0]
+                if cek > 0:
+                    duplicate = True
+            submit = st.form_submit_button("Submit")
+            if submit:
+                if not nama or not bulan:
+                    st.error("Nama dan Bulan wajib diisi.")
+                elif duplicate:
+                    st.error("Sudah ada laporan bulan ini untuk nama tersebut.")
+                elif not f1:
+                    st.error("Minimal 1 file wajib diupload.")
+                else:
+                    pid = gen_id("pmr")
+                    (b1, n1, u1), (b2, n2, u2) = upload_files_and_store([f1, f2], "pmr")
+                    now = now_wib_iso()
+                    try:
+                        cur.execute("PRAGMA table_info(pmr)")
+                        pmr_cols = {row[1] for row in cur.fetchall()}
+                    except Exception:
+                        pmr_cols = set()
+                    if {'file1_url','file2_url'}.issubset(pmr_cols):
+                        cur.execute("""INSERT INTO pmr (id,nama,file1_blob,file1_name,file1_drive_id,file1_url,file2_blob,file2_name,file2_drive_id,file2_url,bulan,finance_note,finance_approved,director_note,director_approved,tanggal_submit)
+                                       VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+                                    (pid, nama, None if u1 else b1, n1, _drive_id_from_url(u1) if u1 else None, u1, None if u2 else b2, n2, _drive_id_from_url(u2) if u2 else None, u2, bulan, "", 0, "", 0, now))
+                    else:
+                        cur.execute("""INSERT INTO pmr (id,nama,file1_blob,file1_name,file2_blob,file2_name,bulan,finance_note,finance_approved,director_note,director_approved,tanggal_submit)
+                                       VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+                                    (pid, nama, b1, n1, b2, n2, bulan, "", 0, "", 0, now))
+                    conn.commit()
+                    try:
+                        audit_log("pmr", "upload", target=pid, details=f"{nama} {bulan}; file1={n1}; file2={n2 or '-'}")
+                    except Exception:
+                        pass
+                    try:
+                        notify_review_request("pmr", title=f"{nama} — {bulan}", entity_id=pid, recipients_roles=("finance","director"))
+                    except Exception:
+                        pass
+                    st.success("Laporan bulanan berhasil diupload.")
+
+    @st.fragment
+    def finance_card(row):
+        with st.expander(f"{row['nama']} | {row['bulan']}"):
+            st.write(f"File 1: {row['file1_name']}")
+            if row['file2_name']:
+                st.write(f"File 2: {row['file2_name']}")
+            st.write(f"Catatan: {row['finance_note']}")
+            note = st.text_area("Catatan Finance", value=row['finance_note'], key=f"fin_note_{row['id']}")
+            colA, colB = st.columns(2)
+            with colA:
+                ajukan = st.button("Ajukan ke Director", key=f"ajukan_dir_{row['id']}")
+            with colB:
+                kembalikan = st.button("Kembalikan ke User", key=f"kembali_user_{row['id']}")
+            if ajukan:
+                # Fragment reruns happen outside the module run: write with a fresh connection
+                conn = get_db()
+                conn.execute("UPDATE pmr SET finance_note=?, finance_approved=1 WHERE id=?", (note, row['id']))
+                conn.commit()
+                conn.close()
+                try:
+                    audit_log("pmr", "finance_review", target=row['id'], details=f"approve=1; note={note}")
+                except Exception:
+                    pass
+                card_saved("Diajukan ke Director.", "pmr")
+            if kembalikan:
+                conn = get_db()
+                conn.execute("UPDATE pmr SET finance_note=?, finance_approved=0 WHERE id=?", (note+"\n[Perlu revisi oleh user]", row['id']))
+                conn.commit()
+                conn.close()
+                try:
+                    audit_log("pmr", "finance_review", target=row['id'], details=f"approve=0; note={note}")
+                except Exception:
+                    pass
+                card_saved("Dikembalikan ke user peminta.", "pmr", icon="⚠️")
+
+    if tab_finance:
+        st.markdown("### Review & Approval Finance")
+        st.caption("Finance melakukan review, memberi catatan, dan approval. Hanya Finance/Director/Superuser yang dapat mengakses.")
+        if _role in ["finance", "director", "superuser"]:
+            rows = conn.execute("SELECT id, nama, bulan, file1_name, file2_name, finance_note, finance_approved FROM pmr ORDER BY tanggal_submit DESC").fetchall()
+            for row in rows:
+                finance_card(row)
+        else:
+            st.info("Hanya Finance yang dapat review di sini.")
+
+    @st.fragment
+    def director_card(row):
+        with st.expander(f"{row['nama']} | {row['bulan']}"):
+            st.write(f"File 1: {row['file1_name']}")
+            if row['file2_name']:
+                st.write(f"File 2: {row['file2_name']}")
+            st.write(f"Finance Approved: {'Ya' if row['finance_approved'] else 'Belum'}")
+            st.write(f"Catatan: {row['director_note']}")
+            note = st.text_area("Catatan Director", value=row['director_note'], key=f"dir_note_{row['id']}")
+            approve = st.checkbox("Approve Director", value=bool(row['director_approved']), key=f"dir_approved_{row['id']}")
+            if st.button("Simpan Approval Director", key=f"save_dir_{row['id']}"):
+                # Fragment reruns happen outside the module run: write with a fresh connection
+                conn = get_db()
+                conn.execute("UPDATE pmr SET director_note=?, director_approved=? WHERE id=?", (note, int(approve), row['id']))
+                conn.commit()
+                conn.close()
+                try:
+                    audit_log("pmr", "director_approval", target=row['id'], details=f"approve={bool(approve)}; note={note}")
+                except Exception:
+                    pass
+                card_saved("Approval Director disimpan.", "pmr")
+
+    if tab_director:
+        st.markdown("### Approval Director PMR")
+        st.caption("Director melakukan approval akhir dan memberi catatan. Hanya Director/Superuser yang dapat mengakses.")
+        if _role in ["director", "superuser"]:
+            rows = conn.execute("SELECT id, nama, bulan, file1_name, file2_name, director_note, director_approved, finance_approved FROM pmr ORDER BY tanggal_submit DESC").fetchall()
+            for row in rows:
+                director_card(row)
+        else:
+            st.info("Hanya Director yang dapat approve di sini.")
+
+    if tab_rekap:
+        if _role in ["finance", "director", "superuser"]:
+            st.markdown("### Daftar & Rekap PMR")
+            df = pd.read_sql_query("SELECT id, nama, bulan, tanggal_submit, finance_approved, director_approved, file1_name, file2_name FROM pmr ORDER BY tanggal_submit DESC", conn)
+            bulan_list = sorted(df['bulan'].unique(), reverse=True) if not df.empty else []
+            filter_bulan = st.selectbox("Pilih Bulan", bulan_list, index=0 if bulan_list else None, key="rekap_bulan")
+            if filter_bulan:
+                df_month = df[df['bulan'] == filter_bulan]
+            else:
+                df_month = pd.DataFrame()
+            st.write(f"Total laporan bulan ini: {len(df_month)}")
+            if not df_month.empty:
+                df_month_disp = df_month.copy()
+                df_month_disp['Status'] = df_month_disp.apply(lambda x: 'Approved' if x['finance_approved'] and x['director_approved'] else ('Proses Finance' if not x['finance_approved'] else 'Proses Director'), axis=1)
+                def make_download_link(row, col):
+                    if row[col]:
+                        return f'<a href="/download_pmr/{row["id"]}/{col}" target="_blank">{row[col]}</a>'
+                    return "-"
+                df_month_disp['Download File 1'] = df_month_disp.apply(lambda r: make_download_link(r, 'file1_name'), axis=1)
+                df_month_disp['Download File 2'] = df_month_disp.apply(lambda r: make_download_link(r, 'file2_name'), axis=1)
+                show_cols = ["nama","bulan","tanggal_submit","Status","Download File 1","Download File 2"]
+                st.markdown(df_month_disp[show_cols].to_html(escape=False, index=False), unsafe_allow_html=True)
+        else:
+            st.info("Hanya Finance/Director yang dapat melihat rekap PMR.")
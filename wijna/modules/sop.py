@@ -0,0 +1,160 @@
+"""SOP: upload, approval Director, dan arsip SOP."""
+import sqlite3
+
+import streamlit as st
+
+from wijna.utils import format_datetime_wib, gen_id, now_wib_iso
+from wijna.db import audit_log, get_db
+from wijna.uow import unit_of_work
+from wijna.drive import _drive_id_from_url
+from wijna.notify import notify_review_request
+from wijna.ui import lazy_tabs, require_login, show_file_download, upload_file_and_store
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def sop_module():
+    user = require_login()
+    st.header("📚 Kebijakan & SOP")
+    conn = get_db()
+    cur = conn.cursor()
+
+    # Normalize role
+    _role = (user.get("role") or "").strip().lower()
+
+    # Tabs: Upload (staff/superuser), Approval (director/superuser), List (all)
+    tab_upload, tab_approval, tab_list = lazy_tabs(["🆕 Upload SOP", "✅ Approval Director", "📋 Daftar SOP"], key="sop")
+
+    # --- Tab Upload SOP ---
+    if tab_upload:
+        allowed = _role in ("staff", "finance", "director", "superuser")
+        st.subheader("Upload SOP Baru")
+        if not allowed:
+            st.info("Anda tidak memiliki akses untuk mengunggah SOP.")
+        else:
+            with st.form("sop_upload_form"):
+                judul = st.text_input("Judul SOP")
+                file = st.file_uploader("File SOP (PDF/DOCX)", type=["pdf", "doc", "docx"])
+                submitted = st.form_submit_button("Upload")
+                if submitted:
+                    if not (judul and file):
+                        st.error("Lengkapi judul dan file.")
+                    else:
+                        blob, fname, furl = upload_file_and_store(file, "sop")
+                        try:
+                            sid = gen_id("sop")
+                            now = now_wib_iso()
+                            # Prefer Drive URL when available
+                            cur.execute("PRAGMA table_info(sop)")
+                            sop_cols = {row[1] for row in cur.fetchall()}
+                            if 'file_url' in sop_cols:
+                                cur.execute(
+                                    "INSERT INTO sop (id, judul, file_blob, file_name, file_drive_id, file_url, tanggal_upload, director_approved) VALUES (?,?,?,?,?,?,?,0)",
+                                    (sid, judul.strip(), None if furl else blob, fname, _drive_id_from_url(furl) if furl else None, furl, now),
+                                )
+                            else:
+                                cur.execute(
+                                    "INSERT INTO sop (id, judul, file_blob, file_name, tanggal_upload, director_approved) VALUES (?,?,?,?,?,0)",
+                                    (sid, judul.strip(), blob, fname, now),
+                                )
+                            conn.commit()
+                            audit_log("sop", "create", target=sid, details=f"Upload SOP: {judul}")
+                            notify_review_request("sop", judul, entity_id=sid, recipients_roles=("director",))
+                            st.success("SOP berhasil diupload dan menunggu approval Director.")
+                        except Exception as e:
+                            st.error(f"Gagal menyimpan SOP: {e}")
+
+    # --- Tab Approval Director ---
+    if tab_approval:
+        allowed = _role in ("director", "superuser")
+        st.subheader("Approval Director")
+        if not allowed:
+            st.info("Hanya Director atau Superuser yang dapat melakukan approval.")
+        else:
+            try:
+                cur.execute("PRAGMA table_info(sop)")
+                sop_cols = [row[1] for row in cur.fetchall()]
+            except Exception:
+                sop_cols = []
+            # pending list
+            try:
+                cur.execute("SELECT id, judul, file_name, tanggal_upload FROM sop WHERE director_approved=0 ORDER BY COALESCE(tanggal_upload, id) DESC")
+                pending = cur.fetchall()
+            except Exception:
+                pending = []
+            if not pending:
+                st.success("Tidak ada SOP menunggu approval.")
+            else:
+                for row in pending:
+                    with st.expander(f"{row['judul']} • {row['file_name']} • {format_datetime_wib(row['tanggal_upload'] or '')}"):
+                        # show download/link if available
+                        try:
+                            cur.execute("SELECT file_blob, file_url FROM sop WHERE id=?", (row["id"],))
+                            r2 = cur.fetchone()
+                            if r2:
+                                file_url = None
+                                try:
+                                    file_url = r2["file_url"] if isinstance(r2, sqlite3.Row) else None
+                                except Exception:
+                                    file_url = None
+                                if file_url:
+                                    show_file_download(file_url, row["file_name"]) 
+                                elif r2[0]:
+                                    show_file_download(r2[0], row["file_name"]) 
+                        except Exception:
+                            pass
+                        note = st.text_area("Catatan Director (opsional)", key=f"sop_note_{row['id']}")
+                        c1, c2 = st.columns(2)
+                        if c1.button("✅ Approve", key=f"sop_app_{row['id']}"):
+                            try:
+                                with unit_of_work() as uow:
+                                    uow.execute("UPDATE sop SET director_approved=1, director_note=? WHERE id=?", (note or "", row["id"]))
+                                    uow.audit("sop", "approve", target=row["id"], details="Director approved")
+                                    uow.notify_decision("sop", row["judul"], decision="approved", entity_id=row["id"], decision_note=note, acted_by_role="director")
+                                st.success("Disetujui.")
+                            except Exception as e:
+                                st.error(f"Gagal menyimpan: {e}")
+                        if c2.button("❌ Tolak", key=f"sop_rej_{row['id']}"):
+                            try:
+                                with unit_of_work() as uow:
+                                    uow.execute("UPDATE sop SET director_approved=0, director_note=? WHERE id=?", (note or "Ditolak", row["id"]))
+                                    uow.audit("sop", "reject", target=row["id"], details="Director rejected")
+                                    uow.notify_decision("sop", row["judul"], decision="rejected", entity_id=row["id"], decision_note=note, acted_by_role="director")
+                                st.warning("Ditolak.")
+                            except Exception as e:
+                                st.error(f"Gagal menyimpan: {e}")
+
+    # --- Tab Daftar SOP ---
+    if tab_list:
+        st.subheader("Daftar SOP")
+        # Introspeksi kolom agar query kompatibel
+        try:
+            cur.execute("PRAGMA table_info(sop)")
+            sop_cols = [row[1] for row in cur.fetchall()]
+        except Exception:
+            sop_cols = []
+
+        date_col = "tanggal_terbit" if "tanggal_terbit" in sop_cols else ("tanggal_upload" if "tanggal_upload" in sop_cols else None)
+        select_parts = []
+        for c in ("id", "judul", "file_name"):
+            if c in sop_cols:
+                select_parts.append(c)
+        if date_col:
+            select_parts.append(f"{date_col} AS tanggal")
+        if "director_approved" in sop_cols:
+            select_parts.append("director_approved")
+
+        if select_parts:
+            order_by = date_col or ("tanggal_upload" if "tanggal_upload" in sop_cols else "id")
+            sql = f"SELECT {', '.join(select_parts)} FROM sop ORDER BY {order_by} DESC"
+            try:
+                df = pd.read_sql_query(sql, conn)
+            except Exception:
+                df = pd.DataFrame()
+        else:
+            df = pd.DataFrame()
+
+        if df.empty:
+            st.info("Belum ada data SOP.")
+        else:
+            st.dataframe(df, use_container_width=True, hide_index=True)
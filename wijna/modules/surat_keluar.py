@@ -0,0 +1,182 @@
+"""Surat Keluar: draft, review, dan arsip surat keluar."""
+from datetime import date
+
+import streamlit as st
+
+from wijna.utils import gen_id
+from wijna.db import audit_log, get_db
+from wijna.notify import notify_review_request
+from wijna.ui import lazy_tabs, require_login, show_file_download, upload_file_and_store
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def surat_keluar_module():
+    conn = get_db()
+    cur = conn.cursor()
+    user = require_login()
+
+    st.markdown("# 📤 Surat Keluar")
+    tab1, tab2, tab3 = lazy_tabs([
+        "📝 Input Draft Surat Keluar",
+        "✅ Approval",
+        "📋 Daftar & Rekap Surat Keluar"
+    ], key="surat_keluar")
+
+    # --- Tab 1: Input Draft (Staff, Finance, Director, Superuser) ---
+    if tab1:
+        st.markdown("### Input Draft Surat Keluar ")
+        draft_type = st.radio("Jenis Draft Surat", ["Upload File", "Link URL"], horizontal=True, key="draft_type_sk")
+        with st.form("sk_add", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                nomor = st.text_input("Nomor Surat")
+                tanggal = st.date_input("Tanggal", value=date.today())
+            with col2:
+                ditujukan = st.text_input("Ditujukan Kepada")
+                perihal = st.text_input("Perihal")
+            draft_blob, draft_name, draft_url = None, None, None
+            if draft_type == "Upload File":
+                draft = st.file_uploader("Upload Draft Surat (PDF/DOC)")
+            else:
+                draft = None
+                draft_url = st.text_input("Link Draft Surat (Google Drive, dll)")
+            follow_up = st.text_area("Tindak Lanjut (opsional)")
+            submit = st.form_submit_button("💾 Simpan Draft Surat Keluar")
+            if submit:
+                if draft_type == "Upload File" and not draft:
+                    st.error("File draft surat wajib diupload.")
+                elif draft_type == "Link URL" and not draft_url:
+                    st.error("Link draft surat wajib diisi.")
+                else:
+                    sid = gen_id("sk")
+                    if draft_type == "Upload File":
+                        draft_blob, draft_name, draft_url = upload_file_and_store(draft, "surat_keluar")
+                    cur.execute("""INSERT INTO surat_keluar (id,indeks,nomor,tanggal,ditujukan,perihal,pengirim,draft_blob,draft_name,status,follow_up, draft_url)
+                                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+                        (sid, '', nomor, tanggal.isoformat(), ditujukan, perihal, user['full_name'], draft_blob, draft_name, "Draft", follow_up, draft_url))
+                    conn.commit()
+                    try:
+                        det = f"draft_file={draft_name}" if draft_name else f"draft_url={draft_url}"
+                        audit_log("surat_keluar", "create", target=sid, details=f"{nomor}-{perihal}; {det}")
+                        notify_review_request("surat_keluar", title=f"Draft {nomor} — {perihal}", entity_id=sid, recipients_roles=("director",))
+                    except Exception:
+                        pass
+                    st.success("✅ Surat keluar (draft) tersimpan.")
+
+    # --- Tab 2: Approval Director ---
+    if tab2:
+        st.markdown("### Approval Surat Keluar (Director)")
+        if user["role"] in ["director","superuser"]:
+            df = pd.read_sql_query("SELECT id,indeks,nomor,tanggal,ditujukan,perihal,pengirim,status,follow_up, director_approved, final_name, draft_blob, draft_name, draft_url FROM surat_keluar ORDER BY tanggal DESC", conn)
+            for idx, row in df.iterrows():
+                with st.expander(f"{row['nomor']} | {row['perihal']} | {row['tanggal']} | Status: {row['status']}"):
+                    st.write(f"Ditujukan: {row['ditujukan']}")
+                    st.write(f"Pengirim: {row['pengirim']}")
+                    st.write(f"Follow Up: {row['follow_up']}")
+                    # Preview/download draft
+                    if row['draft_blob'] and row['draft_name']:
+                        st.markdown(f"**Draft Surat (file):** {row['draft_name']}")
+                        show_file_download(row['draft_blob'], row['draft_name'])
+                    elif row.get('draft_url'):
+                        st.markdown(f"**Draft Surat (link):** [Lihat Draft]({row['draft_url']})")
+                    # Catatan dan upload final
+                    note = st.text_area("Catatan Director", value="", key=f"note_{row['id']}")
+                    final = st.file_uploader("Upload File Final (wajib untuk status resmi)", key=f"final_{row['id']}")
+                    colA, colB = st.columns(2)
+                    with colA:
+                        approve = st.button("✅ Approve & Upload Final", key=f"approve_{row['id']}")
+                    with colB:
+                        disapprove = st.button("❌ Disapprove (Revisi ke Draft)", key=f"disapprove_{row['id']}")
+                    if approve:
+                        if not final:
+                            st.error("File final wajib diupload agar surat keluar tercatat resmi.")
+                        else:
+                            blob, fname, furl = upload_file_and_store(final, "surat_keluar")
+                            # Prefer Drive URL when available
+                            try:
+                                cur.execute("PRAGMA table_info(surat_keluar)")
+                                _cols = {r[1] for r in cur.fetchall()}
+                            except Exception:
+                                _cols = set()
+                            if 'final_url' in _cols:
+                                cur.execute("UPDATE surat_keluar SET final_blob=?, final_name=?, final_url=?, director_note=?, director_approved=1, status='Final' WHERE id=?",
+                                            (None if furl else blob, fname, furl, note, row['id']))
+                            else:
+                                cur.execute("UPDATE surat_keluar SET final_blob=?, final_name=?, director_note=?, director_approved=1, status='Final' WHERE id=?",
+                                            (blob, fname, note, row['id']))
+                            conn.commit()
+                            try:
+                                audit_log("surat_keluar", "director_approval", target=row['id'], details=f"final={fname}; note={note}")
+                            except Exception:
+                                pass
+                            st.success("Final uploaded & approved.")
+                            st.rerun()
+                    if disapprove:
+                        cur.execute("UPDATE surat_keluar SET status='Draft', director_note=?, director_approved=0 WHERE id=?", (note, row['id']))
+                        conn.commit()
+                        try:
+                            audit_log("surat_keluar", "director_disapprove", target=row['id'], details=f"note={note}")
+                        except Exception:
+                            pass
+                        st.warning("Surat dikembalikan ke draft untuk direvisi.")
+                        st.rerun()
+        else:
+            st.info("Hanya Director yang dapat meng-approve dan upload file final.")
+
+    # --- Tab 3: Daftar & Rekap Surat Keluar ---
+    if tab3:
+        st.markdown("### Daftar & Rekap Surat Keluar")
+        df = pd.read_sql_query("SELECT id,indeks,nomor,tanggal,ditujukan,perihal,pengirim,status,follow_up, director_approved, final_name, final_url, draft_name, draft_url, final_blob FROM surat_keluar ORDER BY tanggal DESC", conn)
+        # Indeks otomatis: urutan
+        if not df.empty:
+            df = df.copy()
+            df['indeks'] = [f"SK-{i+1:04d}" for i in range(len(df))]
+        # Tabel utama
+        st.dataframe(df[["indeks","nomor","tanggal","ditujukan","perihal","pengirim","status","follow_up","final_name"]], width='stretch', hide_index=True)
+
+        # Download File Final
+        st.markdown("#### Download File Final Surat Keluar")
+        if not df.empty:
+            for idx, row in df.iterrows():
+                if row.get('final_url') and row.get('final_name'):
+                    st.write(f"{row['nomor']} | {row['perihal']} | {row['tanggal']}")
+                    show_file_download(row['final_url'], row['final_name'])
+                elif row.get('final_blob') and row.get('final_name'):
+                    st.write(f"{row['nomor']} | {row['perihal']} | {row['tanggal']}")
+                    show_file_download(row['final_blob'], row['final_name'])
+
+        # Rekap Bulanan
+        st.markdown("#### 📊 Rekap Bulanan Surat Keluar")
+        this_month = date.today().strftime("%Y-%m")
+        df_month = pd.DataFrame()
+        if not df.empty:
+            df_month = df[df['tanggal'].str[:7] == this_month]
+        st.write(f"Total surat keluar bulan ini: **{len(df_month)}**")
+        if not df_month.empty:
+            approved = df_month[df_month['director_approved']==1]
+            draft = df_month[df_month['status'].str.lower() == 'draft']
+            percent_final = (len(approved)/len(df_month))*100 if len(df_month) > 0 else 0
+            st.info(f"Approved: {len(approved)} | Masih Draft: {len(draft)} | % Finalisasi: {percent_final:.1f}%")
+            # Perbaiki export Excel
+            import io
+            excel_buffer = io.BytesIO()
+            wrote_excel = False
+            # Try openpyxl first, fall back to xlsxwriter, then fallback CSV only
+            for engine_name in ["openpyxl", "xlsxwriter"]:
+                if wrote_excel:
+                    break
+                try:
+                    df_month.to_excel(excel_buffer, index=False, engine=engine_name)
+                    excel_buffer.seek(0)
+                    st.download_button(
+                        "⬇️ Download Rekap Bulanan (Excel)",
+                        excel_buffer,
+                        file_name=f"rekap_suratkeluar_{this_month}.xlsx"
+                    )
+                    wrote_excel = True
+                except Exception:
+                    excel_buffer = io.BytesIO()  # reset buffer for next attempt
+                    continue
+            if not wrote_excel:
+                st.info("Library openpyxl/xlsxwriter tidak tersedia. Export Excel dinonaktifkan.")
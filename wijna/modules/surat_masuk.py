@@ -0,0 +1,244 @@
+"""Surat Masuk: pencatatan surat masuk dan disposisi."""
+import sqlite3
+import uuid
+from datetime import date
+
+import streamlit as st
+
+from wijna.auth import get_current_user
+from wijna.db import audit_log, get_db
+from wijna.drive import _drive_id_from_url
+from wijna.notify import notify_review_request
+from wijna.ui import lazy_tabs, show_file_download, upload_file_and_store
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def surat_masuk_module():
+    st.header("📥 Surat Masuk")
+    user = get_current_user()
+    # Normalize role to avoid casing/whitespace mismatches
+    _role = ((user or {}).get("role") or "").strip().lower()
+    # Staff, Finance, Director, Superuser bisa akses modul ini
+    allowed_roles = {"staff", "finance", "director", "superuser"}
+    if not user or _role not in allowed_roles:
+        st.warning("Anda tidak memiliki akses untuk modul Surat Masuk.")
+        return
+
+    tab1, tab2, tab3 = lazy_tabs([
+        "📝 Input Draft Surat Masuk",
+        "✅ Approval",
+        "📋 Daftar & Rekap Surat Masuk"
+    ], key="surat_masuk")
+
+    if tab1:
+        st.markdown("### Input Draft Surat Masuk")
+        with st.form("form_surat_masuk", clear_on_submit=True):
+            nomor = st.text_input("Nomor Surat")
+            pengirim = st.text_input("Pengirim")
+            tanggal = st.date_input("Tanggal Surat", value=date.today())
+            perihal = st.text_input("Perihal")
+            file_upload = st.file_uploader("Upload File Surat (wajib)", type=None)
+            status = st.selectbox("Status", ["Diusulkan dibahas ke rapat rutin", "Langsung dilegasikan ke salah satu user", "Selesai"], index=0)
+            follow_up = st.text_area("Tindak Lanjut (Follow Up)")
+            submitted = st.form_submit_button("Catat Surat Masuk")
+
+            if submitted:
+                if not file_upload:
+                    st.error("File surat wajib diupload.")
+                else:
+                    conn = get_db()
+                    cur = conn.cursor()
+                    b, file_name, furl = upload_file_and_store(file_upload, "surat_masuk")
+                    # Simpan data ke DB (indeks otomatis di rekap)
+                    sid = str(uuid.uuid4())
+                    try:
+                        cur.execute("PRAGMA table_info(surat_masuk)")
+                        sm_cols = {row[1] for row in cur.fetchall()}
+                    except Exception:
+                        sm_cols = set()
+                    if 'file_url' in sm_cols:
+                        cur.execute("""
+                            INSERT INTO surat_masuk (id, nomor, tanggal, pengirim, perihal, file_blob, file_name, file_drive_id, file_url, status, follow_up)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """, (
+                            sid,
+                            nomor,
+                            tanggal.isoformat(),
+                            pengirim,
+                            perihal,
+                            None if furl else b,
+                            file_name,
+                            _drive_id_from_url(furl) if furl else None,
+                            furl,
+                            status,
+                            follow_up
+                        ))
+                    else:
+                        cur.execute("""
+                            INSERT INTO surat_masuk (id, nomor, tanggal, pengirim, perihal, file_blob, file_name, status, follow_up)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """, (
+                            sid,
+                            nomor,
+                            tanggal.isoformat(),
+                            pengirim,
+                            perihal,
+                            b,
+                            file_name,
+                            status,
+                            follow_up
+                        ))
+                    conn.commit()
+                    try:
+                        audit_log("surat_masuk", "create", target=sid, details=f"{nomor} - {perihal} ({pengirim})")
+                        notify_review_request("surat_masuk", title=f"{nomor} — {perihal}", entity_id=sid, recipients_roles=("director",))
+                    except Exception:
+                        pass
+                    st.success("Surat masuk berhasil dicatat.")
+
+    if tab2:
+        st.markdown("### Approval Surat Masuk")
+        if user["role"] in ["director", "superuser"]:
+            conn = get_db()
+            cur = conn.cursor()
+            df = pd.read_sql_query("SELECT id, nomor, tanggal, pengirim, perihal, file_name, status, follow_up, director_approved, rekap FROM surat_masuk ORDER BY tanggal DESC", conn)
+            for idx, row in df.iterrows():
+                if row.get("director_approved", 0) == 0:
+                    with st.expander(f"{row['nomor']} | {row['perihal']} | {row['tanggal']}"):
+                        st.write(f"Pengirim: {row['pengirim']}")
+                        st.write(f"Status: {row['status']}")
+                        st.write(f"Follow Up: {row['follow_up']}")
+                        if row['file_name']:
+                            # Prefer Drive URL if present
+                            try:
+                                cur.execute("SELECT file_url, file_blob, file_name FROM surat_masuk WHERE id= ?", (row['id'],))
+                                f = cur.fetchone()
+                            except Exception:
+                                f = None
+                            if f and (isinstance(f, sqlite3.Row) and f.get('file_url')):
+                                show_file_download(f.get('file_url'), f.get('file_name'))
+                            elif f and f['file_blob']:
+                                show_file_download(f['file_blob'], f['file_name'])
+                        colA, colB = st.columns(2)
+                        with colA:
+                            if st.button("Approve Surat Masuk", key=f"approve_{row['id']}"):
+                                cur.execute("UPDATE surat_masuk SET director_approved=1 WHERE id= ?", (row['id'],))
+                                conn.commit()
+                                try:
+                                    audit_log("surat_masuk", "director_approval", target=row['id'], details="approve=1")
+                                except Exception:
+                                    pass
+                                st.success("Surat masuk di-approve Director.")
+                                st.rerun()
+                        with colB:
+                            if st.button("Reject Surat Masuk", key=f"reject_{row['id']}"):
+                                cur.execute("UPDATE surat_masuk SET director_approved=-1 WHERE id= ?", (row['id'],))
+                                conn.commit()
+                                try:
+                                    audit_log("surat_masuk", "director_approval", target=row['id'], details="approve=0")
+                                except Exception:
+                                    pass
+                                st.warning("Surat masuk ditolak Director.")
+                                st.rerun()
+                elif row.get("director_approved", 0) == 1:
+                    st.success(f"Sudah di-approve Director: {row['nomor']} | {row['perihal']} | {row['tanggal']}")
+                elif row.get("director_approved", 0) == -1:
+                    st.error(f"Surat masuk ditolak Director: {row['nomor']} | {row['perihal']} | {row['tanggal']}")
+        else:
+            st.info("Hanya Director atau Superuser yang dapat meng-approve surat masuk.")
+    # Tab Rekap Surat Masuk
+    if tab3:
+        st.markdown("### Daftar & Rekap Surat Masuk")
+        conn = get_db()
+        cur = conn.cursor()
+        df = pd.read_sql_query("SELECT id, nomor, tanggal, pengirim, perihal, file_name, rekap, director_approved FROM surat_masuk ORDER BY tanggal DESC", conn)
+        # Indeks otomatis
+        if not df.empty:
+            df = df.copy()
+            df['indeks'] = [f"SM-{i+1:04d}" for i in range(len(df))]
+            show_cols = ["indeks","nomor","tanggal","pengirim","perihal","file_name"]
+        else:
+            show_cols = ["nomor","tanggal","pengirim","perihal","file_name"]
+
+        # Tabel rekap dengan tombol download di kolom, styled modern UI
+        rekap_df = df[df['rekap']==1].copy() if 'rekap' in df.columns else df.copy()
+        if not rekap_df.empty:
+            download_links = []
+            for idx, row in rekap_df.iterrows():
+                cur.execute("SELECT file_blob FROM surat_masuk WHERE id=?", (row['id'],))
+                f = cur.fetchone()
+                if f and f['file_blob']:
+                    import base64
+                    b64 = base64.b64encode(f['file_blob']).decode()
+                    href = f'<a class="rekap-download-btn" href="data:application/octet-stream;base64,{b64}" download="{row["file_name"]}"><span style="font-size:1.1em;">⬇️</span> Download</a>'
+                else:
+                    href = '<span style="color:#bbb">-</span>'
+                download_links.append(href)
+            rekap_df = rekap_df.reset_index(drop=True)
+            rekap_df['Download'] = download_links
+            # Custom styled HTML table
+            table_html = rekap_df[show_cols + ["Download"]].to_html(escape=False, index=False, classes="rekap-table")
+            st.markdown('''
+<style>
+.rekap-table {
+    border-collapse: separate;
+    border-spacing: 0;
+    width: 100%;
+    font-size: 1.05em;
+    background: #f8fbff;
+    border-radius: 12px;
+    overflow: hidden;
+    box-shadow: 0 2px 8px rgba(80,140,255,0.07);
+}
+.rekap-table th {
+    background: linear-gradient(90deg, #4f8cff 0%, #38c6ff 100%);
+    color: #fff;
+    font-weight: 700;
+    text-align: center;
+    padding: 10px 8px;
+    border: none;
+}
+.rekap-table td {
+    text-align: center;
+    padding: 8px 6px;
+    border-bottom: 1px solid #e3eaff;
+    background: #fff;
+    font-size: 1em;
+}
+.rekap-table tr:last-child td {
+    border-bottom: none;
+}
+.rekap-download-btn {
+    display: inline-block;
+    background: linear-gradient(90deg, #38c6ff 0%, #4f8cff 100%);
+    color: #fff !important;
+    padding: 4px 16px;
+    border-radius: 6px;
+    font-weight: 600;
+    text-decoration: none;
+    box-shadow: 0 1px 4px rgba(80,140,255,0.10);
+    transition: background 0.2s;
+}
+.rekap-download-btn:hover {
+    background: linear-gradient(90deg, #4f8cff 0%, #38c6ff 100%);
+    color: #fff !important;
+}
+</style>
+''', unsafe_allow_html=True)
+            st.markdown(table_html, unsafe_allow_html=True)
+        else:
+            st.info("Belum ada surat masuk yang direkap.")
+        # Approval Director: masukan ke rekap
+        if user["role"] in ["director", "superuser"]:
+            for idx, row in df.iterrows():
+                if row.get("rekap", 0) == 0 and row.get("director_approved", 0) == 1:
+                    if st.button("Masukan ke Daftar Rekap Surat", key=f"rekap_{row['id']}"):
+                        cur.execute("UPDATE surat_masuk SET rekap=1 WHERE id= ?", (row['id'],))
+                        conn.commit()
+                        try:
+                            audit_log("surat_masuk", "rekap_add", target=row['id'])
+                        except Exception:
+                            pass
+                        st.success("Surat masuk dimasukan ke rekap.")
+                        st.rerun()
@@ -0,0 +1,414 @@
+"""User Setting: profil, password, manajemen user, dan pengaturan sistem."""
+import streamlit as st
+
+from wijna.auth import hash_password
+from wijna.db import audit_log, get_db, _setting_get, _setting_set
+from wijna.notify import _notif_toggle_enabled, _notif_toggle_key, _send_email, _smtp_settings
+from wijna.ui import has_min_role, lazy_tabs, require_login
+from wijna.startup import LazyModule
+
+pd = LazyModule("pandas")
+
+def user_setting_module():
+    user = require_login()
+    st.header("⚙️ User Setting")
+    conn = get_db()
+    cur = conn.cursor()
+
+    # Ambil data user terkini dari DB
+    cur.execute("SELECT id, email, full_name, role, status, last_login FROM users WHERE id = ?", (user["id"],))
+    me = cur.fetchone()
+    if not me:
+        st.error("User tidak ditemukan di database.")
+        return
+
+    # Kartu ringkas profil (rapi & ringkas)
+    email = me["email"] or "-"
+    nama = me["full_name"] or "-"
+    role = me["role"] or "-"
+    status = me["status"] or "-"
+    st.markdown(
+            f"""
+            <div style='background:#f8fafc;border:1px solid #e5efff;border-radius:12px;padding:12px 16px;margin-bottom:12px;'>
+                <div style='display:flex;gap:24px;flex-wrap:wrap;'>
+                    <div style='min-width:260px'>
+                        <div style='color:#64748b;font-size:12px;margin-bottom:4px'>Email</div>
+                        <div style='font-weight:600;font-size:16px'>{email}</div>
+                    </div>
+                    <div style='min-width:220px'>
+                        <div style='color:#64748b;font-size:12px;margin-bottom:4px'>Nama</div>
+                        <div style='font-weight:600;font-size:16px'>{nama}</div>
+                    </div>
+                    <div style='min-width:160px'>
+                        <div style='color:#64748b;font-size:12px;margin-bottom:4px'>Role</div>
+                        <div style='font-weight:600;font-size:16px;text-transform:capitalize'>{role}</div>
+                    </div>
+                    <div style='min-width:140px'>
+                        <div style='color:#64748b;font-size:12px;margin-bottom:4px'>Status</div>
+                        <div style='font-weight:600;font-size:16px;text-transform:capitalize'>{status}</div>
+                    </div>
+                </div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+    )
+
+    tab_profile, tab_admin, tab1, tab2 = lazy_tabs(["👤 Profil Saya", "🔐 Admin (Director)","🕒 User Baru Menunggu Approval", "👥 Semua User"], key="user_setting")
+
+    # --- Tab 1: Profil Saya ---
+    if tab_profile:
+        st.subheader("Ubah Identitas (Email & Nama)")
+        with st.form("change_identity_form"):
+            new_email = st.text_input("Email", value=me["email"] or "").strip()
+            new_name = st.text_input("Nama Lengkap", value=me["full_name"] or "").strip()
+            save_identity = st.form_submit_button("Simpan Profil")
+            if save_identity:
+                # Validasi sederhana
+                if not new_email or "@" not in new_email:
+                    st.warning("Masukkan email yang valid.")
+                elif not new_name:
+                    st.warning("Nama tidak boleh kosong.")
+                else:
+                    try:
+                        # Cek duplikasi email bila berubah
+                        if (new_email.lower() != (me["email"] or "").lower()):
+                            cur.execute("SELECT 1 FROM users WHERE lower(email)=lower(?) AND id<>?", (new_email, me["id"]))
+                            if cur.fetchone():
+                                st.error("Email sudah digunakan oleh akun lain.")
+                                raise RuntimeError("email_in_use")
+                        # Lakukan update
+                        cur.execute("UPDATE users SET email=?, full_name=? WHERE id=?", (new_email, new_name, me["id"]))
+                        conn.commit()
+                        # Update session
+                        st.session_state["user"]["email"] = new_email
+                        st.session_state["user"]["full_name"] = new_name
+                        try:
+                            old_email = me["email"]
+                            old_name = me["full_name"]
+                            details = f"email: {old_email} → {new_email}; nama: {old_name} → {new_name}"
+                            audit_log("user_setting", "update_identity", target=old_email or new_email, details=details)
+                        except Exception:
+                            pass
+                        st.success("Identitas berhasil diperbarui.")
+                    except RuntimeError:
+                        pass
+
+        st.markdown("---")
+        st.subheader("Ubah Password")
+        with st.form("change_password_form"):
+            old_pw = st.text_input("Password Lama", type="password")
+            new_pw = st.text_input("Password Baru", type="password")
+            new_pw2 = st.text_input("Ulangi Password Baru", type="password")
+            change_pw = st.form_submit_button("Ganti Password")
+            if change_pw:
+                # Validasi
+                if not old_pw or not new_pw or not new_pw2:
+                    st.warning("Semua field password wajib diisi.")
+                elif new_pw != new_pw2:
+                    st.warning("Konfirmasi password baru tidak cocok.")
+                elif len(new_pw) < 6:
+                    st.warning("Password baru minimal 6 karakter.")
+                else:
+                    # Cek password lama
+                    cur.execute("SELECT password_hash FROM users WHERE id=?", (me["id"],))
+                    row = cur.fetchone()
+                    if not row or row["password_hash"] != hash_password(old_pw):
+                        st.error("Password lama tidak sesuai.")
+                    else:
+                        cur.execute("UPDATE users SET password_hash=? WHERE id=?", (hash_password(new_pw), me["id"]))
+                        conn.commit()
+                        try:
+                            audit_log("user_setting", "change_password", target=me["email"], details="Ganti password sendiri")
+                        except Exception:
+                            pass
+                        st.success("Password berhasil diganti.")
+
+    # --- Tab 2: Admin (Director) ---
+    if tab_admin:
+        st.subheader("Admin User (Khusus Director/Superuser)")
+        # Gunakan role hierarchy helper: superuser otomatis lolos
+        if not has_min_role("director"):
+            st.info("Hanya Director/Superuser yang dapat mengakses menu ini.")
+        else:
+            # Cek kolom untuk sorting
+            cur.execute("PRAGMA table_info(users)")
+            user_cols = {r[1] for r in cur.fetchall()}
+            order_col = "created_at" if "created_at" in user_cols else "email"
+
+            # Daftar user ringkas & filter
+            with st.expander("Cari & Pilih User", expanded=True):
+                keyword = st.text_input("Cari user (email/nama)", value="")
+                if keyword:
+                    dfu = pd.read_sql_query(
+                        f"SELECT id,email,full_name,role,status,last_login FROM users WHERE email LIKE ? OR full_name LIKE ? ORDER BY {order_col} DESC",
+                        conn, params=(f"%{keyword}%", f"%{keyword}%")
+                    )
+                else:
+                    dfu = pd.read_sql_query(f"SELECT id,email,full_name,role,status,last_login FROM users ORDER BY {order_col} DESC", conn)
+                st.dataframe(dfu, width='stretch', hide_index=True)
+
+                # Pilih user target
+                options = [f"{r['id']} | {r['email']} | {r['full_name']} | {r['role']} | {r['status']}" for _, r in dfu.iterrows()] if not dfu.empty else []
+                selected = st.selectbox("Pilih user", ["-"] + options)
+                target_id = None
+                if selected and selected != "-":
+                    target_id = selected.split(" | ")[0]
+
+            if target_id:
+                cur.execute("SELECT id,email,full_name,role,status FROM users WHERE id=?", (target_id,))
+                target = cur.fetchone()
+                if not target:
+                    st.error("User target tidak ditemukan.")
+                else:
+                    st.markdown(f"**Target:** {target['email']} · {target['full_name']} · {target['role']} · {target['status']}")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.markdown("##### Reset Password User")
+                        with st.form("admin_reset_pw"):
+                            npw = st.text_input("Password Baru", type="password")
+                            npw2 = st.text_input("Ulangi Password Baru", type="password")
+                            do_reset = st.form_submit_button("Reset Password")
+                            if do_reset:
+                                if len(npw) < 6:
+                                    st.warning("Password minimal 6 karakter.")
+                                elif npw != npw2:
+                                    st.warning("Konfirmasi password tidak cocok.")
+                                else:
+                                    cur.execute("UPDATE users SET password_hash=? WHERE id=?", (hash_password(npw), target["id"]))
+                                    conn.commit()
+                                    try:
+                                        audit_log("user_setting", "reset_password", target=target["email"], details=f"Oleh {me['email']}")
+                                    except Exception:
+                                        pass
+                                    st.success("Password user berhasil direset.")
+                    with col2:
+                        st.markdown("##### Hapus User")
+                        st.caption("Aksi permanen. Tidak dapat dibatalkan.")
+                        with st.form("admin_delete_user"):
+                            confirm_mail = st.text_input("Ketik email user untuk konfirmasi")
+                            confirm_yes = st.checkbox("Saya yakin ingin menghapus user ini")
+                            do_delete = st.form_submit_button("Hapus User", disabled=(target["id"] == me["id"]))
+                            if do_delete:
+                                if target["id"] == me["id"]:
+                                    st.error("Tidak dapat menghapus akun sendiri.")
+                                elif target["role"] == "superuser" and me["role"] != "superuser":
+                                    st.error("Hanya Superuser yang boleh menghapus Superuser.")
+                                elif confirm_mail.strip().lower() != (target["email"] or "").lower():
+                                    st.error("Konfirmasi email tidak cocok.")
+                                elif not confirm_yes:
+                                    st.error("Centang konfirmasi terlebih dahulu.")
+                                else:
+                                    cur.execute("DELETE FROM users WHERE id=?", (target["id"],))
+                                    conn.commit()
+                                    try:
+                                        audit_log("user_setting", "delete_user", target=target["email"], details=f"Oleh {me['email']}")
+                                    except Exception:
+                                        pass
+                                    st.success("User berhasil dihapus. Silakan refresh daftar di atas.")
+
+            # Email notification settings (Director & Superuser) in expanders
+            st.markdown("---")
+            with st.expander("Email Notifikasi (Dunyim) — Director/Superuser", expanded=False):
+                enabled_global = (_setting_get('enable_email_notifications','false') == 'true')
+                enabled_pmr = (_setting_get('pmr_notify_enabled','true') == 'true')
+                enabled_delegasi = (_setting_get('delegasi_notify_enabled','true') == 'true')
+                enabled_mou_expiry = (_setting_get('mou_expiry_notify_enabled','true') == 'true')
+                autoshift = (_setting_get('delegasi_deadline_autoshift','false') == 'true')
+                colA, colB = st.columns(2)
+                with colA:
+                    ng = st.toggle("Aktifkan notifikasi email", value=enabled_global)
+                with colB:
+                    st.caption("Kredensial di secrets: [email_credentials] username/app_password")
+                colC, colD = st.columns(2)
+                with colC:
+                    np = st.toggle("PMR: Tegur otomatis jika terlambat (> tgl 5)", value=enabled_pmr)
+                with colD:
+                    nd = st.toggle("Delegasi: Pengingat ≤3 hari & Lewat tenggat", value=enabled_delegasi)
+                colE, colF = st.columns(2)
+                with colE:
+                    na = st.toggle("Delegasi: Auto-shift deadline jika jatuh pada Libur Nasional", value=autoshift)
+                with colF:
+                    st.caption("Jika aktif, sistem akan memundurkan tenggat ke hari kerja berikutnya.")
+                colG, colH = st.columns(2)
+                with colG:
+                    nm = st.toggle("MoU: Pengingat berakhir (90/30/7/0 hari sebelum Tgl Selesai)", value=enabled_mou_expiry)
+                with colH:
+                    st.caption("Dikirim ke pembuat MoU, Board, dan Director.")
+
+                st.markdown("---")
+                st.markdown("#### Toggle Notifikasi per Event")
+                st.caption("Aktif/nonaktifkan pengiriman email untuk tiap modul dan tahap event.")
+                modules = [
+                    ("inventory", "Inventory"),
+                    ("cuti", "Cuti"),
+                    ("cash_advance", "Cash Advance"),
+                    ("flex", "Flex Time"),
+                    ("mou", "MoU"),
+                ]
+                events = [
+                    ("request", "Permintaan Review (Submit)"),
+                    ("finance_decision", "Keputusan Finance"),
+                    ("director_decision", "Keputusan Director"),
+                    ("board_decision", "Keputusan Board (khusus MoU/SOP/Notulen)"),
+                ]
+                # Render a grid of toggles
+                for ent_key, ent_label in modules:
+                    st.markdown(f"**{ent_label}**")
+                    c1, c2, c3, c4 = st.columns(4)
+                    cols = [c1, c2, c3, c4]
+                    vals = []
+                    for idx, (evt_key, evt_label) in enumerate(events):
+                        with cols[idx]:
+                            cur_val = _notif_toggle_enabled(ent_key, evt_key, True)
+                            vals.append(st.toggle(evt_label, value=cur_val, key=f"tgl_{ent_key}_{evt_key}"))
+                    # Save for this module
+                    if st.button(f"Simpan Toggle {ent_label}", key=f"save_toggles_{ent_key}"):
+                        for (evt_key, _), v in zip(events, vals):
+                            _setting_set(_notif_toggle_key(ent_key, evt_key), 'true' if v else 'false')
+                        st.success(f"Toggle notifikasi {ent_label} disimpan.")
+                if st.button("Simpan Pengaturan Email", key="save_email_notif"):
+                    _setting_set('enable_email_notifications', 'true' if ng else 'false')
+                    _setting_set('pmr_notify_enabled', 'true' if np else 'false')
+                    _setting_set('delegasi_notify_enabled', 'true' if nd else 'false')
+                    _setting_set('delegasi_deadline_autoshift', 'true' if na else 'false')
+                    _setting_set('mou_expiry_notify_enabled', 'true' if nm else 'false')
+                    st.success("Pengaturan disimpan.")
+
+            with st.expander("🔔 Kirim Email Uji Coba", expanded=False):
+                st.caption("Gunakan ini untuk menguji apakah konfigurasi SMTP dan pengiriman email berjalan.")
+                with st.form("test_email_form"):
+                    default_to = me["email"] or ""
+                    test_to = st.text_input("Kirim ke (email)", value=default_to)
+                    subject = st.text_input("Subjek", value="[WIJNA] Test Notifikasi Email")
+                    body = st.text_area("Isi Pesan", value="Ini adalah email uji dari WIJNA Manajemen System.")
+                    submit_test = st.form_submit_button("Kirim Email Tes")
+                    if submit_test:
+                        if not test_to or "@" not in test_to:
+                            st.warning("Masukkan alamat email tujuan yang valid.")
+                        else:
+                            ok = False
+                            try:
+                                ok = _send_email([test_to], subject.strip(), body)
+                            except Exception:
+                                ok = False
+                            if ok:
+                                st.success(f"Email uji berhasil dikirim ke {test_to}.")
+                            else:
+                                st.error("Gagal mengirim email uji. Periksa kembali kredensial di secrets dan koneksi internet.")
+                                usern, apppw = _smtp_settings()
+                                if not usern or not apppw:
+                                    st.info("Hint: Pastikan secrets.email_credentials.username dan app_password terisi.")
+
+            # Aksi User Management moved inside Admin tab
+            st.markdown("---")
+            st.subheader("Aksi User Management")
+            conn3 = get_db()
+            cur3 = conn3.cursor()
+            cur3.execute("SELECT id, email, full_name, role, status FROM users ORDER BY created_at DESC")
+            user_rows = cur3.fetchall()
+            conn3.close()
+            user_options = [f"{row['id']} | {row['email']} | {row['full_name']} | {row['role']} | {row['status']}" for row in user_rows]
+            user_id_map = {f"{row['id']} | {row['email']} | {row['full_name']} | {row['role']} | {row['status']}": row['id'] for row in user_rows}
+            with st.form("admin_change"):
+                selected_user = st.selectbox("Pilih user untuk edit", user_options, key="admin_user_select")
+                uid = user_id_map[selected_user] if selected_user else ""
+                newrole = st.selectbox("Pilih role baru", ["staff","board","finance","director","superuser"])
+                newpw = st.text_input("Set new password (kosong = tidak diganti)", type="password")
+                action = st.selectbox("Aksi", ["Update User", "Approve", "Reject"])
+                submit = st.form_submit_button("Apply")
+                if submit:
+                    conn3 = get_db()
+                    cur3 = conn3.cursor()
+                    if not uid:
+                        st.error("Masukkan user id.")
+                    else:
+                        if action == "Update User":
+                            if newpw:
+                                cur3.execute("UPDATE users SET role=?, password_hash=? WHERE id=?", (newrole, hash_password(newpw), uid))
+                            else:
+                                cur3.execute("UPDATE users SET role=? WHERE id=?", (newrole, uid))
+                            conn3.commit()
+                            st.success("User updated.")
+                        elif action == "Approve":
+                            cur3.execute("UPDATE users SET status='active' WHERE id = ?", (uid,))
+                            conn3.commit()
+                            st.success("User diapprove.")
+                        elif action == "Reject":
+                            cur3.execute("UPDATE users SET status='inactive' WHERE id = ?", (uid,))
+                            conn3.commit()
+                            st.info("User di-set inactive.")
+                    conn3.close()
+    
+    if tab1:
+        st.subheader("User baru menunggu approval")
+        if not has_min_role("director, superuser"):
+            st.info("Hanya Director/Superuser yang dapat mengakses menu ini.")
+            return
+        conn1 = get_db()
+        cur1 = conn1.cursor()
+        cur1.execute("SELECT id,email,full_name,role,status,created_at FROM users WHERE status = 'pending'")
+        pendings = cur1.fetchall()
+        if pendings:
+            for idx, p in enumerate(pendings):
+                with st.expander(f"{p['full_name']} — {p['email']}"):
+                    st.markdown(f'''
+                    <div style="background:#f8fbff;border-radius:10px;padding:1.2em 1.5em 1em 1.5em;margin-bottom:1em;box-shadow:0 2px 8px rgba(80,140,255,0.07);">
+                    <b>Nama:</b> {p['full_name']}<br>
+                    <b>Email:</b> {p['email']}<br>
+                    <b>Role:</b> <span style="color:#2563eb;font-weight:600">{p['role']}</span><br>
+                    <b>Status:</b> <span style="color:#eab308;font-weight:600">{p['status']}</span><br>
+                    <b>Tanggal Daftar:</b> {p['created_at'][:10]}<br>
+                    <b>User ID:</b> <code>{p['id']}</code>
+                    </div>
+                    ''', unsafe_allow_html=True)
+                    # Action buttons for this user
+                    col1, col2, col3 = st.columns([1,1,2])
+                    if 'superuser_panel_action' not in st.session_state:
+                        st.session_state['superuser_panel_action'] = {}
+                    with col1:
+                        if st.button("Approve", key=f"approve_{p['id']}_card_{idx}"):
+                            conn_btn = get_db()
+                            cur_btn = conn_btn.cursor()
+                            cur_btn.execute("UPDATE users SET status='active' WHERE id = ?", (p['id'],))
+                            conn_btn.commit()
+                            conn_btn.close()
+                            st.success("User diapprove.")
+                            st.rerun()
+                    with col2:
+                        if st.button("Reject", key=f"reject_{p['id']}_card_{idx}"):
+                            conn_btn = get_db()
+                            cur_btn = conn_btn.cursor()
+                            cur_btn.execute("UPDATE users SET status='inactive' WHERE id = ?", (p['id'],))
+                            conn_btn.commit()
+                            conn_btn.close()
+                            st.info("User di-set inactive.")
+                            st.rerun()
+                    with col3:
+                        role_options = ["staff","board","finance","director","superuser"]
+                        # Normalize existing role to options
+                        current_role = p['role'] if p['role'] in role_options else "staff"
+                        new_role = st.selectbox("Set role", role_options, index=role_options.index(current_role), key=f"role_{p['id']}_card_{idx}")
+                        if st.button("Update Role", key=f"setrole_{p['id']}_card_{idx}"):
+                            conn_btn = get_db()
+                            cur_btn = conn_btn.cursor()
+                            cur_btn.execute("UPDATE users SET role=? WHERE id=?", (new_role, p['id']))
+                            conn_btn.commit()
+                            conn_btn.close()
+                            st.success("Role diupdate.")
+                            st.rerun()
+        else:
+            st.info("Tidak ada user pending.")
+        conn1.close()
+    
+    # (Aksi User Management dipindahkan ke dalam tab Admin)
+
+    if tab2:
+        st.subheader("Semua user")
+        if not has_min_role("director, superuser"):
+            st.info("Hanya Director/Superuser yang dapat mengakses menu ini.")
+            return
+        conn2 = get_db()
+        df2 = pd.read_sql_query("SELECT id,email,full_name,role,status,last_login,created_at FROM users", conn2)
+        st.dataframe(df2, width='stretch')
+        conn2.close()
+    # (No form here, only one form with key 'admin_change' exists below)
@@ -0,0 +1,360 @@
+"""Email notifications: SMTP sender, per-event toggles, recipient lookup, dedup log."""
+import threading
+from typing import Optional, Tuple, List, Dict
+from email.mime.text import MIMEText
+
+from wijna.config import get_secret
+from wijna.auth import get_current_user
+from wijna.db import get_db, _setting_get, on_db_file_replace, on_table_write
+from wijna.utils import format_datetime_wib, now_wib_iso
+
+# --- Email helpers (Dunyim) ---
+def _email_enabled() -> bool:
+    try:
+        if _setting_get('enable_email_notifications', 'false') != 'true':
+            return False
+        creds = get_secret('email_credentials')
+        if not creds:
+            return False
+        if not creds.get('username') or not creds.get('app_password'):
+            return False
+        return True
+    except Exception:
+        return False
+
+def _smtp_settings() -> Tuple[Optional[str], Optional[str]]:
+    try:
+        creds = get_secret('email_credentials')
+        return creds.get('username'), creds.get('app_password')
+    except Exception:
+        return None, None
+
+def _send_email(recipients: List[str], subject: str, body: str) -> bool:
+    if not recipients:
+        return False
+    try:
+        username, app_password = _smtp_settings()
+        if not username or not app_password:
+            return False
+        msg = MIMEText(body, _charset='utf-8')
+        msg['Subject'] = subject
+        msg['From'] = username
+        msg['To'] = ", ".join(recipients)
+        import smtplib
+        with smtplib.SMTP('smtp.gmail.com', 587, timeout=15) as server:
+            server.ehlo()
+            server.starttls()
+            server.login(username, app_password)
+            server.sendmail(username, recipients, msg.as_string())
+        return True
+    except Exception:
+        return False
+
+# --- Notification toggles helpers ---
+def _bool_from_str(val: Optional[str], default: bool = True) -> bool:
+    if val is None:
+        return default
+    v = str(val).strip().lower()
+    return v in ("1", "true", "yes", "on")
+
+def _notif_toggle_key(entity_type: str, kind: str) -> str:
+    safe_entity = (entity_type or "").strip().lower().replace(" ", "_")
+    safe_kind = (kind or "decision").strip().lower().replace(" ", "_")
+    return f"notify_{safe_entity}_{safe_kind}_enabled"
+
+def _notif_toggle_enabled(entity_type: str, kind: str, default: bool = True) -> bool:
+    try:
+        key = _notif_toggle_key(entity_type, kind)
+        val = _setting_get(key)
+        return _bool_from_str(val, default)
+    except Exception:
+        return default
+
+def _notif_already_sent(entity_type: str, entity_id: str, kind: str, tag: str) -> bool:
+    try:
+        conn = get_db(); cur = conn.cursor()
+        cur.execute("SELECT 1 FROM email_notifications WHERE entity_type=? AND entity_id=? AND kind=? AND tag=? LIMIT 1",
+                    (entity_type, entity_id, kind, tag))
+        return cur.fetchone() is not None
+    except Exception:
+        return False
+
+def _mark_notif_sent(entity_type: str, entity_id: str, kind: str, tag: str, recipients: List[str]) -> None:
+    try:
+        conn = get_db(); cur = conn.cursor()
+        cur.execute("INSERT INTO email_notifications (entity_type, entity_id, kind, tag, recipients) VALUES (?,?,?,?,?)",
+                    (entity_type, entity_id, kind, tag, ",".join(recipients)))
+        conn.commit()
+    except Exception:
+        pass
+
+# --- Recipient directory (in-memory, invalidated on users writes) ---
+_RECIPIENT_DIR: Optional[Dict] = None
+_RECIPIENT_DIR_LOCK = threading.Lock()
+
+def _build_recipient_directory() -> Dict:
+    """Load users once and index emails by role, id and normalized full name."""
+    by_role: Dict[str, set] = {}
+    by_id: Dict[str, str] = {}
+    by_name: Dict[str, str] = {}
+    active: set = set()
+    conn = get_db()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT id, email, full_name, role, status FROM users ORDER BY rowid")
+        for r in cur.fetchall() or []:
+            email = (r['email'] or '').strip()
+            if not email:
+                continue
+            if r['id'] is not None:
+                by_id.setdefault(str(r['id']), email)
+            name_key = (r['full_name'] or '').strip().lower()
+            if name_key:
+                by_name.setdefault(name_key, email)
+            if r['status'] != 'active' or '@' not in email:
+                continue
+            active.add(email.lower())
+            role = (r['role'] or '').strip().lower()
+            by_role.setdefault(role, set()).add(email.lower())
+    finally:
+        conn.close()
+    return {
+        "by_role": {k: sorted(v) for k, v in by_role.items()},
+        "by_id": by_id,
+        "by_name": by_name,
+        "active": sorted(active),
+    }
+
+def _recipient_directory() -> Dict:
+    global _RECIPIENT_DIR
+    d = _RECIPIENT_DIR
+    if d is not None:
+        return d
+    with _RECIPIENT_DIR_LOCK:
+        if _RECIPIENT_DIR is None:
+            _RECIPIENT_DIR = _build_recipient_directory()
+        return _RECIPIENT_DIR
+
+def invalidate_recipient_directory() -> None:
+    global _RECIPIENT_DIR
+    _RECIPIENT_DIR = None
+
+on_table_write("users", invalidate_recipient_directory)
+on_db_file_replace(invalidate_recipient_directory)
+
+def _emails_for_roles(*roles: str) -> List[str]:
+    try:
+        by_role = _recipient_directory()["by_role"]
+    except Exception:
+        return []
+    out: set = set()
+    for role in roles:
+        out.update(by_role.get(role, ()))
+    return sorted(out)
+
+def _get_director_emails() -> List[str]:
+    return _emails_for_roles("director", "superuser")
+
+def _get_user_email_by_name(full_name: str) -> Optional[str]:
+    if not full_name:
+        return None
+    try:
+        # case-insensitive match on full_name
+        return _recipient_directory()["by_name"].get(full_name.strip().lower())
+    except Exception:
+        return None
+
+def _get_board_emails() -> List[str]:
+    return _emails_for_roles("board")
+
+def _resolve_user_email_by_id_or_name(user_ref: Optional[str]) -> Optional[str]:
+    """Resolve a user email from a stored reference: supports user id, email, or full name."""
+    if not user_ref:
+        return None
+    try:
+        ur = str(user_ref).strip()
+        if '@' in ur:
+            return ur
+        email = _recipient_directory()["by_id"].get(ur)
+        if email:
+            return email
+        return _get_user_email_by_name(ur)
+    except Exception:
+        return None
+
+# --- Notification helpers for review/approval ---
+def _get_finance_emails() -> List[str]:
+    return _emails_for_roles("finance")
+
+def notify_review_request(entity_type: str, title: str, entity_id: Optional[str] = None,
+                          recipients_roles: Tuple[str, ...] = ("finance", "director"),
+                          recipients_extra: Optional[List[str]] = None) -> Optional[bool]:
+    """Send an immediate email notification about a new review/approval request.
+    - entity_type: short module key, e.g., 'cash_advance', 'cuti', 'pmr', 'sop', 'notulen', 'surat_masuk', 'surat_keluar', 'inventory'
+    - title: brief display title (e.g., judul/perihal/nama pengaju)
+    - entity_id: optional id for dedup tagging
+    - recipients_roles: which roles to notify ('finance', 'director')
+    - recipients_extra: extra email addresses
+    Returns True when sent (or nothing to send), False when sending failed, None when email is disabled.
+    """
+    try:
+        # Check per-event toggle (request stage)
+        if not _notif_toggle_enabled(entity_type, "request", True):
+            return True
+        if not _email_enabled():
+            return None
+        # Build recipient list by roles
+        recips: List[str] = []
+        roles = [r.strip().lower() for r in (recipients_roles or ())]
+        if "finance" in roles:
+            recips.extend(_get_finance_emails())
+        if "director" in roles:
+            recips.extend(_get_director_emails())
+        if "board" in roles:
+            recips.extend(_get_board_emails())
+        if recipients_extra:
+            recips.extend([e for e in recipients_extra if e and '@' in e])
+        # Deduplicate
+        recips = sorted({e.lower() for e in recips})
+        if not recips:
+            return True
+        # De-duplication tag
+        tag = f"{entity_type}:{entity_id or title}"
+        if _notif_already_sent(entity_type, entity_id or '-', 'review-request', tag):
+            return True
+        # Compose email
+        subj = f"[WIJNA] Permintaan review: {entity_type.replace('_',' ').title()} — {title}"
+        ts = format_datetime_wib(now_wib_iso())
+        body = (
+            f"Permintaan review/approval baru untuk modul: {entity_type}.\n"
+            f"Judul/Perihal: {title}\n"
+            f"Waktu: {ts}\n\n"
+            f"Silakan buka aplikasi WIJNA untuk meninjau dan mengambil tindakan."
+        )
+        if _send_email(recips, subj, body):
+            _mark_notif_sent(entity_type, entity_id or '-', 'review-request', tag, recips)
+            return True
+        return False
+    except Exception:
+        # best effort only
+        return False
+
+def notify_decision(entity_type: str, title: str, decision: str, entity_id: Optional[str] = None,
+                    recipients_roles: Optional[Tuple[str, ...]] = None,
+                    recipients_users: Optional[List[str]] = None,
+                    tag_suffix: str = "",
+                    decision_note: Optional[str] = None,
+                    acted_by_role: Optional[str] = None,
+                    decision_kind: Optional[str] = None) -> Optional[bool]:
+    """Generic notifier for decisions (approve/reject/reviewed).
+    - decision_note: optional note to include; if absent and entity_id provided, try to fetch from DB based on module and acted_by_role.
+    - acted_by_role: one of 'finance','director','board' to determine toggle kind; if omitted, inferred from decision_kind or recipients_roles.
+    - decision_kind: override toggle kind, e.g., 'finance_decision','director_decision','board_decision'.
+    Returns True when sent (or nothing to send), False when sending failed, None when email is disabled.
+    """
+    try:
+        if not _email_enabled():
+            return None
+        # Determine kind for toggle & dedup
+        kind = (decision_kind or "").strip().lower()
+        if not kind:
+            role = (acted_by_role or "").strip().lower()
+            if role in ("finance", "director", "board"):
+                kind = f"{role}_decision"
+            elif recipients_roles and len(recipients_roles) == 1 and recipients_roles[0] in ("finance","director","board"):
+                kind = f"{recipients_roles[0]}_decision"
+            else:
+                kind = "decision"
+
+        # Gate by per-event toggle
+        if not _notif_toggle_enabled(entity_type, kind, True):
+            return True
+
+        recipients: List[str] = []
+        if recipients_roles:
+            roles = [r.strip().lower() for r in recipients_roles]
+            if "director" in roles:
+                recipients += _get_director_emails()
+            if "finance" in roles:
+                recipients += _get_finance_emails()
+            if "board" in roles:
+                recipients += _get_board_emails()
+        if recipients_users:
+            recipients += [e for e in recipients_users if e and '@' in e]
+        recipients = sorted(set([e.lower() for e in recipients if e]))
+        if not recipients:
+            return True
+
+        # Try resolve decision note if not provided
+        note = (decision_note or "").strip()
+        if not note and entity_id:
+            try:
+                conn = get_db(); cur = conn.cursor()
+                et = (entity_type or "").strip().lower()
+                if et == "inventory":
+                    col = "director_note" if "director" in kind else ("finance_note" if "finance" in kind else None)
+                    if col:
+                        cur.execute(f"SELECT {col} FROM inventory WHERE id=?", (entity_id,))
+                        r = cur.fetchone(); note = (r[col] if r and r[col] else "")
+                elif et == "cuti":
+                    col = "director_note" if "director" in kind else ("finance_note" if "finance" in kind else None)
+                    if col:
+                        cur.execute(f"SELECT {col} FROM cuti WHERE id=?", (entity_id,))
+                        r = cur.fetchone(); note = (r[col] if r and r[col] else "")
+                elif et == "cash_advance":
+                    col = "director_note" if "director" in kind else ("finance_note" if "finance" in kind else None)
+                    if col:
+                        cur.execute(f"SELECT {col} FROM cash_advance WHERE id=?", (entity_id,))
+                        r = cur.fetchone(); note = (r[col] if r and r[col] else "")
+                elif et == "flex":
+                    col = "catatan_director" if "director" in kind else ("catatan_finance" if "finance" in kind else None)
+                    if col:
+                        cur.execute(f"SELECT {col} FROM flex WHERE id=?", (entity_id,))
+                        r = cur.fetchone(); note = (r[col] if r and r[col] else "")
+                elif et == "mou":
+                    col = "director_note" if "director" in kind else ("board_note" if "board" in kind else None)
+                    if col:
+                        cur.execute(f"SELECT {col} FROM mou WHERE id=?", (entity_id,))
+                        r = cur.fetchone(); note = (r[col] if r and r[col] else "")
+            except Exception:
+                pass
+
+        # Subject & body
+        decision_label = decision.replace('_',' ').title()
+        subj = f"[WIJNA] {entity_type.replace('_',' ').title()} — {decision_label} — {title}"
+        ts = format_datetime_wib(now_wib_iso())
+        actor = get_current_user() or {}
+        actor_name = actor.get('full_name') or actor.get('email') or '-'
+        actor_role = (acted_by_role or actor.get('role') or '').title()
+        lines = [
+            f"Keputusan: {decision_label}",
+            f"Modul: {entity_type}",
+            f"Judul/Referensi: {title}",
+            f"Waktu: {ts}",
+            f"Oleh: {actor_name} ({actor_role or '-'})",
+        ]
+        if note:
+            lines.append("")
+            lines.append("Catatan Keputusan:")
+            lines.append(note)
+        lines.append("")
+        lines.append("Notifikasi otomatis WIJNA.")
+        body = "\n".join(lines)
+
+        # Dedup key uses the computed kind
+        tag = f"{entity_type}:{decision}:{entity_id or title}:{tag_suffix or '-'}"
+        if _notif_already_sent(entity_type, entity_id or '-', kind, tag):
+            return True
+        if _send_email(recipients, subj, body):
+            _mark_notif_sent(entity_type, entity_id or '-', kind, tag, recipients)
+            return True
+        return False
+    except Exception:
+        return False
+
+def _get_all_active_emails() -> List[str]:
+    """Return all active user emails (deduped, lowercase)."""
+    try:
+        return list(_recipient_directory()["active"])
+    except Exception:
+        return []
@@ -0,0 +1,403 @@
+"""Point-in-time recovery: ship WAL segments to Drive between full base snapshots.
+
+Database berjalan dalam mode WAL. Shipper membaca frame WAL yang sudah ter-commit
+sejak pengiriman terakhir, meng-upload-nya sebagai segmen terkompresi, lalu
+melakukan checkpoint TRUNCATE bila WAL sudah besar. Satu "generasi" WAL
+(diidentifikasi oleh salt header) dimulai setiap kali WAL di-reset.
+
+Nama file di Drive:
+    pitr_base_<seq>_<chain>_<gen>_<ts>.sqlite.gz           snapshot penuh (backup API)
+    pitr_wal_<seq>_<chain>_<gen>_<start>-<end>_<ts>.wal.gz byte WAL [start, end) generasi <gen>
+
+Setiap base memulai rantai baru (<chain>, id acak); segmen membawa id rantai base-nya.
+`seq` naik terus lintas generasi dan rantai; bila state lokal hilang (mis. setelah DB
+diganti) seq dilanjutkan dari nilai terbesar di Drive. Restore = base terakhir dengan
+ts <= target + segmen rantai base itu dengan ts <= target, urut seq.
+Generasi baru tanpa base hanya diterima bila generasi sebelumnya ditutup oleh
+checkpoint shipper sendiri tanpa commit lain di sela-selanya (dicek via
+PRAGMA data_version); selain itu (checkpoint otomatis, proses restart, DB diganti)
+shipper meng-upload base baru agar rantai tidak pernah berlubang.
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from wijna import config
+from wijna.db import _setting_get, on_db_file_replace
+from wijna.drive import _drive_list, _drive_upload_file, _drive_download, _drive_download_to_file
+from wijna.utils import now_wib
+
+PITR_SHIP_INTERVAL_SECONDS = 60
+PITR_CHECKPOINT_BYTES = 1024 * 1024
+PITR_BASE_MAX_AGE_SECONDS = 24 * 3600
+PITR_LOCK_STALE_SECONDS = 600
+_TS_FMT = "%Y%m%dT%H%M%S"
+_WAL_HEADER_SIZE = 32
+_WAL_FRAME_HEADER_SIZE = 24
+_WAL_MAGIC_LE = 0x377f0682
+_WAL_MAGIC_BE = 0x377f0683
+# <chain> is absent in names written before chains were introduced
+_BASE_RE = re.compile(r"^pitr_base_(\d+)_(?:([0-9a-f]{8})_)?([0-9a-f]{16})_(\d{8}T\d{6})\.sqlite\.gz$")
+_SEG_RE = re.compile(r"^pitr_wal_(\d+)_(?:([0-9a-f]{8})_)?([0-9a-f]{16})_(\d+)-(\d+)_(\d{8}T\d{6})\.wal\.gz$")
+
+_SHIPPER_LOCK = threading.Lock()
+_SHIPPER: Dict = {"thread": None, "conn": None, "conn_path": None, "last": None}
+
+
+# --- State file (outside the DB so shipping does not itself produce WAL frames) ---
+def _state_path() -> str:
+    return config.DB_PATH + ".pitr.json"
+
+def _load_state() -> Dict:
+    try:
+        with open(_state_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _save_state(state: Dict) -> None:
+    tmp = _state_path() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, _state_path())
+
+def _acquire_lock() -> bool:
+    """Cross-process guard so the app thread and a cron `wal-ship` never ship at once."""
+    path = config.DB_PATH + ".pitr.lock"
+    try:
+        if time.time() - os.path.getmtime(path) > PITR_LOCK_STALE_SECONDS:
+            os.remove(path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except OSError:
+        return False
+
+def _release_lock() -> None:
+    try:
+        os.remove(config.DB_PATH + ".pitr.lock")
+    except OSError:
+        pass
+
+
+# --- WAL parsing ---
+def _wal_checksum(data: bytes, s0: int, s1: int, big_endian: bool) -> Tuple[int, int]:
+    ints = struct.unpack((">" if big_endian else "<") + "I" * (len(data) // 4), data)
+    for i in range(0, len(ints), 2):
+        s0 = (s0 + ints[i] + s1) & 0xFFFFFFFF
+        s1 = (s1 + ints[i + 1] + s0) & 0xFFFFFFFF
+    return s0, s1
+
+def _read_wal_header(f) -> Optional[Dict]:
+    f.seek(0)
+    hdr = f.read(_WAL_HEADER_SIZE)
+    if len(hdr) < _WAL_HEADER_SIZE:
+        return None
+    magic, _version, page_size, _ckpt_seq, salt1, salt2, ck1, ck2 = struct.unpack(">8I", hdr)
+    if magic not in (_WAL_MAGIC_LE, _WAL_MAGIC_BE):
+        return None
+    big_endian = magic == _WAL_MAGIC_BE
+    s0, s1 = _wal_checksum(hdr[:24], 0, 0, big_endian)
+    if (s0, s1) != (ck1, ck2):
+        return None
+    return {"gen": f"{salt1:08x}{salt2:08x}", "page_size": page_size, "salt": (salt1, salt2),
+            "big_endian": big_endian, "cksum": (s0, s1)}
+
+def _scan_wal(f, hdr: Dict, start: int, cksum: Tuple[int, int]) -> Tuple[int, Tuple[int, int]]:
+    """Walk valid frames from `start`; return (end of last commit frame, checksum there)."""
+    frame_size = _WAL_FRAME_HEADER_SIZE + hdr["page_size"]
+    pos, s = start, cksum
+    end, end_ck = start, cksum
+    f.seek(pos)
+    while True:
+        frame = f.read(frame_size)
+        if len(frame) < frame_size:
+            break
+        _pgno, commit, salt1, salt2, ck1, ck2 = struct.unpack(">6I", frame[:_WAL_FRAME_HEADER_SIZE])
+        if (salt1, salt2) != hdr["salt"]:
+            break
+        s = _wal_checksum(frame[:8], s[0], s[1], hdr["big_endian"])
+        s = _wal_checksum(frame[_WAL_FRAME_HEADER_SIZE:], s[0], s[1], hdr["big_endian"])
+        if s != (ck1, ck2):
+            break
+        pos += frame_size
+        if commit:
+            end, end_ck = pos, s
+    return end, end_ck
+
+
+# --- Shipping ---
+def _shipper_conn() -> sqlite3.Connection:
+    """Long-lived reader: keeps the WAL from being checkpointed+deleted on last close,
+    and its data_version tells whether anyone committed around our checkpoint."""
+    conn = _SHIPPER.get("conn")
+    if conn is None or _SHIPPER.get("conn_path") != config.DB_PATH:
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        conn = sqlite3.connect(config.DB_PATH, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("SELECT count(*) FROM sqlite_master").fetchone()  # attach to the WAL now
+        _SHIPPER["conn"], _SHIPPER["conn_path"] = conn, config.DB_PATH
+    return conn
+
+def _upload_gz(service, folder_id: str, name: str, src_path: str, tmp: str) -> Optional[str]:
+    gz = os.path.join(tmp, name)
+    with open(src_path, "rb") as fin, gzip.open(gz, "wb", compresslevel=6) as fout:
+        shutil.copyfileobj(fin, fout, 1024 * 1024)
+    return _drive_upload_file(service, folder_id, name, gz, mimetype="application/gzip", ref_module="pitr", replace=False)
+
+def _close_shipper_conn() -> None:
+    with _SHIPPER_LOCK:
+        conn, _SHIPPER["conn"], _SHIPPER["conn_path"] = _SHIPPER.get("conn"), None, None
+    if conn is not None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+on_db_file_replace(_close_shipper_conn)
+
+def _ship_base(service, folder_id: str, state: Dict, gen: str, tmp: str) -> str:
+    from wijna.backup import _snapshot_db
+    ts = now_wib().strftime(_TS_FMT)
+    chain = uuid.uuid4().hex[:8]
+    name = f"pitr_base_{state.get('seq', 0):08d}_{chain}_{gen}_{ts}.sqlite.gz"
+    snap = os.path.join(tmp, "base.sqlite")
+    _snapshot_db(snap)
+    if not _upload_gz(service, folder_id, name, snap, tmp):
+        raise RuntimeError(f"Upload base {name} gagal")
+    state["chain"] = chain
+    state["last_base_time"] = time.time()
+    return name
+
+def _ship_range(service, folder_id: str, state: Dict, wal_bytes_path: str, start: int, end: int, tmp: str) -> str:
+    ts = now_wib().strftime(_TS_FMT)
+    seq = int(state.get("seq", 0))
+    name = f"pitr_wal_{seq:08d}_{state['chain']}_{state['gen']}_{start}-{end}_{ts}.wal.gz"
+    if not _upload_gz(service, folder_id, name, wal_bytes_path, tmp):
+        raise RuntimeError(f"Upload segmen {name} gagal")
+    state["seq"] = seq + 1
+    state["offset"] = end
+    return name
+
+def _copy_range(wal_path: str, start: int, end: int, dest: str) -> None:
+    with open(wal_path, "rb") as fin, open(dest, "wb") as fout:
+        fin.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = fin.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            fout.write(chunk)
+            remaining -= len(chunk)
+
+def _next_seq_from_drive(service, folder_id: str) -> int:
+    """First unused seq in the folder, so a lost state file never restarts the counter."""
+    bases, segs = _parse_pitr_files(_drive_list(service, folder_id, max_age=0))
+    return max([b["seq"] for b in bases] + [s["seq"] + 1 for s in segs] + [0])
+
+def _db_file_stat() -> List[int]:
+    st = os.stat(config.DB_PATH)
+    return [st.st_size, st.st_mtime_ns]
+
+def ship_wal(service, folder_id: str, force_checkpoint: bool = False) -> Tuple[bool, str]:
+    """One shipping round: base if needed, new WAL frames, checkpoint when large."""
+    if not _acquire_lock():
+        return False, "Shipper lain sedang berjalan"
+    try:
+        conn = _shipper_conn()
+        wal_path = config.DB_PATH + "-wal"
+        state = _load_state()
+        shipped: List[str] = []
+        with tempfile.TemporaryDirectory(prefix="wijna-pitr-") as tmp:
+            hdr = None
+            if os.path.exists(wal_path) and os.path.getsize(wal_path) > 0:
+                with open(wal_path, "rb") as f:
+                    hdr = _read_wal_header(f)
+            if hdr is None:
+                return True, "WAL kosong"
+            if "seq" not in state:
+                state["seq"] = _next_seq_from_drive(service, folder_id)
+            if hdr["gen"] != state.get("gen") or not state.get("chain"):
+                # Clean only if our own checkpoint closed the previous generation and nothing
+                # (auto-checkpoint, last-connection close) has written the main file since.
+                clean = (bool(state.get("gen")) and state.get("closed") == state.get("gen")
+                         and state.get("closed_stat") == _db_file_stat())
+                base_age = time.time() - float(state.get("last_base_time") or 0)
+                state.update({"gen": hdr["gen"], "offset": 0, "cksum": None, "closed": None})
+                if not clean or base_age > PITR_BASE_MAX_AGE_SECONDS:
+                    shipped.append(_ship_base(service, folder_id, state, hdr["gen"], tmp))
+                _save_state(state)
+            offset = int(state.get("offset") or 0)
+            cksum = tuple(state["cksum"]) if offset and state.get("cksum") else hdr["cksum"]
+            start = offset or _WAL_HEADER_SIZE
+            with open(wal_path, "rb") as f:
+                end, end_ck = _scan_wal(f, hdr, start, cksum)
+            if end > start:
+                seg = os.path.join(tmp, "segment.wal")
+                _copy_range(wal_path, offset, end, seg)
+                shipped.append(_ship_range(service, folder_id, state, seg, offset, end, tmp))
+                state["cksum"] = list(end_ck)
+                _save_state(state)
+            if force_checkpoint or end >= PITR_CHECKPOINT_BYTES:
+                # Capture frames committed since the scan, then checkpoint; data_version
+                # unchanged across both means nothing slipped in between.
+                dv1 = conn.execute("PRAGMA data_version").fetchone()[0]
+                offset = int(state["offset"])
+                with open(wal_path, "rb") as f:
+                    end2, end2_ck = _scan_wal(f, hdr, offset or _WAL_HEADER_SIZE, tuple(state.get("cksum") or hdr["cksum"]))
+                tail = None
+                if end2 > offset:
+                    tail = os.path.join(tmp, "tail.wal")
+                    _copy_range(wal_path, offset, end2, tail)
+                busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+                dv2 = conn.execute("PRAGMA data_version").fetchone()[0]
+                if tail:
+                    shipped.append(_ship_range(service, folder_id, state, tail, offset, end2, tmp))
+                    state["cksum"] = list(end2_ck)
+                if not busy and dv1 == dv2:
+                    state["closed"] = state["gen"]
+                    state["closed_stat"] = _db_file_stat()
+                _save_state(state)
+        msg = f"{len(shipped)} file dikirim" if shipped else "Tidak ada frame baru"
+        return True, msg
+    finally:
+        _release_lock()
+
+def _shipper_loop() -> None:
+    from wijna.drive import _build_drive
+    service = None
+    while True:
+        time.sleep(PITR_SHIP_INTERVAL_SECONDS)
+        try:
+            if _setting_get('pitr_enabled', 'false') != 'true':
+                continue
+            folder_id = _setting_get('gdrive_folder_id', config.GDRIVE_DEFAULT_FOLDER_ID) or config.GDRIVE_DEFAULT_FOLDER_ID
+            if service is None:
+                service = _build_drive()
+            ok, msg = ship_wal(service, folder_id)
+        except Exception as e:
+            ok, msg = False, f"Error: {e}"
+            service = None
+        _SHIPPER["last"] = (now_wib().replace(microsecond=0).isoformat(sep=" "), ok, msg)
+
+def start_wal_shipper() -> None:
+    """Start the in-process shipper thread once per process (idempotent)."""
+    with _SHIPPER_LOCK:
+        t = _SHIPPER.get("thread")
+        if t is not None and t.is_alive():
+            return
+        t = threading.Thread(target=_shipper_loop, name="wijna-wal-shipper", daemon=True)
+        _SHIPPER["thread"] = t
+        t.start()
+
+def shipper_status() -> Optional[Tuple[str, bool, str]]:
+    """(waktu, ok, pesan) of the last in-process shipping round, if any."""
+    return _SHIPPER.get("last")
+
+
+# --- Restore ---
+def _parse_pitr_files(files: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    bases, segs = [], []
+    for f in files:
+        name = f.get("name", "")
+        m = _BASE_RE.match(name)
+        if m:
+            bases.append({"id": f["id"], "name": name, "seq": int(m.group(1)), "chain": m.group(2),
+                          "gen": m.group(3), "ts": m.group(4)})
+            continue
+        m = _SEG_RE.match(name)
+        if m:
+            segs.append({"id": f["id"], "name": name, "seq": int(m.group(1)), "chain": m.group(2), "gen": m.group(3),
+                         "start": int(m.group(4)), "end": int(m.group(5)), "ts": m.group(6)})
+    return bases, segs
+
+def list_recovery_range(service, folder_id: str) -> Optional[Tuple[datetime, datetime]]:
+    """Earliest base and latest segment time available on Drive (WIB), or None."""
+    bases, segs = _parse_pitr_files(_drive_list(service, folder_id))
+    if not bases:
+        return None
+    first = min(b["ts"] for b in bases)
+    last = max([s["ts"] for s in segs] + [max(b["ts"] for b in bases)])
+    return datetime.strptime(first, _TS_FMT), datetime.strptime(last, _TS_FMT)
+
+def _replay_generation(dest_path: str, wal_bytes_path: str) -> None:
+    for suffix in ("-wal", "-shm"):
+        try:
+            os.remove(dest_path + suffix)
+        except OSError:
+            pass
+    shutil.copyfile(wal_bytes_path, dest_path + "-wal")
+    conn = sqlite3.connect(dest_path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        conn.close()
+
+def pitr_restore(service, folder_id: str, target: datetime, dest_path: str) -> Tuple[bool, str]:
+    """Rebuild the DB as of `target` (WIB) into `dest_path` from base + WAL chain.
+    DB live tidak disentuh; gunakan Sync DB / Replace DB untuk memakai hasilnya.
+    """
+    tag = target.strftime(_TS_FMT)
+    bases, segs = _parse_pitr_files(_drive_list(service, folder_id, max_age=0))
+    cands = [b for b in bases if b["ts"] <= tag]
+    if not cands:
+        return False, "Tidak ada base snapshot sebelum waktu target"
+    base = max(cands, key=lambda b: (b["ts"], b["seq"]))
+    # Only the base's own chain: seq restarts or overlaps after a DB swap must not mix chains
+    chain = sorted((s for s in segs if s["chain"] == base["chain"] and base["ts"] <= s["ts"] <= tag
+                    and (s["chain"] or s["seq"] >= base["seq"])), key=lambda s: s["seq"])
+    with tempfile.TemporaryDirectory(prefix="wijna-pitr-") as tmp:
+        work = os.path.join(tmp, "restore.sqlite")
+        base_gz = os.path.join(tmp, "base.sqlite.gz")
+        _drive_download_to_file(service, base["id"], base_gz)
+        with gzip.open(base_gz, "rb") as fin, open(work, "wb") as fout:
+            shutil.copyfileobj(fin, fout, 1024 * 1024)
+        os.remove(base_gz)
+        applied, last_ts, note = 0, base["ts"], ""
+        gen, gen_end, gen_file = None, 0, None
+        for s in chain:
+            if s["gen"] != gen:
+                if gen_file:
+                    gen_file.close()
+                    _replay_generation(work, os.path.join(tmp, "gen.wal"))
+                if s["start"] != 0:
+                    note = f" (rantai terputus di {s['name']})"
+                    gen_file = None
+                    break
+                gen, gen_end = s["gen"], 0
+                gen_file = open(os.path.join(tmp, "gen.wal"), "wb")
+            if s["start"] != gen_end:
+                note = f" (rantai terputus di {s['name']})"
+                break
+            gen_file.write(gzip.decompress(_drive_download(service, s["id"])))
+            gen_end = s["end"]
+            applied += 1
+            last_ts = s["ts"]
+        if gen_file:
+            gen_file.close()
+            _replay_generation(work, os.path.join(tmp, "gen.wal"))
+        conn = sqlite3.connect(work)
+        try:
+            check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        if check != "ok":
+            return False, f"Hasil restore tidak valid: {check}"
+        shutil.move(work, dest_path)
+    when = datetime.strptime(last_ts, _TS_FMT).strftime("%Y-%m-%d %H:%M:%S")
+    return True, f"DB per {when} WIB ditulis ke {dest_path} (base {base['name']}, {applied} segmen){note}"
@@ -0,0 +1,124 @@
+"""Cold-start profiler: waktu import dependensi berat, ensure_db, auto-restore, dan render pertama.
+
+Diukur sekali per proses (run skrip pertama setelah server bangun). Laporan disimpan ke
+tabel startup_profile saat render pertama selesai sehingga latensi bangun bisa dipantau
+dari Dunyim Security. Dependensi berat diimpor lewat LazyModule/timed_import agar tidak
+dibayar di jalur cold start dan waktunya tetap tercatat saat pertama dipakai.
+"""
+import importlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from wijna import config
+
+_T0 = time.perf_counter()
+_LOCK = threading.Lock()
+_PROFILE: Dict = {"imports": {}, "phases": {}, "saved": False}
+STARTUP_PROFILE_KEEP = 50
+
+# Dependencies worth tracking; anything else imported via timed_import is listed too
+TRACKED_DEPENDENCIES = (
+    "pandas", "google.oauth2.service_account", "googleapiclient.discovery", "googleapiclient.http",
+    "streamlit_calendar", "plotly", "altair",
+)
+
+def timed_import(name: str):
+    """importlib.import_module that records the duration of the first import in this process."""
+    mod = sys.modules.get(name)
+    if mod is not None:
+        return mod
+    t = time.perf_counter()
+    mod = importlib.import_module(name)
+    with _LOCK:
+        _PROFILE["imports"].setdefault(name, {
+            "ms": round((time.perf_counter() - t) * 1000, 1),
+            "after_first_render": _PROFILE["saved"],
+        })
+    return mod
+
+class LazyModule:
+    """Module proxy: `pd = LazyModule("pandas")` imports pandas on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._mod = None
+
+    def __getattr__(self, attr):
+        mod = self._mod
+        if mod is None:
+            mod = self._mod = timed_import(self._name)
+        return getattr(mod, attr)
+
+@contextmanager
+def phase(name: str):
+    """Record the duration of the first `name` block in this process."""
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _LOCK:
+            _PROFILE["phases"].setdefault(name, round((time.perf_counter() - t) * 1000, 1))
+
+def mark(name: str) -> None:
+    """Record milliseconds since process start (first call only)."""
+    with _LOCK:
+        _PROFILE["phases"].setdefault(name, round((time.perf_counter() - _T0) * 1000, 1))
+
+def current_profile() -> Dict:
+    """This process's profile, including lazy imports that happened after the first render."""
+    with _LOCK:
+        imports = dict(_PROFILE["imports"])
+        phases = dict(_PROFILE["phases"])
+    deps = {}
+    for name in TRACKED_DEPENDENCIES:
+        if name in imports:
+            deps[name] = imports[name]
+        elif name in sys.modules:
+            deps[name] = {"ms": None, "after_first_render": None}  # loaded by something else
+    for name, v in imports.items():
+        deps.setdefault(name, v)
+    return {"phases": phases, "imports": deps}
+
+def finish_first_render() -> None:
+    """Close the cold-start window and persist its report (once per process)."""
+    with _LOCK:
+        if _PROFILE["saved"]:
+            return
+        _PROFILE["saved"] = True
+        _PROFILE["phases"].setdefault("first_render", round((time.perf_counter() - _T0) * 1000, 1))
+    report = current_profile()
+    try:
+        conn = sqlite3.connect(config.DB_PATH, timeout=30)
+        try:
+            conn.execute("INSERT INTO startup_profile (total_ms, report_json) VALUES (?, ?)",
+                         (report["phases"]["first_render"], json.dumps(report)))
+            conn.execute("DELETE FROM startup_profile WHERE id NOT IN (SELECT id FROM startup_profile ORDER BY id DESC LIMIT ?)",
+                         (STARTUP_PROFILE_KEEP,))
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        pass
+
+def startup_history(limit: int = 20) -> List[Dict]:
+    """Saved cold-start reports, newest first."""
+    conn = sqlite3.connect(config.DB_PATH, timeout=30)
+    try:
+        rows = conn.execute("SELECT total_ms, report_json, created_at FROM startup_profile ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+    out = []
+    for total_ms, report_json, created_at in rows:
+        try:
+            report = json.loads(report_json or "{}")
+        except ValueError:
+            report = {}
+        out.append({"created_at": created_at, "total_ms": total_ms, **report})
+    return out
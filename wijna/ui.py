@@ -0,0 +1,402 @@
+"""Streamlit helpers shared by every page: login/session, role checks, uploads,
+fragment topics, lazy tabs, and file downloads."""
+import hashlib
+import sqlite3
+import uuid
+from typing import List, Optional, Tuple
+
+import streamlit as st
+
+from wijna import config
+from wijna.auth import get_current_user, hash_password
+from wijna.utils import from_blob, gen_id, now_wib_iso, to_blob
+from wijna.db import audit_log, get_db, _setting_get, table_version
+from wijna.drive import _drive_available, drive_upload_many
+from wijna.backup import (
+    background_backup_result, _is_probably_fresh_seed_db, submit_background_backup, submit_background_verify,
+)
+
+# -------------------------
+# Auth & Session
+# -------------------------
+def register_user(email, full_name, password):
+    conn = get_db()
+    cur = conn.cursor()
+    pw = hash_password(password)
+    now = now_wib_iso()
+    try:
+        cur.execute("INSERT INTO users (email, full_name, role, password_hash, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (email, full_name, "staff", pw, "active", now))
+        conn.commit()
+        return True, "Registered — akun langsung aktif."
+    except sqlite3.IntegrityError:
+        return False, "Email sudah terdaftar."
+
+def login_user(email, password):
+    conn = get_db()
+    cur = conn.cursor()
+    now = now_wib_iso()
+    cur.execute("SELECT * FROM users WHERE email = ?", (email,))
+    row = cur.fetchone()
+    if not row:
+        alasan = "User tidak ditemukan."
+        audit_log("auth", "login_failed", target=email, details=alasan, actor=email)
+        return False, alasan
+    if row["status"] != "active":
+        alasan = f"User status: {row['status']}. Tidak bisa login."
+        audit_log("auth", "login_failed", target=email, details=alasan, actor=email)
+        return False, alasan
+    if row["password_hash"] == hash_password(password):
+        # set session
+        st.session_state["user"] = {"id": row["id"], "email": row["email"], "role": row["role"], "full_name": row["full_name"]}
+        cur.execute("UPDATE users SET last_login = ? WHERE id = ?", (now, row["id"]))
+        # Commit before calling audit_log to prevent cross-connection SQLite lock
+        conn.commit()
+        audit_log("auth", "login", target=email, details="Login sukses.", actor=email)
+        # Defer backup to after rerun, but only if DB is fresh or this is the first login since app wake
+        try:
+            cond_fresh = False
+            try:
+                cond_fresh = _is_probably_fresh_seed_db()
+            except Exception:
+                cond_fresh = False
+            cond_first_login_since_wake = not bool(st.session_state.get("__first_login_since_wake_done", False))
+            if cond_fresh or cond_first_login_since_wake:
+                st.session_state["__post_login_backup"] = True
+            # Mark that we've performed the first-login check for this process/session
+            st.session_state["__first_login_since_wake_done"] = True
+        except Exception:
+            pass
+        conn.commit()
+        return True, "Login sukses."
+    else:
+        alasan = "Password salah."
+        audit_log("auth", "login_failed", target=email, details=alasan, actor=email)
+        return False, alasan
+
+def _request_background_backup(reason: str) -> None:
+    """Submit a non-blocking Drive backup; the toast fragment in main() reports the result."""
+    try:
+        if _drive_available():
+            folder_id = _setting_get('gdrive_folder_id', config.GDRIVE_DEFAULT_FOLDER_ID) or config.GDRIVE_DEFAULT_FOLDER_ID
+            if folder_id:
+                st.session_state["__bg_backup_ticket"] = submit_background_backup(reason)
+    except Exception:
+        pass
+
+def _request_background_verify(reason: str) -> None:
+    """Submit a sandboxed restore check of the newest backup (after any pending backup)."""
+    try:
+        if _drive_available():
+            folder_id = _setting_get('gdrive_folder_id', config.GDRIVE_DEFAULT_FOLDER_ID) or config.GDRIVE_DEFAULT_FOLDER_ID
+            if folder_id:
+                st.session_state["__bg_verify_ticket"] = submit_background_verify(reason)
+    except Exception:
+        pass
+
+@st.fragment(run_every=2)
+def _background_backup_toast():
+    """Poll pending backup/verify tickets. main() renders this only while a ticket is pending;
+    once one resolves the whole page reruns, which drops the fragment when none are left."""
+    resolved = False
+    for key, title in (("__bg_backup_ticket", "Backup DB ke Drive"), ("__bg_verify_ticket", "Verifikasi backup")):
+        ticket = st.session_state.get(key)
+        if not ticket:
+            continue
+        res = background_backup_result(ticket)
+        if res is None:
+            continue
+        st.session_state.pop(key, None)
+        ok, msg = res
+        if ok:
+            flash_toast(f"{title}: {msg}")
+        else:
+            flash_toast(f"{title} gagal: {msg}", icon="⚠️")
+        resolved = True
+    if resolved:
+        st.rerun(scope="app")
+
+def flash_toast(message: str, icon: str = "✅") -> None:
+    """Queue a toast for the next full run (survives st.rerun); shown by show_flash_toasts()."""
+    st.session_state.setdefault("__flash_toasts", []).append((message, icon))
+
+def show_flash_toasts() -> None:
+    for message, icon in st.session_state.pop("__flash_toasts", []):
+        st.toast(message, icon=icon)
+
+def logout():
+    # capture actor before clearing session
+    actor_email = None
+    if "user" in st.session_state and st.session_state["user"]:
+        actor_email = st.session_state["user"].get("email") or st.session_state["user"].get("full_name")
+    audit_log("auth", "logout", target=actor_email or "-", details="Logout", actor=actor_email)
+    # Best-effort backup on logout (background; result shown as toast)
+    _request_background_backup("logout")
+    for k in ("user",):
+        if k in st.session_state:
+            del st.session_state[k]
+
+# -------------------------
+# Simple decorators / checks
+# -------------------------
+def require_login():
+    user = get_current_user()
+    if not user:
+        st.warning("Silakan login dulu.")
+        st.stop()
+    return user
+
+def require_role(roles):
+    user = require_login()
+    # Superuser override: can access everything
+    if user.get("role") == "superuser":
+        return user
+    # Normalize roles input (allow string or list)
+    if isinstance(roles, str):
+        roles = [roles]
+    if user["role"] not in roles:
+        st.error(f"Akses ditolak. Diperlukan role: {roles}")
+        st.stop()
+    return user
+
+def has_role(roles) -> bool:
+    """Convenience checker: returns True if current user is superuser or in roles."""
+    u = get_current_user()
+    if not u:
+        return False
+    if u.get("role") == "superuser":
+        return True
+    if isinstance(roles, str):
+        roles = [roles]
+    return u.get("role") in (roles or [])
+
+# -------------------------
+# Role hierarchy helpers
+# -------------------------
+# Order: staff < finance < director < superuser
+ROLE_HIERARCHY = {
+    "staff": 1,
+    "board": 1,
+    "finance": 2,
+    "director": 3,
+    "superuser": 4,
+}
+
+def role_rank(role: Optional[str]) -> int:
+    if not role:
+        return 0
+    return ROLE_HIERARCHY.get(role, 0)
+
+def has_min_role(min_role: str) -> bool:
+    u = get_current_user()
+    if not u:
+        return False
+    # superuser always passes
+    if u.get("role") == "superuser":
+        return True
+    return role_rank(u.get("role")) >= role_rank(min_role)
+
+def require_min_role(min_role: str):
+    u = require_login()
+    if u.get("role") == "superuser":
+        return u
+    if role_rank(u.get("role")) < role_rank(min_role):
+        st.error(f"Akses ditolak. Minimal role: {min_role}")
+        st.stop()
+    return u
+
+# -------------------------
+# UI Components: Authentication
+# -------------------------
+def auth_sidebar():
+    user = get_current_user()
+    if user:
+        # Ambil info user lebih lengkap dari DB
+        conn = get_db()
+        cur = conn.cursor()
+        cur.execute("SELECT email, full_name, role, status, last_login FROM users WHERE id = ?", (user["id"],))
+        u = cur.fetchone()
+        if u:
+            st.sidebar.markdown("""
+                <b>Email:</b> {email}<br>
+                <b>Role:</b> {role}<br>
+                <b>Status:</b> {status}<br>
+                </div>
+            """.format(
+                full_name=u["full_name"],
+                email=u["email"],
+                role=u["role"],
+                status=u["status"],
+            ), unsafe_allow_html=True)
+            # Peringatan penting agar user melakukan logout setelah selesai
+            st.sidebar.warning("saat selesai menggunakan apps harap **logout**, menghindari potensi unsaved data saat apps autosleep")
+        else:
+            st.sidebar.write(f"Logged in: **{user['full_name']}** ({user['role']})")
+            # Peringatan penting agar user melakukan logout setelah selesai
+            st.sidebar.warning("saat selesai menggunakan apps harap **logout**, menghindari potensi unsaved data saat apps autosleep")
+    else:
+        tabs = st.sidebar.tabs(["Login", "Register"])
+        with tabs[0]:
+            st.subheader("Login")
+            with st.form("login_form_sidebar"):
+                email_login = st.text_input("Email", key="login_email")
+                pwd_login = st.text_input("Password", type="password", key="login_pwd")
+                submit_login = st.form_submit_button("Login")
+                if submit_login:
+                    ok, msg = login_user(email_login.strip().lower(), pwd_login)
+                    if ok:
+                        st.success(msg)
+                        st.rerun()
+                    else:
+                        st.error(msg)
+        with tabs[1]:
+            st.subheader("Register")
+            with st.form("register_form_sidebar"):
+                email_reg = st.text_input("Email", key="register_email")
+                name_reg = st.text_input("Nama Lengkap", key="register_name")
+                pwd_reg = st.text_input("Password", type="password", key="register_pwd")
+                submit_reg = st.form_submit_button("Register")
+                if submit_reg:
+                    if not (email_reg and name_reg and pwd_reg):
+                        st.error("Lengkapi semua field.")
+                    else:
+                        ok, msg = register_user(email_reg.strip().lower(), name_reg.strip(), pwd_reg)
+                        if ok:
+                            st.success(msg)
+                        else:
+                            st.error(msg)
+
+
+
+# -------------------------
+# Common helpers for modules
+# -------------------------
+def upload_files_and_store(file_uploader_objs, ref_module: Optional[str] = None) -> List[Tuple]:
+    """Upload several attachments concurrently; returns (blob, name, url) per input, in order.
+    Drive upload per file berjalan paralel; file yang gagal jatuh ke BLOB tanpa memengaruhi yang lain.
+    """
+    results: List[Tuple] = [(None, None, None)] * len(file_uploader_objs)
+    present = [(i, u) for i, u in enumerate(file_uploader_objs) if u is not None]
+    if not present:
+        return results
+    drive_on = _drive_available()
+    fids: List[Optional[str]] = [None] * len(present)
+    if drive_on:
+        try:
+            folder_id = _setting_get('gdrive_folder_id', config.GDRIVE_DEFAULT_FOLDER_ID) or config.GDRIVE_DEFAULT_FOLDER_ID
+            # Streamed from the upload handles; unique Drive names need no name lookup
+            items = [(f"{uuid.uuid4().hex[:8]}_{u.name}", u, getattr(u, "type", None) or "application/octet-stream", ref_module) for _, u in present]
+            fids = drive_upload_many(folder_id, items)
+        except Exception:
+            pass
+    logs = []
+    for (i, u), fid in zip(present, fids):
+        if fid:
+            results[i] = (None, u.name, f"https://drive.google.com/file/d/{fid}/view?usp=drive_link")
+            logs.append((u.name, "drive"))
+        else:
+            u.seek(0)
+            results[i] = (to_blob(u.read()), u.name, None)
+            # Drive failures (after retries) are recorded in drive_errors with the reason
+            logs.append((u.name, "blob_fallback" if drive_on else "blob"))
+    if logs:
+        try:
+            user = get_current_user()
+            conn = get_db()
+            cur = conn.cursor()
+            now = now_wib_iso()
+            for name, action in logs:
+                cur.execute("INSERT INTO file_log (id, modul, file_name, versi, uploaded_by, tanggal_upload, action) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (gen_id("log"), "upload", name, 1, user["full_name"] if user else "-", now, action))
+            conn.commit()
+            conn.close()
+        except Exception:
+            pass
+    return results
+
+def upload_file_and_store(file_uploader_obj, ref_module: Optional[str] = None):
+    # New behavior: upload directly to Google Drive and return URL (fallback to BLOB if Drive unavailable)
+    return upload_files_and_store([file_uploader_obj], ref_module)[0]
+
+# --- Fragment-scoped reruns ---
+# Kartu approval dll. berjalan sebagai st.fragment dengan baris yang sudah dimuat tab-nya:
+# mengetik catatan hanya menjalankan ulang kartunya. Setelah simpan, card_saved() menjalankan
+# ulang halaman sekali agar daftar dan penghitung ikut berubah. Penghitung membaca lewat
+# topic_cached() dan dimuat ulang hanya bila topiknya berubah: invalidate_topic() dari sesi
+# ini, atau tulisan ke tabel bernama sama dari sesi lain (table_version). Tanpa polling.
+
+def invalidate_topic(*topics: str) -> None:
+    versions = st.session_state.setdefault("__topic_versions", {})
+    for t in topics:
+        versions[t] = versions.get(t, 0) + 1
+
+def topic_cached(topic: str, key: str, loader):
+    """loader() result cached in session state until invalidate_topic(topic) or a committed
+    write to the table named `topic` from any session."""
+    ver = (st.session_state.get("__topic_versions", {}).get(topic, 0), table_version(topic))
+    slot = f"__topic_cache_{key}"
+    cached = st.session_state.get(slot)
+    if cached is None or cached[0] != ver:
+        cached = (ver, loader())
+        st.session_state[slot] = cached
+    return cached[1]
+
+def _count_query(sql: str, params: tuple = ()) -> int:
+    conn = get_db()
+    try:
+        return int(conn.execute(sql, params).fetchone()[0] or 0)
+    finally:
+        conn.close()
+
+def pending_counter(topic: str, label: str, sql: str, params: tuple = ()):
+    n = topic_cached(topic, f"count_{topic}_{label}", lambda: _count_query(sql, params))
+    st.caption(f"{label}: **{n}**")
+
+def card_saved(message: str, *topics: str, icon: str = "✅") -> None:
+    """Finish a write made inside a card fragment. A fragment rerun would refresh only that
+    card, so invalidate `topics` and rerun the whole page once: the card list and the
+    pending counters update together. `message` is shown as a toast on that run."""
+    invalidate_topic(*topics)
+    flash_toast(message, icon)
+    st.rerun(scope="app")
+
+def lazy_tabs(labels: List[str], key: str) -> List[bool]:
+    """Tab bar whose bodies run lazily: returns one flag per label, True only for the active tab.
+    Dipakai sebagai `t1, t2 = lazy_tabs([...], key=...)` lalu `if t1: ...`, sehingga rerun hanya
+    menjalankan query & widget tab yang terlihat (st.tabs menjalankan semua isi tab)."""
+    state_key = f"lazytab_{key}"
+    if st.session_state.get(state_key) not in labels:
+        st.session_state[state_key] = labels[0]
+    last = st.session_state[state_key]
+
+    def _keep_selection():
+        # segmented_control can be deselected; stay on the current tab instead
+        if st.session_state.get(state_key) not in labels:
+            st.session_state[state_key] = last
+    st.segmented_control("Tab", labels, key=state_key, on_change=_keep_selection, label_visibility="collapsed")
+    active = st.session_state.get(state_key)
+    return [label == active for label in labels]
+
+def show_file_download(blob_or_url, filename):
+    # If a URL is passed, render a clickable link; else use legacy BLOB download
+    try:
+        if isinstance(blob_or_url, str) and blob_or_url.startswith("http"):
+            label = f"⬇️ Download {filename}" if filename else "⬇️ Download File"
+            st.markdown(f"[{label}]({blob_or_url})")
+            return
+    except Exception:
+        pass
+    data = from_blob(blob_or_url)
+    if data:
+        # Use a deterministic unique key to avoid duplicate element IDs when multiple buttons share the same label
+        try:
+            key_suffix = hashlib.md5(data).hexdigest()[:8]
+        except Exception:
+            key_suffix = str(uuid.uuid4())
+        st.download_button(
+            label=f"⬇️ Download {filename or 'file'}",
+            data=data,
+            file_name=filename or "file",
+            mime="application/octet-stream",
+            key=f"dl_{key_suffix}_{(filename or 'file')}"
+        )
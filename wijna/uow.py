@@ -0,0 +1,146 @@
+"""Unit of work: entity write + audit record + notification outbox in one commit.
+
+Usage:
+    with unit_of_work() as uow:
+        uow.execute("UPDATE cuti SET director_approved=1 WHERE id=?", (cid,))
+        uow.audit("cuti", "director_approval", target=cid, details="approve=1")
+        uow.notify_decision("cuti", title=..., decision="director_approved", entity_id=cid)
+
+Semua statement berjalan di satu koneksi dan satu transaksi (BEGIN IMMEDIATE).
+Notifikasi disimpan ke notification_outbox pada transaksi yang sama dan baru
+dikirim setelah commit; bila proses mati sebelum terkirim, `python -m wijna outbox`
+mengirim ulang baris yang tertunda.
+"""
+import json
+import sqlite3
+from datetime import timedelta
+from typing import Optional, List, Tuple
+
+from wijna import config
+from wijna.db import _AUDIT_INSERT_SQL, _audit_row, _dml_table, _fire_table_write
+from wijna.utils import now_wib, now_wib_iso
+
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_MAX_AGE_HOURS = 24  # older pending rows are skipped rather than sent late
+_OUTBOX_PENDING = "sent_at IS NULL AND skipped_at IS NULL"
+
+
+class UnitOfWork:
+    def __init__(self):
+        self.conn = sqlite3.connect(config.DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self._written_tables = set()
+        self._outbox_ids: List[int] = []
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is not None:
+                self.conn.execute("ROLLBACK")
+                return False
+            self.conn.execute("COMMIT")
+        finally:
+            self.conn.close()
+        _fire_table_write(self._written_tables)
+        if self._outbox_ids:
+            dispatch_outbox(self._outbox_ids)
+        return False
+
+    def execute(self, sql, params=()):
+        cur = self.conn.execute(sql, params)
+        table = _dml_table(sql)
+        if table:
+            self._written_tables.add(table)
+        return cur
+
+    def audit(self, modul: str, action: str, target=None, details=None, actor=None) -> None:
+        self.conn.execute(_AUDIT_INSERT_SQL, _audit_row(modul, action, target=target, details=details, actor=actor))
+
+    def _enqueue(self, fn: str, kwargs: dict) -> None:
+        cur = self.conn.execute(
+            "INSERT INTO notification_outbox (fn, payload, created_at) VALUES (?,?,?)",
+            (fn, json.dumps(kwargs, default=str), now_wib_iso()),
+        )
+        self._outbox_ids.append(cur.lastrowid)
+
+    def notify_review_request(self, entity_type: str, title: str, **kwargs) -> None:
+        self._enqueue("notify_review_request", dict(kwargs, entity_type=entity_type, title=title))
+
+    def notify_decision(self, entity_type: str, title: str, decision: str, **kwargs) -> None:
+        self._enqueue("notify_decision", dict(kwargs, entity_type=entity_type, title=title, decision=decision))
+
+
+def unit_of_work() -> UnitOfWork:
+    return UnitOfWork()
+
+
+def dispatch_outbox(ids: Optional[List[int]] = None, limit: int = 100) -> Tuple[int, int]:
+    """Send pending outbox notifications; returns (processed, failed).
+    Each row is claimed by bumping `attempts` with a compare-and-set so concurrent
+    dispatchers (app + CLI) do not send the same row twice. A row is marked sent only
+    when its handler reports delivery. Rows are marked skipped (not sent later) while
+    email is disabled, and when older than OUTBOX_MAX_AGE_HOURS, so enabling email
+    never flushes a backlog of stale notices.
+    """
+    from wijna.notify import _email_enabled, notify_review_request, notify_decision
+    handlers = {
+        "notify_review_request": notify_review_request,
+        "notify_decision": notify_decision,
+    }
+    processed = failed = 0
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        scope, scope_params = "", ()
+        if ids:
+            scope, scope_params = f" AND id IN ({','.join('?' for _ in ids)})", tuple(ids)
+        now = now_wib_iso()
+        if not _email_enabled():
+            conn.execute(f"UPDATE notification_outbox SET skipped_at=?, last_error=? WHERE {_OUTBOX_PENDING}{scope}",
+                         (now, "Email nonaktif") + scope_params)
+            conn.commit()
+            return 0, 0
+        cutoff = (now_wib() - timedelta(hours=OUTBOX_MAX_AGE_HOURS)).replace(microsecond=0).isoformat()
+        conn.execute(f"UPDATE notification_outbox SET skipped_at=?, last_error=? WHERE {_OUTBOX_PENDING} AND created_at < ?{scope}",
+                     (now, "Kedaluwarsa", cutoff) + scope_params)
+        conn.commit()
+        if ids:
+            rows = conn.execute(
+                f"SELECT id, fn, payload, attempts FROM notification_outbox WHERE {_OUTBOX_PENDING}{scope} ORDER BY id",
+                scope_params,
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                f"SELECT id, fn, payload, attempts FROM notification_outbox WHERE {_OUTBOX_PENDING} AND attempts < ? ORDER BY id LIMIT ?",
+                (OUTBOX_MAX_ATTEMPTS, limit),
+            ).fetchall()
+        for r in rows:
+            claimed = conn.execute(
+                f"UPDATE notification_outbox SET attempts=attempts+1 WHERE id=? AND {_OUTBOX_PENDING} AND attempts=?",
+                (r["id"], r["attempts"]),
+            ).rowcount
+            conn.commit()
+            if not claimed:
+                continue
+            try:
+                delivered = handlers[r["fn"]](**json.loads(r["payload"] or "{}"))
+            except Exception as e:
+                delivered, error = False, str(e)[:500]
+            else:
+                error = "Pengiriman email gagal"
+            if delivered:
+                conn.execute("UPDATE notification_outbox SET sent_at=?, last_error=NULL WHERE id=?", (now_wib_iso(), r["id"]))
+                processed += 1
+            elif delivered is None:
+                # Email switched off mid-run: skipped like every row queued while it is off
+                conn.execute("UPDATE notification_outbox SET skipped_at=?, last_error=? WHERE id=?", (now_wib_iso(), "Email nonaktif", r["id"]))
+            else:
+                conn.execute("UPDATE notification_outbox SET last_error=? WHERE id=?", (error, r["id"]))
+                failed += 1
+            conn.commit()
+    finally:
+        conn.close()
+    return processed, failed
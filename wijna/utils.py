@@ -0,0 +1,60 @@
+"""Small shared helpers: WIB time formatting, blob encoding, id generation."""
+import base64
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+def format_datetime_wib(dtstr):
+    try:
+        dt = datetime.fromisoformat(dtstr)
+        # Assume stored timestamps are already WIB-naive
+        return dt.strftime('%d-%m-%Y %H:%M') + ' WIB'
+    except Exception:
+        return dtstr
+
+# Timezone helpers: WIB (GMT+7)
+def now_wib() -> datetime:
+    """Return current time in WIB (UTC+7) as a naive datetime."""
+    from datetime import timezone
+    utc_now = datetime.now(timezone.utc)
+    return utc_now.replace(tzinfo=None) + timedelta(hours=7)
+
+def now_wib_iso() -> str:
+    """ISO8601 string of WIB time (no microseconds)."""
+    return now_wib().replace(microsecond=0).isoformat()
+
+def format_date_wib(d: Optional[str]) -> str:
+    """Format a date or datetime string to dd-mm-yyyy in WIB.
+    Accepts ISO date (YYYY-MM-DD) or ISO datetime, returns 'dd-mm-yyyy'.
+    """
+    if not d:
+        return ""
+    try:
+        if len(d) >= 10 and d[4] == '-' and d[7] == '-':
+            # Looks like yyyy-mm-dd or yyyy-mm-ddTHH:MM:SS
+            if 'T' in d:
+                dt = datetime.fromisoformat(d.split('Z')[0].replace('Z',''))
+                # Assume stored as WIB-naive
+                return dt.strftime('%d-%m-%Y')
+            else:
+                y, m, dd = d[:4], d[5:7], d[8:10]
+                return f"{dd}-{m}-{y}"
+    except Exception:
+        pass
+    return str(d)
+
+def to_blob(file_bytes: bytes) -> bytes:
+    # store base64 bytes (text) to BLOB, so we keep as bytes
+    return base64.b64encode(file_bytes)
+
+def from_blob(blob: bytes) -> bytes:
+    if blob is None:
+        return None
+    try:
+        return base64.b64decode(blob)
+    except Exception:
+        return blob
+
+def gen_id(prefix="id"):
+    return f"{prefix}_{uuid.uuid4().hex[:12]}"